@@ -10,13 +10,25 @@ knowledge_engine/knowledge_graph.py
 import sys
 import json
 import os
-from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+import heapq
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timezone
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 
+GRAPH_FORMAT_VERSION = 2
+
+
+def _unique(tags: Iterable[str]) -> List[str]:
+    """順序を保って重複タグを除く（自己ループ "a::a" を作らない）"""
+    return list(dict.fromkeys(t for t in (tags or []) if t))
+
+
+def _new_stats() -> Dict:
+    return {"count": 0, "hit": 0, "resolved": 0, "brier_sum": 0.0}
+
 
 class KnowledgeGraph:
     """
@@ -29,16 +41,25 @@ class KnowledgeGraph:
       1. 記事が公開されるたびに update_from_prediction() を呼ぶ
       2. 予測が解決されたら resolve_edge() で精度を更新する
       3. get_cooccurrence() で特定タグの関係性を調べる
+      4. rebuild_from_predictions() で prediction_db 全件から一括再計算する
+
+    内部構造:
+      _predictions: {prediction_id: {"tags", "result", "brier"}} — 各予測の寄与を1回だけ数えるための台帳。
+        同じ prediction_id で再度呼んでも二重計上しない（タグや結果が変わった場合は差分だけ反映）。
+      _adj: {tag: {partner: edge_key}} — 隣接マップ。get_cooccurrence は O(次数)。
     """
 
     DEFAULT_PATH = "data/knowledge_graph.json"
 
     def __init__(self, db_path: str = None):
         self.db_path = db_path or self.DEFAULT_PATH
-        # edges: {(tag_a, tag_b): {"count": N, "hit": M, "brier_sum": X, "predictions": [...]}}
+        # edges: {"tag_a::tag_b": {"tags": [a, b], "count": N, "hit": M, "resolved": R, "brier_sum": X}}
         self._edges: Dict[str, Dict] = {}
-        # node metadata: {tag: {"count": N, "avg_brier": X, "hit_rate": X}}
+        # nodes: {tag: {"count": N, "hit": M, "resolved": R, "brier_sum": X}}
         self._nodes: Dict[str, Dict] = {}
+        self._adj: Dict[str, Dict[str, str]] = {}
+        self._predictions: Dict[str, Dict] = {}
+        self._batch_depth = 0
         self._load()
 
     # ── 更新 ──────────────────────────────────────
@@ -46,61 +67,113 @@ class KnowledgeGraph:
     def update_from_prediction(self, prediction_id: str, tags: List[str]):
         """
         新しい予測からグラフを更新する（共起エッジを追加）
-        """
-        # ノード更新
-        for tag in tags:
-            if tag not in self._nodes:
-                self._nodes[tag] = {"count": 0, "hit": 0, "resolved": 0,
-                                     "brier_sum": 0.0, "predictions": []}
-            self._nodes[tag]["count"] += 1
-            self._nodes[tag]["predictions"].append(prediction_id)
 
-        # エッジ更新（全ペアの共起）
-        for i, tag_a in enumerate(tags):
-            for tag_b in tags[i+1:]:
-                edge_key = self._edge_key(tag_a, tag_b)
-                if edge_key not in self._edges:
-                    self._edges[edge_key] = {
-                        "tags": [tag_a, tag_b],
-                        "count": 0,
-                        "hit": 0,
-                        "resolved": 0,
-                        "brier_sum": 0.0,
-                        "predictions": [],
-                    }
-                self._edges[edge_key]["count"] += 1
-                self._edges[edge_key]["predictions"].append(prediction_id)
-
-        self._save()
+        同じ prediction_id・同じタグでの再呼び出しは何もしない。
+        """
+        if self._register(prediction_id, tags):
+            self._save()
 
     def resolve_edge(self, prediction_id: str, tags: List[str],
                      result: str, brier_score: float):
         """
-        予測解決時にエッジの精度情報を更新する
+        予測解決時にエッジの精度情報を更新する（冪等: 再解決しても二重計上しない）
 
         Args:
             result: "HIT" / "MISS"
             brier_score: 0.0〜1.0
         """
-        is_hit = 1 if result == "HIT" else 0
+        changed = self._register(prediction_id, tags)
+        changed = self._resolve(prediction_id, result, brier_score) or changed
+        if changed:
+            self._save()
 
-        # ノード更新
-        for tag in tags:
-            if tag in self._nodes:
-                self._nodes[tag]["resolved"] += 1
-                self._nodes[tag]["hit"] += is_hit
-                self._nodes[tag]["brier_sum"] += brier_score
+    def rebuild_from_predictions(self, predictions: Iterable[Dict]) -> Dict:
+        """
+        prediction_db の全予測からノード・エッジ統計を1パスで作り直す
 
-        # エッジ更新
+        Args:
+            predictions: prediction_db.json のエントリー（id / tags / result / brier_score）
+        """
+        self._edges, self._nodes, self._adj, self._predictions = {}, {}, {}, {}
+        for pred in predictions:
+            pred_id = pred.get("id") or pred.get("prediction_id")
+            if not pred_id:
+                continue
+            self._register(pred_id, pred.get("tags", []))
+            if pred.get("result") and pred.get("brier_score") is not None:
+                self._resolve(pred_id, pred["result"], pred["brier_score"])
+        self._save()
+        return {"predictions": len(self._predictions), "nodes": len(self._nodes), "edges": len(self._edges)}
+
+    @contextmanager
+    def batch(self):
+        """ブロック内の更新をまとめて1回だけ保存する"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+        self._save()
+
+    def _register(self, prediction_id: str, tags: List[str]) -> bool:
+        tags = _unique(tags)
+        record = self._predictions.get(prediction_id)
+        if record is not None and record["tags"] == tags:
+            return False
+        resolution = None
+        if record is not None:
+            if record["result"] is not None:
+                resolution = (record["result"], record["brier"])
+                self._apply_resolution(record["tags"], record["result"], record["brier"], -1)
+            self._apply_counts(record["tags"], -1)
+        self._apply_counts(tags, +1)
+        self._predictions[prediction_id] = {"tags": tags, "result": None, "brier": None}
+        if resolution:
+            self._resolve(prediction_id, *resolution)
+        return True
+
+    def _resolve(self, prediction_id: str, result: str, brier_score: float) -> bool:
+        record = self._predictions[prediction_id]
+        if record["result"] == result and record["brier"] == brier_score:
+            return False
+        if record["result"] is not None:
+            self._apply_resolution(record["tags"], record["result"], record["brier"], -1)
+        self._apply_resolution(record["tags"], result, brier_score, +1)
+        record["result"], record["brier"] = result, brier_score
+        return True
+
+    def _pairs(self, tags: List[str]):
         for i, tag_a in enumerate(tags):
             for tag_b in tags[i+1:]:
-                edge_key = self._edge_key(tag_a, tag_b)
-                if edge_key in self._edges:
-                    self._edges[edge_key]["resolved"] += 1
-                    self._edges[edge_key]["hit"] += is_hit
-                    self._edges[edge_key]["brier_sum"] += brier_score
+                yield tag_a, tag_b
 
-        self._save()
+    def _apply_counts(self, tags: List[str], sign: int):
+        for tag in tags:
+            node = self._nodes.setdefault(tag, _new_stats())
+            node["count"] += sign
+            if node["count"] <= 0:
+                del self._nodes[tag]
+        for tag_a, tag_b in self._pairs(tags):
+            edge_key = self._edge_key(tag_a, tag_b)
+            edge = self._edges.get(edge_key)
+            if edge is None:
+                edge = self._edges[edge_key] = {"tags": [tag_a, tag_b], **_new_stats()}
+                self._adj.setdefault(tag_a, {})[tag_b] = edge_key
+                self._adj.setdefault(tag_b, {})[tag_a] = edge_key
+            edge["count"] += sign
+            if edge["count"] <= 0:
+                del self._edges[edge_key]
+                self._adj[tag_a].pop(tag_b, None)
+                self._adj[tag_b].pop(tag_a, None)
+
+    def _apply_resolution(self, tags: List[str], result: str, brier_score: float, sign: int):
+        is_hit = 1 if result == "HIT" else 0
+        stats = [self._nodes[tag] for tag in tags]
+        stats += [self._edges[self._edge_key(a, b)] for a, b in self._pairs(tags)]
+        for st in stats:
+            st["resolved"] += sign
+            st["hit"] += sign * is_hit
+            st["brier_sum"] += sign * brier_score
 
     # ── クエリ ──────────────────────────────────────
 
@@ -112,11 +185,8 @@ class KnowledgeGraph:
             [{"tag": "...", "count": N, "hit_rate": X, "avg_brier": X}]
         """
         results = []
-        for edge_key, edge in self._edges.items():
-            tags = edge["tags"]
-            if tag not in tags:
-                continue
-            partner = tags[1] if tags[0] == tag else tags[0]
+        for partner, edge_key in self._adj.get(tag, {}).items():
+            edge = self._edges[edge_key]
             resolved = edge["resolved"]
             hit_rate = round(edge["hit"] / resolved, 3) if resolved > 0 else None
             avg_brier = round(edge["brier_sum"] / resolved, 4) if resolved > 0 else None
@@ -128,8 +198,7 @@ class KnowledgeGraph:
                 "avg_brier": avg_brier,
             })
 
-        results.sort(key=lambda r: r["count"], reverse=True)
-        return results[:limit]
+        return heapq.nlargest(limit, results, key=lambda r: r["count"])
 
     def get_strongest_patterns(self, min_resolved: int = 3, limit: int = 10) -> List[Dict]:
         """
@@ -151,8 +220,7 @@ class KnowledgeGraph:
                 "strength": round(hit_rate * resolved, 2),  # 信頼度×件数
             })
 
-        results.sort(key=lambda r: r["strength"], reverse=True)
-        return results[:limit]
+        return heapq.nlargest(limit, results, key=lambda r: r["strength"])
 
     def get_tag_stats(self, tag: str) -> Optional[Dict]:
         """単一タグの統計"""
@@ -192,17 +260,39 @@ class KnowledgeGraph:
         try:
             with open(self.db_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
-            self._edges = data.get("edges", {})
-            self._nodes = data.get("nodes", {})
         except Exception as e:
             print(f"[WARNING] KnowledgeGraph load error: {e}")
+            return
+        self._edges = data.get("edges", {})
+        self._nodes = data.get("nodes", {})
+        if data.get("version") == GRAPH_FORMAT_VERSION:
+            self._predictions = data.get("predictions", {})
+        else:
+            # 旧形式: ノードごとの predictions リストから台帳を復元（解決結果は不明なので
+            # rebuild_from_predictions() で作り直すまでは未解決扱い）
+            for tag, node in self._nodes.items():
+                for pred_id in node.pop("predictions", []):
+                    record = self._predictions.setdefault(pred_id, {"tags": [], "result": None, "brier": None})
+                    if tag not in record["tags"]:
+                        record["tags"].append(tag)
+            for edge in self._edges.values():
+                edge.pop("predictions", None)
+        for edge_key, edge in self._edges.items():
+            tag_a, tag_b = edge["tags"]
+            self._adj.setdefault(tag_a, {})[tag_b] = edge_key
+            self._adj.setdefault(tag_b, {})[tag_a] = edge_key
 
     def _save(self):
+        if self._batch_depth:
+            return
         os.makedirs(os.path.dirname(self.db_path) if os.path.dirname(self.db_path) else ".", exist_ok=True)
+        tmp_path = self.db_path + ".tmp"
         try:
-            with open(self.db_path, "w", encoding="utf-8") as f:
-                json.dump({"edges": self._edges, "nodes": self._nodes},
-                          f, ensure_ascii=False, indent=2)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": GRAPH_FORMAT_VERSION, "edges": self._edges, "nodes": self._nodes,
+                           "predictions": self._predictions},
+                          f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.db_path)
         except Exception as e:
             print(f"[WARNING] KnowledgeGraph save error: {e}")
 
@@ -4,11 +4,23 @@ knowledge_engine/knowledge_store.py
 
 Unshakeable facts だけを永続化し、
 Wishful facts を拒否するフィルター付きストレージ。
+
+ストレージ: SQLite (WAL)
+  - entries        : 本体（id 主キー + 優先順位 / fact_type インデックス）
+  - entry_tags     : (tag, entry_id) の逆引きインデックス
+  - entries_fts    : FTS5 trigram 全文索引（日本語の部分一致も可、bm25 で順位付け）
+  1件の add / verify は1行の書き込みだけ（旧実装はストア全体の JSON を毎回書き直していた）。
+  mark_used はメモリ上でまとめ、USED_FLUSH_EVERY 件ごと・読み取り前・終了時に一括反映する。
+  旧 knowledge_store.json は初回オープン時に自動で取り込む。
 """
 
 import sys
 import json
 import os
+import atexit
+import sqlite3
+import uuid
+from contextlib import contextmanager
 from typing import Dict, List, Optional
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
@@ -38,6 +50,59 @@ class KnowledgeEntry:
 ACCEPTABLE_FACT_TYPES = {"UNSHAKEABLE", "SURFACE", "REPORTED", "ASSUMED"}
 TRUSTED_FACT_TYPES = {"UNSHAKEABLE"}
 
+USED_FLUSH_EVERY = 100    # mark_used をこの件数ためたら一括 UPDATE
+FTS_MIN_QUERY_LEN = 3     # trigram 索引が使える最短クエリ（それ未満は instr で部分一致）
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id          TEXT PRIMARY KEY,
+    content     TEXT NOT NULL,
+    fact_type   TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    tags        TEXT NOT NULL DEFAULT '[]',
+    confidence  REAL NOT NULL DEFAULT 1.0,
+    created_at  TEXT NOT NULL,
+    used_count  INTEGER NOT NULL DEFAULT 0,
+    verified    INTEGER NOT NULL DEFAULT 0,
+    trusted     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_entries_rank
+    ON entries(trusted DESC, confidence DESC, used_count DESC);
+CREATE INDEX IF NOT EXISTS idx_entries_fact_type
+    ON entries(fact_type, confidence DESC, used_count DESC);
+CREATE TABLE IF NOT EXISTS entry_tags (
+    tag      TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    PRIMARY KEY (tag, entry_id)
+) WITHOUT ROWID;
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    content, content='entries', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_fts_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_au AFTER UPDATE OF content ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+    INSERT INTO entries_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+"""
+
+_COLUMNS = "e.id, e.content, e.fact_type, e.source, e.tags, e.confidence, e.created_at, e.used_count, e.verified"
+
+
+def _entry_from_row(row) -> KnowledgeEntry:
+    return KnowledgeEntry(
+        id=row[0], content=row[1], fact_type=row[2], source=row[3],
+        tags=json.loads(row[4] or "[]"), confidence=row[5], created_at=row[6],
+        used_count=row[7], verified=bool(row[8]),
+    )
+
 
 class KnowledgeStore:
     """
@@ -49,12 +114,30 @@ class KnowledgeStore:
     3. タグ・キーワード・ファクトタイプで検索可能
     """
 
-    DEFAULT_PATH = "data/knowledge_store.json"
+    DEFAULT_PATH = "data/knowledge_store.db"
 
     def __init__(self, db_path: str = None):
-        self.db_path = db_path or self.DEFAULT_PATH
-        self._entries: Dict[str, KnowledgeEntry] = {}
-        self._load()
+        path = db_path or self.DEFAULT_PATH
+        # 旧 API 互換: *.json を渡されたら同名の .db を使い、JSON は移行元にする
+        stem, ext = os.path.splitext(path)
+        self.db_path = stem + ".db" if ext == ".json" else path
+        self.legacy_json_path = stem + ".json"
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self._has_fts = True
+        except sqlite3.OperationalError:
+            self._has_fts = False  # FTS5/trigram 非対応ビルドは instr にフォールバック
+        self._batch_depth = 0
+        self._pending_used: Dict[str, int] = {}
+        if self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0:
+            self._import_legacy_json()
+        atexit.register(self.flush)
 
     # ── 書き込み ──────────────────────────────────────
 
@@ -83,28 +166,61 @@ class KnowledgeStore:
             tags=tags or [],
             confidence=confidence,
         )
-        self._entries[entry_id] = entry
-        self._save()
+        self._insert(entry)
+        self._commit()
         return entry
 
     def verify(self, entry_id: str) -> bool:
         """エントリーを検証済みにマークする"""
-        if entry_id in self._entries:
-            self._entries[entry_id].verified = True
-            self._save()
-            return True
-        return False
+        cur = self._conn.execute("UPDATE entries SET verified = 1 WHERE id = ?", (entry_id,))
+        self._commit()
+        return cur.rowcount > 0
 
     def mark_used(self, entry_id: str):
-        """予測で使用された回数をインクリメント"""
-        if entry_id in self._entries:
-            self._entries[entry_id].used_count += 1
-            self._save()
+        """予測で使用された回数をインクリメント（USED_FLUSH_EVERY 件ごとにまとめて書く）"""
+        self._pending_used[entry_id] = self._pending_used.get(entry_id, 0) + 1
+        if sum(self._pending_used.values()) >= USED_FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """保留中の mark_used を一括反映する"""
+        if not self._pending_used or self._conn is None:
+            return
+        pending, self._pending_used = self._pending_used, {}
+        self._conn.executemany(
+            "UPDATE entries SET used_count = used_count + ? WHERE id = ?",
+            [(n, entry_id) for entry_id, n in pending.items()],
+        )
+        self._commit()
+
+    @contextmanager
+    def batch(self):
+        """ブロック内の書き込みを1トランザクションにまとめる（学習ループの連続 add 用）"""
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.rollback()
+            raise
+        self._batch_depth -= 1
+        self._commit()
+
+    def close(self):
+        if self._conn is None:
+            return
+        self.flush()
+        atexit.unregister(self.flush)
+        self._conn.close()
+        self._conn = None
 
     # ── 読み取り ──────────────────────────────────────
 
     def get(self, entry_id: str) -> Optional[KnowledgeEntry]:
-        return self._entries.get(entry_id)
+        self.flush()
+        row = self._conn.execute(f"SELECT {_COLUMNS} FROM entries e WHERE e.id = ?", (entry_id,)).fetchone()
+        return _entry_from_row(row) if row else None
 
     def search(self, query: str = None, tags: List[str] = None,
                fact_type: str = None, trusted_only: bool = False,
@@ -113,87 +229,114 @@ class KnowledgeStore:
         知識を検索する
 
         Args:
-            query: キーワード検索（コンテンツ部分一致）
+            query: キーワード検索（コンテンツ部分一致、FTS5 bm25 で順位付け）
             tags: 指定タグを持つエントリーのみ
             fact_type: ファクトタイプでフィルター
             trusted_only: True なら UNSHAKEABLE のみ返す
             limit: 最大件数
+
+        並び順は UNSHAKEABLE 優先 → (全文検索なら bm25) → 信頼度 → 使用回数。
+        ORDER BY ... LIMIT は SQLite 側で上位 k 件だけ保持するので、全件ソートしない。
         """
-        results = list(self._entries.values())
+        self.flush()
+        sql = f"SELECT {_COLUMNS} FROM entries e"
+        where: List[str] = []
+        params: List = []
+        order = ["e.trusted DESC"]
 
-        # UNSHAKEABLE優先ソート（信頼度→使用回数降順）
-        results.sort(key=lambda e: (
-            1 if e.fact_type == "UNSHAKEABLE" else 0,
-            e.confidence,
-            e.used_count,
-        ), reverse=True)
+        if query:
+            q = query.lower()
+            if self._has_fts and len(q) >= FTS_MIN_QUERY_LEN:
+                sql += " JOIN entries_fts f ON f.rowid = e.rowid"
+                where.append("entries_fts MATCH ?")
+                params.append('"' + q.replace('"', '""') + '"')
+                order.append("bm25(entries_fts)")
+            else:
+                where.append("instr(lower(e.content), ?) > 0")
+                params.append(q)
 
         if trusted_only:
-            results = [e for e in results if e.fact_type in TRUSTED_FACT_TYPES]
+            where.append(f"e.fact_type IN ({','.join('?' * len(TRUSTED_FACT_TYPES))})")
+            params.extend(sorted(TRUSTED_FACT_TYPES))
 
         if fact_type:
-            results = [e for e in results if e.fact_type == fact_type]
+            where.append("e.fact_type = ?")
+            params.append(fact_type)
 
         if tags:
-            results = [e for e in results
-                       if any(t in e.tags for t in tags)]
-
-        if query:
-            q = query.lower()
-            results = [e for e in results if q in e.content.lower()]
+            where.append(f"e.id IN (SELECT entry_id FROM entry_tags WHERE tag IN ({','.join('?' * len(tags))}))")
+            params.extend(tags)
 
-        return results[:limit]
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        order += ["e.confidence DESC", "e.used_count DESC", "e.rowid"]
+        sql += " ORDER BY " + ", ".join(order) + " LIMIT ?"
+        params.append(limit)
+        return [_entry_from_row(row) for row in self._conn.execute(sql, params)]
 
     def get_by_tags(self, tags: List[str]) -> List[KnowledgeEntry]:
         """タグで知識を取得（UNSHAKEABLE 優先）"""
         return self.search(tags=tags, trusted_only=False)
 
     def stats(self) -> Dict:
-        entries = list(self._entries.values())
-        by_type = {}
-        for e in entries:
-            by_type[e.fact_type] = by_type.get(e.fact_type, 0) + 1
+        self.flush()
+        by_type = dict(self._conn.execute(
+            "SELECT fact_type, COUNT(*) FROM entries GROUP BY fact_type").fetchall())
+        total = sum(by_type.values())
+        verified = self._conn.execute("SELECT COUNT(*) FROM entries WHERE verified = 1").fetchone()[0]
+        most_used = [_entry_from_row(row) for row in self._conn.execute(
+            f"SELECT {_COLUMNS} FROM entries e ORDER BY e.used_count DESC, e.rowid LIMIT 3")]
 
         return {
-            "total_entries": len(entries),
+            "total_entries": total,
             "by_fact_type": by_type,
-            "verified_count": sum(1 for e in entries if e.verified),
+            "verified_count": verified,
             "unshakeable_pct": round(
-                by_type.get("UNSHAKEABLE", 0) / max(len(entries), 1) * 100, 1
+                by_type.get("UNSHAKEABLE", 0) / max(total, 1) * 100, 1
             ),
-            "most_used": sorted(entries, key=lambda e: e.used_count, reverse=True)[:3],
+            "most_used": most_used,
         }
 
     # ── 永続化 ──────────────────────────────────────
 
-    def _load(self):
-        if not os.path.exists(self.db_path):
+    def _insert(self, entry: KnowledgeEntry):
+        self._conn.execute(
+            "INSERT INTO entries (id, content, fact_type, source, tags, confidence,"
+            " created_at, used_count, verified, trusted) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry.id, entry.content, entry.fact_type, entry.source,
+             json.dumps(entry.tags, ensure_ascii=False), entry.confidence, entry.created_at,
+             entry.used_count, int(entry.verified), int(entry.fact_type in TRUSTED_FACT_TYPES)),
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO entry_tags (tag, entry_id) VALUES (?, ?)",
+            [(tag, entry.id) for tag in entry.tags],
+        )
+
+    def _commit(self):
+        if self._batch_depth == 0:
+            self._conn.commit()
+
+    def _import_legacy_json(self):
+        """旧 knowledge_store.json（{id: entry}）を一度だけ取り込む"""
+        if not os.path.exists(self.legacy_json_path):
             return
         try:
-            with open(self.db_path, "r", encoding="utf-8") as f:
+            with open(self.legacy_json_path, "r", encoding="utf-8") as f:
                 raw = json.load(f)
-            for entry_id, data in raw.items():
-                self._entries[entry_id] = KnowledgeEntry(**data)
-        except Exception as e:
-            print(f"[WARNING] KnowledgeStore load error: {e}")
-
-    def _save(self):
-        os.makedirs(os.path.dirname(self.db_path) if os.path.dirname(self.db_path) else ".", exist_ok=True)
-        try:
-            data = {eid: e.to_dict() for eid, e in self._entries.items()}
-            with open(self.db_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with self._conn:
+                for data in raw.values():
+                    self._insert(KnowledgeEntry(**data))
         except Exception as e:
-            print(f"[WARNING] KnowledgeStore save error: {e}")
+            print(f"[WARNING] KnowledgeStore legacy import error: {e}")
 
     def _generate_id(self) -> str:
+        # プロセスごとの連番だと複数 writer が同じ id を作り PRIMARY KEY 衝突するので uuid
         ts = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
-        count = len(self._entries) + 1
-        return f"KE-{ts}-{count:04d}"
+        return f"KE-{ts}-{uuid.uuid4().hex[:12]}"
 
 
 if __name__ == "__main__":
-    store = KnowledgeStore("data/knowledge_store.json")
+    store = KnowledgeStore("data/knowledge_store.db")
 
     # デモ: 知識追加
     e1 = store.add(
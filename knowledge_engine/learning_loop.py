@@ -109,16 +109,18 @@ class LearningLoop:
     def batch_learn(self, predictions: List[Dict]) -> Dict:
         """複数の解決済み予測を一括学習する"""
         results = {"learned": 0, "skipped": 0, "insights": []}
-        for pred in predictions:
-            if not pred.get("resolved", False):
-                results["skipped"] += 1
-                continue
-            r = self.process_resolved_prediction(pred)
-            if r["learned"]:
-                results["learned"] += 1
-                results["insights"].append(r["insight"])
-            else:
-                results["skipped"] += 1
+        # ストアへの add を1トランザクションに、グラフの保存を1回にまとめる
+        with self.store.batch(), self.graph.batch():
+            for pred in predictions:
+                if not pred.get("resolved", False):
+                    results["skipped"] += 1
+                    continue
+                r = self.process_resolved_prediction(pred)
+                if r["learned"]:
+                    results["learned"] += 1
+                    results["insights"].append(r["insight"])
+                else:
+                    results["skipped"] += 1
         return results
 
     # ── 重み調整 ──────────────────────────────────────
@@ -335,18 +335,19 @@ class KnowledgeIngestion:
         try:
             from knowledge_engine.knowledge_store import KnowledgeStore
             ks = KnowledgeStore()
-            for fact in facts:
-                # KnowledgeStore.add() expects fact_type (uppercase) + tags list
-                ft = fact.get("fact_type", "REPORTED").upper()
-                if ft not in {"UNSHAKEABLE", "SURFACE", "REPORTED", "ASSUMED"}:
-                    ft = "REPORTED"
-                ks.add(
-                    content=fact["content"],
-                    fact_type=ft,
-                    source=fact.get("source", source),
-                    tags=[fact.get("topic", "general")],
-                    confidence=fact.get("confidence", 0.7),
-                )
+            with ks.batch():
+                for fact in facts:
+                    # KnowledgeStore.add() expects fact_type (uppercase) + tags list
+                    ft = fact.get("fact_type", "REPORTED").upper()
+                    if ft not in {"UNSHAKEABLE", "SURFACE", "REPORTED", "ASSUMED"}:
+                        ft = "REPORTED"
+                    ks.add(
+                        content=fact["content"],
+                        fact_type=ft,
+                        source=fact.get("source", source),
+                        tags=[fact.get("topic", "general")],
+                        confidence=fact.get("confidence", 0.7),
+                    )
             if self.verbose:
                 print(f"    Stored {len(facts)} facts to KnowledgeStore")
         except Exception as e:
@@ -3,10 +3,11 @@ loops/knowledge_update_loop.py
 知識更新ループ — 解決済み予測からナレッジグラフを更新する
 
 フロー:
+  0. prediction_db.json 全件から KnowledgeGraph を一括再計算
   1. prediction_db.json から「新規解決済み」予測を特定
   2. LearningLoop.process_resolved_prediction() を呼ぶ
   3. 力学タグの重みを dynamics_weights_adjusted.json に保存
-  4. knowledge_store.json を UNSHAKEABLE facts で更新
+  4. knowledge_store.db を UNSHAKEABLE facts で更新
   5. 学習サマリーを Telegram 送信
   6. 週次で generate_weight_report() をコンソール出力
 
@@ -54,6 +55,12 @@ class KnowledgeUpdateLoop:
         """
         resolved = self.tracker.get_resolved_predictions()
 
+        # ナレッジグラフは毎回 prediction_db 全件から作り直す（冪等なので何度実行しても同じ結果）
+        graph_stats = self.learning_loop.graph.rebuild_from_predictions(
+            self.tracker.get_open_predictions() + resolved)
+        print(f"[INFO] グラフ再計算: 予測{graph_stats['predictions']}件 / "
+              f"ノード{graph_stats['nodes']} / エッジ{graph_stats['edges']}")
+
         # 未処理のみフィルタ
         if not force_all:
             to_process = [p for p in resolved if p["id"] not in self._processed_ids]
@@ -4,11 +4,11 @@ AI Civilization OS — 観測可能性レイヤー
 
 モジュール:
   os_logger        — 構造化ログ（run_id / correlation_id / JSON emit）
-  pipeline_metrics — パイプライン各ステージの計測
+  pipeline_metrics — パイプライン各ステージの計測（SQLite + 分位点 + Prometheus exporter）
   health_snapshot  — システム健全性スナップショット
 """
 
 from observability.os_logger import get_logger, OSLogger
-from observability.pipeline_metrics import PipelineMetrics
+from observability.pipeline_metrics import PipelineMetrics, MetricsStore
 
-__all__ = ["get_logger", "OSLogger", "PipelineMetrics"]
+__all__ = ["get_logger", "OSLogger", "PipelineMetrics", "MetricsStore"]
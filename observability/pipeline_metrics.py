@@ -3,7 +3,7 @@ observability/pipeline_metrics.py
 AI Civilization OS — パイプライン計測
 
 各ステージの実行時間・成功率・件数を追跡し、
-daily_metrics.json に蓄積する。
+pipeline_metrics.db (SQLite) に追記する。
 
 使い方:
   from observability.pipeline_metrics import PipelineMetrics
@@ -11,24 +11,269 @@ daily_metrics.json に蓄積する。
   with m.stage("generate_jp"):
       # ... 処理 ...
       m.record(generated=95, failed=5)
-  m.flush()  # daily_metrics.json に書き込み
+  m.flush()  # pipeline_metrics.db に1行追記
+
+  PipelineMetrics.get_stage_percentiles("article_pipeline", "generate_jp", last_days=7)
+  python observability/pipeline_metrics.py --prometheus          # Prometheus text 形式で出力
+  python observability/pipeline_metrics.py --serve 9464          # /metrics を HTTP で公開
+
+ストレージ (MetricsStore):
+  runs         : 1実行 = 1行（サマリー JSON 付き、append-only）
+  stage_hist   : (pipeline, stage, 時間帯, バケット) → 件数。
+                 対数バケット (相対誤差 ~1%) のヒストグラムなので、任意の時間窓の
+                 p50/p95/p99 は窓内のバケットを合算するだけで求まり、履歴の長さに依存しない。
+  stage_hourly : (pipeline, stage, 時間帯) → 件数 / 合計秒 / エラー数（Prometheus の _count/_sum 用）
+  90日より古い行は flush 時にインデックス経由で削除する。旧 daily_metrics.json は初回に取り込む。
 
 Geneenの原則: 「管理者は管理する。プロセスではなく結果を。」
 """
 
 import sys
 import json
+import math
 import os
+import sqlite3
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timezone
 from contextlib import contextmanager
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 
-METRICS_PATH = "data/daily_metrics.json"
+METRICS_DB_PATH = "data/pipeline_metrics.db"
+METRICS_PATH = "data/daily_metrics.json"   # 旧形式（初回のみ取り込み）
 MAX_METRICS_DAYS = 90
+HIST_GAMMA = 1.02            # バケット幅（隣接バケットの比）→ 相対誤差 (γ-1)/(γ+1) ≈ 1%
+HIST_MIN_SEC = 0.001         # これ未満は同じバケットに丸める
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_WINDOW_SEC = 7 * 86400
+PROMETHEUS_PREFIX = "nowpattern_pipeline"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    pipeline    TEXT NOT NULL,
+    ts          REAL NOT NULL,
+    day         TEXT NOT NULL,
+    all_ok      INTEGER NOT NULL,
+    total_sec   REAL NOT NULL,
+    summary     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_pipeline_ts ON runs(pipeline, ts);
+CREATE INDEX IF NOT EXISTS idx_runs_ts ON runs(ts);
+CREATE TABLE IF NOT EXISTS stage_hist (
+    pipeline TEXT NOT NULL,
+    stage    TEXT NOT NULL,
+    hour     INTEGER NOT NULL,
+    bucket   INTEGER NOT NULL,
+    count    INTEGER NOT NULL,
+    PRIMARY KEY (pipeline, stage, hour, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_stage_hist_hour ON stage_hist(hour);
+CREATE TABLE IF NOT EXISTS stage_hourly (
+    pipeline TEXT NOT NULL,
+    stage    TEXT NOT NULL,
+    hour     INTEGER NOT NULL,
+    count    INTEGER NOT NULL,
+    sum_sec  REAL NOT NULL,
+    errors   INTEGER NOT NULL,
+    PRIMARY KEY (pipeline, stage, hour)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_stage_hourly_hour ON stage_hourly(hour);
+"""
+
+_LOG_GAMMA = math.log(HIST_GAMMA)
+
+
+def bucket_of(elapsed_sec: float) -> int:
+    """レイテンシ → 対数バケット番号"""
+    return math.ceil(math.log(max(elapsed_sec, HIST_MIN_SEC)) / _LOG_GAMMA)
+
+
+def bucket_value(bucket: int) -> float:
+    """バケットの代表値（境界の調和中点。真値との相対誤差は (γ-1)/(γ+1) 以内）"""
+    return 2 * HIST_GAMMA ** bucket / (HIST_GAMMA + 1)
+
+
+def _parse_ts(iso: str) -> Optional[float]:
+    try:
+        dt = datetime.fromisoformat(iso.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _quantiles_from_hist(rows: List[Tuple[int, int]], quantiles: Iterable[float]) -> Dict[str, float]:
+    """(bucket, count) 昇順 → {"p95": 秒}。順位は旧実装と同じ int(n * q)（0始まり）"""
+    total = sum(c for _, c in rows)
+    result: Dict[str, float] = {}
+    if not total:
+        return result
+    for q in quantiles:
+        rank = min(int(total * q), total - 1)
+        cumulative = 0
+        for bucket, count in rows:
+            cumulative += count
+            if cumulative > rank:
+                result[f"p{q * 100:g}"] = round(bucket_value(bucket), 3)
+                break
+    return result
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsStore:
+    """パイプライン計測の append-only ストア（SQLite WAL）"""
+
+    def __init__(self, db_path: str = None, legacy_json_path: Optional[str] = None):
+        self.db_path = db_path or METRICS_DB_PATH
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if legacy_json_path and os.path.exists(legacy_json_path):
+            if self._conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None:
+                self.import_daily_json(legacy_json_path)
+
+    def close(self):
+        self._conn.close()
+
+    # ── 書き込み ──────────────────────────────────────────────────────
+
+    def append_run(self, summary: Dict[str, Any], ts: Optional[float] = None):
+        """1実行分を追記し、ステージ別ヒストグラムを更新する（O(ステージ数)）"""
+        with self._conn:
+            self._append(summary, ts)
+            cutoff = (ts or time.time()) - MAX_METRICS_DAYS * 86400
+            self._conn.execute("DELETE FROM runs WHERE ts < ?", (cutoff,))
+            self._conn.execute("DELETE FROM stage_hist WHERE hour < ?", (int(cutoff // 3600),))
+            self._conn.execute("DELETE FROM stage_hourly WHERE hour < ?", (int(cutoff // 3600),))
+
+    def _append(self, summary: Dict[str, Any], ts: Optional[float]):
+        if ts is None:
+            ts = _parse_ts(summary.get("ended_at", "")) or time.time()
+        pipeline = summary["pipeline"]
+        self._conn.execute(
+            "INSERT INTO runs (pipeline, ts, day, all_ok, total_sec, summary) VALUES (?, ?, ?, ?, ?, ?)",
+            (pipeline, ts, datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d"),
+             int(bool(summary.get("all_stages_ok"))), summary.get("total_elapsed_sec", 0.0),
+             json.dumps(summary, ensure_ascii=False, default=str)),
+        )
+        hour = int(ts // 3600)
+        hist, hourly = [], []
+        for stage, info in (summary.get("stages") or {}).items():
+            if "elapsed_sec" not in info:
+                continue
+            elapsed = float(info["elapsed_sec"])
+            hist.append((pipeline, stage, hour, bucket_of(elapsed)))
+            hourly.append((pipeline, stage, hour, elapsed, int(info.get("status") == "error")))
+        self._conn.executemany(
+            "INSERT INTO stage_hist (pipeline, stage, hour, bucket, count) VALUES (?, ?, ?, ?, 1) "
+            "ON CONFLICT(pipeline, stage, hour, bucket) DO UPDATE SET count = count + 1", hist)
+        self._conn.executemany(
+            "INSERT INTO stage_hourly (pipeline, stage, hour, count, sum_sec, errors) VALUES (?, ?, ?, 1, ?, ?) "
+            "ON CONFLICT(pipeline, stage, hour) DO UPDATE SET "
+            "count = count + 1, sum_sec = sum_sec + excluded.sum_sec, errors = errors + excluded.errors",
+            hourly)
+
+    def import_daily_json(self, path: str) -> int:
+        """旧 daily_metrics.json（{day: {pipeline: [summary]}}）を取り込む"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                metrics = json.load(f)
+        except Exception as e:
+            print(f"[WARN] PipelineMetrics legacy import failed: {e}", file=sys.stderr)
+            return 0
+        imported = 0
+        with self._conn:
+            for day, pipelines in sorted(metrics.items()):
+                for runs in pipelines.values():
+                    for summary in runs:
+                        ts = _parse_ts(summary.get("ended_at") or summary.get("started_at") or "")
+                        if ts is None:
+                            ts = _parse_ts(day + "T00:00:00+00:00")
+                        self._append(summary, ts)
+                        imported += 1
+        return imported
+
+    # ── クエリ ────────────────────────────────────────────────────────
+
+    def stage_percentiles(self, pipeline: str, stage: str,
+                          quantiles: Iterable[float] = DEFAULT_QUANTILES,
+                          since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, float]:
+        """[since, until] の時間窓（時間単位）のレイテンシ分位点。データが無ければ {}"""
+        lo = int(since // 3600) if since is not None else -(1 << 62)
+        hi = int(until // 3600) if until is not None else (1 << 62)
+        rows = self._conn.execute(
+            "SELECT bucket, SUM(count) FROM stage_hist WHERE pipeline = ? AND stage = ? "
+            "AND hour BETWEEN ? AND ? GROUP BY bucket ORDER BY bucket",
+            (pipeline, stage, lo, hi)).fetchall()
+        return _quantiles_from_hist(rows, quantiles)
+
+    def latest_run(self, pipeline: str, day: Optional[str] = None) -> Optional[Dict]:
+        sql = "SELECT summary FROM runs WHERE pipeline = ?"
+        params: List[Any] = [pipeline]
+        if day:
+            sql += " AND day = ?"
+            params.append(day)
+        row = self._conn.execute(sql + " ORDER BY ts DESC, id DESC LIMIT 1", params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def prometheus_text(self, window_sec: float = PROMETHEUS_WINDOW_SEC, now: Optional[float] = None) -> str:
+        """Prometheus text exposition format (直近 window_sec の集計)
+
+        古い時間帯は削除されるので値は減りうる。summary/counter ではなく、
+        窓付きの値として別名の gauge で出す。
+        """
+        now = time.time() if now is None else now
+        since = now - window_sec
+        p = PROMETHEUS_PREFIX
+        window = int(window_sec)
+        quantiles = [f"# HELP {p}_stage_window_seconds Stage latency quantiles over the last {window}s (log-bucket histogram).",
+                     f"# TYPE {p}_stage_window_seconds gauge"]
+        spent = [f"# HELP {p}_stage_window_seconds_spent Total stage seconds over the last {window}s.",
+                 f"# TYPE {p}_stage_window_seconds_spent gauge"]
+        counts = [f"# HELP {p}_stage_window_runs Stage runs over the last {window}s.",
+                  f"# TYPE {p}_stage_window_runs gauge"]
+        stages = self._conn.execute(
+            "SELECT pipeline, stage, SUM(count), SUM(sum_sec), SUM(errors) FROM stage_hourly "
+            "WHERE hour >= ? GROUP BY pipeline, stage ORDER BY pipeline, stage",
+            (int(since // 3600),)).fetchall()
+        errors = []
+        for pipeline, stage, count, sum_sec, errs in stages:
+            labels = f'pipeline="{_escape_label(pipeline)}",stage="{_escape_label(stage)}"'
+            for q in DEFAULT_QUANTILES:
+                value = self.stage_percentiles(pipeline, stage, (q,), since=since).get(f"p{q * 100:g}")
+                if value is not None:
+                    quantiles.append(f'{p}_stage_window_seconds{{{labels},quantile="{q:g}"}} {value}')
+            spent.append(f"{p}_stage_window_seconds_spent{{{labels}}} {round(sum_sec, 3)}")
+            counts.append(f"{p}_stage_window_runs{{{labels}}} {count}")
+            errors.append(f"{p}_stage_errors{{{labels}}} {errs}")
+        lines = quantiles + spent + counts
+        lines += [f"# HELP {p}_stage_errors Stage runs that raised, last {window}s.",
+                  f"# TYPE {p}_stage_errors gauge"] + errors
+
+        runs = self._conn.execute(
+            "SELECT pipeline, COUNT(*), SUM(all_ok), MAX(ts) FROM runs WHERE ts >= ? "
+            "GROUP BY pipeline ORDER BY pipeline", (since,)).fetchall()
+        lines += [f"# HELP {p}_runs Pipeline runs in the last {window}s.",
+                  f"# TYPE {p}_runs gauge"]
+        lines += [f'{p}_runs{{pipeline="{_escape_label(name)}"}} {n}' for name, n, _, _ in runs]
+        lines += [f"# HELP {p}_runs_ok Runs where every stage succeeded.",
+                  f"# TYPE {p}_runs_ok gauge"]
+        lines += [f'{p}_runs_ok{{pipeline="{_escape_label(name)}"}} {ok}' for name, _, ok, _ in runs]
+        lines += [f"# HELP {p}_last_run_timestamp_seconds End time of the latest run.",
+                  f"# TYPE {p}_last_run_timestamp_seconds gauge"]
+        lines += [f'{p}_last_run_timestamp_seconds{{pipeline="{_escape_label(name)}"}} {round(last, 3)}'
+                  for name, _, _, last in runs]
+        return "\n".join(lines) + "\n"
 
 
 class PipelineMetrics:
@@ -37,11 +282,12 @@ class PipelineMetrics:
 
     - ステージ単位でレイテンシを計測
     - 成功/失敗カウンターを管理
-    - daily_metrics.json に日次集計を保存
+    - pipeline_metrics.db に1実行1行で追記（ステージ別ヒストグラムも更新）
     """
 
-    def __init__(self, pipeline_name: str):
+    def __init__(self, pipeline_name: str, db_path: Optional[str] = None):
         self.pipeline_name = pipeline_name
+        self.db_path = db_path
         self.started_at = datetime.now(timezone.utc).isoformat()
         self._stages: Dict[str, Dict[str, Any]] = {}
         self._current_stage: Optional[str] = None
@@ -101,37 +347,14 @@ class PipelineMetrics:
         }
 
     def flush(self) -> Dict[str, Any]:
-        """サマリーを daily_metrics.json に追記する"""
+        """サマリーを pipeline_metrics.db に追記する（履歴の長さに関係なく O(ステージ数)）"""
         summary = self.summary()
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-
-        metrics = {}
-        if os.path.exists(METRICS_PATH):
-            try:
-                with open(METRICS_PATH, encoding="utf-8") as f:
-                    metrics = json.load(f)
-            except Exception:
-                metrics = {}
-
-        if today not in metrics:
-            metrics[today] = {}
-
-        pipeline_key = self.pipeline_name
-        if pipeline_key not in metrics[today]:
-            metrics[today][pipeline_key] = []
-
-        metrics[today][pipeline_key].append(summary)
-
-        # 90日ローテーション
-        if len(metrics) > MAX_METRICS_DAYS:
-            oldest_keys = sorted(metrics.keys())[:-MAX_METRICS_DAYS]
-            for k in oldest_keys:
-                del metrics[k]
-
-        os.makedirs("data", exist_ok=True)
         try:
-            with open(METRICS_PATH, "w", encoding="utf-8") as f:
-                json.dump(metrics, f, ensure_ascii=False, indent=2)
+            store = _open_store(self.db_path)
+            try:
+                store.append_run(summary)
+            finally:
+                store.close()
         except Exception as e:
             print(f"[WARN] PipelineMetrics flush failed: {e}", file=sys.stderr)
 
@@ -140,37 +363,107 @@ class PipelineMetrics:
     # ── クイックアクセス ───────────────────────────────────────────────
 
     @staticmethod
-    def get_today_summary(pipeline_name: str) -> Optional[Dict]:
+    def get_today_summary(pipeline_name: str, db_path: Optional[str] = None) -> Optional[Dict]:
         """今日の最新メトリクスを返す"""
         today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        if not os.path.exists(METRICS_PATH):
-            return None
         try:
-            with open(METRICS_PATH, encoding="utf-8") as f:
-                m = json.load(f)
-            runs = m.get(today, {}).get(pipeline_name, [])
-            return runs[-1] if runs else None
+            store = _open_store(db_path)
+            try:
+                return store.latest_run(pipeline_name, day=today)
+            finally:
+                store.close()
         except Exception:
             return None
 
     @staticmethod
-    def get_stage_p95(pipeline_name: str, stage_name: str, last_days: int = 7) -> Optional[float]:
-        """指定ステージの過去 N日 p95 レイテンシを返す（秒）"""
-        if not os.path.exists(METRICS_PATH):
-            return None
+    def get_stage_percentiles(pipeline_name: str, stage_name: str, last_days: int = 7,
+                              quantiles: Iterable[float] = DEFAULT_QUANTILES,
+                              db_path: Optional[str] = None) -> Dict[str, float]:
+        """指定ステージの過去 N日の p50/p95/p99 レイテンシ（秒）"""
         try:
-            with open(METRICS_PATH, encoding="utf-8") as f:
-                m = json.load(f)
-            elapsed_list = []
-            for day_data in m.values():
-                for run in day_data.get(pipeline_name, []):
-                    s = run.get("stages", {}).get(stage_name, {})
-                    if "elapsed_sec" in s:
-                        elapsed_list.append(s["elapsed_sec"])
-            if not elapsed_list:
-                return None
-            elapsed_list.sort()
-            idx = int(len(elapsed_list) * 0.95)
-            return elapsed_list[min(idx, len(elapsed_list) - 1)]
+            store = _open_store(db_path)
+            try:
+                return store.stage_percentiles(pipeline_name, stage_name, quantiles,
+                                               since=time.time() - last_days * 86400)
+            finally:
+                store.close()
         except Exception:
-            return None
+            return {}
+
+    @staticmethod
+    def get_stage_p95(pipeline_name: str, stage_name: str, last_days: int = 7,
+                      db_path: Optional[str] = None) -> Optional[float]:
+        """指定ステージの過去 N日 p95 レイテンシを返す（秒）"""
+        return PipelineMetrics.get_stage_percentiles(
+            pipeline_name, stage_name, last_days, (0.95,), db_path=db_path).get("p95")
+
+
+def _open_store(db_path: Optional[str] = None) -> MetricsStore:
+    # 既定パスのときだけ旧 daily_metrics.json を取り込む
+    return MetricsStore(db_path, legacy_json_path=None if db_path else METRICS_PATH)
+
+
+def serve_metrics(port: int, db_path: Optional[str] = None, window_sec: float = PROMETHEUS_WINDOW_SEC):
+    """/metrics を返すだけの HTTP サーバー（Prometheus のスクレイプ先）"""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            store = _open_store(db_path)
+            try:
+                body = store.prometheus_text(window_sec).encode("utf-8")
+            finally:
+                store.close()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    HTTPServer(("0.0.0.0", port), Handler).serve_forever()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline metrics: percentiles / Prometheus exporter")
+    parser.add_argument("--db", default=None, help=f"メトリクス DB（既定: {METRICS_DB_PATH}）")
+    parser.add_argument("--pipeline", help="分位点を表示するパイプライン")
+    parser.add_argument("--stage", help="分位点を表示するステージ")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--prometheus", action="store_true", help="Prometheus text 形式で標準出力へ")
+    parser.add_argument("--textfile", help="node-exporter textfile collector 用 .prom ファイルへ書き出す")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="/metrics を HTTP で公開")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_metrics(args.serve, args.db)
+        return
+    store = _open_store(args.db)
+    try:
+        if args.prometheus or args.textfile:
+            text = store.prometheus_text()
+            if args.textfile:
+                tmp_path = args.textfile + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, args.textfile)
+            else:
+                sys.stdout.write(text)
+        elif args.pipeline and args.stage:
+            pct = store.stage_percentiles(args.pipeline, args.stage, since=time.time() - args.days * 86400)
+            print(json.dumps({"pipeline": args.pipeline, "stage": args.stage, "days": args.days, **pct}))
+        else:
+            parser.print_help()
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""Nowpattern article index: in-memory lookups + append-only persistence.
+
+nowpattern_publisher used to keep the index as one JSON dict, re-read and
+re-written in full (indent=2) on every publish. find_related_articles()
+scanned `articles` once per id per dynamics tag, and the sitemap re-sorted
+every article on each call. At ~200 articles a day the index reaches tens of
+thousands of entries within months.
+
+ArticleIndex keeps:
+- id -> article (first entry wins, like the old linear scan)
+- tag posting lists (`dynamics_index` / `genre_index`, ids in publish order;
+  only tags that already have a list are posted, as before)
+- a published_at-ordered list, so "newest N" / "since T" queries walk only
+  the entries they return
+- a write-sequence list: save() stamps every new or revised record with
+  `seq` (one counter shared by all writers, assigned under the lock), so
+  written_since(seq) returns what changed since a reader last looked, whatever
+  its published_at. Re-adding an article with the same id + published_at but
+  different fields (URL / slug edits) is a revision: it replaces the record
+  and gets a new seq.
+
+Persistence:
+- `<index>.json` stays in the legacy layout ({"meta", "articles",
+  "dynamics_index", "genre_index"}) so existing readers keep working. It is now
+  a snapshot, rewritten compactly and atomically only on compaction.
+- New articles are appended to `<index>.journal.jsonl`, one line per article.
+  Loading replays the journal on top of the snapshot. Entries already in the
+  snapshot (same id + published_at, same or older seq) are skipped, so a crash
+  between snapshot and truncate is harmless.
+- save() folds the journal into the snapshot after COMPACT_EVERY journal
+  lines, or when the snapshot is older than COMPACT_MAX_AGE_SEC. save() only
+  runs on a publish, so the last articles of a quiet period would stay
+  journal-only; the `--compact-if-due` cron job (every 15 min, deploy_all.sh)
+  applies the same rule in between. Readers that skip the journal therefore
+  lag by at most COMPACT_MAX_AGE_SEC plus the cron interval.
+
+Usage:
+  python3 article_index.py /opt/shared/nowpattern_article_index.json            # stats
+  python3 article_index.py /opt/shared/nowpattern_article_index.json --compact  # fold journal
+  python3 article_index.py /opt/shared/nowpattern_article_index.json --compact-if-due  # cron
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+from file_lock import FileLock
+
+COMPACT_EVERY = 200  # ≒ 1日分の公開数
+COMPACT_MAX_AGE_SEC = 3600  # journal があればスナップショットは最長1時間で更新
+
+
+def journal_path_for(index_path: str) -> str:
+    base = index_path[:-5] if index_path.endswith(".json") else index_path
+    return base + ".journal.jsonl"
+
+
+class ArticleIndex:
+    """The article index with O(1) id lookup and per-tag posting lists."""
+
+    def __init__(self, path: Optional[str] = None, dynamics_tags: Iterable[str] = (),
+                 genre_tags: Iterable[str] = ()):
+        self.path = path
+        self.meta = {
+            "version": "1.0",
+            "last_updated": "",
+            "total_articles": 0,
+            "total_deep_patterns": 0,
+            "total_speed_logs": 0,
+        }
+        self.articles: list[dict] = []
+        self.by_id: dict[str, dict] = {}
+        self.dynamics_index: dict[str, list[str]] = {tag: [] for tag in dynamics_tags}
+        self.genre_index: dict[str, list[str]] = {tag: [] for tag in genre_tags}
+        self._posted: dict[str, set] = {}           # tag 種別ごとの (tag, id) 重複防止
+        self._by_time: list[tuple[str, int]] = []   # (published_at, articles 内の位置) 昇順
+        self._pos: dict[tuple[str, str], int] = {}  # (id, published_at) -> articles 内の位置（重複除去・改訂）
+        self._by_seq: list[tuple[int, int]] = []    # (seq, articles 内の位置) 昇順。改訂前の古い seq も残る
+        self.write_seq = 0                          # 読み込んだ中で最大の seq
+        self._pending: list[dict] = []
+        self._journal_lines = 0
+        self._snapshot_mtime: Optional[float] = None
+
+    # -- building -------------------------------------------------------------
+
+    def _post(self, kind: str, index: dict, tags: Iterable[str], article_id: str):
+        seen = self._posted.setdefault(kind, set())
+        for tag in tags:
+            if tag not in index or (tag, article_id) in seen:
+                continue  # 既知タグのみ（publisher の旧挙動と同じ）
+            seen.add((tag, article_id))
+            index[tag].append(article_id)
+
+    def _track_seq(self, article: dict, pos: int):
+        seq = article.get("seq")
+        if not isinstance(seq, int):
+            return  # 未保存（seq は save() で振る）/ seq 導入前の記録
+        entry = (seq, pos)
+        if not self._by_seq or entry >= self._by_seq[-1]:
+            self._by_seq.append(entry)
+        else:
+            bisect.insort(self._by_seq, entry)
+        self.write_seq = max(self.write_seq, seq)
+
+    def _revise(self, pos: int, article: dict) -> bool:
+        old = self.articles[pos]
+        if "seq" in article and article["seq"] <= old.get("seq", 0):
+            return False  # 同じ記録（またはそれより古い版）の再生
+        if {k: v for k, v in old.items() if k != "seq"} == {k: v for k, v in article.items() if k != "seq"}:
+            return False
+        self.articles[pos] = article
+        if self.by_id.get(article.get("id", "")) is old:
+            self.by_id[article.get("id", "")] = article
+        self._post("dynamics", self.dynamics_index, article.get("dynamics_tags") or [], article.get("id", ""))
+        self._post("genre", self.genre_index, article.get("genre_tags") or [], article.get("id", ""))
+        self._track_seq(article, pos)
+        return True
+
+    def _insert(self, article: dict) -> bool:
+        key = (article.get("id", ""), article.get("published_at", ""))
+        if key in self._pos:
+            return self._revise(self._pos[key], article)
+        pos = len(self.articles)
+        self._pos[key] = pos
+        self.articles.append(article)
+        self.by_id.setdefault(article.get("id", ""), article)
+        self._post("dynamics", self.dynamics_index, article.get("dynamics_tags") or [], key[0])
+        self._post("genre", self.genre_index, article.get("genre_tags") or [], key[0])
+        self._track_seq(article, pos)
+        entry = (key[1], pos)
+        if not self._by_time or entry >= self._by_time[-1]:
+            self._by_time.append(entry)  # 通常は最新記事なので末尾追加
+        else:
+            bisect.insort(self._by_time, entry)
+        mode = article.get("mode")
+        self.meta["total_articles"] = len(self.articles)
+        if mode == "deep_pattern":
+            self.meta["total_deep_patterns"] = self.meta.get("total_deep_patterns", 0) + 1
+        elif mode == "speed_log":
+            self.meta["total_speed_logs"] = self.meta.get("total_speed_logs", 0) + 1
+        return True
+
+    def add(self, article: dict) -> dict:
+        """Add (or revise) an article; it is persisted and stamped by the next save()."""
+        article.pop("seq", None)  # seq は save() が振る（既存記録のコピーを編集した場合も）
+        if self._insert(article):
+            self._pending.append(article)
+        return article
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def get(self, article_id: str) -> Optional[dict]:
+        return self.by_id.get(article_id)
+
+    # -- queries ----------------------------------------------------------------
+
+    def related(self, dynamics_tags: Iterable[str], exclude_id: str = "") -> list[dict]:
+        """Articles sharing any of the dynamics tags, in tag order then publish order."""
+        related = []
+        seen_ids = set()
+        for tag in dynamics_tags:
+            for article_id in self.dynamics_index.get(tag, []):
+                if article_id != exclude_id and article_id not in seen_ids:
+                    seen_ids.add(article_id)
+                    article = self.by_id.get(article_id)
+                    if article is not None:
+                        related.append(article)
+        return related
+
+    def newest(self, limit: Optional[int] = None) -> Iterator[dict]:
+        """Articles newest first (by published_at string), stopping after `limit`."""
+        for n, (_, pos) in enumerate(reversed(self._by_time)):
+            if limit is not None and n >= limit:
+                return
+            yield self.articles[pos]
+
+    def published_between(self, start: str, end: str) -> Iterator[dict]:
+        """Articles with start <= published_at < end (string order), oldest first.
+
+        Bounds may be prefixes, e.g. ("2026-03", "2026-04") for one month.
+        """
+        lo = bisect.bisect_left(self._by_time, (start,))
+        hi = bisect.bisect_left(self._by_time, (end,))
+        for _, pos in self._by_time[lo:hi]:
+            yield self.articles[pos]
+
+    def written_since(self, seq: int) -> Iterator[dict]:
+        """Records written after `seq` (oldest write first), then unsaved ones."""
+        for article_seq, pos in self._by_seq[bisect.bisect_left(self._by_seq, (seq + 1,)):]:
+            article = self.articles[pos]
+            if article.get("seq") == article_seq:  # 後から改訂された版は改訂側で返す
+                yield article
+        yield from self._pending
+
+    def published_since(self, cutoff: datetime) -> Iterator[tuple[dict, datetime]]:
+        """(article, published_at) newest first while published_at >= cutoff.
+
+        Entries whose published_at does not parse are skipped.
+        """
+        for article in self.newest():
+            try:
+                dt = datetime.fromisoformat(article.get("published_at", "").replace("Z", "+00:00"))
+            except (ValueError, AttributeError):
+                continue
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            if dt < cutoff:
+                return
+            yield article, dt
+
+    # -- persistence ------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "meta": dict(self.meta),
+            "articles": self.articles,
+            "dynamics_index": self.dynamics_index,
+            "genre_index": self.genre_index,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, path: Optional[str] = None) -> "ArticleIndex":
+        index = cls(path, dynamics_tags=(data.get("dynamics_index") or {}).keys(),
+                    genre_tags=(data.get("genre_index") or {}).keys())
+        index.meta.update(data.get("meta") or {})
+        index.meta["total_deep_patterns"] = 0
+        index.meta["total_speed_logs"] = 0
+        for article in data.get("articles") or []:
+            index._insert(article)
+        return index
+
+    def _replay_journal(self) -> int:
+        journal = journal_path_for(self.path)
+        lines = 0
+        if not os.path.exists(journal):
+            return 0
+        with open(journal, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                lines += 1
+                try:
+                    self._insert(json.loads(line))
+                except ValueError:
+                    continue  # 書き込み途中でクラッシュした末尾行
+        return lines
+
+    @classmethod
+    def load(cls, path: str, dynamics_tags: Iterable[str] = (), genre_tags: Iterable[str] = ()) -> "ArticleIndex":
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                index = cls.from_dict(json.load(f), path)
+        else:
+            index = cls(path, dynamics_tags, genre_tags)
+        index._snapshot_mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        index._journal_lines = index._replay_journal()
+        return index
+
+    def _catch_up_locked(self):
+        """Pull in what other writers saved since load (their compaction, then the journal)."""
+        if os.path.exists(self.path) and os.path.getmtime(self.path) != self._snapshot_mtime:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for article in data.get("articles") or []:
+                self._insert(article)
+            self._snapshot_mtime = os.path.getmtime(self.path)
+        self._journal_lines = self._replay_journal()
+
+    def _stamp_pending(self) -> list[dict]:
+        """Give unsaved records the next seqs; call after _catch_up_locked()."""
+        pending, self._pending = self._pending, []
+        for article in pending:
+            self.write_seq += 1
+            article["seq"] = self.write_seq
+            pos = self._pos[(article.get("id", ""), article.get("published_at", ""))]
+            old = self.articles[pos]
+            if old is not article:  # 取り込み中に他プロセスの版で置き換わった: こちらが新しい
+                self.articles[pos] = article
+                if self.by_id.get(article.get("id", "")) is old:
+                    self.by_id[article.get("id", "")] = article
+            self._track_seq(article, pos)
+        return pending
+
+    def save(self, path: Optional[str] = None):
+        """Append new articles to the journal; compact once it is long or the snapshot is old."""
+        if path and path != self.path:
+            self.path = path
+            self.compact()
+            return
+        self.meta["last_updated"] = datetime.now(timezone.utc).isoformat()
+        with FileLock(self.path):
+            if self._pending:
+                self._catch_up_locked()
+                pending = self._stamp_pending()
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                data = "".join(json.dumps(a, ensure_ascii=False, separators=(",", ":")) + "\n"
+                               for a in pending)
+                with open(journal_path_for(self.path), "a", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_lines += len(pending)
+            if self._needs_compaction():
+                self._compact_locked()
+
+    def _needs_compaction(self) -> bool:
+        if not os.path.exists(self.path):
+            return True
+        if self._journal_lines >= COMPACT_EVERY:
+            return True
+        return self._journal_lines > 0 and time.time() - os.path.getmtime(self.path) >= COMPACT_MAX_AGE_SEC
+
+    def compact_if_due(self) -> bool:
+        """Fold the journal if save() would (periodic job between publishes). True if it did."""
+        with FileLock(self.path):
+            self._catch_up_locked()
+            if not self._journal_lines or not self._needs_compaction():
+                return False
+            self.meta["last_updated"] = datetime.now(timezone.utc).isoformat()
+            self._compact_locked()
+            return True
+
+    def compact(self):
+        """Fold the journal (including other writers' lines) into the snapshot."""
+        self.meta["last_updated"] = datetime.now(timezone.utc).isoformat()
+        with FileLock(self.path):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        self._catch_up_locked()
+        self._stamp_pending()  # 未保存分もスナップショットに含まれる
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._snapshot_mtime = os.path.getmtime(self.path)
+        journal = journal_path_for(self.path)
+        if os.path.exists(journal):
+            os.remove(journal)
+        self._journal_lines = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nowpattern article index stats / compaction")
+    parser.add_argument("path")
+    parser.add_argument("--compact", action="store_true", help="journal をスナップショットに畳み込む")
+    parser.add_argument("--compact-if-due", action="store_true",
+                        help="save() と同じ条件（件数・スナップショットの古さ）のときだけ畳み込む（cron 用）")
+    args = parser.parse_args()
+
+    index = ArticleIndex.load(args.path)
+    if args.compact_if_due:
+        print("compacted" if index.compact_if_due() else "up to date")
+        return
+    print(f"articles={len(index)} unique_ids={len(index.by_id)} journal_lines={index._journal_lines} write_seq={index.write_seq}")
+    print(f"dynamics_tags={len(index.dynamics_index)} genre_tags={len(index.genre_index)}")
+    for article in index.newest(5):
+        print(f"  {article.get('published_at', '')[:19]}  {article.get('id', '')}  {article.get('title_ja', '')[:50]}")
+    if args.compact:
+        index.compact()
+        print("compacted")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ Flash記事を自動生成 → Ghost公開 → X引用リポストを行う。
 
 実行: cron */5 * * * *
 ログ: /opt/shared/scripts/breaking-news.log
-状態: /opt/shared/state/breaking_seen.json (24h保持)
+状態: /opt/shared/state/breaking_seen.json (24h保持, ハッシュ化URLの1時間バケット)
 """
 
 import json
@@ -25,11 +25,13 @@ import base64
 import re
 import urllib.request
 import urllib.parse
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from pathlib import Path
 from email.utils import parsedate_to_datetime
 
 from article_factcheck_postprocess import fact_check_and_revise_generated_article
+from feed_ingest import FeedIngest
+from seen_set import RollingSeenSet
 from mission_contract import assert_mission_handshake
 from release_governor import evaluate_governed_release
 from article_truth_guard import evaluate_article_truth
@@ -45,6 +47,7 @@ MISSION_HANDSHAKE = assert_mission_handshake(
 SCRIPTS_DIR = Path("/opt/shared/scripts")
 STATE_DIR = Path("/opt/shared/state")
 STATE_FILE = STATE_DIR / "breaking_seen.json"
+FEED_CURSOR_FILE = STATE_DIR / "breaking_feed_cursor.json"
 LOG_FILE = SCRIPTS_DIR / "breaking-news.log"
 
 GHOST_URL = "https://nowpattern.com"
@@ -137,74 +140,32 @@ def load_env() -> dict:
 # State (deduplication)
 # ---------------------------------------------------------------------------
 
-def load_seen() -> dict:
+def load_seen() -> RollingSeenSet:
+    """処理済み URL（ハッシュ化・1時間バケット）。旧 {url: iso} 形式もそのまま読める"""
     STATE_DIR.mkdir(parents=True, exist_ok=True)
-    if STATE_FILE.exists():
-        try:
-            return json.loads(STATE_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            pass
-    return {}
+    return RollingSeenSet.load(str(STATE_FILE), window_sec=SEEN_EXPIRY_HOURS * 3600)
 
 
-def save_seen(seen: dict):
-    # Expire entries older than SEEN_EXPIRY_HOURS
-    cutoff = (datetime.utcnow() - timedelta(hours=SEEN_EXPIRY_HOURS)).isoformat()
-    seen = {k: v for k, v in seen.items() if v > cutoff}
-    STATE_FILE.write_text(json.dumps(seen, ensure_ascii=False, indent=2), encoding="utf-8")
+def save_seen(seen: RollingSeenSet):
+    # 期限切れバケットを落としてからアトミックに書き出す
+    seen.save(str(STATE_FILE))
 
 
-def mark_seen(seen: dict, url: str):
-    seen[url] = datetime.utcnow().isoformat()
+def mark_seen(seen: RollingSeenSet, url: str):
+    seen.add(url)
 
 
 # ---------------------------------------------------------------------------
-# RSS Fetch
+# RSS Fetch (feed_ingest: 条件付き取得 + ストリーミング解析 + フィード別カーソル)
 # ---------------------------------------------------------------------------
 
-def fetch_rss(feed_url: str, timeout: int = 15) -> list[dict]:
-    """RSSを取得してアイテムリストを返す"""
-    try:
-        req = urllib.request.Request(
-            feed_url,
-            headers={"User-Agent": "Mozilla/5.0 Nowpattern-Bot/1.0"}
-        )
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            content = resp.read().decode("utf-8", errors="replace")
-    except Exception as e:
-        log(f"  RSS fetch failed {feed_url}: {e}")
-        return []
-
-    items = []
-    # Simple regex-based RSS/Atom parser (avoids lxml dependency)
-    item_blocks = re.findall(r"<item>(.*?)</item>", content, re.DOTALL)
-    if not item_blocks:
-        item_blocks = re.findall(r"<entry>(.*?)</entry>", content, re.DOTALL)
-
-    for block in item_blocks:
-        title = _extract_tag(block, "title")
-        link = _extract_tag(block, "link") or _extract_attr(block, "link", "href")
-        pub_date = _extract_tag(block, "pubDate") or _extract_tag(block, "published") or _extract_tag(block, "updated")
-        description = _extract_tag(block, "description") or _extract_tag(block, "summary") or ""
-        description = re.sub(r"<[^>]+>", "", description)[:500]
-        if title and link:
-            items.append({
-                "title": title.strip(),
-                "link": link.strip(),
-                "pub_date": pub_date.strip() if pub_date else "",
-                "description": description.strip(),
-            })
-    return items
-
-
-def _extract_tag(text: str, tag: str) -> str:
-    m = re.search(rf"<{tag}[^>]*>\s*(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?\s*</{tag}>", text, re.DOTALL)
-    return m.group(1).strip() if m else ""
-
-
-def _extract_attr(text: str, tag: str, attr: str) -> str:
-    m = re.search(rf'<{tag}[^>]*\s{attr}="([^"]+)"', text)
-    return m.group(1) if m else ""
+def poll_feeds(ingest: FeedIngest) -> dict:
+    """全フィードを並列取得し、前回以降の新着アイテムだけを {feed_url: [item]} で返す"""
+    polled = ingest.poll(feed["url"] for feed in RSS_FEEDS)
+    stats = ingest.stats
+    log(f"  RSS: {stats['feeds']} feeds / 304 {stats['not_modified']} / "
+        f"parsed {stats['parsed']} / new {stats['new']} / errors {stats['errors']}")
+    return polled
 
 
 def is_fresh(pub_date_str: str) -> bool:
@@ -730,12 +691,13 @@ def main():
     processed = 0
     candidates = []
 
-    # Step 1: Collect fresh high-score articles
+    # Step 1: Collect fresh high-score articles (new items only)
+    ingest = FeedIngest(str(FEED_CURSOR_FILE), log=log)
+    polled = poll_feeds(ingest)
     for feed in RSS_FEEDS:
-        if processed >= MAX_PER_RUN:
-            break
-        items = fetch_rss(feed["url"])
-        for item in items:
+        for item in polled.get(feed["url"], []):
+            if not item["title"] or not item["link"]:
+                continue
             url = item["link"]
             if url in seen:
                 continue
@@ -751,7 +713,11 @@ def main():
 
     # Sort by score desc, take top MAX_PER_RUN
     candidates.sort(key=lambda x: x["score"], reverse=True)
+    # 今回処理しない候補はカーソルから外し、次回も新着として再評価させる
+    for leftover in candidates[MAX_PER_RUN:]:
+        ingest.forget(leftover["url"], [leftover["guid"]])
     candidates = candidates[:MAX_PER_RUN]
+    ingest.save()
 
     if not candidates:
         log("No fresh high-score articles found. Exit.")
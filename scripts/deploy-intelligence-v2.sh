@@ -10,9 +10,13 @@ REMOTE_SCRIPT="/opt/shared/scripts/intelligence-feed-v2.py"
 
 echo "=== Hey Loop v2.0 VPS配置 ==="
 
-# 1. スクリプトをVPSにコピー
+# 1. スクリプトをVPSにコピー（import する feed_collector / feed_ingest / seen_set も同じディレクトリへ）
 echo "→ スクリプトをVPSにコピー中..."
 scp "${SCRIPT_DIR}/intelligence-feed-v2.py" "${VPS}:${REMOTE_SCRIPT}"
+for module in feed_collector.py feed_ingest.py seen_set.py; do
+    scp "${SCRIPT_DIR}/${module}" "${VPS}:$(dirname "${REMOTE_SCRIPT}")/${module}"
+    echo "  ✅ $(dirname "${REMOTE_SCRIPT}")/${module}"
+done
 ssh "${VPS}" "chmod +x ${REMOTE_SCRIPT}"
 echo "  ✅ ${REMOTE_SCRIPT}"
 
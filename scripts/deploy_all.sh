@@ -65,6 +65,27 @@ SCRIPTS=(
     "distribution_check.py"
     "article_validator.py"
     "market_history_crawler.py"
+    "market_candidate_index.py"
+    # ↑ のスクリプトが import する共有モジュール（欠けると VPS 上で ImportError）
+    "agent_bootstrap_context.py"
+    "article_factcheck_postprocess.py"
+    "article_index.py"
+    "article_release_guard.py"
+    "article_truth_guard.py"
+    "canonical_public_lexicon.py"
+    "change_freeze_guard.py"
+    "content_release_scope.py"
+    "credibility_budget_guard.py"
+    "file_lock.py"
+    "link_verifier.py"
+    "market_match_index.py"
+    "mission_contract.py"
+    "prediction_state_utils.py"
+    "prediction_store.py"
+    "release_governor.py"
+    "report_authority.py"
+    "runtime_boundary.py"
+    "sitemap_engine.py"
     "substack_notes_poster.py"
     "nowpattern_taxonomy.json"
     "caddy_activitypub.conf"
@@ -105,14 +126,17 @@ VERIFIER_CRON="0 6 * * * source /opt/cron-env.sh && /usr/bin/python3 ${REMOTE_DI
 # market_history_crawler.py — 毎日 09:00 JST (00:00 UTC) 市場データ収集
 CRAWLER_CRON="0 0 * * * source /opt/cron-env.sh && /usr/bin/python3 ${REMOTE_DIR}/market_history_crawler.py >> /var/log/market-crawler.log 2>&1"
 
+# article_index.py --compact-if-due — 15分毎。公開が途絶えても journal をスナップショットへ畳み込む
+INDEX_COMPACT_CRON="*/15 * * * * /usr/bin/python3 ${REMOTE_DIR}/article_index.py /opt/shared/nowpattern_article_index.json --compact-if-due >> /var/log/article-index.log 2>&1"
+
 ssh "$VPS" "
     # 既存エントリを除去して新しく追加
-    (crontab -l 2>/dev/null | grep -v 'prediction_cron_update' | grep -v 'x_swarm_dispatcher' | grep -v 'prediction_verifier' | grep -v 'market_history_crawler') | crontab -
-    (crontab -l 2>/dev/null; echo '${CRON_LINE}'; echo '${SWARM_CRON}'; echo '${SWARM_DLQ_CRON}'; echo '${VERIFIER_CRON}'; echo '${CRAWLER_CRON}') | crontab -
+    (crontab -l 2>/dev/null | grep -v 'prediction_cron_update' | grep -v 'x_swarm_dispatcher' | grep -v 'prediction_verifier' | grep -v 'market_history_crawler' | grep -v 'article_index.py') | crontab -
+    (crontab -l 2>/dev/null; echo '${CRON_LINE}'; echo '${SWARM_CRON}'; echo '${SWARM_DLQ_CRON}'; echo '${VERIFIER_CRON}'; echo '${CRAWLER_CRON}'; echo '${INDEX_COMPACT_CRON}') | crontab -
     echo 'Cron registered:'
-    crontab -l | grep -E 'prediction_cron|x_swarm|prediction_verifier|market_history'
+    crontab -l | grep -E 'prediction_cron|x_swarm|prediction_verifier|market_history|article_index'
 "
-log_ok "全cronジョブ登録完了（prediction_cron/verifier/market_crawler/x_swarm）"
+log_ok "全cronジョブ登録完了（prediction_cron/verifier/market_crawler/x_swarm/article_index）"
 
 # ──────── Step 4: 全チャネル状態確認 ────────
 echo ""
@@ -173,4 +197,5 @@ echo "  10:00 JST: prediction_cron_update.py（予測更新 5ステップ）"
 echo "  15:00 JST: prediction_verifier.py --auto-judge（AI検証）"
 echo "  */5:     x_swarm_dispatcher.py（X投稿）"
 echo "  */30:    x_swarm_dispatcher.py --retry-dlq（DLQリトライ）"
+echo "  */15:    article_index.py --compact-if-due（記事インデックスの journal 畳み込み）"
 echo ""
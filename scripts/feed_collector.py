@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""Concurrent HTTP collection layer for intelligence-feed-v2 Layer 0.
+
+collect() used to walk RSS feeds, subreddits, Hacker News and GitHub one
+request at a time with fixed sleeps (0.5s per feed, 1s per subreddit, 0.05s
+per HN item, 0.3s per repo). This module runs them from asyncio tasks:
+
+- HostRateLimiter: per-host minimum interval and concurrency instead of
+  global sleeps, so Reddit stays paced while unrelated hosts run in parallel.
+- Keep-alive http.client connections pooled per host (gzip accepted).
+- Conditional GET: ETag / Last-Modified are remembered per URL and a 304
+  serves the cached body.
+- CollectorCache (JSON, persisted across runs): the validators above, HN item
+  titles (immutable, so off-topic stories are never refetched) and a
+  rolling seen-set (seen_set.RollingSeenSet, hourly buckets) that stamps
+  first_seen and deduplicates items across sources and runs.
+
+Usage:
+  python3 feed_collector.py --stats
+  python3 feed_collector.py https://hnrss.org/frontpage ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import queue
+import ssl
+import threading
+import time
+import urllib.parse
+from contextlib import asynccontextmanager
+from typing import Callable, Iterable, Optional
+
+from seen_set import RollingSeenSet
+
+DEFAULT_CACHE_PATH = "/opt/shared/intelligence/collector_cache.json"
+CACHE_VERSION = 1
+USER_AGENT = "HeyLoopIntelligence/2.0 (AI monitoring)"
+
+TOTAL_LIMIT = 16
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+DEFAULT_HOST_CONCURRENCY = 4
+DEFAULT_HOST_INTERVAL = 0.0
+# ホスト別の間隔（秒）と同時接続数。旧実装の固定 sleep をホスト単位に置き換えたもの
+HOST_INTERVALS = {
+    "www.reddit.com": 1.0,
+    "api.github.com": 0.3,
+}
+HOST_CONCURRENCY = {
+    "www.reddit.com": 1,
+    "api.github.com": 2,
+    "hacker-news.firebaseio.com": 8,
+}
+
+VALIDATOR_KEEP_SEC = 7 * 86400   # 使われなくなった URL の本文キャッシュを捨てるまで
+SEEN_KEEP_SEC = 14 * 86400       # 重複排除用 first_seen の保持期間
+HN_TITLE_KEEP_SEC = 3 * 86400    # トップから外れた HN item のタイトル保持期間
+
+# fetcher(url, headers, timeout) -> (status, response_headers, body)
+Fetcher = Callable[[str, dict, float], "tuple[int, dict, bytes]"]
+
+
+class FetchError(Exception):
+    """Non-2xx/304 response (the status is kept for callers that care, e.g. 404)."""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.url = url
+
+
+def item_key(url: str, fallback: str = "") -> str:
+    """Dedup key: URL without fragment / tracking query, or a hash of the fallback text."""
+    url = (url or "").strip()
+    if url:
+        parts = urllib.parse.urlsplit(urllib.parse.urldefrag(url)[0])
+        query = urllib.parse.urlencode(
+            [(k, v) for k, v in urllib.parse.parse_qsl(parts.query) if not k.lower().startswith("utm_")]
+        )
+        return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                                        parts.path.rstrip("/"), query, ""))
+    return "sha1:" + hashlib.sha1(fallback.strip().lower().encode("utf-8")).hexdigest()[:20]
+
+
+class HostRateLimiter:
+    """Per-host concurrency + minimum spacing between request starts."""
+
+    def __init__(self, intervals: Optional[dict] = None, concurrency: Optional[dict] = None,
+                 default_interval: float = DEFAULT_HOST_INTERVAL,
+                 default_concurrency: int = DEFAULT_HOST_CONCURRENCY,
+                 clock: Callable[[], float] = time.monotonic):
+        self.intervals = HOST_INTERVALS if intervals is None else intervals
+        self.concurrency = HOST_CONCURRENCY if concurrency is None else concurrency
+        self.default_interval = default_interval
+        self.default_concurrency = default_concurrency
+        self.clock = clock
+        self._hosts: dict[str, tuple[asyncio.Semaphore, asyncio.Lock]] = {}
+        self._next_start: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(self.concurrency.get(host, self.default_concurrency)),
+                                 asyncio.Lock())
+        sem, lock = self._hosts[host]
+        async with sem:
+            interval = self.intervals.get(host, self.default_interval)
+            if interval > 0:
+                async with lock:
+                    wait = self._next_start.get(host, 0.0) - self.clock()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    self._next_start[host] = self.clock() + interval
+            yield
+
+
+class _ConnectionPool:
+    """Keep-alive http.client connections, one LIFO queue per (scheme, host)."""
+
+    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None, per_host: int = 8):
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.per_host = per_host
+        self._pools: dict[tuple[str, str], queue.LifoQueue] = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, key: tuple[str, str]) -> queue.LifoQueue:
+        with self._lock:
+            return self._pools.setdefault(key, queue.LifoQueue(maxsize=self.per_host))
+
+    def _connect(self, parts: urllib.parse.SplitResult, timeout: float) -> http.client.HTTPConnection:
+        if parts.scheme == "https":
+            return http.client.HTTPSConnection(parts.netloc, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(parts.netloc, timeout=timeout)
+
+    def request(self, url: str, headers: dict, timeout: float) -> tuple[int, dict, bytes]:
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        pool = self._queue(key)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        try:
+            conn, reused = pool.get_nowait(), True
+        except queue.Empty:
+            conn, reused = self._connect(parts, timeout), False
+        while True:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request("GET", path, headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip", **headers})
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused:
+                    raise
+                # サーバー側で閉じられた keep-alive 接続: 新しい接続で1回だけやり直す
+                conn, reused = self._connect(parts, timeout), False
+            except Exception:
+                conn.close()
+                raise
+        resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+        if resp.will_close:
+            conn.close()
+        else:
+            try:
+                pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        if resp_headers.get("content-encoding", "").lower() == "gzip" and body:
+            body = gzip.decompress(body)
+        return resp.status, resp_headers, body
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+class CollectorCache:
+    """Validators + HN titles + cross-run first_seen map, persisted as one JSON file."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self.validators: dict[str, dict] = {}
+        self.hn_titles: dict[str, dict] = {}
+        self.seen = RollingSeenSet(window_sec=SEEN_KEEP_SEC, clock=clock)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == CACHE_VERSION:
+                self.validators = data.get("validators") or {}
+                self.hn_titles = data.get("hn_titles") or {}
+                self.seen.update_from_dict(data.get("seen") or {})
+
+    def first_seen(self, key: str) -> tuple[float, bool]:
+        """(first_seen, is_new) — records the key on first sight (hour resolution once stored)."""
+        return self.seen.first_seen(key)
+
+    def save(self):
+        if not self.path:
+            return
+        now = self.clock()
+        self.validators = {u: v for u, v in self.validators.items() if now - v.get("used_at", 0) < VALIDATOR_KEEP_SEC}
+        self.hn_titles = {i: v for i, v in self.hn_titles.items() if now - v.get("seen_at", 0) < HN_TITLE_KEEP_SEC}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "validators": self.validators,
+                       "hn_titles": self.hn_titles, "seen": self.seen.to_dict()},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+
+class FeedCollector:
+    """Rate-limited, pooled, conditional GETs for one collection run."""
+
+    def __init__(self, cache: Optional[CollectorCache] = None, fetcher: Optional[Fetcher] = None,
+                 limiter: Optional[HostRateLimiter] = None, total_limit: int = TOTAL_LIMIT):
+        self.cache = cache if cache is not None else CollectorCache()
+        self._pool = None if fetcher else _ConnectionPool()
+        self.fetcher: Fetcher = fetcher or self._pool.request
+        self.limiter = limiter or HostRateLimiter()
+        self.total_limit = total_limit
+        self._total: Optional[asyncio.Semaphore] = None
+        self.stats = {"requests": 0, "not_modified": 0, "errors": 0}
+
+    async def get(self, url: str, headers: Optional[dict] = None, timeout: float = 20,
+                  conditional: bool = True) -> bytes:
+        """GET the body (cached body on 304). Raises FetchError / network errors."""
+        if self._total is None:
+            self._total = asyncio.Semaphore(self.total_limit)
+        headers = dict(headers or {})
+        entry = self.cache.validators.get(url) if conditional else None
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        target = url
+        for _ in range(MAX_REDIRECTS + 1):
+            host = urllib.parse.urlsplit(target).netloc
+            # ホスト枠を先に取る: 間隔待ち中のリクエストが全体枠を握って他ホストを止めないように
+            async with self.limiter.slot(host), self._total:
+                self.stats["requests"] += 1
+                try:
+                    status, resp_headers, body = await asyncio.to_thread(self.fetcher, target, headers, timeout)
+                except Exception:
+                    self.stats["errors"] += 1
+                    raise
+            location = resp_headers.get("location")
+            if status not in REDIRECT_STATUSES or not location:
+                break
+            target = urllib.parse.urljoin(target, location)
+        else:
+            self.stats["errors"] += 1
+            raise FetchError(status, url)
+        if status == 304 and entry:
+            self.stats["not_modified"] += 1
+            entry["used_at"] = self.cache.clock()
+            return entry["body"].encode("utf-8")
+        if status >= 400:
+            self.stats["errors"] += 1
+            raise FetchError(status, url)
+        if conditional and (resp_headers.get("etag") or resp_headers.get("last-modified")):
+            self.cache.validators[url] = {
+                "etag": resp_headers.get("etag", ""),
+                "last_modified": resp_headers.get("last-modified", ""),
+                "body": body.decode("utf-8", errors="replace"),
+                "used_at": self.cache.clock(),
+            }
+        else:
+            self.cache.validators.pop(url, None)
+        return body
+
+    async def get_json(self, url: str, headers: Optional[dict] = None, timeout: float = 20,
+                       conditional: bool = True):
+        body = await self.get(url, headers, timeout, conditional)
+        return json.loads(body.decode("utf-8"))
+
+    def dedupe(self, items: Iterable[dict], url_field: str = "url", text_field: str = "title",
+               seen_in_run: Optional[set] = None) -> list[dict]:
+        """Drop items already emitted in this run; stamp first_seen / is_new from the cross-run map."""
+        seen_in_run = set() if seen_in_run is None else seen_in_run
+        out = []
+        for item in items:
+            key = item_key(item.get(url_field, ""), item.get(text_field, ""))
+            if key in seen_in_run:
+                continue
+            seen_in_run.add(key)
+            first, is_new = self.cache.first_seen(key)
+            item["first_seen"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(first))
+            item["is_new"] = is_new
+            out.append(item)
+        return out
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent feed collection layer")
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--stats", action="store_true", help="キャッシュの状態を表示")
+    args = parser.parse_args()
+
+    cache = CollectorCache(args.cache)
+    if args.stats or not args.urls:
+        print(f"validators={len(cache.validators)} hn_titles={len(cache.hn_titles)} seen={len(cache.seen)}")
+        return
+    collector = FeedCollector(cache)
+
+    async def fetch_all():
+        async def one(url):
+            try:
+                return url, len(await collector.get(url))
+            except Exception as e:
+                return url, str(e)
+        return await asyncio.gather(*(one(u) for u in args.urls))
+
+    for url, result in asyncio.run(fetch_all()):
+        print(f"{result}\t{url}")
+    collector.close()
+    cache.save()
+    print(json.dumps(collector.stats))
+
+
+if __name__ == "__main__":
+    main()
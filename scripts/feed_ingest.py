@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Shared RSS/Atom ingest: streaming parse, conditional GET, per-feed cursor.
+
+breaking-news-watcher.py polls ~16 feeds every 5 minutes. It used to download
+each feed in full, one after another, and regex every <item> block even though
+almost all of them were already handled on the previous run. FeedIngest does:
+
+- Conditional requests (ETag / Last-Modified per feed); a 304 means "nothing
+  new" and costs no parsing at all.
+- Streaming parse: the body is fed to an XMLPullParser chunk by chunk and
+  items are yielded as each <item>/<entry> closes. Feeds list newest first,
+  so once STOP_AFTER_KNOWN consecutive items are already in the feed's
+  cursor (the GUIDs seen last time) the rest of the body is neither read nor
+  parsed. Malformed feeds fall back to the old regex parser.
+- Feeds are fetched in parallel from a thread pool.
+
+State is one JSON file per consumer (each poller keeps its own cursor):
+  {feed_url: {"etag", "last_modified", "guids": [...], "checked_at"}}
+
+parse_items() is also used by intelligence-feed-v2 for its RSS sources.
+
+Usage:
+  python3 feed_ingest.py --state /tmp/ingest.json https://feeds.bbci.co.uk/news/world/rss.xml
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+USER_AGENT = "Mozilla/5.0 Nowpattern-Bot/1.0"
+CHUNK_SIZE = 16 * 1024
+MAX_WORKERS = 8
+STOP_AFTER_KNOWN = 3      # 既知 GUID がこの件数連続したら残りを読まない
+CURSOR_SIZE = 200         # フィードごとに覚えておく GUID 数
+DESCRIPTION_LIMIT = 500
+
+# fetcher(url, headers, timeout) -> (status, response_headers, chunk iterator, close)
+Fetcher = Callable[[str, dict, float], "tuple[int, dict, Iterable[bytes], Callable[[], None]]"]
+
+_ITEM_TAGS = {"item", "entry"}
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _strip_html(text: str) -> str:
+    return re.sub(r"<[^>]+>", "", text or "")
+
+
+def _item_from_element(el: ET.Element) -> dict:
+    fields: dict[str, str] = {}
+    link = ""
+    for child in el:
+        name = _local(child.tag)
+        text = (child.text or "").strip()
+        if name == "link":
+            # RSS: <link>url</link> / Atom: <link rel="alternate" href="url"/>
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate" and not link:
+                link = href
+            elif text and not link:
+                link = text
+        elif name not in fields:
+            fields[name] = text
+    description = fields.get("description") or fields.get("summary") or fields.get("content") or ""
+    pub_date = fields.get("pubDate") or fields.get("published") or fields.get("updated") or fields.get("date") or ""
+    return {
+        "guid": fields.get("guid") or fields.get("id") or link,
+        "title": fields.get("title", ""),
+        "link": link,
+        "pub_date": pub_date,
+        "description": _strip_html(description)[:DESCRIPTION_LIMIT].strip(),
+    }
+
+
+def iter_items(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Yield feed items as soon as each <item>/<entry> element is complete."""
+    parser = ET.XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, el in parser.read_events():
+            if _local(el.tag) in _ITEM_TAGS:
+                item = _item_from_element(el)
+                el.clear()
+                yield item
+    parser.close()
+    for _, el in parser.read_events():
+        if _local(el.tag) in _ITEM_TAGS:
+            yield _item_from_element(el)
+
+
+def _extract_tag(text: str, tag: str) -> str:
+    m = re.search(rf"<{tag}[^>]*>\s*(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?\s*</{tag}>", text, re.DOTALL)
+    return m.group(1).strip() if m else ""
+
+
+def _extract_attr(text: str, tag: str, attr: str) -> str:
+    m = re.search(rf'<{tag}[^>]*\s{attr}="([^"]+)"', text)
+    return m.group(1) if m else ""
+
+
+def regex_items(content: str) -> list[dict]:
+    """Lenient fallback for feeds that are not well-formed XML."""
+    blocks = re.findall(r"<item[\s>](.*?)</item>", content, re.DOTALL)
+    if not blocks:
+        blocks = re.findall(r"<entry[\s>](.*?)</entry>", content, re.DOTALL)
+    items = []
+    for block in blocks:
+        link = _extract_tag(block, "link") or _extract_attr(block, "link", "href")
+        description = _extract_tag(block, "description") or _extract_tag(block, "summary") or ""
+        items.append({
+            "guid": _extract_tag(block, "guid") or _extract_tag(block, "id") or link,
+            "title": _extract_tag(block, "title"),
+            "link": link,
+            "pub_date": (_extract_tag(block, "pubDate") or _extract_tag(block, "published")
+                         or _extract_tag(block, "updated")),
+            "description": _strip_html(description)[:DESCRIPTION_LIMIT].strip(),
+        })
+    return items
+
+
+def parse_items(raw: bytes | str, limit: Optional[int] = None) -> list[dict]:
+    """Parse a whole feed body (stops after `limit` items)."""
+    data = raw.encode("utf-8") if isinstance(raw, str) else raw
+    items = []
+    try:
+        for item in iter_items([data]):
+            items.append(item)
+            if limit is not None and len(items) >= limit:
+                break
+    except ET.ParseError:
+        items = regex_items(data.decode("utf-8", errors="replace"))[:limit]
+    return items
+
+
+def _urllib_fetch(url: str, headers: dict, timeout: float):
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, **headers})
+    try:
+        resp = urllib.request.urlopen(req, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, {}, iter(()), lambda: None
+        raise
+    resp_headers = {k.lower(): v for k, v in resp.headers.items()}
+
+    def chunks():
+        while True:
+            chunk = resp.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    return resp.status, resp_headers, chunks(), resp.close
+
+
+class FeedIngest:
+    """Poll feeds in parallel and return only items past each feed's cursor."""
+
+    def __init__(self, state_path: Optional[str], fetcher: Optional[Fetcher] = None,
+                 max_workers: int = MAX_WORKERS, stop_after_known: int = STOP_AFTER_KNOWN,
+                 timeout: float = 15, clock: Callable[[], float] = time.time,
+                 log: Callable[[str], None] = print):
+        self.state_path = state_path
+        self.fetcher: Fetcher = fetcher or _urllib_fetch
+        self.max_workers = max_workers
+        self.stop_after_known = stop_after_known
+        self.timeout = timeout
+        self.clock = clock
+        self.log = log
+        self.state: dict[str, dict] = {}
+        self.stats = {"feeds": 0, "not_modified": 0, "parsed": 0, "new": 0, "errors": 0}
+        if state_path and os.path.exists(state_path):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError):
+                self.state = {}
+
+    def save(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.state_path)
+
+    def _poll_one(self, url: str) -> tuple[list[dict], dict]:
+        """Fetch one feed; returns (new items, updated state entry). No shared state is touched."""
+        entry = dict(self.state.get(url) or {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        status, resp_headers, chunks, close = self.fetcher(url, headers, self.timeout)
+        entry["checked_at"] = self.clock()
+        if status == 304:
+            return [], {**entry, "not_modified": True}
+        known = set(entry.get("guids") or [])
+        new_items: list[dict] = []
+        parsed = 0
+        body: list[bytes] = []
+
+        def recording(source):
+            for chunk in source:
+                body.append(chunk)
+                yield chunk
+
+        try:
+            streak = 0
+            for item in iter_items(recording(chunks)):
+                parsed += 1
+                if item["guid"] in known:
+                    streak += 1
+                    if streak >= self.stop_after_known:
+                        break
+                    continue
+                streak = 0
+                new_items.append(item)
+        except ET.ParseError:
+            body.extend(chunks)
+            new_items = [i for i in regex_items(b"".join(body).decode("utf-8", errors="replace"))
+                         if i["guid"] not in known]
+            parsed = len(new_items)
+        finally:
+            close()
+        entry["etag"] = resp_headers.get("etag", "")
+        entry["last_modified"] = resp_headers.get("last-modified", "")
+        entry["guids"] = ([i["guid"] for i in new_items if i["guid"]] + list(entry.get("guids") or []))[:CURSOR_SIZE]
+        entry["parsed"] = parsed
+        entry.pop("not_modified", None)
+        return new_items, entry
+
+    def poll(self, urls: Iterable[str]) -> dict[str, list[dict]]:
+        """{feed_url: [new items, newest first]} for every feed (errors -> [])."""
+        urls = list(dict.fromkeys(urls))
+
+        def run(url):
+            try:
+                return url, self._poll_one(url), None
+            except Exception as e:
+                return url, None, e
+
+        results: dict[str, list[dict]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(urls)))) as pool:
+            for url, outcome, error in pool.map(run, urls):
+                self.stats["feeds"] += 1
+                if error is not None:
+                    self.stats["errors"] += 1
+                    self.log(f"  RSS fetch failed {url}: {error}")
+                    results[url] = []
+                    continue
+                items, entry = outcome
+                if entry.pop("not_modified", False):
+                    self.stats["not_modified"] += 1
+                self.stats["parsed"] += entry.pop("parsed", 0)
+                self.stats["new"] += len(items)
+                self.state[url] = entry
+                results[url] = items
+        return results
+
+    def forget(self, url: str, guids: Iterable[str]):
+        """Drop GUIDs from a feed's cursor so the next poll returns them again."""
+        entry = self.state.get(url)
+        if not entry:
+            return
+        drop = set(guids)
+        entry["guids"] = [g for g in entry.get("guids", []) if g not in drop]
+        # 304 だと本文が返らないので、次回は条件なしで取り直す
+        entry["etag"] = ""
+        entry["last_modified"] = ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS/Atom ingest with per-feed cursor")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--state", default="", help="カーソル状態 JSON（省略時は保存しない）")
+    args = parser.parse_args()
+
+    ingest = FeedIngest(args.state or None)
+    for url, items in ingest.poll(args.urls).items():
+        print(f"{len(items):3d} new  {url}")
+        for item in items[:5]:
+            print(f"       {item['pub_date'][:25]:25s} {item['title'][:70]}")
+    ingest.save()
+    print(json.dumps(ingest.stats))
+
+
+if __name__ == "__main__":
+    main()
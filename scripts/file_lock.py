@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Cross-process advisory file lock shared by the scripts on the VPS.
+
+Writers that rewrite a shared file (article index, sitemap state, the
+prediction_db.json export, the NEO queue) take FileLock(path), which
+flock()s `<path>.lock`. Every writer of one file must use the same path.
+
+Without fcntl (Windows dev machines) the lock is a no-op.
+"""
+
+from __future__ import annotations
+
+import os
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows の開発環境
+    HAS_FCNTL = False
+
+
+class FileLock:
+    """Exclusive lock on `<path>.lock`, held for the `with` block (no-op without fcntl)."""
+
+    def __init__(self, path: str):
+        self.path = path + ".lock"
+        self._fh = None
+
+    def __enter__(self):
+        if HAS_FCNTL:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fh = open(self.path, "a")
+            fcntl.flock(self._fh, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fh is not None:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
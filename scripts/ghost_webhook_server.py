@@ -9,16 +9,24 @@ port 8765 で待機。Ghost CMSからのwebhookを受信して即座にQA+アラ
   post.edited           → タグ変更検知 → lang-ja/lang-en 整合性チェック → アラート
   page.published.edited → /predictions/ ページ改ざん検知 → Telegram警告
 
+受信したイベントは webhook_job_queue（SQLite）に積んで即 200 を返し、
+ワーカープールが記事単位で並列処理する。同じ記事への連続イベントは
+WEBHOOK_DEBOUNCE_SEC 内で 1 ジョブにまとめる。
+  GET /queue → キュー深さ・待ち時間/処理時間の p50/p95（JSON）
+
 起動: python3 /opt/shared/scripts/ghost_webhook_server.py
 """
 
-import json, os, sys, time, re, hashlib, sqlite3, subprocess, tempfile
+import json, os, sys, time, hashlib, sqlite3, subprocess, tempfile
 import urllib.request, ssl
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from datetime import datetime, timezone
 
 from mission_contract import assert_mission_handshake
 from release_governor import evaluate_governed_release
+from webhook_job_queue import WebhookJobQueue, WorkerPool
+import qa_rule_engine
+from qa_rule_engine import fix_prediction_link, enqueue_neo_with_prompt
 
 MISSION_HANDSHAKE = assert_mission_handshake(
     "ghost_webhook_server",
@@ -50,12 +58,12 @@ HEALTH_DB   = "/opt/shared/article_health.db"
 NEO_QUEUE   = "/opt/shared/neo_task_queue.json"
 GEN_THUMB   = "/opt/shared/scripts/gen_thumbnail.py"
 PRED_DB     = "/opt/shared/scripts/prediction_db.json"
+QUEUE_DB    = ENV.get("WEBHOOK_QUEUE_DB", "/opt/shared/webhook_jobs.db")
+WORKERS       = int(ENV.get("WEBHOOK_WORKERS", "4"))
+DEBOUNCE_SEC  = float(ENV.get("WEBHOOK_DEBOUNCE_SEC", "10"))
 
 PROTECTED_SLUGS  = {"predictions", "en-predictions"}
-REQUIRED_MARKERS = ["np-fast-read", "np-signal", "np-between-lines", "np-open-loop"]
-MIN_LEN_JA = 5000
-MIN_LEN_EN = 3000
-CJK_MAX_EN = 50
+# 判定ルール（必須タグ/マーカー/文字数/CJK/Oracle）は qa_rule_engine（qa_sentinel と共有）
 
 # ── Helpers ───────────────────────────────────────────────────────────────
 
@@ -144,9 +152,6 @@ def ghost_add_tags(post_id, existing_slugs, add_slugs, updated_at):
         print(f"  add_tags failed: {e}")
         return False
 
-def fix_prediction_link(html):
-    return re.sub(r'(href=["\'])(/predictions/)(["\'])', r'\1/en/predictions/\3', html)
-
 def ghost_update_html(post_id, updated_at, new_html):
     jwt = ghost_jwt()
     put_url = f"{GHOST_URL}/ghost/api/admin/posts/{post_id}/"
@@ -183,63 +188,15 @@ def upload_image(image_path):
         print(f"  upload_image error: {e}")
         return None
 
-def count_cjk(text):
-    max_run = run = 0
-    for ch in text:
-        cp = ord(ch)
-        if (0x3000 <= cp <= 0x9FFF) or (0xF900 <= cp <= 0xFAFF):
-            run += 1; max_run = max(max_run, run)
-        else:
-            run = 0
-    return max_run
-
-def get_text(html):
-    return re.sub(r"<[^>]+>", "", html or "")
-
 def load_pred_slugs():
-    try:
-        with open(PRED_DB) as f:
-            db = json.load(f)
-        slugs = set()
-        for p in db.get("predictions", []):
-            url = p.get("ghost_url", "")
-            if url:
-                s = url.rstrip("/").rsplit("/", 1)[-1]
-                if s: slugs.add(s)
-        return slugs
-    except Exception:
-        return set()
+    return qa_rule_engine.load_prediction_slugs(PRED_DB)
 
 def load_neo_queue():
-    if os.path.exists(NEO_QUEUE):
-        try:
-            with open(NEO_QUEUE) as f: return json.load(f)
-        except Exception: pass
-    return {"tasks": []}
+    return qa_rule_engine.load_neo_queue(NEO_QUEUE)
 
 def save_neo_queue(q):
-    with open(NEO_QUEUE, "w") as f:
-        json.dump(q, f, ensure_ascii=False, indent=2)
-
-def enqueue_neo_with_prompt(queue, post_id, slug, title, lang, issue, fix_prompt, priority=1):
-    """詳細な修正プロンプト付きでNEOキューに追加"""
-    existing = {(t["post_id"], t["issue"]) for t in queue["tasks"] if t.get("status") != "done"}
-    if (post_id, issue) in existing:
-        return False
-    queue["tasks"].append({
-        "task_id":    f"{slug[:25]}_{issue[:15]}_{int(time.time())}",
-        "post_id":    post_id,
-        "slug":       slug,
-        "title":      title[:80],
-        "lang":       lang,
-        "issue":      issue,
-        "fix_prompt": fix_prompt,
-        "priority":   priority,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "status":     "pending",
-        "source":     "webhook_qa",
-    })
-    return True
+    """他ワーカーの追記を消さないよう、ディスク上のキューにマージして保存"""
+    qa_rule_engine.save_neo_queue(q, NEO_QUEUE)
 
 def build_fix_prompt(slug, title, lang, issues):
     """NEOが即実行できる修正プロンプトを生成"""
@@ -303,8 +260,6 @@ def run_qa_on_post(post_id, event_type="post.published"):
     tags  = {t["slug"] for t in post.get("tags", [])}
     updated_at = post.get("updated_at", "")
     lang  = "en" if "lang-en" in tags else "ja"
-    text  = get_text(html)
-    content_len = len(text)
 
     # Ghost DBからJA画像セット（画像重複チェック用）
     ja_images = set()
@@ -325,24 +280,16 @@ def run_qa_on_post(post_id, event_type="post.published"):
     pred_slugs = load_pred_slugs()
     neo_queue  = load_neo_queue()
 
-    rec = {
-        "post_id": post_id, "slug": slug, "title": title[:120], "lang": lang,
-        "checked_at": datetime.now(timezone.utc).isoformat(),
-        "content_len": content_len,
-        "image_ok": 1, "image_fixed": 0,
-        "tags_ok": 1, "tags_fixed": 0, "missing_tags": "",
-        "length_ok": 1, "sections_ok": 1, "missing_sections": "",
-        "cjk_ok": 1, "cjk_char_count": 0,
-        "oracle_ok": 1, "oracle_needed": 0,
-        "pred_link_ok": 1, "pred_link_fixed": 0,
-        "neo_queued": 0, "neo_issue": "", "overall_ok": 0,
-    }
-    neo_issues = []
+    # 判定は共有ルールエンジンで 1 パス（HTML のパースも 1 回）
+    doc    = qa_rule_engine.PostDoc.parse(html, slug=slug, lang=lang, tags=tags, feature_image=fi)
+    result = qa_rule_engine.evaluate(doc, qa_rule_engine.QAContext(
+        ja_images=frozenset(ja_images), pred_slugs=frozenset(pred_slugs)))
+    rec = qa_rule_engine.new_health_record(post_id, slug, title, lang, result)
+    neo_issues = list(result.neo_issues)
     fixes_done = []
 
     # Check 1: feature_image
-    if lang == "en" and fi and fi in ja_images:
-        rec["image_ok"] = 0
+    if not rec["image_ok"]:
         with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tf:
             tmp_path = tf.name
         try:
@@ -360,51 +307,19 @@ def run_qa_on_post(post_id, event_type="post.published"):
             if os.path.exists(tmp_path): os.unlink(tmp_path)
 
     # Check 2: required tags
-    required = {"nowpattern","deep-pattern"} | ({"lang-ja"} if lang=="ja" else {"lang-en"})
-    missing_tags = required - tags
-    if missing_tags:
-        rec["tags_ok"]      = 0
-        rec["missing_tags"] = ",".join(sorted(missing_tags))
-        if ghost_add_tags(post_id, tags, list(missing_tags), updated_at):
+    if result.missing_tags:
+        if ghost_add_tags(post_id, tags, result.missing_tags, updated_at):
             rec["tags_fixed"] = 1
-            fixes_done.append(f"タグ追加:{','.join(missing_tags)}")
+            fixes_done.append(f"タグ追加:{','.join(result.missing_tags)}")
 
     # Check 3: prediction link (EN)
-    bad_pred_link = bool(re.search(r'href=["\'](?!https?://)[^"\']*?(?<!/en)/predictions/["\']', html))
-    if lang == "en" and bad_pred_link:
-        rec["pred_link_ok"] = 0
+    if not rec["pred_link_ok"]:
         new_html = fix_prediction_link(html)
         if ghost_update_html(post_id, updated_at, new_html):
             rec["pred_link_fixed"] = 1
             fixes_done.append("/predictions/ → /en/predictions/")
 
-    # Check 4: content length
-    min_len = MIN_LEN_JA if lang == "ja" else MIN_LEN_EN
-    if content_len < min_len:
-        rec["length_ok"] = 0
-        neo_issues.append(f"article_too_short:{content_len}chars(min:{min_len})")
-
-    # Check 5: section markers
-    missing_secs = [m for m in REQUIRED_MARKERS if m not in html]
-    if missing_secs:
-        rec["sections_ok"]      = 0
-        rec["missing_sections"] = ",".join(missing_secs)
-        neo_issues.append(f"missing_sections:{','.join(missing_secs)}")
-
-    # Check 6: CJK contamination (EN)
-    if lang == "en":
-        cjk = count_cjk(text)
-        rec["cjk_char_count"] = cjk
-        if cjk > CJK_MAX_EN:
-            rec["cjk_ok"] = 0
-            neo_issues.append(f"cjk_contamination:{cjk}chars")
-
-    # Check 7: Oracle
-    if slug in pred_slugs:
-        rec["oracle_needed"] = 1
-        if "np-oracle" not in html:
-            rec["oracle_ok"] = 0
-            neo_issues.append("missing_oracle_statement")
+    # Check 4-7（文字数・セクション・CJK・Oracle）は result.neo_issues に入っている
 
     release_block = evaluate_governed_release(
         title=title,
@@ -419,7 +334,6 @@ def run_qa_on_post(post_id, event_type="post.published"):
     if release_block["errors"]:
         neo_issues.append("release_blocker:" + ",".join(release_block["errors"][:3]))
 
-
     # Check 8: JA-EN pairing — 公開時に対訳の存在を即時確認（URLルール強制）
     rec["pair_ok"] = 1
     rec["pair_queued"] = 0
@@ -482,12 +396,7 @@ def run_qa_on_post(post_id, event_type="post.published"):
         # 処刑: 修正されるまで非公開
         ghost_force_draft(post_id, slug)
 
-    rec["overall_ok"] = 1 if (
-        (rec["image_ok"] or rec["image_fixed"]) and
-        (rec["tags_ok"]  or rec["tags_fixed"])  and
-        (rec["pred_link_ok"] or rec["pred_link_fixed"]) and
-        rec["length_ok"] and rec["sections_ok"] and rec["cjk_ok"] and rec["oracle_ok"]
-    ) else 0
+    rec["overall_ok"] = qa_rule_engine.overall_ok(rec)
 
     update_health_db(post_id, slug, lang, rec)
 
@@ -758,9 +667,90 @@ def run_tag_check_on_post(post_id, webhook_post):
     else:
         print(f"  [TAG-CHECK] OK: {slug} tags={tags & {'lang-ja','lang-en'}}")
 
+# ── Job Worker ────────────────────────────────────────────────────────────
+
+JOB_QUEUE = None    # WebhookJobQueue（__main__ で初期化）
+WORKER_POOL = None  # WorkerPool
+
+def process_job(job):
+    """ワーカースレッドで 1 ジョブを処理する（例外は WorkerPool が failed として記録）"""
+    post_id = job["post_id"]
+    payload = job["payload"]
+    slug    = payload.get("slug", "")
+    waited  = time.time() - job["received_at"]
+    print(f"[Worker] {job['kind']} | slug={slug} | id={post_id} | events={job['events']} | waited={waited:.1f}s")
+
+    # page.published.edited — predictions改ざん検知
+    if job["kind"] == "page_alert":
+        msg = (
+            f"⚠️ *[ALERT] /{slug}/ ページが変更されました*\n"
+            f"編集者: {payload.get('editor', 'unknown')}\n"
+            f"時刻: {datetime.fromtimestamp(job['updated_at']).strftime('%Y-%m-%d %H:%M JST')}\n"
+            f"→ 意図しない変更の場合は即確認"
+        )
+        if job["events"] > 1:
+            msg += f"\n（{job['events']}回の変更をまとめて通知）"
+        print(msg)
+        send_telegram(msg)
+        return
+
+    # post.published / post.published.edited → QA
+    if job["kind"] == "qa":
+        # Semantic QA: Gemini Flash によるコンテンツ品質チェック
+        try:
+            import sys as _sys2
+            if "/opt/shared/scripts" not in _sys2.path:
+                _sys2.path.insert(0, "/opt/shared/scripts")
+            import semantic_qa as _sqa
+            _sqa_fetch = ghost_request(
+                "GET",
+                f"/posts/{post_id}/?formats=html&fields=id,title,html"
+            )
+            _sqa_post = (_sqa_fetch.get("posts") or [{}])[0]
+            _sqa_passed, _sqa_score, _sqa_reason = _sqa.check(
+                post_id,
+                _sqa_post.get("title", ""),
+                _sqa_post.get("html", ""),
+                slug=slug,
+                lang=lang,
+            )
+            if not _sqa_passed:
+                print(f"  [SemanticQA] BLOCKED: {slug} score={_sqa_score}/10")
+                return
+        except Exception as _sqa_e:
+            print(f"  [SemanticQA] Error (skip): {_sqa_e}")
+        run_qa_on_post(post_id, job["event"])
+        return
+
+    # post.edited → タグ変更の lang 整合性チェック
+    if job["kind"] == "tag_check":
+        run_tag_check_on_post(post_id, {"slug": slug})
+        return
+
+    print(f"[Worker] unknown job kind: {job['kind']}")
+
+def enqueue_job(post_id, kind, event, payload, debounce_sec=None):
+    JOB_QUEUE.enqueue(post_id, kind, event, payload, debounce_sec=debounce_sec)
+    WORKER_POOL.notify()
+
 # ── Webhook Handler ───────────────────────────────────────────────────────
 
 class WebhookHandler(BaseHTTPRequestHandler):
+    def _send_json(self, code, obj):
+        data = json.dumps(obj, ensure_ascii=False).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        # キュー深さ・レイテンシ（監視用）
+        if self.path.rstrip("/") == "/queue":
+            self._send_json(200, {**JOB_QUEUE.stats(), "workers": WORKERS, "debounce_sec": DEBOUNCE_SEC})
+        else:
+            self._send_json(404, {"status": "not_found"})
+
     def do_POST(self):
         try:
             length = int(self.headers.get("Content-Length", 0))
@@ -785,64 +775,28 @@ class WebhookHandler(BaseHTTPRequestHandler):
         post_id = post.get("id", "")
         slug    = post.get("slug", "")
         status  = post.get("status", "")
+        event   = self.path.strip("/")
 
         print(f"[Webhook] {self.path} | slug={slug} | id={post_id} | status={status}")
 
-        # page.published.edited — predictions改ざん検知
+        # page.published.edited — predictions改ざん検知（通知は待たせない）
         if slug in PROTECTED_SLUGS:
             editor = post.get("updated_by", {}).get("name", "unknown") if isinstance(post.get("updated_by"), dict) else "unknown"
-            msg = (
-                f"⚠️ *[ALERT] /{slug}/ ページが変更されました*\n"
-                f"編集者: {editor}\n"
-                f"時刻: {datetime.now().strftime('%Y-%m-%d %H:%M JST')}\n"
-                f"→ 意図しない変更の場合は即確認"
-            )
-            print(msg)
-            send_telegram(msg)
+            enqueue_job(post_id or slug, "page_alert", event, {"slug": slug, "editor": editor}, debounce_sec=0)
             return
 
-        # post.published / post.published.edited → QA即実行
+        # post.published / post.published.edited → QA（debounce してまとめる）
         if post_id and status in ("published", ""):
             # Circuit Breaker: 同一slugの連続Webhookを遮断
             if not circuit_breaker_check(slug):
                 return
-            # Semantic QA: Gemini Flash によるコンテンツ品質チェック
-            try:
-                import sys as _sys2
-                if "/opt/shared/scripts" not in _sys2.path:
-                    _sys2.path.insert(0, "/opt/shared/scripts")
-                import semantic_qa as _sqa
-                _sqa_fetch = ghost_request(
-                    "GET",
-                    f"/posts/{post_id}/?formats=html&fields=id,title,html"
-                )
-                _sqa_post = (_sqa_fetch.get("posts") or [{}])[0]
-                _sqa_passed, _sqa_score, _sqa_reason = _sqa.check(
-                    post_id,
-                    _sqa_post.get("title", ""),
-                    _sqa_post.get("html", ""),
-                    slug=slug,
-                    lang=lang,
-                )
-                if not _sqa_passed:
-                    print(f"  [SemanticQA] BLOCKED: {slug} score={_sqa_score}/10")
-                    return
-            except Exception as _sqa_e:
-                print(f"  [SemanticQA] Error (skip): {_sqa_e}")
-            try:
-                run_qa_on_post(post_id, self.path.strip("/"))
-            except Exception as e:
-                print(f"[Webhook] QA error for {post_id}: {e}")
-                import traceback; traceback.print_exc()
+            enqueue_job(post_id, "qa", event, {"slug": slug})
             return
 
         # post.edited → タグ変更の lang 整合性チェック
         # (status = "draft" でも投稿されたタグ変更を検知する)
         if post_id and "/post.edited" in self.path:
-            try:
-                run_tag_check_on_post(post_id, post)
-            except Exception as e:
-                print(f"[Webhook] tag-check error for {post_id}: {e}")
+            enqueue_job(post_id, "tag_check", event, {"slug": slug})
 
     def log_message(self, fmt, *args):
         pass  # アクセスログは静かに
@@ -851,9 +805,16 @@ class WebhookHandler(BaseHTTPRequestHandler):
 
 if __name__ == "__main__":
     port   = int(os.environ.get("WEBHOOK_PORT", "8765"))
-    server = HTTPServer(("127.0.0.1", port), WebhookHandler)
+    JOB_QUEUE = WebhookJobQueue(QUEUE_DB, debounce_sec=DEBOUNCE_SEC)
+    recovered = JOB_QUEUE.recover()
+    WORKER_POOL = WorkerPool(JOB_QUEUE, process_job, workers=WORKERS).start()
+    server = ThreadingHTTPServer(("127.0.0.1", port), WebhookHandler)
     print(f"[Ghost Webhook Server] listening on 127.0.0.1:{port}")
     print(f"  Ghost DB: {GHOST_DB}")
     print(f"  Health DB: {HEALTH_DB}")
     print(f"  NEO Queue: {NEO_QUEUE}")
-    server.serve_forever()
+    print(f"  Job Queue: {QUEUE_DB} (workers={WORKERS}, debounce={DEBOUNCE_SEC}s, recovered={recovered})")
+    try:
+        server.serve_forever()
+    finally:
+        WORKER_POOL.stop()
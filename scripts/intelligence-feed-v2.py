@@ -30,18 +30,22 @@ VPS cron 設定:
 """
 
 import argparse
+import asyncio
 import json
 import os
 import subprocess
 import sys
 import time
-import xml.etree.ElementTree as ET
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
 import urllib.request
 import urllib.error
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from feed_collector import CollectorCache, FeedCollector, FetchError  # noqa: E402
+from feed_ingest import parse_items  # noqa: E402
+
 # =============================================================================
 # Config
 # =============================================================================
@@ -53,6 +57,7 @@ RAW_DIR = f"{INTEL_DIR}/raw"
 SYNTH_DIR = f"{INTEL_DIR}/synthesis"
 WEEKLY_DIR = f"{INTEL_DIR}/weekly"
 STATE_FILE = f"{INTEL_DIR}/state.json"
+COLLECTOR_CACHE_FILE = f"{INTEL_DIR}/collector_cache.json"
 AGENT_WISDOM_FILE = "/opt/shared/AGENT_WISDOM.md"
 
 # Claude バイナリ候補（VPS環境）
@@ -351,48 +356,28 @@ def save_state(state: dict):
 # Layer 0: 収集関数
 # =============================================================================
 
-def fetch_rss(feed: dict) -> list[dict]:
-    """RSS フィードを取得してアイテムリストを返す。"""
-    url = feed["url"]
+def parse_rss(feed: dict, raw: str) -> list[dict]:
+    """RSS 2.0 / Atom の本文からアイテムリストを作る（壊れた XML は正規表現でフォールバック）。"""
+    results = []
+    for item in parse_items(raw, limit=10):
+        if item["title"]:
+            results.append({
+                "title": item["title"],
+                "url": item["link"],
+                "published": item["pub_date"],
+                "summary": item["description"][:400].strip(),
+                "source": feed["name"],
+                "category": feed["category"],
+                "priority": feed["priority"],
+            })
+    return results
+
+
+async def fetch_rss(collector: FeedCollector, feed: dict) -> list[dict]:
+    """RSS フィードを取得してアイテムリストを返す（ETag/Last-Modified で条件付き取得）。"""
     try:
-        req = urllib.request.Request(
-            url,
-            headers={"User-Agent": "HeyLoopIntelligence/2.0 (AI monitoring)"},
-        )
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            raw = resp.read().decode("utf-8", errors="replace")
-
-        root = ET.fromstring(raw)
-        # RSS 2.0
-        ns = {}
-        items = root.findall(".//item")
-        # Atom フォールバック
-        if not items:
-            atom_ns = "http://www.w3.org/2005/Atom"
-            items = root.findall(f".//{{{atom_ns}}}entry")
-
-        results = []
-        for item in items[:10]:
-            title = (
-                item.findtext("title") or
-                item.findtext(f"{{{atom_ns}}}title") if not item.findtext("title") else item.findtext("title")
-            )
-            link = (
-                item.findtext("link") or
-                (item.find("link").get("href") if item.find("link") is not None else "")
-            )
-            pub = item.findtext("pubDate") or item.findtext("published") or ""
-            desc = (item.findtext("description") or item.findtext("summary") or "")[:400]
-            if title:
-                results.append({
-                    "title": (title or "").strip(),
-                    "url": (link or "").strip(),
-                    "published": pub.strip(),
-                    "summary": desc.strip(),
-                    "source": feed["name"],
-                    "category": feed["category"],
-                    "priority": feed["priority"],
-                })
+        raw = (await collector.get(feed["url"])).decode("utf-8", errors="replace")
+        results = parse_rss(feed, raw)
         log(f"  RSS [{feed['name']}]: {len(results)} 件")
         return results
     except Exception as e:
@@ -400,16 +385,13 @@ def fetch_rss(feed: dict) -> list[dict]:
         return []
 
 
-def fetch_reddit(sub: dict) -> list[dict]:
+async def fetch_reddit(collector: FeedCollector, sub: dict) -> list[dict]:
     """Reddit サブレディットのホット投稿を取得。"""
     url = f"https://www.reddit.com/r/{sub['name']}/hot.json?limit={sub['limit']}"
-    req = urllib.request.Request(
-        url,
-        headers={"User-Agent": "HeyLoopIntelligence/2.0 (non-commercial research)"},
-    )
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
+        data = await collector.get_json(
+            url, headers={"User-Agent": "HeyLoopIntelligence/2.0 (non-commercial research)"}, timeout=15
+        )
         posts = []
         for child in data.get("data", {}).get("children", []):
             d = child["data"]
@@ -434,82 +416,99 @@ def fetch_reddit(sub: dict) -> list[dict]:
         return []
 
 
-def fetch_hn(limit: int = 50) -> list[dict]:
-    """Hacker News のトップストーリーからキーワードフィルタして返す。"""
+def _hn_matched_keyword(title: str) -> str | None:
+    title_lower = (title or "").lower()
+    return next((kw for kw in HN_KEYWORDS if kw in title_lower), None)
+
+
+async def fetch_hn(collector: FeedCollector, limit: int = 50) -> list[dict]:
+    """Hacker News のトップストーリーからキーワードフィルタして返す。
+
+    タイトルは変わらないので、キーワードに合わなかった item はキャッシュ済み
+    タイトルで判定して再取得しない（スコアが要る一致 item だけ並列取得）。
+    """
     try:
-        with urllib.request.urlopen(
-            "https://hacker-news.firebaseio.com/v0/topstories.json", timeout=15
-        ) as resp:
-            ids = json.loads(resp.read().decode("utf-8"))[:limit]
+        ids = (await collector.get_json(
+            "https://hacker-news.firebaseio.com/v0/topstories.json", timeout=15, conditional=False
+        ))[:limit]
     except Exception as e:
         log(f"  HN トップ取得エラー: {e}")
         return []
 
-    results = []
+    titles = collector.cache.hn_titles
+    now = time.time()
+    to_fetch = []
     for sid in ids:
-        try:
-            with urllib.request.urlopen(
-                f"https://hacker-news.firebaseio.com/v0/item/{sid}.json", timeout=10
-            ) as resp:
-                item = json.loads(resp.read().decode("utf-8"))
-            if not item:
+        cached = titles.get(str(sid))
+        if cached is not None:
+            cached["seen_at"] = now
+            if not _hn_matched_keyword(cached.get("title", "")):
                 continue
-            title_lower = (item.get("title") or "").lower()
-            matched = next((kw for kw in HN_KEYWORDS if kw in title_lower), None)
-            if matched:
-                results.append({
-                    "title": item.get("title", ""),
-                    "url": item.get("url", ""),
-                    "score": item.get("score", 0),
-                    "comments": item.get("descendants", 0),
-                    "hn_url": f"https://news.ycombinator.com/item?id={sid}",
-                    "matched_keyword": matched,
-                })
-        except Exception:
-            pass
-        time.sleep(0.05)
+        to_fetch.append(sid)
 
+    async def fetch_item(sid):
+        try:
+            item = await collector.get_json(
+                f"https://hacker-news.firebaseio.com/v0/item/{sid}.json", timeout=10, conditional=False
+            )
+        except Exception:
+            return None
+        if not item:
+            return None
+        titles[str(sid)] = {"title": item.get("title", ""), "seen_at": now}
+        matched = _hn_matched_keyword(item.get("title"))
+        if not matched:
+            return None
+        return {
+            "title": item.get("title", ""),
+            "url": item.get("url", ""),
+            "score": item.get("score", 0),
+            "comments": item.get("descendants", 0),
+            "hn_url": f"https://news.ycombinator.com/item?id={sid}",
+            "matched_keyword": matched,
+        }
+
+    results = [r for r in await asyncio.gather(*(fetch_item(sid) for sid in to_fetch)) if r]
     results.sort(key=lambda x: x["score"], reverse=True)
-    log(f"  HN: {len(results)} 件（top {limit} から）")
+    log(f"  HN: {len(results)} 件（top {len(ids)} から、取得 {len(to_fetch)} 件）")
     return results[:15]
 
 
-def fetch_github(repos: list[dict]) -> list[dict]:
+async def fetch_github_release(collector: FeedCollector, repo_info: dict) -> dict | None:
     """GitHub リポジトリの最新リリース情報を取得。"""
-    results = []
-    for repo_info in repos:
-        repo = repo_info["repo"]
-        url = f"https://api.github.com/repos/{repo}/releases/latest"
-        req = urllib.request.Request(
-            url,
-            headers={
-                "User-Agent": "HeyLoopIntelligence/2.0",
-                "Accept": "application/vnd.github+json",
-            },
+    repo = repo_info["repo"]
+    url = f"https://api.github.com/repos/{repo}/releases/latest"
+    try:
+        data = await collector.get_json(
+            url, headers={"User-Agent": "HeyLoopIntelligence/2.0", "Accept": "application/vnd.github+json"},
+            timeout=10,
         )
-        try:
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-            results.append({
-                "repo": repo,
-                "tag": data.get("tag_name", ""),
-                "name": data.get("name", ""),
-                "published": data.get("published_at", ""),
-                "body": (data.get("body") or "")[:600],
-                "url": data.get("html_url", ""),
-                "category": repo_info["category"],
-                "priority": repo_info["priority"],
-            })
-            log(f"  GitHub {repo}: {data.get('tag_name', 'no release')}")
-        except urllib.error.HTTPError as e:
-            if e.code == 404:
-                log(f"  GitHub {repo}: リリースなし")
-            else:
-                log(f"  GitHub {repo}: HTTP {e.code}")
-        except Exception as e:
-            log(f"  GitHub {repo}: {e}")
-        time.sleep(0.3)
-    return results
+    except FetchError as e:
+        if e.status == 404:
+            log(f"  GitHub {repo}: リリースなし")
+        else:
+            log(f"  GitHub {repo}: HTTP {e.status}")
+        return None
+    except Exception as e:
+        log(f"  GitHub {repo}: {e}")
+        return None
+    log(f"  GitHub {repo}: {data.get('tag_name', 'no release')}")
+    return {
+        "repo": repo,
+        "tag": data.get("tag_name", ""),
+        "name": data.get("name", ""),
+        "published": data.get("published_at", ""),
+        "body": (data.get("body") or "")[:600],
+        "url": data.get("html_url", ""),
+        "category": repo_info["category"],
+        "priority": repo_info["priority"],
+    }
+
+
+async def fetch_github(collector: FeedCollector, repos: list[dict]) -> list[dict]:
+    """GitHub リポジトリの最新リリース情報を取得（api.github.com はホスト単位で間隔制御）。"""
+    results = await asyncio.gather(*(fetch_github_release(collector, r) for r in repos))
+    return [r for r in results if r]
 
 
 def fetch_grok_x(xai_key: str, run_index: int) -> str | None:
@@ -564,6 +563,19 @@ def fetch_grok_x(xai_key: str, run_index: int) -> str | None:
 # Layer 0: メイン収集
 # =============================================================================
 
+async def _collect_sources(collector: FeedCollector, subs: list[dict]) -> tuple:
+    """Layer 0 の HTTP ソースを1つのイベントループでまとめて取得。"""
+    rss_lists, reddit_lists, hn, github = await asyncio.gather(
+        asyncio.gather(*(fetch_rss(collector, feed) for feed in RSS_FEEDS)),
+        asyncio.gather(*(fetch_reddit(collector, sub) for sub in subs)),
+        fetch_hn(collector, limit=50),
+        fetch_github(collector, GITHUB_REPOS),
+    )
+    rss = [item for items in rss_lists for item in items]
+    reddit = [post for posts in reddit_lists for post in posts]
+    return rss, reddit, hn, github
+
+
 def collect(keys: dict, grok_enabled: bool = False) -> dict:
     """全ソースからデータを収集してJSONに保存。"""
     log("=== Layer 0: データ収集開始 ===")
@@ -578,30 +590,28 @@ def collect(keys: dict, grok_enabled: bool = False) -> dict:
         "grok_x": None,
     }
 
-    # RSS
-    log("RSS フィード収集中...")
-    for feed in RSS_FEEDS:
-        items = fetch_rss(feed)
-        raw_data["rss"].extend(items)
-        time.sleep(0.5)
-
-    # Reddit（30分ごと収集ではサブセットのみ）
-    log("Reddit 収集中...")
+    # RSS / Reddit / HN / GitHub を並列収集（間隔はホスト単位で HostRateLimiter が管理）
     hour = ts.hour
-    # 奇数時間はAIツール系、偶数時間は収益系を優先
     subs_to_collect = SUBREDDITS if grok_enabled else SUBREDDITS[:8]
-    for sub in subs_to_collect:
-        posts = fetch_reddit(sub)
-        raw_data["reddit"].extend(posts)
-        time.sleep(1.0)
-
-    # Hacker News
-    log("HN 収集中...")
-    raw_data["hn"] = fetch_hn(limit=50)
-
-    # GitHub（3時間ごと = synth と同タイミング想定）
-    log("GitHub 収集中...")
-    raw_data["github"] = fetch_github(GITHUB_REPOS)
+    log(f"並列収集中: RSS {len(RSS_FEEDS)} / Reddit {len(subs_to_collect)} / HN / GitHub {len(GITHUB_REPOS)}")
+    cache = CollectorCache(COLLECTOR_CACHE_FILE)
+    collector = FeedCollector(cache)
+    started = time.monotonic()
+    try:
+        rss, reddit, hn, github = asyncio.run(_collect_sources(collector, subs_to_collect))
+    finally:
+        collector.close()
+
+    # ソース横断・実行間の重複排除（同じ URL は最初に出たソースだけ残し、first_seen を付与）
+    seen_in_run: set = set()
+    raw_data["github"] = github
+    raw_data["rss"] = collector.dedupe(rss, seen_in_run=seen_in_run)
+    raw_data["hn"] = collector.dedupe(hn, seen_in_run=seen_in_run)
+    raw_data["reddit"] = collector.dedupe(reddit, seen_in_run=seen_in_run)
+    cache.save()
+    stats = collector.stats
+    log(f"  並列収集: {time.monotonic() - started:.1f}秒 / リクエスト {stats['requests']} "
+        f"(304: {stats['not_modified']}, エラー: {stats['errors']})")
 
     # Grok X（6時間ごと、フラグがある時のみ）
     if grok_enabled and keys.get("xai"):
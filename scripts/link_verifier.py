@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""Cached, concurrent outbound link verification.
+
+Used by prediction_page_builder.check_links_in_html() before every tracker
+deploy. Instead of HEAD/GETting every link with 4 threads and no memory:
+
+- Results are persisted in a JSON cache with a TTL per status class
+  (live links for hours, 404/410 for minutes, transient errors never).
+- Expired live entries are revalidated with conditional requests
+  (If-None-Match / If-Modified-Since); a 304 refreshes the entry cheaply.
+- URLs already proven live locally — published Ghost posts from the Ghost DB
+  and URLs listed in the site sitemap — are answered without a request.
+- The rest are probed from asyncio tasks with a per-host concurrency limit
+  over pooled keep-alive http.client connections.
+
+Usage:
+  python3 link_verifier.py https://nowpattern.com/predictions/ ...
+  python3 link_verifier.py --stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import queue
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+from typing import Callable, Iterable, Optional
+
+DEFAULT_CACHE_PATH = "/opt/shared/polymarket/link_check_cache.json"
+CACHE_VERSION = 1
+
+# TTL（秒）per status class. 0 = never served from cache.
+TTL_LIVE = 12 * 3600        # 2xx / 3xx
+TTL_GONE = 10 * 60          # 404 / 410 — short so a fixed link unblocks quickly
+TTL_ERROR = 0               # 5xx / timeouts / connection errors
+
+PER_HOST_LIMIT = 8
+TOTAL_LIMIT = 32
+# (method, timeout) attempts; a timeout earns one slower GET at the end
+PROBE_PLAN = (("HEAD", 10), ("GET", 20))
+SLOW_RETRY_TIMEOUT = 45
+MAX_REDIRECTS = 5
+USER_AGENT = "nowpattern-linkchecking/1.0"
+
+# fetcher(url, method, headers, timeout) -> (status, response_headers)
+Fetcher = Callable[[str, str, dict, float], "tuple[int, dict]"]
+# body_fetcher(url, headers) -> (status, response_headers, body) — sitemaps only
+BodyFetcher = Callable[[str, dict], "tuple[int, dict, Optional[bytes]]"]
+
+
+def normalize_url(url: str) -> str:
+    """Drop the fragment (never sent to the server) so #anchors share one check."""
+    return urllib.parse.urldefrag((url or "").strip())[0]
+
+
+def _proof_key(url: str) -> str:
+    parts = urllib.parse.urlsplit(normalize_url(url))
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+def status_ttl(status) -> int:
+    if isinstance(status, int) and status < 400:
+        return TTL_LIVE
+    if status in (404, 410):
+        return TTL_GONE
+    return TTL_ERROR
+
+
+def is_live(status) -> bool:
+    return isinstance(status, int) and status < 400
+
+
+class _ConnectionPool:
+    """Keep-alive http.client connections, one LIFO queue per (scheme, host)."""
+
+    def __init__(self, ssl_context: ssl.SSLContext, per_host: int = PER_HOST_LIMIT):
+        self.ssl_context = ssl_context
+        self.per_host = per_host
+        self._pools: dict[tuple[str, str], queue.LifoQueue] = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, key: tuple[str, str]) -> queue.LifoQueue:
+        with self._lock:
+            return self._pools.setdefault(key, queue.LifoQueue(maxsize=self.per_host))
+
+    def request(self, url: str, method: str, headers: dict, timeout: float) -> tuple[int, dict]:
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        pool = self._queue(key)
+        try:
+            conn = pool.get_nowait()
+        except queue.Empty:
+            if parts.scheme == "https":
+                conn = http.client.HTTPSConnection(parts.netloc, timeout=timeout, context=self.ssl_context)
+            else:
+                conn = http.client.HTTPConnection(parts.netloc, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        try:
+            conn.request(method, path, headers={"User-Agent": USER_AGENT, **headers})
+            resp = conn.getresponse()
+            resp.read()  # drain so the connection can be reused
+            result = (resp.status, {k.lower(): v for k, v in resp.getheaders()})
+        except Exception:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            try:
+                pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return result
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+def _http_get_body(url: str, headers: dict, ssl_context: ssl.SSLContext) -> tuple[int, dict, bytes]:
+    """Plain GET with body (sitemaps: a handful of requests, no pooling needed)."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme == "https":
+        conn = http.client.HTTPSConnection(parts.netloc, timeout=PROBE_PLAN[-1][1], context=ssl_context)
+    else:
+        conn = http.client.HTTPConnection(parts.netloc, timeout=PROBE_PLAN[-1][1])
+    try:
+        conn.request("GET", parts.path or "/", headers={"User-Agent": USER_AGENT, **headers})
+        resp = conn.getresponse()
+        return resp.status, {k.lower(): v for k, v in resp.getheaders()}, resp.read()
+    finally:
+        conn.close()
+
+
+class LinkVerifier:
+    """Verify URLs with a persisted result cache, local proofs and pooled probes."""
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+        live_urls: Iterable[str] = (),
+        sitemap_url: str = "",
+        fetcher: Optional[Fetcher] = None,
+        body_fetcher: Optional[BodyFetcher] = None,
+        per_host_limit: int = PER_HOST_LIMIT,
+        total_limit: int = TOTAL_LIMIT,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.cache_path = cache_path
+        self.per_host_limit = per_host_limit
+        self.total_limit = total_limit
+        self.clock = clock
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        self._pool = None if fetcher else _ConnectionPool(ctx, per_host_limit)
+        self.fetcher: Fetcher = fetcher or self._pool.request
+        self.body_fetcher: BodyFetcher = body_fetcher or (lambda url, headers: _http_get_body(url, headers, ctx))
+        self._stats_lock = threading.Lock()
+        self.entries: dict[str, dict] = {}
+        self.sitemaps: dict[str, dict] = {}
+        self.stats = {"cached": 0, "local": 0, "revalidated": 0, "fetched": 0}
+        self._load_cache()
+        self._proven = {_proof_key(url) for url in live_urls if url}
+        if sitemap_url:
+            self._proven.update(_proof_key(url) for url in self.sitemap_urls(sitemap_url))
+
+    # ── persistence ──────────────────────────────────────────────
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        self.entries = data.get("entries") or {}
+        self.sitemaps = data.get("sitemaps") or {}
+
+    def save(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries, "sitemaps": self.sitemaps},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+
+    # ── sitemap proofs ───────────────────────────────────────────
+    def _conditional_headers(self, entry: Optional[dict]) -> dict:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def sitemap_urls(self, sitemap_url: str, _depth: int = 0) -> list[str]:
+        """All <loc> URLs of a sitemap (index), refreshed with conditional GETs."""
+        if _depth > 2:
+            return []
+        cached = self.sitemaps.get(sitemap_url)
+        body = None
+        try:
+            status, headers, body = self.body_fetcher(sitemap_url, self._conditional_headers(cached))
+        except Exception:
+            status, headers = None, {}
+        if status == 304 and cached:
+            locs, children = cached.get("urls", []), cached.get("children", [])
+        elif status == 200 and body is not None:
+            try:
+                root = ET.fromstring(body)
+            except ET.ParseError:
+                return cached.get("urls", []) if cached else []
+            ns = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+            is_index = root.tag.endswith("sitemapindex")
+            found = [el.text.strip() for el in root.iter(f"{ns}loc") if el.text]
+            locs, children = ([], found) if is_index else (found, [])
+            self.sitemaps[sitemap_url] = {
+                "etag": headers.get("etag", ""),
+                "last_modified": headers.get("last-modified", ""),
+                "urls": locs,
+                "children": children,
+            }
+        else:
+            return cached.get("urls", []) if cached else []
+        urls = list(locs)
+        for child in children:
+            urls.extend(self.sitemap_urls(child, _depth + 1))
+        return urls
+
+    # ── probing ──────────────────────────────────────────────────
+    def _probe(self, url: str, method: str, headers: dict, timeout: float) -> tuple[int, dict]:
+        """One request, following redirects so a 301 -> 404 still counts as broken.
+
+        A redirect chain longer than MAX_REDIRECTS raises, so check_one reports
+        it as an error (never cached) instead of a live status.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            status, resp_headers = self.fetcher(url, method, headers, timeout)
+            location = resp_headers.get("location")
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                headers = {}
+                continue
+            return status, resp_headers
+        raise http.client.HTTPException(f"Too many redirects (>{MAX_REDIRECTS})")
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def check_one(self, url: str, entry: Optional[dict]) -> dict:
+        """Probe one URL (HEAD, then GET, then one slow GET if anything timed out)."""
+        conditional = self._conditional_headers(entry) if entry and is_live(entry.get("status")) else {}
+        last_error = None
+        saw_timeout = False
+        for attempt, (method, timeout) in enumerate(PROBE_PLAN + (("GET", SLOW_RETRY_TIMEOUT),)):
+            if attempt >= len(PROBE_PLAN) and not saw_timeout:
+                break
+            try:
+                status, headers = self._probe(url, method, conditional, timeout)
+            except Exception as e:
+                last_error = str(e) or e.__class__.__name__
+                if isinstance(e, TimeoutError) or "timed out" in last_error.lower():
+                    saw_timeout = True
+                continue
+            if status == 304 and entry:
+                self._count("revalidated")
+                return {**entry, "checked_at": self.clock()}
+            if status < 400 or status in (404, 410):
+                self._count("fetched")
+                return {
+                    "status": status,
+                    "checked_at": self.clock(),
+                    "etag": headers.get("etag", ""),
+                    "last_modified": headers.get("last-modified", ""),
+                }
+            last_error = f"HTTP Error {status}"
+        self._count("fetched")
+        return {"status": last_error or "Unknown link check error", "checked_at": self.clock()}
+
+    async def _check_all(self, urls: list[str]) -> dict[str, dict]:
+        total = asyncio.Semaphore(self.total_limit)
+        per_host: dict[str, asyncio.Semaphore] = {}
+
+        async def run(url: str):
+            host = urllib.parse.urlsplit(url).netloc
+            sem = per_host.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+            async with total, sem:
+                return url, await asyncio.to_thread(self.check_one, url, self.entries.get(url))
+
+        return dict(await asyncio.gather(*(run(url) for url in urls)))
+
+    def verify(self, urls: Iterable[str]) -> dict[str, object]:
+        """Return {normalized url: status int or error string} and persist the cache."""
+        now = self.clock()
+        results: dict[str, object] = {}
+        to_probe: list[str] = []
+        for url in dict.fromkeys(normalize_url(u) for u in urls if u):
+            entry = self.entries.get(url)
+            # Ghost DB / sitemap の証明はキャッシュ（古い 404 など）より優先
+            if _proof_key(url) in self._proven:
+                self.stats["local"] += 1
+                results[url] = 200
+            elif entry and now - entry.get("checked_at", 0) < status_ttl(entry.get("status")):
+                self.stats["cached"] += 1
+                results[url] = entry["status"]
+            else:
+                to_probe.append(url)
+        if to_probe:
+            fresh = asyncio.run(self._check_all(to_probe))
+            for url, entry in fresh.items():
+                results[url] = entry["status"]
+                if status_ttl(entry["status"]):
+                    self.entries[url] = entry
+                else:
+                    self.entries.pop(url, None)
+        self.save()
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached link verification")
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--stats", action="store_true", help="キャッシュの状態を表示")
+    args = parser.parse_args()
+
+    verifier = LinkVerifier(cache_path=args.cache)
+    if args.stats:
+        now = time.time()
+        fresh = sum(1 for e in verifier.entries.values() if now - e.get("checked_at", 0) < status_ttl(e.get("status")))
+        print(f"entries={len(verifier.entries)} fresh={fresh} sitemaps={len(verifier.sitemaps)}")
+        return
+    results = verifier.verify(args.urls)
+    verifier.close()
+    for url, status in sorted(results.items()):
+        print(f"{'OK  ' if is_live(status) else 'FAIL'} {status} {url}")
+    print(json.dumps(verifier.stats))
+    sys.exit(0 if all(is_live(s) for s in results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Persistent n-gram blocking index over market_history.db markets.
+
+prediction_resolver.auto_link_predictions() scores a prediction against a
+market by checking which of its keywords occur as substrings of
+"question event_title". Scanning every unresolved market for every open
+prediction is O(predictions × markets); this index makes it proportional to
+the markets that actually contain a keyword.
+
+- market_ngrams(gram, market_id): character trigrams of the lower-cased
+  market text, padded with one space on each side. A keyword of length >= 3
+  can only be a substring if all its trigrams are present; a 2-character
+  keyword must be the prefix of some trigram (range scan on the primary key).
+  Candidates are then verified with the real substring test, so scores are
+  exactly those of the linear scan.
+- market_index_state(market_id, source_text): the text each market was
+  indexed from. update() re-indexes only markets whose question/event title
+  changed, so the crawler can call it after every batch of upserts.
+
+Usage:
+  python3 market_candidate_index.py --update      # index new/changed markets
+  python3 market_candidate_index.py --rebuild
+  python3 market_candidate_index.py --query "Fed rate cut"
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from typing import Iterable, Optional
+
+DEFAULT_DB_PATH = "/opt/shared/market_history/market_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS market_ngrams (
+    gram        TEXT NOT NULL,
+    market_id   INTEGER NOT NULL,
+    PRIMARY KEY (gram, market_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_market_ngrams_market ON market_ngrams(market_id);
+
+CREATE TABLE IF NOT EXISTS market_index_state (
+    market_id   INTEGER PRIMARY KEY,
+    source_text TEXT NOT NULL
+);
+"""
+
+# markets 行から索引対象テキストを作る SQL 式（Python 側の market_text と同じ内容）
+_SOURCE_TEXT_SQL = "m.question || ' ' || COALESCE(m.event_title, '')"
+
+
+def market_text(question: str, event_title: Optional[str]) -> str:
+    """_score_market_match と同じ照合対象テキスト"""
+    return f"{question} {event_title or ''}".lower()
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+
+
+def update(conn: sqlite3.Connection, market_ids: Optional[Iterable[int]] = None) -> int:
+    """テキストが未索引/変更済みの市場だけ n-gram を作り直す
+
+    呼び出し側のトランザクション内で動く（DDL は ensure_schema() で事前に作成しておく）。
+    """
+    sql = f"""
+        SELECT m.id, m.question, m.event_title, {_SOURCE_TEXT_SQL} AS source_text
+        FROM markets m
+        LEFT JOIN market_index_state s ON s.market_id = m.id
+        WHERE (s.market_id IS NULL OR s.source_text != {_SOURCE_TEXT_SQL})
+    """
+    if market_ids is None:
+        rows = conn.execute(sql).fetchall()
+    else:
+        ids = sorted(set(market_ids))
+        rows = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows.extend(conn.execute(f"{sql} AND m.id IN ({','.join('?' * len(chunk))})", chunk).fetchall())
+    if not rows:
+        return 0
+    stale = [(row[0],) for row in rows]
+    conn.executemany("DELETE FROM market_ngrams WHERE market_id = ?", stale)
+    conn.executemany(
+        "INSERT OR IGNORE INTO market_ngrams (gram, market_id) VALUES (?, ?)",
+        ((gram, row[0]) for row in rows for gram in trigrams(market_text(row[1], row[2]))),
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO market_index_state (market_id, source_text) VALUES (?, ?)",
+        ((row[0], row[3]) for row in rows),
+    )
+    return len(rows)
+
+
+def rebuild(conn: sqlite3.Connection) -> int:
+    ensure_schema(conn)
+    conn.execute("DELETE FROM market_ngrams")
+    conn.execute("DELETE FROM market_index_state")
+    return update(conn)
+
+
+class CandidateMatcher:
+    """One linker run: keyword -> matching market ids, cached across predictions.
+
+    Open markets are ranked like the original scan (last_updated DESC), so the
+    best match for a prediction is the same market the linear loop picked.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._keyword_hits: dict[str, frozenset] = {}
+        self._markets: dict[int, dict] = {}
+        self.stats = {"keywords": 0, "candidates": 0}
+
+    def _load_markets(self, ids: Iterable[int]):
+        missing = sorted(set(ids) - self._markets.keys())
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            for row in self.conn.execute(f"""
+                SELECT id, source, external_id, question, event_title, close_date, resolved, last_updated
+                FROM markets WHERE id IN ({','.join('?' * len(chunk))})
+            """, chunk):
+                self._markets[row[0]] = {
+                    "id": row[0], "source": row[1], "external_id": row[2], "question": row[3],
+                    "event_title": row[4], "close_date": row[5], "resolved": row[6], "last_updated": row[7],
+                    "text": market_text(row[3], row[4]),
+                }
+
+    def _grams_candidates(self, keyword: str) -> set[int]:
+        if len(keyword) >= 3:
+            grams = sorted({keyword[i:i + 3] for i in range(len(keyword) - 2)})
+            rows = self.conn.execute(f"""
+                SELECT market_id FROM market_ngrams
+                WHERE gram IN ({','.join('?' * len(grams))})
+                GROUP BY market_id HAVING COUNT(*) = ?
+            """, (*grams, len(grams))).fetchall()
+        else:
+            # 2文字キーワード: そのキーワードで始まる trigram を持つ市場（先頭一致の範囲スキャン）
+            upper = keyword[:-1] + chr(ord(keyword[-1]) + 1)
+            rows = self.conn.execute(
+                "SELECT DISTINCT market_id FROM market_ngrams WHERE gram >= ? AND gram < ?",
+                (keyword, upper),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def markets_containing(self, keyword: str) -> frozenset:
+        """keyword を部分文字列として含む未解決市場の id（検証済み）"""
+        hits = self._keyword_hits.get(keyword)
+        if hits is None:
+            candidates = self._grams_candidates(keyword)
+            self._load_markets(candidates)
+            hits = frozenset(
+                mid for mid in candidates
+                if not self._markets[mid]["resolved"] and keyword in self._markets[mid]["text"]
+            )
+            self._keyword_hits[keyword] = hits
+            self.stats["keywords"] += 1
+        return hits
+
+    def top_candidates(self, keywords: set, limit: int = 5) -> list[tuple[dict, float]]:
+        """(market, score) をスコア降順（同点は last_updated 降順）で最大 limit 件"""
+        if not keywords:
+            return []
+        counts: dict[int, int] = {}
+        for kw in keywords:
+            for mid in self.markets_containing(kw):
+                counts[mid] = counts.get(mid, 0) + 1
+        self.stats["candidates"] += len(counts)
+        # 安定ソートを重ねる: id 昇順 → last_updated 降順 → 一致数 降順
+        ranked = sorted(counts.items())
+        ranked.sort(key=lambda item: self._markets[item[0]]["last_updated"] or "", reverse=True)
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return [(self._markets[mid], n / len(keywords)) for mid, n in ranked[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="market_history.db の n-gram 候補索引")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--update", action="store_true", help="新規/変更市場だけ索引")
+    parser.add_argument("--rebuild", action="store_true", help="索引を作り直す")
+    parser.add_argument("--query", help="キーワード（空白区切り）で候補を表示")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    ensure_schema(conn)
+    with conn:
+        if args.rebuild:
+            print(f"Indexed {rebuild(conn)} markets")
+        elif args.update or not args.query:
+            print(f"Indexed {update(conn)} new/changed markets")
+    if args.query:
+        matcher = CandidateMatcher(conn)
+        for market, score in matcher.top_candidates({w.lower() for w in args.query.split()}, limit=10):
+            print(f"{score:.2f}  #{market['id']} {market['question'][:70]}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,10 @@ market_history_crawler.py — Nowpattern 予測市場データ収集クローラ
   - Polymarket Gamma API からトップ市場の確率スナップショットを取得
   - Manifold Markets API からスナップショットを取得
   - SQLite market_history.db に保存（4テーブル構成）
+  - 両ソースのページを並列取得（同時実行数は CRAWL_WORKERS で制限）し、
+    ページ単位の executemany + チャンク化トランザクションで書き込む
+  - ページ完了ごとに crawl_checkpoints へ記録 → 中断しても同じ実行枠なら続きから再開
+  - --interval-minutes で日中スナップショット（intraday_snapshots）も記録
 
 DB: /opt/shared/market_history/market_history.db
 
@@ -17,17 +21,23 @@ DB: /opt/shared/market_history/market_history.db
   python3 market_history_crawler.py --init     # DBスキーマ初期化のみ
   python3 market_history_crawler.py --import-json  # 既存JSON履歴をDBに取り込む
   python3 market_history_crawler.py --status   # DB統計を表示
+  python3 market_history_crawler.py --interval-minutes 60 --poly-pages 10   # 毎時・10ページ
+  python3 market_history_crawler.py --fresh    # チェックポイントを無視して最初から
 """
 
 import argparse
 import json
 import os
+import queue
 import re
 import sqlite3
-from datetime import datetime, date, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta, timezone
 
 import requests
 
+import market_candidate_index
+
 # ── 設定 ────────────────────────────────────────────────────────────
 DB_DIR = "/opt/shared/market_history"
 DB_PATH = os.path.join(DB_DIR, "market_history.db")
@@ -40,6 +50,17 @@ MANIFOLD_API = "https://api.manifold.markets/v0"
 POLY_MAX_EVENTS = 100
 # Manifold: 1回あたり最大取得件数
 MANIFOLD_MAX = 100
+# 1回の実行で取得するページ数（ページ = 上記件数）
+POLY_MAX_PAGES = 5
+MANIFOLD_MAX_PAGES = 3
+# ページ取得の同時実行数（両ソース合計）
+CRAWL_WORKERS = 4
+# 1トランザクションあたりの最大書き込み行数
+WRITE_CHUNK = 500
+# 日中スナップショットの間隔（分）。1440 = 1日1回（従来動作）
+SNAPSHOT_INTERVAL_MIN = 1440
+# チェックポイントの保持日数
+CHECKPOINT_KEEP_DAYS = 7
 
 # ── DB 初期化 ─────────────────────────────────────────────────────
 
@@ -100,6 +121,82 @@ CREATE INDEX IF NOT EXISTS idx_snapshots_market   ON probability_snapshots(marke
 CREATE INDEX IF NOT EXISTS idx_snapshots_date     ON probability_snapshots(snapshot_date);
 CREATE INDEX IF NOT EXISTS idx_links_prediction   ON nowpattern_links(prediction_id);
 CREATE INDEX IF NOT EXISTS idx_news_market        ON news_events(market_id);
+CREATE INDEX IF NOT EXISTS idx_news_market_date   ON news_events(market_id, event_date);
+
+-- 日中スナップショット（snapshot_at = 実行枠の開始時刻 UTC ISO8601）。
+-- probability_snapshots はその日の最新値で上書きされる日次系列のまま。
+CREATE TABLE IF NOT EXISTS intraday_snapshots (
+    market_id       INTEGER NOT NULL REFERENCES markets(id),
+    snapshot_at     TEXT NOT NULL,
+    yes_prob        REAL,
+    no_prob         REAL,
+    volume          REAL,
+    PRIMARY KEY (market_id, snapshot_at)
+) WITHOUT ROWID;
+
+-- クロール進捗（run_key = 実行枠, page_key = Polymarket offset / Manifold ページ番号）
+CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+    run_key         TEXT NOT NULL,
+    source          TEXT NOT NULL,
+    page_key        TEXT NOT NULL,
+    next_cursor     TEXT,
+    rows_saved      INTEGER NOT NULL DEFAULT 0,
+    completed_at    TEXT NOT NULL,
+    PRIMARY KEY (run_key, source, page_key)
+);
+-- 時系列（スパークライン）読み出し用のカバリングインデックス
+CREATE INDEX IF NOT EXISTS idx_snapshots_series   ON probability_snapshots(market_id, snapshot_date, yes_prob);
+
+-- 市場ごとの最新スナップショット（probability_snapshots のトリガーで維持）
+CREATE TABLE IF NOT EXISTS latest_snapshot (
+    market_id       INTEGER PRIMARY KEY REFERENCES markets(id),
+    snapshot_date   TEXT NOT NULL,
+    yes_prob        REAL,
+    no_prob         REAL,
+    volume          REAL,
+    recorded_at     TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_latest_snapshot_insert
+AFTER INSERT ON probability_snapshots
+BEGIN
+    INSERT INTO latest_snapshot (market_id, snapshot_date, yes_prob, no_prob, volume, recorded_at)
+    VALUES (NEW.market_id, NEW.snapshot_date, NEW.yes_prob, NEW.no_prob, NEW.volume, NEW.recorded_at)
+    ON CONFLICT(market_id) DO UPDATE SET
+        snapshot_date = excluded.snapshot_date,
+        yes_prob      = excluded.yes_prob,
+        no_prob       = excluded.no_prob,
+        volume        = excluded.volume,
+        recorded_at   = excluded.recorded_at
+    WHERE excluded.snapshot_date >= latest_snapshot.snapshot_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_latest_snapshot_update
+AFTER UPDATE ON probability_snapshots
+BEGIN
+    INSERT INTO latest_snapshot (market_id, snapshot_date, yes_prob, no_prob, volume, recorded_at)
+    VALUES (NEW.market_id, NEW.snapshot_date, NEW.yes_prob, NEW.no_prob, NEW.volume, NEW.recorded_at)
+    ON CONFLICT(market_id) DO UPDATE SET
+        snapshot_date = excluded.snapshot_date,
+        yes_prob      = excluded.yes_prob,
+        no_prob       = excluded.no_prob,
+        volume        = excluded.volume,
+        recorded_at   = excluded.recorded_at
+    WHERE excluded.snapshot_date >= latest_snapshot.snapshot_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_latest_snapshot_delete
+AFTER DELETE ON probability_snapshots
+WHEN (SELECT snapshot_date FROM latest_snapshot WHERE market_id = OLD.market_id) = OLD.snapshot_date
+BEGIN
+    DELETE FROM latest_snapshot WHERE market_id = OLD.market_id;
+    INSERT INTO latest_snapshot (market_id, snapshot_date, yes_prob, no_prob, volume, recorded_at)
+    SELECT market_id, snapshot_date, yes_prob, no_prob, volume, recorded_at
+    FROM probability_snapshots
+    WHERE market_id = OLD.market_id
+    ORDER BY snapshot_date DESC
+    LIMIT 1;
+END;
 """
 
 
@@ -111,9 +208,29 @@ def get_db():
     return conn
 
 
+def rebuild_latest_snapshots(conn: sqlite3.Connection) -> int:
+    """latest_snapshot を probability_snapshots から作り直す（トリガー導入前のDB用・1回だけ）"""
+    conn.execute("DELETE FROM latest_snapshot")
+    conn.execute("""
+        INSERT INTO latest_snapshot (market_id, snapshot_date, yes_prob, no_prob, volume, recorded_at)
+        SELECT ps.market_id, ps.snapshot_date, ps.yes_prob, ps.no_prob, ps.volume, ps.recorded_at
+        FROM probability_snapshots ps
+        JOIN (
+            SELECT market_id, MAX(snapshot_date) AS snapshot_date
+            FROM probability_snapshots GROUP BY market_id
+        ) latest USING (market_id, snapshot_date)
+    """)
+    return conn.execute("SELECT COUNT(*) FROM latest_snapshot").fetchone()[0]
+
+
 def init_db():
     conn = get_db()
     conn.executescript(DDL)
+    market_candidate_index.ensure_schema(conn)
+    has_latest = conn.execute("SELECT 1 FROM latest_snapshot LIMIT 1").fetchone()
+    has_snapshots = conn.execute("SELECT 1 FROM probability_snapshots LIMIT 1").fetchone()
+    if has_snapshots and not has_latest:
+        print(f"Backfilled latest_snapshot: {rebuild_latest_snapshots(conn)} markets")
     conn.commit()
     conn.close()
     print(f"DB initialized: {DB_PATH}")
@@ -121,16 +238,21 @@ def init_db():
 
 # ── Polymarket 取得 ───────────────────────────────────────────────
 
+def fetch_polymarket_page(limit: int = POLY_MAX_EVENTS, offset: int = 0) -> list[dict]:
+    """Gamma API のアクティブなイベント1ページ（offset でページング）。失敗時は例外。"""
+    r = requests.get(
+        f"{POLYMARKET_GAMMA}/events",
+        params={"limit": limit, "offset": offset, "active": "true", "closed": "false"},
+        timeout=30,
+    )
+    r.raise_for_status()
+    return r.json()
+
+
 def fetch_polymarket_events(limit: int = POLY_MAX_EVENTS) -> list[dict]:
     """Gamma API からアクティブなイベントを取得する。"""
     try:
-        r = requests.get(
-            f"{POLYMARKET_GAMMA}/events",
-            params={"limit": limit, "active": "true", "closed": "false"},
-            timeout=30,
-        )
-        r.raise_for_status()
-        return r.json()
+        return fetch_polymarket_page(limit)
     except Exception as e:
         print(f"[WARN] Polymarket events fetch failed: {e}")
         return []
@@ -151,8 +273,8 @@ def fetch_polymarket_markets(limit: int = POLY_MAX_EVENTS) -> list[dict]:
         return []
 
 
-def upsert_polymarket(conn: sqlite3.Connection, event: dict, today_str: str):
-    """1イベントをDBに挿入/更新し、スナップショットを記録する。"""
+def parse_polymarket_event(event: dict) -> list[dict]:
+    """1イベントを市場行（markets + スナップショット値）のリストに変換する。"""
     event_id = str(event.get("id", ""))
     event_title = event.get("title", "")
     event_slug = event.get("slug", "")
@@ -161,18 +283,8 @@ def upsert_polymarket(conn: sqlite3.Connection, event: dict, today_str: str):
     genres_raw = event.get("tags", [])
     genres = json.dumps([g.get("slug", g) if isinstance(g, dict) else g for g in genres_raw])
 
-    markets = event.get("markets", [])
-    if not markets:
-        return 0
-
-    now_str = datetime.now(timezone.utc).isoformat()
-    saved = 0
-
-    for m in markets:
-        market_id_ext = str(m.get("id", ""))
-        question = m.get("question", "")
-        market_slug = m.get("slug", "")
-
+    rows = []
+    for m in event.get("markets", []) or []:
         # outcomePrices は "[\"0.72\", \"0.28\"]" のような文字列
         outcome_prices_raw = m.get("outcomePrices", "")
         outcomes_raw = m.get("outcomes", "")
@@ -193,121 +305,121 @@ def upsert_polymarket(conn: sqlite3.Connection, event: dict, today_str: str):
         if yes_prob is None and no_prob is None:
             continue
 
-        volume = float(m.get("volumeNum", 0) or 0)
-
-        # markets テーブル upsert
-        conn.execute("""
-            INSERT INTO markets
-                (source, external_id, event_id, question, event_title,
-                 market_slug, event_slug, genres, close_date, first_seen, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(source, external_id) DO UPDATE SET
-                last_updated = excluded.last_updated,
-                event_title  = excluded.event_title,
-                genres       = excluded.genres
-        """, ("polymarket", market_id_ext, event_id, question, event_title,
-              market_slug, event_slug, genres, end_date, now_str, now_str))
-
-        row = conn.execute(
-            "SELECT id FROM markets WHERE source=? AND external_id=?",
-            ("polymarket", market_id_ext)
-        ).fetchone()
-        if not row:
-            continue
-        db_id = row["id"]
-
-        # probability_snapshots upsert
-        conn.execute("""
-            INSERT INTO probability_snapshots
-                (market_id, snapshot_date, yes_prob, no_prob, volume, recorded_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ON CONFLICT(market_id, snapshot_date) DO UPDATE SET
-                yes_prob    = excluded.yes_prob,
-                no_prob     = excluded.no_prob,
-                volume      = excluded.volume,
-                recorded_at = excluded.recorded_at
-        """, (db_id, today_str, yes_prob, no_prob, volume, now_str))
-
-        # 前日比 ≥15% でnews_eventsフラグ
-        prev = conn.execute("""
-            SELECT yes_prob FROM probability_snapshots
-            WHERE market_id=? AND snapshot_date < ?
-            ORDER BY snapshot_date DESC LIMIT 1
-        """, (db_id, today_str)).fetchone()
-        if prev and prev["yes_prob"] is not None and yes_prob is not None:
-            change = (yes_prob - prev["yes_prob"]) * 100
-            if abs(change) >= 15:
-                conn.execute("""
-                    INSERT OR IGNORE INTO news_events
-                        (market_id, event_date, prev_prob, curr_prob, change_pct, recorded_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (db_id, today_str, prev["yes_prob"], yes_prob, round(change, 1), now_str))
-
-        saved += 1
-
-    return saved
-
-
-# ── Manifold 取得 ─────────────────────────────────────────────────
-
-def fetch_manifold_markets(limit: int = MANIFOLD_MAX) -> list[dict]:
-    """Manifold Markets から注目市場を取得する（BINARY型のみ）。"""
-    try:
-        r = requests.get(
-            f"{MANIFOLD_API}/markets",
-            params={"limit": limit, "sort": "last-bet-time"},
-            timeout=30,
-        )
-        r.raise_for_status()
-        markets = r.json()
-        # BINARY型のみ（probability フィールドあり）
-        return [m for m in markets if m.get("outcomeType") == "BINARY" and m.get("probability") is not None]
-    except Exception as e:
-        print(f"[WARN] Manifold fetch failed: {e}")
-        return []
-
-
-def upsert_manifold(conn: sqlite3.Connection, m: dict, today_str: str):
-    """1 Manifold 市場をDBに挿入/更新する。"""
-    market_id_ext = str(m.get("id", ""))
-    question = m.get("question", "")
-    market_slug = m.get("slug", "")
-    close_ts = m.get("closeTime", 0)
-    close_date = datetime.fromtimestamp(close_ts / 1000).strftime("%Y-%m-%d") if close_ts else None
-
-    # probability: BINARY markets have probability field directly
+        rows.append({
+            "source": "polymarket",
+            "external_id": str(m.get("id", "")),
+            "event_id": event_id,
+            "question": m.get("question", ""),
+            "event_title": event_title,
+            "market_slug": m.get("slug", ""),
+            "event_slug": event_slug,
+            "genres": genres,
+            "close_date": end_date,
+            "yes_prob": yes_prob,
+            "no_prob": no_prob,
+            "volume": float(m.get("volumeNum", 0) or 0),
+        })
+    return rows
+
+
+def parse_manifold_market(m: dict) -> list[dict]:
+    """1 Manifold 市場を市場行に変換する（BINARY 以外は空リスト）。"""
     prob = m.get("probability")
     if prob is None:
-        return 0
+        return []
+    close_ts = m.get("closeTime", 0)
+    question = m.get("question", "")
     yes_prob = float(prob)
-    no_prob = 1.0 - yes_prob
-    volume = float(m.get("volume", 0) or 0)
-
-    # Manifold にはタグがある
-    tags = m.get("tags", [])
-    genres = json.dumps(tags)
-
-    now_str = datetime.now(timezone.utc).isoformat()
-
-    conn.execute("""
+    return [{
+        "source": "manifold",
+        "external_id": str(m.get("id", "")),
+        "event_id": None,
+        "question": question,
+        "event_title": question,
+        "market_slug": m.get("slug", ""),
+        "event_slug": None,
+        # Manifold にはタグがある
+        "genres": json.dumps(m.get("tags", [])),
+        "close_date": datetime.fromtimestamp(close_ts / 1000).strftime("%Y-%m-%d") if close_ts else None,
+        "yes_prob": yes_prob,
+        "no_prob": 1.0 - yes_prob,
+        "volume": float(m.get("volume", 0) or 0),
+    }]
+
+
+_UPSERT_MARKET_SQL = {
+    # Polymarket はイベント名・タグが変わるので更新、Manifold は last_updated のみ（従来どおり）
+    "polymarket": """
         INSERT INTO markets
             (source, external_id, event_id, question, event_title,
              market_slug, event_slug, genres, close_date, first_seen, last_updated)
-        VALUES (?, ?, NULL, ?, ?, ?, NULL, ?, ?, ?, ?)
+        VALUES (:source, :external_id, :event_id, :question, :event_title,
+                :market_slug, :event_slug, :genres, :close_date, :now, :now)
+        ON CONFLICT(source, external_id) DO UPDATE SET
+            last_updated = excluded.last_updated,
+            event_title  = excluded.event_title,
+            genres       = excluded.genres
+    """,
+    "manifold": """
+        INSERT INTO markets
+            (source, external_id, event_id, question, event_title,
+             market_slug, event_slug, genres, close_date, first_seen, last_updated)
+        VALUES (:source, :external_id, :event_id, :question, :event_title,
+                :market_slug, :event_slug, :genres, :close_date, :now, :now)
         ON CONFLICT(source, external_id) DO UPDATE SET
             last_updated = excluded.last_updated
-    """, ("manifold", market_id_ext, question, question,
-          market_slug, genres, close_date, now_str, now_str))
-
-    row = conn.execute(
-        "SELECT id FROM markets WHERE source=? AND external_id=?",
-        ("manifold", market_id_ext)
-    ).fetchone()
-    if not row:
-        return 0
-    db_id = row["id"]
+    """,
+}
 
-    conn.execute("""
+
+def write_market_rows(conn: sqlite3.Connection, rows: list[dict], today_str: str,
+                      snapshot_at: str = None) -> int:
+    """市場行をまとめて upsert する（executemany、呼び出し側のトランザクション内）。
+
+    - markets: source ごとに executemany（新規/改題市場は market_candidate_index にも反映）
+    - probability_snapshots: その日の最新値で upsert（latest_snapshot はトリガーで追従）
+    - intraday_snapshots: snapshot_at 指定時のみ、実行枠ごとに1行
+    - news_events: Polymarket 市場が前日以前の最新値から ≥15% 動いたら、1市場1日1件まで記録
+    """
+    if not rows:
+        return 0
+    now_str = datetime.now(timezone.utc).isoformat()
+    by_source: dict[str, list[dict]] = {}
+    for row in rows:
+        by_source.setdefault(row["source"], []).append(dict(row, now=now_str))
+
+    snapshot_rows = []
+    for source, source_rows in by_source.items():
+        conn.executemany(_UPSERT_MARKET_SQL[source], source_rows)
+        ids = {}
+        ext_ids = [r["external_id"] for r in source_rows]
+        for start in range(0, len(ext_ids), 500):
+            chunk = ext_ids[start:start + 500]
+            ids.update(conn.execute(
+                f"SELECT external_id, id FROM markets WHERE source = ? AND external_id IN ({','.join('?' * len(chunk))})",
+                (source, *chunk),
+            ).fetchall())
+        snapshot_rows.extend((ids[r["external_id"]], r) for r in source_rows if r["external_id"] in ids)
+    if not snapshot_rows:
+        return 0
+    # 自動リンク用の n-gram 候補索引（質問/イベント名が変わった市場だけ）
+    market_candidate_index.update(conn, [db_id for db_id, _ in snapshot_rows])
+
+    # 前日比判定用: 今日より前の最新値（書き込み前に取得）
+    market_ids = [db_id for db_id, _ in snapshot_rows]
+    prev_probs = {}
+    for start in range(0, len(market_ids), 500):
+        chunk = market_ids[start:start + 500]
+        prev_probs.update(conn.execute(f"""
+            SELECT ps.market_id, ps.yes_prob FROM probability_snapshots ps
+            WHERE ps.market_id IN ({','.join('?' * len(chunk))})
+              AND ps.snapshot_date = (
+                  SELECT MAX(snapshot_date) FROM probability_snapshots
+                  WHERE market_id = ps.market_id AND snapshot_date < ?
+              )
+        """, (*chunk, today_str)).fetchall())
+
+    conn.executemany("""
         INSERT INTO probability_snapshots
             (market_id, snapshot_date, yes_prob, no_prob, volume, recorded_at)
         VALUES (?, ?, ?, ?, ?, ?)
@@ -316,9 +428,72 @@ def upsert_manifold(conn: sqlite3.Connection, m: dict, today_str: str):
             no_prob     = excluded.no_prob,
             volume      = excluded.volume,
             recorded_at = excluded.recorded_at
-    """, (db_id, today_str, yes_prob, no_prob, volume, now_str))
+    """, [(db_id, today_str, r["yes_prob"], r["no_prob"], r["volume"], now_str) for db_id, r in snapshot_rows])
+
+    if snapshot_at:
+        conn.executemany("""
+            INSERT INTO intraday_snapshots (market_id, snapshot_at, yes_prob, no_prob, volume)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(market_id, snapshot_at) DO UPDATE SET
+                yes_prob = excluded.yes_prob,
+                no_prob  = excluded.no_prob,
+                volume   = excluded.volume
+        """, [(db_id, snapshot_at, r["yes_prob"], r["no_prob"], r["volume"]) for db_id, r in snapshot_rows])
+
+    # 前日比 ≥15% でnews_eventsフラグ
+    news_rows = []
+    for db_id, r in snapshot_rows:
+        prev = prev_probs.get(db_id)
+        if r["source"] != "polymarket" or prev is None or r["yes_prob"] is None:
+            continue
+        change = (r["yes_prob"] - prev) * 100
+        if abs(change) >= 15:
+            news_rows.append((db_id, today_str, prev, r["yes_prob"], round(change, 1), now_str, db_id, today_str))
+    if news_rows:
+        conn.executemany("""
+            INSERT INTO news_events
+                (market_id, event_date, prev_prob, curr_prob, change_pct, recorded_at)
+            SELECT ?, ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM news_events WHERE market_id = ? AND event_date = ?)
+        """, news_rows)
 
-    return 1
+    return len(snapshot_rows)
+
+
+def upsert_polymarket(conn: sqlite3.Connection, event: dict, today_str: str):
+    """1イベントをDBに挿入/更新し、スナップショットを記録する。"""
+    return write_market_rows(conn, parse_polymarket_event(event), today_str)
+
+
+# ── Manifold 取得 ─────────────────────────────────────────────────
+
+def fetch_manifold_page(limit: int = MANIFOLD_MAX, before: str = None) -> list[dict]:
+    """Manifold Markets の1ページ（全型）。before = 前ページ最後の市場ID。失敗時は例外。"""
+    params = {"limit": limit, "sort": "last-bet-time"}
+    if before:
+        params["before"] = before
+    r = requests.get(f"{MANIFOLD_API}/markets", params=params, timeout=30)
+    r.raise_for_status()
+    return r.json()
+
+
+def _binary_only(markets: list[dict]) -> list[dict]:
+    # BINARY型のみ（probability フィールドあり）
+    return [m for m in markets if m.get("outcomeType") == "BINARY" and m.get("probability") is not None]
+
+
+def fetch_manifold_markets(limit: int = MANIFOLD_MAX) -> list[dict]:
+    """Manifold Markets から注目市場を取得する（BINARY型のみ）。"""
+    try:
+        return _binary_only(fetch_manifold_page(limit))
+    except Exception as e:
+        print(f"[WARN] Manifold fetch failed: {e}")
+        return []
+
+
+def upsert_manifold(conn: sqlite3.Connection, m: dict, today_str: str):
+    """1 Manifold 市場をDBに挿入/更新する。"""
+    return write_market_rows(conn, parse_manifold_market(m), today_str)
 
 
 # ── 既存JSON履歴の取り込み ─────────────────────────────────────────
@@ -405,6 +580,7 @@ def print_status(conn: sqlite3.Connection):
     n_poly = conn.execute("SELECT COUNT(*) FROM markets WHERE source='polymarket'").fetchone()[0]
     n_manifold = conn.execute("SELECT COUNT(*) FROM markets WHERE source='manifold'").fetchone()[0]
     n_snaps = conn.execute("SELECT COUNT(*) FROM probability_snapshots").fetchone()[0]
+    n_intraday = conn.execute("SELECT COUNT(*) FROM intraday_snapshots").fetchone()[0]
     n_links = conn.execute("SELECT COUNT(*) FROM nowpattern_links").fetchone()[0]
     n_news = conn.execute("SELECT COUNT(*) FROM news_events").fetchone()[0]
     min_date = conn.execute("SELECT MIN(snapshot_date) FROM probability_snapshots").fetchone()[0]
@@ -413,44 +589,133 @@ def print_status(conn: sqlite3.Connection):
     print(f"""
 === market_history.db ===
 Markets:      {n_markets} (Polymarket: {n_poly}, Manifold: {n_manifold})
-Snapshots:    {n_snaps} ({min_date} → {max_date})
+Snapshots:    {n_snaps} ({min_date} → {max_date}), intraday: {n_intraday}
 Links:        {n_links} (nowpattern articles ↔ markets)
 News events:  {n_news} (≥15% probability changes)
 """)
 
 
-def run_crawler():
-    """通常実行: Polymarket + Manifold から今日のスナップショットを取得。"""
-    today_str = date.today().isoformat()
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting crawl for {today_str}")
+def crawl_slot(now: datetime, interval_min: int = SNAPSHOT_INTERVAL_MIN) -> tuple[str, str]:
+    """(snapshot_date, run_key) を返す。run_key = 実行枠の開始時刻（UTC）"""
+    now = now.astimezone(timezone.utc)
+    interval_min = max(1, min(interval_min, 1440))
+    minute_of_day = now.hour * 60 + now.minute
+    slot_start = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(
+        minutes=minute_of_day - minute_of_day % interval_min)
+    return now.date().isoformat(), slot_start.strftime("%Y-%m-%dT%H:%MZ")
 
-    conn = get_db()
 
-    # --- Polymarket ---
-    print("Fetching Polymarket events...")
-    events = fetch_polymarket_events()
-    print(f"  Got {len(events)} events")
+def _load_checkpoints(conn: sqlite3.Connection, run_key: str) -> dict:
+    done = {"polymarket": {}, "manifold": {}}
+    for row in conn.execute(
+        "SELECT source, page_key, next_cursor FROM crawl_checkpoints WHERE run_key = ?", (run_key,)
+    ):
+        done.setdefault(row["source"], {})[row["page_key"]] = row["next_cursor"]
+    return done
 
-    poly_saved = 0
-    for event in events:
-        poly_saved += upsert_polymarket(conn, event, today_str)
-    conn.commit()
-    print(f"  Saved {poly_saved} Polymarket market snapshots")
 
-    # --- Manifold ---
-    print("Fetching Manifold markets...")
-    manifold_markets = fetch_manifold_markets()
-    print(f"  Got {len(manifold_markets)} markets")
+def _write_page(conn: sqlite3.Connection, rows: list[dict], today_str: str, snapshot_at: str,
+                run_key: str, source: str, page_key: str, next_cursor: str) -> int:
+    """1ページ分を WRITE_CHUNK 行ずつのトランザクションで書き込み、最後にチェックポイントを記録"""
+    saved = 0
+    for start in range(0, max(len(rows), 1), WRITE_CHUNK):
+        chunk = rows[start:start + WRITE_CHUNK]
+        last_chunk = start + WRITE_CHUNK >= len(rows)
+        with conn:  # BEGIN ... COMMIT（例外時は ROLLBACK）
+            saved += write_market_rows(conn, chunk, today_str, snapshot_at)
+            if last_chunk:
+                conn.execute("""
+                    INSERT OR REPLACE INTO crawl_checkpoints
+                        (run_key, source, page_key, next_cursor, rows_saved, completed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (run_key, source, page_key, next_cursor, saved, datetime.now(timezone.utc).isoformat()))
+    return saved
 
-    mf_saved = 0
-    for m in manifold_markets:
-        mf_saved += upsert_manifold(conn, m, today_str)
-    conn.commit()
-    print(f"  Saved {mf_saved} Manifold market snapshots")
+
+def run_crawler(poly_pages: int = POLY_MAX_PAGES, manifold_pages: int = MANIFOLD_MAX_PAGES,
+                interval_min: int = SNAPSHOT_INTERVAL_MIN, workers: int = CRAWL_WORKERS,
+                fresh: bool = False, now: datetime = None):
+    """通常実行: Polymarket + Manifold のページを並列取得し、今の実行枠のスナップショットを保存。
+
+    - Polymarket は offset ページを並列に、Manifold は before カーソルを順にたどる
+      （Manifold 全体で1ワーカー）。取得はワーカースレッド、書き込みはこのスレッドのみ。
+    - 完了ページは crawl_checkpoints に記録。同じ実行枠で再実行すると未完了ページだけ取得する。
+    """
+    now = now or datetime.now(timezone.utc)
+    today_str, run_key = crawl_slot(now, interval_min)
+    snapshot_at = run_key if interval_min < 1440 else None
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting crawl for {today_str} (run {run_key})")
+
+    conn = get_db()
+    if fresh:
+        with conn:
+            conn.execute("DELETE FROM crawl_checkpoints WHERE run_key = ?", (run_key,))
+    with conn:
+        cutoff = (now - timedelta(days=CHECKPOINT_KEEP_DAYS)).strftime("%Y-%m-%dT%H:%MZ")
+        conn.execute("DELETE FROM crawl_checkpoints WHERE run_key < ?", (cutoff,))
+    done = _load_checkpoints(conn, run_key)
+    if any(done.values()):
+        print(f"  Resuming: {len(done['polymarket'])} Polymarket + {len(done['manifold'])} Manifold pages already saved")
+
+    pages: queue.Queue = queue.Queue()
+    _DONE = object()
+
+    def poly_page(offset: int):
+        try:
+            events = fetch_polymarket_page(POLY_MAX_EVENTS, offset)
+            rows = [row for event in events for row in parse_polymarket_event(event)]
+            pages.put(("polymarket", str(offset), None, rows, len(events)))
+        except Exception as e:
+            print(f"[WARN] Polymarket page offset={offset} failed: {e}")
+        finally:
+            pages.put(_DONE)
+
+    def walk_manifold():
+        # 完了済みページの続きから（最後に完了したページの next_cursor）
+        try:
+            done_pages = sorted(int(k) for k in done["manifold"])
+            page, cursor = 0, None
+            while page in done_pages:
+                cursor = done["manifold"][str(page)]
+                page += 1
+            while page < manifold_pages:
+                markets = fetch_manifold_page(MANIFOLD_MAX, cursor)
+                if not markets:
+                    break
+                cursor = markets[-1].get("id")
+                rows = [row for m in _binary_only(markets) for row in parse_manifold_market(m)]
+                pages.put(("manifold", str(page), cursor, rows, len(markets)))
+                page += 1
+        except Exception as e:
+            print(f"[WARN] Manifold page fetch failed: {e}")
+        finally:
+            pages.put(_DONE)
+
+    tasks = [offset for offset in range(0, poly_pages * POLY_MAX_EVENTS, POLY_MAX_EVENTS)
+             if str(offset) not in done["polymarket"]]
+    saved = {"polymarket": 0, "manifold": 0}
+    fetched = {"polymarket": 0, "manifold": 0}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = 1 + len(tasks)
+        pool.submit(walk_manifold)
+        for offset in tasks:
+            pool.submit(poly_page, offset)
+        while pending:
+            item = pages.get()
+            if item is _DONE:
+                pending -= 1
+                continue
+            source, page_key, cursor, rows, n_items = item
+            fetched[source] += n_items
+            saved[source] += _write_page(conn, rows, today_str, snapshot_at, run_key, source, page_key, cursor)
+
+    print(f"  Got {fetched['polymarket']} Polymarket events -> saved {saved['polymarket']} market snapshots")
+    print(f"  Got {fetched['manifold']} Manifold markets -> saved {saved['manifold']} market snapshots")
 
     print_status(conn)
     conn.close()
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Crawl complete")
+    return saved
 
 
 def main():
@@ -458,6 +723,12 @@ def main():
     parser.add_argument("--init", action="store_true", help="DBスキーマ初期化のみ")
     parser.add_argument("--import-json", action="store_true", help="既存JSON履歴をDBに取り込む")
     parser.add_argument("--status", action="store_true", help="DB統計を表示")
+    parser.add_argument("--poly-pages", type=int, default=POLY_MAX_PAGES, help="Polymarket 取得ページ数")
+    parser.add_argument("--manifold-pages", type=int, default=MANIFOLD_MAX_PAGES, help="Manifold 取得ページ数")
+    parser.add_argument("--interval-minutes", type=int, default=SNAPSHOT_INTERVAL_MIN,
+                        help="スナップショット間隔（分）。1440 未満で intraday_snapshots にも記録")
+    parser.add_argument("--workers", type=int, default=CRAWL_WORKERS, help="ページ取得の同時実行数")
+    parser.add_argument("--fresh", action="store_true", help="今の実行枠のチェックポイントを捨てて最初から")
     args = parser.parse_args()
 
     init_db()
@@ -478,7 +749,8 @@ def main():
         conn.close()
         return
 
-    run_crawler()
+    run_crawler(poly_pages=args.poly_pages, manifold_pages=args.manifold_pages,
+                interval_min=args.interval_minutes, workers=args.workers, fresh=args.fresh)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Offline-first market matching for the prediction tracker.
+
+prediction_page_builder.find_polymarket_match() used to re-run
+extract_keywords() on every embed_data market for every article, and
+find_metaculus_match() made up to three live Manifold searches per title.
+This module replaces both hot paths with local lookups:
+
+- MarketMatchIndex: keywords of every market are extracted once into a
+  keyword -> market posting list plus a genre map. Polymarket candidates are
+  exactly the embed_data.json markets the original linear scan used; open
+  Manifold markets from market_history.db are indexed only for the offline
+  search() fallback. A title is scored only against markets sharing >= 2
+  keywords with it (the minimum the scoring rule accepts), with exactly the
+  same score and tie-breaking as the original linear scan.
+- SearchCache: TTL cache of external search results (Manifold), keyed by the
+  normalized query and persisted as JSON. Empty results are cached too, so
+  titles without a market stop costing a round-trip on every build.
+
+Usage:
+  python3 market_match_index.py "Will the Fed cut rates in June?"
+  python3 market_match_index.py --stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+DEFAULT_EMBED_DATA = "/opt/shared/polymarket/embed_data.json"
+DEFAULT_MARKET_HISTORY_DB = "/opt/shared/market_history/market_history.db"
+SEARCH_CACHE_PATH = "/opt/shared/polymarket/market_search_cache.json"
+SEARCH_CACHE_TTL = 6 * 3600          # 検索結果（ヒットあり）
+SEARCH_CACHE_EMPTY_TTL = 24 * 3600   # ヒットなしのクエリ
+
+KeywordFn = Callable[[str], set]
+
+
+def default_keywords(text: str) -> set:
+    """Fallback tokenizer (same shape as prediction_page_builder.extract_keywords)."""
+    text = (text or "").lower()
+    text = re.sub(r"[^\w\s\-\u3000-\u9fff]", " ", text)
+    return {w for w in text.split() if len(w) > 1}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def load_history_markets(db_path: str = DEFAULT_MARKET_HISTORY_DB, sources: Iterable[str] = ("polymarket",)) -> list[dict]:
+    """market_history.db の未解決市場を embed_data と同じ形の dict で返す（最新確率つき）"""
+    if not db_path or not os.path.exists(db_path):
+        return []
+    sources = tuple(sources)
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            has_latest = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'latest_snapshot'"
+            ).fetchone()
+            if has_latest:
+                snapshot_join = "JOIN latest_snapshot ps ON ps.market_id = m.id"
+            else:
+                snapshot_join = """JOIN probability_snapshots ps ON ps.market_id = m.id
+                  AND ps.snapshot_date = (
+                      SELECT MAX(snapshot_date) FROM probability_snapshots WHERE market_id = m.id
+                  )"""
+            rows = conn.execute(f"""
+                SELECT m.source, m.external_id, m.question, m.event_title, m.market_slug,
+                       m.genres, ps.yes_prob, ps.volume
+                FROM markets m
+                {snapshot_join}
+                WHERE m.resolved = 0
+                  AND m.source IN ({",".join("?" * len(sources))})
+                ORDER BY m.id
+            """, sources).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return []
+    markets = []
+    for row in rows:
+        if row["yes_prob"] is None:
+            continue
+        try:
+            genres = json.loads(row["genres"] or "[]")
+        except (TypeError, ValueError):
+            genres = []
+        yes = round(row["yes_prob"] * 100, 1)
+        markets.append({
+            "source": row["source"],
+            "external_id": row["external_id"],
+            "title": row["event_title"] or "",
+            "question": row["question"] or "",
+            "market_slug": row["market_slug"] or "",
+            "genres": [g for g in genres if isinstance(g, str)],
+            "probability": yes,
+            "outcomes": {"Yes": yes, "No": round(100 - yes, 1)},
+            "volume_usd": row["volume"] or 0,
+        })
+    return markets
+
+
+class MarketMatchIndex:
+    """Keyword/genre inverted index over market dicts (embed_data shape)."""
+
+    def __init__(self, markets: Iterable[dict], keyword_fn: KeywordFn = default_keywords,
+                 genre_map: Optional[dict] = None):
+        self.keyword_fn = keyword_fn
+        self.genre_map = genre_map or {}
+        self.markets: list[dict] = []
+        self.market_keywords: list[frozenset] = []
+        self.market_genres: list[frozenset] = []
+        self.market_sources: list[str] = []
+        self.postings: dict[str, list[int]] = {}
+        seen_questions: set[str] = set()
+        for market in markets:
+            question_key = normalize_query(market.get("question", ""))
+            if market.get("source") and question_key in seen_questions:
+                continue  # embed_data が先。同じ質問の market_history.db 行は重複させない
+            seen_questions.add(question_key)
+            idx = len(self.markets)
+            self.markets.append(market)
+            keywords = frozenset(keyword_fn(market.get("title", "") + " " + market.get("question", "")))
+            self.market_keywords.append(keywords)
+            self.market_genres.append(frozenset(self.genre_map.get(g, g) for g in market.get("genres", [])))
+            self.market_sources.append(market.get("source") or "polymarket")  # embed_data = Polymarket
+            for kw in keywords:
+                self.postings.setdefault(kw, []).append(idx)
+
+    @classmethod
+    def from_sources(cls, embed_data: Iterable[dict], db_path: str = DEFAULT_MARKET_HISTORY_DB,
+                     keyword_fn: KeywordFn = default_keywords, genre_map: Optional[dict] = None):
+        # Polymarket 候補は embed_data のみ（旧 linear scan と同一）。DB からは Manifold だけを足す
+        markets = list(embed_data or []) + load_history_markets(db_path, sources=("manifold",))
+        return cls(markets, keyword_fn=keyword_fn, genre_map=genre_map)
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def _keyword_hits(self, keywords: Iterable[str]) -> Counter:
+        hits: Counter = Counter()
+        for kw in keywords:
+            hits.update(self.postings.get(kw, ()))
+        return hits
+
+    def best_match(self, title: str, genres, source: str = "polymarket") -> Optional[dict]:
+        """find_polymarket_match と同じスコア（ジャンル一致×3 + キーワード一致数）で最良の市場"""
+        article_kw = self.keyword_fn(title)
+        article_genres = set(genres) if isinstance(genres, list) else set()
+        best = None
+        best_score = 0
+        # 採用条件は常に kw_hit >= 2 を含むので、2語以上共有する市場だけを走査（元の順序で）
+        for idx, kw_hits in sorted((i, n) for i, n in self._keyword_hits(article_kw).items() if n >= 2):
+            if self.market_sources[idx] != source:
+                continue
+            overlap = article_genres & self.market_genres[idx]
+            score = len(overlap) * 3 + kw_hits
+            if score > best_score and (overlap or kw_hits >= 4):
+                best_score = score
+                market = self.markets[idx]
+                best = {
+                    "question": market.get("question", "")[:60],
+                    "probability": market.get("probability", 0),
+                    "outcomes": market.get("outcomes"),  # {"Yes": xx, "No": yy} 0-100%
+                    "volume_usd": market.get("volume_usd", 0),
+                }
+        return best
+
+    def match_all(self, items: Iterable[tuple]) -> dict:
+        """(key, title, genres) を一括マッチ → {key: match or None}"""
+        return {key: self.best_match(title, genres) for key, title, genres in items}
+
+    def search(self, query: str, source: Optional[str] = None, limit: int = 5) -> list[dict]:
+        """全クエリ語を含む市場（ローカル全文検索。外部検索のオフライン代替）"""
+        terms = self.keyword_fn(query)
+        if not terms:
+            return []
+        rows = None
+        for term in terms:
+            posting = set(self.postings.get(term, ()))
+            rows = posting if rows is None else rows & posting
+            if not rows:
+                return []
+        found = [self.markets[i] for i in sorted(rows)
+                 if source is None or self.market_sources[i] == source]
+        return found[:limit]
+
+
+class SearchCache:
+    """TTL cache of external search results keyed by normalized query."""
+
+    def __init__(self, path: Optional[str] = SEARCH_CACHE_PATH, ttl: int = SEARCH_CACHE_TTL,
+                 empty_ttl: int = SEARCH_CACHE_EMPTY_TTL, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self.clock = clock
+        self.entries: dict[str, dict] = {}
+        self.dirty = False
+        self.stats = {"hit": 0, "miss": 0}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("entries", {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, namespace: str, query: str) -> Optional[list]:
+        entry = self.entries.get(f"{namespace}:{normalize_query(query)}")
+        if entry is not None:
+            ttl = self.ttl if entry.get("results") else self.empty_ttl
+            if self.clock() - entry.get("fetched_at", 0) < ttl:
+                self.stats["hit"] += 1
+                return entry.get("results", [])
+        self.stats["miss"] += 1
+        return None
+
+    def put(self, namespace: str, query: str, results: list):
+        self.entries[f"{namespace}:{normalize_query(query)}"] = {"fetched_at": self.clock(), "results": results}
+        self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        now = self.clock()
+        horizon = max(self.ttl, self.empty_ttl)
+        self.entries = {k: v for k, v in self.entries.items() if now - v.get("fetched_at", 0) < horizon}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline market matching index")
+    parser.add_argument("title", nargs="?")
+    parser.add_argument("--genres", default="", help="カンマ区切りジャンル")
+    parser.add_argument("--embed-data", default=DEFAULT_EMBED_DATA)
+    parser.add_argument("--db", default=DEFAULT_MARKET_HISTORY_DB)
+    parser.add_argument("--stats", action="store_true")
+    args = parser.parse_args()
+
+    embed_data = []
+    if os.path.exists(args.embed_data):
+        with open(args.embed_data, encoding="utf-8") as f:
+            embed_data = json.load(f)
+    index = MarketMatchIndex.from_sources(embed_data, args.db)
+    if args.stats or not args.title:
+        print(f"markets={len(index)} keywords={len(index.postings)}")
+        return
+    genres = [g.strip() for g in args.genres.split(",") if g.strip()]
+    print(json.dumps(index.best_match(args.title, genres), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
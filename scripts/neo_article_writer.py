@@ -32,6 +32,8 @@ import subprocess
 import argparse
 from datetime import datetime, timezone, timedelta
 
+from article_index import ArticleIndex
+
 QUEUE_FILE = "/opt/shared/scripts/breaking_queue.json"
 SEND_SCRIPT = "/opt/shared/scripts/send-to-neo.py"
 WRITING_TIMEOUT_MIN = 60  # writing状態で60分以上経過したら再送信
@@ -144,6 +146,11 @@ def _load_json(path):
     return {}
 
 
+def _load_article_index():
+    """記事インデックスを読み込む（journal 追記分も含めた旧形式の dict）"""
+    return ArticleIndex.load("/opt/shared/nowpattern_article_index.json").to_dict()
+
+
 def find_previous_article(item):
     """同じトピック（力学×ジャンル）の直近の前回記事を検索。
 
@@ -158,7 +165,7 @@ def find_previous_article(item):
     if not genre:
         return None
 
-    idx = _load_json("/opt/shared/nowpattern_article_index.json")
+    idx = _load_article_index()
     db = _load_json("/opt/shared/scripts/prediction_db.json")
 
     # article_index のジャンルインデックスで同ジャンル記事を取得
@@ -309,7 +316,7 @@ def get_flywheel_context(item):
 
     # 2. article_index から同ジャンルの過去記事を検索
     try:
-        idx = _load_json("/opt/shared/nowpattern_article_index.json")
+        idx = _load_article_index()
         genre_articles = idx.get("genre_index", {}).get(genre, [])
         if genre_articles:
             context_parts.append(f"\n【同ジャンル({genre})の過去記事: {len(genre_articles)}件】")
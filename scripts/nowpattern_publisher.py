@@ -47,6 +47,8 @@ from pathlib import Path
 from mission_contract import assert_mission_handshake
 from release_governor import assert_governed_release_ready
 from article_truth_guard import evaluate_article_truth
+from article_index import ArticleIndex
+from sitemap_engine import SitemapEngine
 
 MISSION_HANDSHAKE = assert_mission_handshake(
     "nowpattern_publisher",
@@ -665,36 +667,21 @@ DEFAULT_SITEMAP_PATH = "/opt/shared/sitemap-news.xml"
 DEFAULT_LLMS_TXT_PATH = "/opt/shared/llms.txt"
 
 
-def load_index(index_path: str = DEFAULT_INDEX_PATH) -> dict:
-    """記事インデックスを読み込む"""
-    p = Path(index_path)
-    if p.exists():
-        return json.loads(p.read_text(encoding="utf-8"))
-    return {
-        "meta": {
-            "version": "1.0",
-            "last_updated": "",
-            "total_articles": 0,
-            "total_deep_patterns": 0,
-            "total_speed_logs": 0,
-        },
-        "articles": [],
-        "dynamics_index": {tag: [] for tag in VALID_DYNAMICS_TAGS},
-        "genre_index": {tag: [] for tag in VALID_GENRE_TAGS},
-    }
+def load_index(index_path: str = DEFAULT_INDEX_PATH) -> ArticleIndex:
+    """記事インデックスを読み込む（スナップショット + journal を再生）"""
+    return ArticleIndex.load(index_path, VALID_DYNAMICS_TAGS, VALID_GENRE_TAGS)
 
 
-def save_index(index: dict, index_path: str = DEFAULT_INDEX_PATH) -> None:
-    """記事インデックスを保存する"""
-    index["meta"]["last_updated"] = datetime.now(timezone.utc).isoformat()
-    p = Path(index_path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding="utf-8")
+def save_index(index: ArticleIndex, index_path: str = DEFAULT_INDEX_PATH) -> None:
+    """記事インデックスを保存する（新規記事を journal に追記、一定件数で compaction）"""
+    if isinstance(index, dict):
+        index = ArticleIndex.from_dict(index, index_path)
+    index.save(index_path)
     print(f"OK: Index updated at {index_path}")
 
 
 def add_article_to_index(
-    index: dict,
+    index: ArticleIndex,
     article_id: str,
     mode: str,
     title_ja: str,
@@ -714,7 +701,7 @@ def add_article_to_index(
     # v5.0: Delta support
     bottom_line: str = "",
     scenario_summary: list[dict] | None = None,
-) -> dict:
+) -> ArticleIndex:
     """記事をインデックスに追加する"""
     genre_tags = genre_tags or []
     event_tags = event_tags or []
@@ -747,41 +734,17 @@ def add_article_to_index(
         "scenario_summary": scenario_summary or [],
     }
 
-    index["articles"].append(article_entry)
-
-    # Update counts
-    index["meta"]["total_articles"] = len(index["articles"])
-    index["meta"]["total_deep_patterns"] = sum(1 for a in index["articles"] if a["mode"] == "deep_pattern")
-    index["meta"]["total_speed_logs"] = sum(1 for a in index["articles"] if a["mode"] == "speed_log")
-
-    # Update dynamics_index
-    for tag in dynamics_tags:
-        if tag in index["dynamics_index"]:
-            if article_id not in index["dynamics_index"][tag]:
-                index["dynamics_index"][tag].append(article_id)
-
-    # Update genre_index
-    for tag in genre_tags:
-        if tag in index["genre_index"]:
-            if article_id not in index["genre_index"][tag]:
-                index["genre_index"][tag].append(article_id)
-
+    if isinstance(index, dict):
+        index = ArticleIndex.from_dict(index)
+    index.add(article_entry)
     return index
 
 
-def find_related_articles(index: dict, dynamics_tags: list[str], exclude_id: str = "") -> list[dict]:
+def find_related_articles(index: ArticleIndex, dynamics_tags: list[str], exclude_id: str = "") -> list[dict]:
     """同じ力学タグを持つ過去記事を検索する（自己参照ナレッジグラフ用）"""
-    related = []
-    seen_ids = set()
-    for tag in dynamics_tags:
-        for article_id in index.get("dynamics_index", {}).get(tag, []):
-            if article_id != exclude_id and article_id not in seen_ids:
-                seen_ids.add(article_id)
-                for article in index["articles"]:
-                    if article["id"] == article_id:
-                        related.append(article)
-                        break
-    return related
+    if isinstance(index, dict):
+        index = ArticleIndex.from_dict(index)
+    return index.related(dynamics_tags, exclude_id)
 
 
 def generate_article_id(mode: str) -> str:
@@ -1159,17 +1122,18 @@ def generate_news_sitemap(
     index_path: str = DEFAULT_INDEX_PATH,
     output_path: str = DEFAULT_SITEMAP_PATH,
     ghost_url: str = "https://nowpattern.com",
-    max_articles: int = 1000,
     news_days: int = 2,
+    full: bool = False,
 ) -> str:
-    """Google News Sitemap XML を記事インデックスから生成する。
+    """Google News Sitemap と全記事のシャード sitemap を記事インデックスから更新する。
 
-    Google News Sitemap は直近 2日間 の記事のみ収録可能。
-    通常の sitemap.xml は max_articles 件の全記事を収録する。
+    Google News Sitemap は直近 2日間（48時間のローリング窓）の記事のみ収録する。
+    全記事は月別シャード sitemap-articles-YYYY-MM.xml に収録し、sitemap.xml は
+    それらを列挙する sitemap index になる。新しい記事が入った月のシャードだけを
+    書き直す（full=True で全シャード再生成）。詳細は sitemap_engine.py。
 
-    出力:
-        output_path に sitemap-news.xml を書き込む
-        output_path.replace("-news.xml", ".xml") に全記事 sitemap.xml を書き込む
+    出力（output_path と同じディレクトリ）:
+        sitemap-news.xml / sitemap.xml / sitemap-articles-*.xml / sitemap-shards.json
 
     VPS Caddyでの配信方法（/etc/caddy/Caddyfile に追記）:
         handle /sitemap-news.xml {
@@ -1180,107 +1144,27 @@ def generate_news_sitemap(
             root * /opt/shared
             file_server
         }
+        handle /sitemap-articles-* {
+            root * /opt/shared
+            file_server
+        }
     """
     index = load_index(index_path)
-    articles = index.get("articles", [])
 
-    if not articles:
+    if not len(index):
         print("WARN: No articles in index, skipping sitemap generation")
         return ""
 
-    now_utc = datetime.now(timezone.utc)
-    cutoff_news = now_utc.timestamp() - (news_days * 86400)
-
-    # ─── Google News Sitemap (直近2日間のみ) ─────────────────────────────
-    news_items = []
-    for a in sorted(articles, key=lambda x: x.get("published_at", ""), reverse=True):
-        url = a.get("url", "")
-        if not url:
-            slug = a.get("slug", "")
-            if slug:
-                url = f"{ghost_url}/{slug}/"
-            else:
-                continue
-
-        pub_at = a.get("published_at", "")
-        try:
-            dt = datetime.fromisoformat(pub_at.replace("Z", "+00:00"))
-            if dt.timestamp() < cutoff_news:
-                continue  # 2日以上前の記事はNews Sitemapに含めない
-            pub_str = dt.strftime("%Y-%m-%dT%H:%M:%S+00:00")
-        except (ValueError, AttributeError):
-            continue
-
-        title = a.get("title_ja") or a.get("title_en", "")
-        genre_tags = a.get("genre_tags", [])
-        keywords = ", ".join(genre_tags[:3]) if genre_tags else "geopolitics"
-
-        news_items.append(
-            f'  <url>\n'
-            f'    <loc>{url}</loc>\n'
-            f'    <news:news>\n'
-            f'      <news:publication>\n'
-            f'        <news:name>Nowpattern</news:name>\n'
-            f'        <news:language>ja</news:language>\n'
-            f'      </news:publication>\n'
-            f'      <news:publication_date>{pub_str}</news:publication_date>\n'
-            f'      <news:title><![CDATA[{title}]]></news:title>\n'
-            f'      <news:keywords>{keywords}</news:keywords>\n'
-            f'    </news:news>\n'
-            f'  </url>'
-        )
-
-    news_xml = (
-        '<?xml version="1.0" encoding="UTF-8"?>\n'
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"\n'
-        '        xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">\n'
-        + ("\n".join(news_items) if news_items else "  <!-- no recent articles -->") + "\n"
-        "</urlset>\n"
-    )
-
-    # ─── Standard Sitemap (全記事) ────────────────────────────────────────
-    all_items = []
-    for a in sorted(articles, key=lambda x: x.get("published_at", ""), reverse=True)[:max_articles]:
-        url = a.get("url", "")
-        if not url:
-            slug = a.get("slug", "")
-            if slug:
-                url = f"{ghost_url}/{slug}/"
-            else:
-                continue
-
-        pub_at = a.get("published_at", "")
-        try:
-            dt = datetime.fromisoformat(pub_at.replace("Z", "+00:00"))
-            lastmod = dt.strftime("%Y-%m-%d")
-        except (ValueError, AttributeError):
-            lastmod = now_utc.strftime("%Y-%m-%d")
-
-        all_items.append(
-            f'  <url>\n'
-            f'    <loc>{url}</loc>\n'
-            f'    <lastmod>{lastmod}</lastmod>\n'
-            f'    <changefreq>weekly</changefreq>\n'
-            f'    <priority>0.8</priority>\n'
-            f'  </url>'
-        )
-
-    all_xml = (
-        '<?xml version="1.0" encoding="UTF-8"?>\n'
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        + ("\n".join(all_items) if all_items else "  <!-- no articles -->") + "\n"
-        "</urlset>\n"
+    engine = SitemapEngine(
+        out_dir=os.path.dirname(output_path) or ".",
+        ghost_url=ghost_url,
+        news_name=os.path.basename(output_path),
+        index_name=os.path.basename(output_path).replace("-news.xml", ".xml"),
     )
-
-    # ─── Write files ─────────────────────────────────────────────────────
-    p_news = Path(output_path)
-    p_news.parent.mkdir(parents=True, exist_ok=True)
-    p_news.write_text(news_xml, encoding="utf-8")
-    print(f"OK: News sitemap ({len(news_items)} articles) -> {output_path}")
-
-    p_all = Path(output_path.replace("-news.xml", ".xml"))
-    p_all.write_text(all_xml, encoding="utf-8")
-    print(f"OK: Full sitemap ({len(all_items)} articles) -> {p_all}")
+    summary = engine.update(index, full=full, news_window_hours=news_days * 24)
+    print(f"OK: News sitemap ({summary['news_urls']} articles) -> {output_path}")
+    print(f"OK: Sitemap index ({summary['shards']} shards, {summary['urls']} articles, "
+          f"rewritten: {', '.join(summary['rewritten_months']) or 'none'}) -> {engine.index_path}")
 
     return output_path
 
@@ -1349,7 +1233,7 @@ if __name__ == "__main__":
     print("  publish_speed_log()     - Speed Log記事投稿+インデックス更新")
     print("  find_related_articles() - 同じ力学タグの過去記事検索")
     print("  generate_article_id()   - 記事ID自動生成")
-    print("  generate_news_sitemap() - Google News + 全記事 sitemap.xml 生成")
+    print("  generate_news_sitemap() - Google News + 全記事シャード sitemap 更新")
     print("  deploy_llms_txt()       - llms.txt を /opt/shared/ にデプロイ")
     print("  deploy_robots_txt()     - robots.txt を /opt/shared/ にデプロイ")
     print()
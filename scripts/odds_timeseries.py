@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""Append-only odds time-series store for polymarket_monitor.
+
+polymarket_monitor.py used to write one pretty-printed JSON snapshot per day
+to /opt/shared/polymarket/history/ and diff two whole snapshot dicts to find
+movements, so nothing older than the previous scan was queryable. This module
+keeps every scan in SQLite instead:
+
+- odds_series: one row per (market_id, outcome) with event metadata and the
+  last observed probability / scan time.
+- odds_points(series_id, ts, prob): WITHOUT ROWID table clustered on
+  (series_id, ts), so one market's history is a single contiguous range scan.
+  A point is only appended when the probability changed; reads are "as of"
+  (the last point at or before a time), so unchanged scans cost nothing.
+- odds_scans(ts): every scan time, to tell "unchanged" from "not seen".
+
+On top of that: range / downsample / rolling-delta queries per series, an
+all-series as-of lookup (one indexed seek per series and window) feeding the
+vectorized multi-window movement detector (1h / 24h / 7d), and settled-market
+extraction for Brier scoring.
+
+Usage:
+  python3 odds_timeseries.py --stats
+  python3 odds_timeseries.py --import-history /opt/shared/polymarket/history
+  python3 odds_timeseries.py --series <market_id> --bucket 3600
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+DEFAULT_DB_PATH = "/opt/shared/polymarket/odds_history.db"
+
+# 移動検知ウィンドウ: ラベル → (秒, 閾値)
+MOVEMENT_WINDOWS = {
+    "1h": (3600, 0.10),
+    "24h": (86400, 0.10),
+    "7d": (7 * 86400, 0.15),
+}
+# cron のずれ（59分後の実行など）で1つ前のスキャンを取りこぼさないための余裕
+SCAN_SLACK_SEC = 300
+
+# Brier 用: 最終価格がこの範囲外に張り付いた市場を「決着済み」とみなす
+SETTLE_HI = 0.99
+SETTLE_LO = 0.01
+BRIER_HORIZONS = {"24h": 86400, "7d": 7 * 86400}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS odds_series (
+    series_id   INTEGER PRIMARY KEY,
+    market_id   TEXT NOT NULL,
+    outcome     TEXT NOT NULL,
+    event_id    TEXT,
+    question    TEXT,
+    title       TEXT,
+    volume      REAL,
+    genres      TEXT,            -- JSON (classify_event の結果)
+    first_ts    INTEGER NOT NULL,
+    last_ts     INTEGER NOT NULL,
+    last_prob   REAL NOT NULL,
+    UNIQUE(market_id, outcome)
+);
+CREATE INDEX IF NOT EXISTS idx_odds_series_last_ts ON odds_series(last_ts);
+
+CREATE TABLE IF NOT EXISTS odds_points (
+    series_id   INTEGER NOT NULL,
+    ts          INTEGER NOT NULL,
+    prob        REAL NOT NULL,
+    PRIMARY KEY (series_id, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS odds_scans (
+    ts          INTEGER PRIMARY KEY,
+    n_series    INTEGER NOT NULL
+);
+"""
+
+# 系列ごとの as-of: 時刻 × 系列ごとに PK (series_id, ts) を逆向きに1回シークする。
+# （ts <= 時刻 で odds_points を JOIN して GROUP BY すると、時刻ごとに全点を走査してしまう）
+_AS_OF_SQL = """
+    WITH cutoffs(k, ts) AS (VALUES {values})
+    SELECT c.k, s.series_id,
+           (SELECT p.prob FROM odds_points p
+            WHERE p.series_id = s.series_id AND p.ts <= c.ts
+            ORDER BY p.ts DESC LIMIT 1) AS prob
+    FROM cutoffs c JOIN odds_series s ON s.first_ts <= c.ts{seen_filter}
+"""
+
+
+def flatten_snapshot(snapshot: dict) -> Iterable[dict]:
+    """polymarket_monitor のスナップショット dict → (market, outcome) 単位の行"""
+    for event_id, event in snapshot.items():
+        genres = json.dumps(event.get("genres", []), ensure_ascii=False)
+        for market_id, market in event.get("markets", {}).items():
+            for outcome, prob in market.get("prices", {}).items():
+                yield {
+                    "market_id": str(market_id),
+                    "outcome": outcome,
+                    "event_id": str(event_id),
+                    "question": market.get("question", "?"),
+                    "title": event.get("title", "?"),
+                    "volume": float(event.get("volume", 0) or 0),
+                    "genres": genres,
+                    "prob": float(prob),
+                }
+
+
+class OddsStore:
+    """SQLite-backed append-only odds history (one process, one connection)."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ── 書き込み ──────────────────────────────────────────────────────
+
+    def append_snapshot(self, snapshot: dict, ts: Optional[int] = None) -> int:
+        """1回のスキャンを追記。変化した確率だけ点を追加し、追加した点数を返す"""
+        ts = int(ts if ts is not None else time.time())
+        latest = self.latest_scan_ts()
+        if latest is not None and ts < latest:
+            return 0  # 追記専用: 過去時刻のスキャンは無視
+        rows = list(flatten_snapshot(snapshot))
+        with self.conn:
+            known = {}
+            market_ids = sorted({r["market_id"] for r in rows})
+            for start in range(0, len(market_ids), 500):
+                chunk = market_ids[start:start + 500]
+                for row in self.conn.execute(f"""
+                    SELECT series_id, market_id, outcome, last_ts, last_prob FROM odds_series
+                    WHERE market_id IN ({','.join('?' * len(chunk))})
+                """, chunk):
+                    known[(row["market_id"], row["outcome"])] = dict(row)
+            points = []
+            updates = []
+            for r in rows:
+                prev = known.get((r["market_id"], r["outcome"]))
+                if prev is None:
+                    cur = self.conn.execute("""
+                        INSERT INTO odds_series (market_id, outcome, event_id, question, title, volume,
+                                                 genres, first_ts, last_ts, last_prob)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (r["market_id"], r["outcome"], r["event_id"], r["question"], r["title"],
+                          r["volume"], r["genres"], ts, ts, r["prob"]))
+                    points.append((cur.lastrowid, ts, r["prob"]))
+                    known[(r["market_id"], r["outcome"])] = {"series_id": cur.lastrowid, "last_ts": ts,
+                                                             "last_prob": r["prob"]}
+                    continue
+                if r["prob"] != prev["last_prob"]:
+                    points.append((prev["series_id"], ts, r["prob"]))
+                    prev["last_prob"] = r["prob"]
+                updates.append((r["event_id"], r["question"], r["title"], r["volume"], r["genres"],
+                                ts, r["prob"], prev["series_id"]))
+            self.conn.executemany("INSERT OR REPLACE INTO odds_points (series_id, ts, prob) VALUES (?, ?, ?)", points)
+            self.conn.executemany("""
+                UPDATE odds_series SET event_id = ?, question = ?, title = ?, volume = ?, genres = ?,
+                                       last_ts = ?, last_prob = ?
+                WHERE series_id = ?
+            """, updates)
+            self.conn.execute("INSERT OR REPLACE INTO odds_scans (ts, n_series) VALUES (?, ?)", (ts, len(rows)))
+        return len(points)
+
+    def import_history_dir(self, history_dir: str, tz=timezone(timedelta(hours=9))) -> int:
+        """旧形式の HISTORY_DIR/{date}.json を日付順に取り込む（その日の 00:00 を時刻とする）"""
+        if not os.path.isdir(history_dir):
+            return 0
+        imported = 0
+        for fname in sorted(os.listdir(history_dir)):
+            if not fname.endswith(".json"):
+                continue
+            try:
+                day = datetime.strptime(fname[:-5], "%Y-%m-%d").replace(tzinfo=tz)
+                with open(os.path.join(history_dir, fname), encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (ValueError, OSError):
+                continue
+            if isinstance(snapshot, dict):
+                self.append_snapshot(snapshot, int(day.timestamp()))
+                imported += 1
+        return imported
+
+    # ── 1系列のクエリ ─────────────────────────────────────────────────
+
+    def series_id(self, market_id: str, outcome: str = "Yes") -> Optional[int]:
+        row = self.conn.execute(
+            "SELECT series_id FROM odds_series WHERE market_id = ? AND outcome = ?", (str(market_id), outcome)
+        ).fetchone()
+        return row[0] if row else None
+
+    def value_at(self, market_id: str, outcome: str, ts: int) -> Optional[float]:
+        row = self.conn.execute("""
+            SELECT p.prob FROM odds_points p JOIN odds_series s ON s.series_id = p.series_id
+            WHERE s.market_id = ? AND s.outcome = ? AND p.ts <= ?
+            ORDER BY p.ts DESC LIMIT 1
+        """, (str(market_id), outcome, int(ts))).fetchone()
+        return row[0] if row else None
+
+    def series_range(self, market_id: str, outcome: str = "Yes", start: int = 0,
+              end: Optional[int] = None) -> list[tuple[int, float]]:
+        """[start, end] の点。start 時点の値（as-of）を先頭に含める"""
+        sid = self.series_id(market_id, outcome)
+        if sid is None:
+            return []
+        end = end if end is not None else 2**62
+        rows = self.conn.execute("""
+            SELECT ts, prob FROM odds_points WHERE series_id = ? AND ts > ? AND ts <= ? ORDER BY ts
+        """, (sid, start, end)).fetchall()
+        head = self.conn.execute("""
+            SELECT ts, prob FROM odds_points WHERE series_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1
+        """, (sid, start)).fetchone()
+        points = [(r[0], r[1]) for r in rows]
+        return ([(head[0], head[1])] if head else []) + points
+
+    def downsample(self, market_id: str, outcome: str, start: int, end: int,
+                   bucket: int) -> list[tuple[int, float]]:
+        """bucket 秒ごとの終値（前方補完）。点がまだない区間は出さない"""
+        points = self.series_range(market_id, outcome, start, end)
+        ts_list = [p[0] for p in points]
+        out = []
+        t = start - start % bucket
+        while t <= end:
+            i = bisect_right(ts_list, min(t + bucket - 1, end)) - 1
+            if i >= 0:
+                out.append((t, points[i][1]))
+            t += bucket
+        return out
+
+    def rolling_deltas(self, market_id: str, outcome: str, window: int, start: int, end: int,
+                       step: int) -> list[tuple[int, float]]:
+        """step 秒の格子上で value(t) - value(t - window)"""
+        points = self.series_range(market_id, outcome, start - window, end)
+        ts_list = [p[0] for p in points]
+        out = []
+        for t in range(start, end + 1, step):
+            i = bisect_right(ts_list, t) - 1
+            j = bisect_right(ts_list, t - window) - 1
+            if i >= 0 and j >= 0:
+                out.append((t, points[i][1] - points[j][1]))
+        return out
+
+    # ── 全系列（ベクトル化）──────────────────────────────────────────
+
+    def values_at(self, ts: int) -> dict[int, float]:
+        """全系列の as-of 値 {series_id: prob}（その時点で点がない系列は含めない）"""
+        return self.values_at_many([ts])[0]
+
+    def values_at_many(self, ts_list: list[int], seen_at: Optional[int] = None) -> list[dict[int, float]]:
+        """複数時刻の as-of 値。ts_list と同じ順に {series_id: prob} を返す
+
+        seen_at を渡すと、そのスキャンに現れた系列（last_ts == seen_at）だけを引く。
+        """
+        result: list[dict[int, float]] = [{} for _ in ts_list]
+        if not ts_list:
+            return result
+        sql = _AS_OF_SQL.format(values=",".join("(?, ?)" for _ in ts_list),
+                                seen_filter="" if seen_at is None else " AND s.last_ts = ?")
+        params = [v for k, ts in enumerate(ts_list) for v in (k, int(ts))]
+        if seen_at is not None:
+            params.append(int(seen_at))
+        for k, series_id, prob in self.conn.execute(sql, params):
+            if prob is not None:
+                result[k][series_id] = prob
+        return result
+
+    def latest_scan_ts(self) -> Optional[int]:
+        row = self.conn.execute("SELECT MAX(ts) FROM odds_scans").fetchone()
+        return row[0] if row else None
+
+    def days_tracked(self) -> int:
+        row = self.conn.execute("SELECT MIN(ts), MAX(ts) FROM odds_scans").fetchone()
+        if not row or row[0] is None:
+            return 0
+        return (row[1] - row[0]) // 86400 + 1
+
+    def detect_movements(self, now_ts: Optional[int] = None, windows: Optional[dict] = None,
+                         slack: int = SCAN_SLACK_SEC) -> list[dict]:
+        """最新スキャンに現れた全系列について、各ウィンドウの変化を一括計算
+
+        1系列につき閾値を超えたウィンドウのうち |delta| 最大のものを1件返す
+        （alert dict は polymarket_monitor.detect_movements と同じキー + window）。
+        """
+        now_ts = now_ts if now_ts is not None else self.latest_scan_ts()
+        if now_ts is None:
+            return []
+        windows = windows or MOVEMENT_WINDOWS
+        current = self.conn.execute(
+            "SELECT * FROM odds_series WHERE last_ts = ? ORDER BY series_id", (now_ts,)
+        ).fetchall()
+        if not current:
+            return []
+        sids = [row["series_id"] for row in current]
+        cur = [row["last_prob"] for row in current]
+        best: dict[int, tuple] = {}
+        refs = self.values_at_many([now_ts - seconds + slack for seconds, _ in windows.values()], seen_at=now_ts)
+        for (label, (seconds, threshold)), ref in zip(windows.items(), refs):
+            prev = [ref.get(sid) for sid in sids]
+            for idx, delta in _threshold_deltas(cur, prev, threshold):
+                if idx not in best or abs(delta) > abs(best[idx][1]):
+                    best[idx] = (label, delta, prev[idx])
+        alerts = []
+        for idx, (label, delta, prev_prob) in best.items():
+            row = current[idx]
+            alerts.append({
+                "type": "movement",
+                "window": label,
+                "event_id": row["event_id"],
+                "market_id": row["market_id"],
+                "title": row["title"] or "?",
+                "question": row["question"] or "?",
+                "outcome": row["outcome"],
+                "prev_prob": prev_prob,
+                "curr_prob": row["last_prob"],
+                "delta": delta,
+                "direction": "UP" if delta > 0 else "DOWN",
+                "volume": row["volume"] or 0,
+                "genres": json.loads(row["genres"] or "[]"),
+                "severity": "high" if abs(delta) >= 0.20 else "medium",
+            })
+        alerts.sort(key=lambda a: (0 if a["severity"] == "high" else 1, -abs(a["delta"])))
+        return alerts
+
+    # ── Brier ─────────────────────────────────────────────────────────
+
+    def settled_series(self, hi: float = SETTLE_HI, lo: float = SETTLE_LO,
+                       outcome: str = "Yes") -> list[dict]:
+        """最終値が hi 以上 / lo 以下に張り付いた系列と、張り付いた時刻"""
+        rows = self.conn.execute("""
+            SELECT s.series_id, s.market_id, s.question, s.last_prob,
+                   (SELECT MIN(p.ts) FROM odds_points p
+                    WHERE p.series_id = s.series_id
+                      AND p.ts > COALESCE((SELECT MAX(q.ts) FROM odds_points q
+                                           WHERE q.series_id = s.series_id AND q.prob > ? AND q.prob < ?), -1)
+                   ) AS settle_ts
+            FROM odds_series s
+            WHERE s.outcome = ? AND (s.last_prob >= ? OR s.last_prob <= ?)
+        """, (lo, hi, outcome, hi, lo)).fetchall()
+        return [{"series_id": r[0], "market_id": r[1], "question": r[2],
+                 "actual": 1.0 if r[3] >= hi else 0.0, "settle_ts": r[4]} for r in rows]
+
+    def market_brier(self, horizons: Optional[dict] = None) -> dict:
+        """決着済み市場について「決着 h 前の市場価格」の Brier Score（ホライズン別）"""
+        horizons = horizons or BRIER_HORIZONS
+        settled = self.settled_series()
+        result = {}
+        for label, seconds in horizons.items():
+            forecasts, actuals = [], []
+            for s in settled:
+                row = self.conn.execute("""
+                    SELECT prob FROM odds_points WHERE series_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1
+                """, (s["series_id"], s["settle_ts"] - seconds)).fetchone()
+                if row is not None:
+                    forecasts.append(row[0])
+                    actuals.append(s["actual"])
+            result[label] = {"n": len(forecasts), "brier": brier_score(forecasts, actuals)}
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "series": self.conn.execute("SELECT COUNT(*) FROM odds_series").fetchone()[0],
+            "points": self.conn.execute("SELECT COUNT(*) FROM odds_points").fetchone()[0],
+            "scans": self.conn.execute("SELECT COUNT(*) FROM odds_scans").fetchone()[0],
+            "days_tracked": self.days_tracked(),
+        }
+
+
+def _threshold_deltas(cur: list, prev: list, threshold: float) -> list[tuple[int, float]]:
+    """cur - prev のうち |delta| >= threshold の (index, delta)。prev=None は比較対象外"""
+    if HAS_NUMPY:
+        c = np.asarray(cur, dtype=float)
+        p = np.asarray([np.nan if v is None else v for v in prev], dtype=float)
+        delta = c - p
+        hit = np.flatnonzero(np.abs(np.nan_to_num(delta)) >= threshold)
+        return [(int(i), float(delta[i])) for i in hit]
+    return [(i, c - p) for i, (c, p) in enumerate(zip(cur, prev))
+            if p is not None and abs(c - p) >= threshold]
+
+
+def brier_score(forecasts: list, actuals: list) -> Optional[float]:
+    if not forecasts:
+        return None
+    if HAS_NUMPY:
+        return round(float(np.mean((np.asarray(forecasts) - np.asarray(actuals)) ** 2)), 4)
+    return round(sum((f - a) ** 2 for f, a in zip(forecasts, actuals)) / len(forecasts), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polymarket odds time-series store")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--import-history", metavar="DIR", help="旧 HISTORY_DIR/{date}.json を取り込む")
+    parser.add_argument("--series", metavar="MARKET_ID", help="1市場の推移を表示")
+    parser.add_argument("--outcome", default="Yes")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--bucket", type=int, default=3600, help="ダウンサンプル間隔（秒）")
+    args = parser.parse_args()
+
+    store = OddsStore(args.db)
+    try:
+        if args.import_history:
+            print(f"Imported {store.import_history_dir(args.import_history)} daily snapshots")
+        if args.series:
+            end = int(time.time())
+            for ts, prob in store.downsample(args.series, args.outcome, end - args.days * 86400, end, args.bucket):
+                print(f"{datetime.fromtimestamp(ts, timezone.utc):%Y-%m-%d %H:%M}Z  {prob * 100:5.1f}%")
+        if args.stats or not (args.import_history or args.series):
+            print(json.dumps(store.stats(), indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
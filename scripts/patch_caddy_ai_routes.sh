@@ -8,39 +8,41 @@ CADDYFILE="/etc/caddy/Caddyfile"
 SHARED_DIR="/opt/shared"
 BACKUP="${CADDYFILE}.bak.$(date +%Y%m%d%H%M%S)"
 
-# --- 冪等チェック: 既にパッチ済みなら何もしない ---
-if grep -q "llms.txt" "$CADDYFILE" 2>/dev/null; then
-    echo "OK: Caddyfile already patched (llms.txt route exists). Nothing to do."
+# --- 配信するルート（Caddyfile の handle パターン） ---
+ROUTES=(
+    "/llms.txt"
+    "/robots.txt"
+    "/sitemap.xml"
+    "/sitemap-news.xml"
+    "/sitemap-articles-*"   # sitemap.xml（sitemapindex）が指す月別シャード
+)
+
+# --- 冪等チェック: ルートごとに、まだ無いものだけ追加する ---
+# （llms.txt だけで判定すると、パッチ済みホストに後から増えたルートが入らない）
+MISSING=()
+for route in "${ROUTES[@]}"; do
+    if grep -qF "handle ${route} {" "$CADDYFILE" 2>/dev/null; then
+        echo "  = ${route} (already routed)"
+    else
+        MISSING+=("$route")
+    fi
+done
+if [ ${#MISSING[@]} -eq 0 ]; then
+    echo "OK: Caddyfile already routes every AI/sitemap file. Nothing to do."
     exit 0
 fi
 
 echo "Backing up Caddyfile -> $BACKUP"
 cp "$CADDYFILE" "$BACKUP"
 
-# --- 追記するルート設定 ---
+# --- 追記するルート設定（足りないルートのみ） ---
 # nowpattern.com ブロック内の末尾（最後の "}" の直前）に挿入する
-PATCH=$(cat <<'CADDY_PATCH'
-
-    # ─── AI-optimized static files (added by patch_caddy_ai_routes.sh) ───
-    handle /llms.txt {
-        root * /opt/shared
-        file_server
-    }
-    handle /robots.txt {
-        root * /opt/shared
-        file_server
-    }
-    handle /sitemap.xml {
-        root * /opt/shared
-        file_server
-    }
-    handle /sitemap-news.xml {
-        root * /opt/shared
-        file_server
-    }
-    # ─────────────────────────────────────────────────────────────────────
-CADDY_PATCH
-)
+PATCH=$'\n    # ─── AI-optimized static files (added by patch_caddy_ai_routes.sh) ───'
+for route in "${MISSING[@]}"; do
+    echo "  + ${route}"
+    PATCH+=$'\n'"    handle ${route} {"$'\n'"        root * ${SHARED_DIR}"$'\n'"        file_server"$'\n'"    }"
+done
+PATCH+=$'\n    # ─────────────────────────────────────────────────────────────────────'
 
 # nowpattern.com ブロックの最後の } の直前に挿入
 # Caddyfileの構造: nowpattern.com { ... reverse_proxy ... \n}
@@ -82,6 +84,11 @@ for f in llms.txt robots.txt sitemap.xml sitemap-news.xml; do
         echo "  ✗ $f (NOT FOUND — run deploy_llms_txt() / generate_news_sitemap() first)"
     fi
 done
+if ls "$SHARED_DIR"/sitemap-articles-*.xml >/dev/null 2>&1; then
+    echo "  ✓ sitemap-articles-*.xml"
+else
+    echo "  ✗ sitemap-articles-*.xml (NOT FOUND — run generate_news_sitemap() first)"
+fi
 
 # --- Caddy設定を検証して再起動 ---
 echo ""
@@ -98,3 +105,4 @@ echo "  curl -I https://nowpattern.com/llms.txt"
 echo "  curl -I https://nowpattern.com/robots.txt"
 echo "  curl -I https://nowpattern.com/sitemap.xml"
 echo "  curl -I https://nowpattern.com/sitemap-news.xml"
+echo "  curl -I https://nowpattern.com/sitemap-articles-\$(date +%Y-%m).xml"
@@ -33,6 +33,8 @@ import urllib.request
 import urllib.error
 from datetime import datetime, timezone, timedelta
 
+from odds_timeseries import MOVEMENT_WINDOWS, OddsStore
+
 # =============================================================================
 # Config
 # =============================================================================
@@ -40,7 +42,9 @@ from datetime import datetime, timezone, timedelta
 BASE_URL = "https://gamma-api.polymarket.com"
 DATA_DIR = "/opt/shared/polymarket"
 SNAPSHOT_FILE = os.path.join(DATA_DIR, "latest_snapshot.json")
-HISTORY_DIR = os.path.join(DATA_DIR, "history")
+HISTORY_DIR = os.path.join(DATA_DIR, "history")  # 旧形式（日次JSON）。初回のみ ODDS_DB へ取り込む
+ODDS_DB = os.path.join(DATA_DIR, "odds_history.db")
+PREDICTION_DB = "/opt/shared/scripts/prediction_db.json"
 ALERTS_FILE = os.path.join(DATA_DIR, "alerts.json")
 EMBED_FILE = os.path.join(DATA_DIR, "embed_data.json")
 
@@ -326,45 +330,73 @@ def load_snapshot():
 
 
 def save_snapshot(snapshot):
-    """Save current snapshot."""
+    """Save current snapshot (latest state only; history lives in ODDS_DB)."""
     os.makedirs(DATA_DIR, exist_ok=True)
-    with open(SNAPSHOT_FILE, "w", encoding="utf-8") as f:
-        json.dump(snapshot, f, indent=2, ensure_ascii=False)
+    tmp_path = SNAPSHOT_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, SNAPSHOT_FILE)
+
+
+def open_odds_store(path=ODDS_DB):
+    """Open the odds time-series store, importing legacy daily JSON once."""
+    store = OddsStore(path)
+    if store.latest_scan_ts() is None and os.path.isdir(HISTORY_DIR):
+        imported = store.import_history_dir(HISTORY_DIR, tz=JST)
+        if imported:
+            print(f"  Imported {imported} legacy history files into {path}")
+    return store
 
 
-def save_history(snapshot, date_str):
-    """Save daily history for Brier score tracking."""
-    os.makedirs(HISTORY_DIR, exist_ok=True)
-    path = os.path.join(HISTORY_DIR, f"{date_str}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(snapshot, f, indent=2, ensure_ascii=False)
+def save_history(store, snapshot, ts):
+    """Append this scan to the odds time-series store."""
+    return store.append_snapshot(snapshot, ts)
 
 
 # =============================================================================
 # Movement Detection (Idea 2: Article Triggers)
 # =============================================================================
 
+def _new_event_alert(event_id, current):
+    """Debut alert for a high-volume event not seen in the previous scan."""
+    vol = current.get("volume", 0)
+    if vol < 5_000_000:  # New event with $5M+ volume
+        return None
+    return {
+        "type": "new_event",
+        "event_id": event_id,
+        "title": current.get("title", "?"),
+        "volume": vol,
+        "genres": current.get("genres", []),
+        "top_market": _get_top_market(current),
+        "severity": "medium",
+    }
+
+
+def _sort_alerts(alerts):
+    """Sort by severity then delta."""
+    alerts.sort(key=lambda a: (
+        0 if a["severity"] == "high" else 1,
+        -abs(a.get("delta", 0)),
+    ))
+    return alerts
+
+
 def detect_movements(prev_snapshot, current_snapshot):
-    """Detect significant odds movements (±10%+ in 24h).
+    """Detect significant odds movements between two snapshots (±10%+).
 
     Returns list of alerts with market details and genre classification.
+    scan_and_snapshot() uses detect_window_movements() instead; this
+    two-snapshot diff is kept for callers that only have JSON snapshots.
     """
     alerts = []
 
     for event_id, current in current_snapshot.items():
         if event_id not in prev_snapshot:
             # New event — check if it's high volume (debut alert)
-            vol = current.get("volume", 0)
-            if vol >= 5_000_000:  # New event with $5M+ volume
-                alerts.append({
-                    "type": "new_event",
-                    "event_id": event_id,
-                    "title": current.get("title", "?"),
-                    "volume": vol,
-                    "genres": current.get("genres", []),
-                    "top_market": _get_top_market(current),
-                    "severity": "medium",
-                })
+            alert = _new_event_alert(event_id, current)
+            if alert:
+                alerts.append(alert)
             continue
 
         prev = prev_snapshot[event_id]
@@ -397,12 +429,30 @@ def detect_movements(prev_snapshot, current_snapshot):
                         "severity": "high" if abs(delta) >= 0.20 else "medium",
                     })
 
-    # Sort by severity then delta
-    alerts.sort(key=lambda a: (
-        0 if a["severity"] == "high" else 1,
-        -abs(a.get("delta", 0)),
-    ))
-    return alerts
+    return _sort_alerts(alerts)
+
+
+def detect_window_movements(store, prev_snapshot, current_snapshot, now_ts):
+    """Multi-window (1h/24h/7d) movement alerts from the odds store.
+
+    Movements are computed for every market of the latest scan at once
+    (OddsStore.detect_movements); debut alerts still compare event ids with
+    the previous snapshot.
+    """
+    alerts = []
+    if prev_snapshot:
+        for event_id, current in current_snapshot.items():
+            if event_id not in prev_snapshot:
+                alert = _new_event_alert(event_id, current)
+                if alert:
+                    alerts.append(alert)
+    alerts.extend(store.detect_movements(now_ts))
+    return _sort_alerts(alerts)
+
+
+def _windows_label():
+    """e.g. "1h ±10%, 24h ±10%, 7d ±15%"."""
+    return ", ".join(f"{label} ±{threshold*100:.0f}%" for label, (_, threshold) in MOVEMENT_WINDOWS.items())
 
 
 def _get_top_market(event_data):
@@ -493,34 +543,54 @@ def generate_embed_data(snapshot, max_per_event=3, max_total=50):
 # Brier Score Comparison (Idea 3)
 # =============================================================================
 
-def compute_brier_scores(history_dir=HISTORY_DIR):
+def compute_brier_scores(odds_db=ODDS_DB, prediction_db=PREDICTION_DB):
     """Compare Nowpattern predictions vs Polymarket consensus.
 
     Brier Score = mean of (forecast - actual)^2
     Lower = better. 0 = perfect. 0.25 = coin flip.
 
-    Requires:
-    - Resolved markets in history (actual outcomes)
-    - Nowpattern predictions (from /predictions/ page data)
+    Market side: markets whose Yes price settled at >=99% / <=1% in the odds
+    store, scored with the price 24h / 7d before settlement.
+    Nowpattern side: brier_score of resolved predictions in prediction_db.
     """
-    # TODO: Implement when we have enough resolved markets + predictions
-    # For now, return placeholder explaining the concept
-    return {
-        "status": "accumulating_data",
-        "message": (
-            "Brier Score comparison requires resolved markets. "
-            "Polymarket data is being collected daily. "
-            "First comparison available after ~30 days of data."
-        ),
-        "polymarket_markets_tracked": _count_history_files(history_dir),
-    }
+    store = OddsStore(odds_db)
+    try:
+        market = store.market_brier()
+        days = store.days_tracked()
+    finally:
+        store.close()
 
+    nowpattern_scores = []
+    if os.path.exists(prediction_db):
+        try:
+            with open(prediction_db, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            data = {}
+        for pred in data.get("predictions", []) if isinstance(data, dict) else []:
+            if pred.get("status") == "resolved" and isinstance(pred.get("brier_score"), (int, float)):
+                nowpattern_scores.append(float(pred["brier_score"]))
+    nowpattern = {
+        "n": len(nowpattern_scores),
+        "brier": round(sum(nowpattern_scores) / len(nowpattern_scores), 4) if nowpattern_scores else None,
+    }
 
-def _count_history_files(history_dir):
-    """Count days of historical data."""
-    if not os.path.exists(history_dir):
-        return 0
-    return len([f for f in os.listdir(history_dir) if f.endswith(".json")])
+    if not any(h["n"] for h in market.values()):
+        return {
+            "status": "accumulating_data",
+            "message": (
+                "Brier Score comparison requires settled markets. "
+                "Polymarket odds are being recorded every scan."
+            ),
+            "days_tracked": days,
+            "nowpattern": nowpattern,
+        }
+    return {
+        "status": "ok",
+        "days_tracked": days,
+        "polymarket": market,
+        "nowpattern": nowpattern,
+    }
 
 
 # =============================================================================
@@ -542,7 +612,7 @@ def format_alerts_telegram(alerts):
                 f"{emoji} {a['title'][:50]}\n"
                 f"  {a['question'][:60]}\n"
                 f"  {a['outcome']}: {a['prev_prob']*100:.1f}% -> "
-                f"{a['curr_prob']*100:.1f}% ({a['delta']*100:+.1f}%)\n"
+                f"{a['curr_prob']*100:.1f}% ({a['delta']*100:+.1f}% / {a.get('window', '-')})\n"
                 f"  Vol: ${a['volume']:,.0f} | {genre_str}\n"
             )
         elif a["type"] == "new_event":
@@ -573,13 +643,13 @@ def format_alerts_for_daily_learning(alerts, snapshot):
     ]
 
     if alerts:
-        lines.append(f"Significant movements (±{MOVEMENT_THRESHOLD*100:.0f}%+): {len(alerts)}")
+        lines.append(f"Significant movements ({_windows_label()}): {len(alerts)}")
         for a in alerts[:5]:
             if a["type"] == "movement":
                 lines.append(
                     f"  - {a['question'][:60]}: "
                     f"{a['outcome']} {a['prev_prob']*100:.0f}%→{a['curr_prob']*100:.0f}% "
-                    f"({a['delta']*100:+.1f}%) [Vol: ${a['volume']:,.0f}]"
+                    f"({a['delta']*100:+.1f}% / {a.get('window', '-')}) [Vol: ${a['volume']:,.0f}]"
                 )
         lines.append("")
 
@@ -618,7 +688,6 @@ def format_alerts_for_daily_learning(alerts, snapshot):
 def scan_and_snapshot():
     """Main scan: fetch events, classify, snapshot, detect movements."""
     now = datetime.now(JST)
-    date_str = now.strftime("%Y-%m-%d")
 
     print(f"[Polymarket Monitor] {now.strftime('%Y-%m-%d %H:%M JST')}")
 
@@ -678,19 +747,24 @@ def scan_and_snapshot():
     prev_snapshot = load_snapshot()
     prev_count = len(prev_snapshot)
 
-    # 4. Detect movements
-    alerts = []
-    if prev_snapshot:
-        alerts = detect_movements(prev_snapshot, current_snapshot)
-        print(f"  Movements detected: {len(alerts)} (threshold: ±{MOVEMENT_THRESHOLD*100:.0f}%)")
+    # 4. Record history, then detect movements over 1h/24h/7d windows
+    store = open_odds_store()
+    try:
+        had_history = store.latest_scan_ts() is not None
+        now_ts = int(now.timestamp())
+        appended = save_history(store, current_snapshot, now_ts)
+        alerts = detect_window_movements(store, prev_snapshot, current_snapshot, now_ts)
+    finally:
+        store.close()
+    if had_history or prev_snapshot:
+        print(f"  Movements detected: {len(alerts)} ({_windows_label()})")
     else:
         print("  First scan — no previous data to compare")
 
-    # 5. Save snapshots
+    # 5. Save snapshot
     save_snapshot(current_snapshot)
-    save_history(current_snapshot, date_str)
     print(f"  Snapshot saved: {SNAPSHOT_FILE}")
-    print(f"  History saved: {HISTORY_DIR}/{date_str}.json")
+    print(f"  History saved: {ODDS_DB} (+{appended} points)")
 
     # 6. Save alerts
     if alerts:
@@ -802,7 +876,7 @@ def main():
                         f"  {emoji} {a['question'][:60]}\n"
                         f"    {a['outcome']}: "
                         f"{a['prev_prob']*100:.1f}% -> {a['curr_prob']*100:.1f}% "
-                        f"({a['delta']*100:+.1f}%)"
+                        f"({a['delta']*100:+.1f}% / {a.get('window', '-')})"
                     )
                 elif a["type"] == "new_event":
                     print(f"  NEW: {a['title'][:60]} (${a['volume']:,.0f})")
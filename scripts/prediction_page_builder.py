@@ -19,6 +19,7 @@ VPS cron (1日1回):
 """
 
 from __future__ import annotations
+import atexit
 import json
 import os
 
@@ -28,6 +29,7 @@ import sys
 import hmac
 import hashlib
 import base64
+import functools
 import urllib.request
 import ssl
 import math
@@ -38,6 +40,9 @@ from mission_contract import MISSION_CONTRACT_VERSION, mission_contract_hash
 from canonical_public_lexicon import LEXICON_VERSION
 from canonical_public_lexicon import get_tracker_copy
 from prediction_state_utils import is_prediction_resolved, normalize_public_status, public_prediction_status
+from prediction_store import get_store
+from link_verifier import LinkVerifier, is_live
+from market_match_index import MarketMatchIndex, SearchCache
 
 if sys.stdout.encoding != "utf-8":
     sys.stdout.reconfigure(encoding="utf-8")
@@ -494,6 +499,10 @@ GHOST_URL = "https://nowpattern.com"
 PREDICTION_DB = "/opt/shared/scripts/prediction_db.json"
 EMBED_DATA = "/opt/shared/polymarket/embed_data.json"
 TRACKER_OUTPUT = "/opt/shared/polymarket/tracker_page_data.json"
+TRACKER_RENDER_CACHE = "/opt/shared/polymarket/tracker_render_cache.json"
+TRACKER_BUILD_STATE = "/opt/shared/polymarket/tracker_build_state.json"
+LINK_CHECK_CACHE = "/opt/shared/polymarket/link_check_cache.json"
+MARKET_SEARCH_CACHE = "/opt/shared/polymarket/market_search_cache.json"
 PREDICTIONS_SLUG_JA = "predictions"
 PREDICTIONS_SLUG_EN = "en-predictions"
 MARKET_HISTORY_DB = "/opt/shared/market_history/market_history.db"
@@ -772,8 +781,12 @@ def ghost_request(method, path, api_key, data=None):
 
 def load_prediction_db():
     if os.path.exists(PREDICTION_DB):
-        with open(PREDICTION_DB, encoding="utf-8") as f:
-            db = json.load(f)
+        try:
+            db = get_store(PREDICTION_DB).load_db()
+        except Exception as exc:
+            print(f"[PREDICTION STORE] unavailable ({exc}) — reading {PREDICTION_DB} directly")
+            with open(PREDICTION_DB, encoding="utf-8") as f:
+                db = json.load(f)
     else:
         return {"predictions": [], "stats": {}}
     # ★ 自動修正 (2026-03-29): エラー文字列をデータロード時に除去
@@ -804,12 +817,20 @@ def load_embed_data():
     return []
 
 
+def _has_latest_snapshot_table(db) -> bool:
+    return db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'latest_snapshot'"
+    ).fetchone() is not None
+
+
 def load_linked_markets():
     """
-    market_history.db の nowpattern_links + probability_snapshots を読み込む。
+    market_history.db の nowpattern_links + latest_snapshot を読み込む。
+    （latest_snapshot はクローラーのトリガーで維持。未作成の古いDBでは
+      probability_snapshots から最新日を集計するフォールバック）
     returns: {prediction_id: {"question": str, "yes_prob": float, "direction": str,
                                "market_source": str, "market_slug": str, "event_slug": str,
-                               "external_id": str}}
+                               "external_id": str, "market_id": int}}
     """
     if not os.path.exists(MARKET_HISTORY_DB):
         return {}
@@ -817,22 +838,26 @@ def load_linked_markets():
         db = sqlite3.connect(MARKET_HISTORY_DB)
         db.row_factory = sqlite3.Row
         cur = db.cursor()
-        cur.execute("""
-            SELECT nl.prediction_id, nl.resolution_direction,
-                   nl.source as link_source, nl.external_market_id,
-                   m.question, m.close_date, m.source as m_source,
-                   m.market_slug, m.event_slug, m.external_id, m.event_id,
-                   ps.yes_prob, ps.snapshot_date
-            FROM nowpattern_links nl
-            JOIN markets m ON nl.market_id = m.id
-            LEFT JOIN (
+        if _has_latest_snapshot_table(db):
+            latest_sql = "latest_snapshot"
+        else:
+            latest_sql = """(
                 SELECT market_id, yes_prob, snapshot_date
                 FROM probability_snapshots
                 WHERE (market_id, snapshot_date) IN (
                     SELECT market_id, MAX(snapshot_date)
                     FROM probability_snapshots GROUP BY market_id
                 )
-            ) ps ON m.id = ps.market_id
+            )"""
+        cur.execute(f"""
+            SELECT nl.prediction_id, nl.resolution_direction,
+                   nl.source as link_source, nl.external_market_id,
+                   m.id as market_id, m.question, m.close_date, m.source as m_source,
+                   m.market_slug, m.event_slug, m.external_id, m.event_id,
+                   ps.yes_prob, ps.snapshot_date
+            FROM nowpattern_links nl
+            JOIN markets m ON nl.market_id = m.id
+            LEFT JOIN {latest_sql} ps ON m.id = ps.market_id
         """)
         result = {}
         for row in cur.fetchall():
@@ -847,6 +872,7 @@ def load_linked_markets():
                 "event_slug": row["event_slug"] or "",
                 "external_id": row["external_id"] or row["external_market_id"] or "",
                 "event_id": str(row["event_id"]) if row["event_id"] else "",
+                "market_id": row["market_id"],
             }
         db.close()
         return result
@@ -854,6 +880,46 @@ def load_linked_markets():
         return {}
 
 
+def load_market_series(market_ids, days=90, max_points=30):
+    """スパークライン用の確率履歴（コンパクト形式）。
+
+    returns: {market_id: [[snapshot_date, yes_pct], ...]}  古い順、max_points 点まで
+    idx_snapshots_series (market_id, snapshot_date, yes_prob) のカバリングインデックスだけで読む。
+    """
+    market_ids = sorted({int(m) for m in market_ids if m is not None})
+    if not market_ids or not os.path.exists(MARKET_HISTORY_DB):
+        return {}
+    since = (date.today() - timedelta(days=days)).isoformat()
+    series = {}
+    try:
+        db = sqlite3.connect(f"file:{MARKET_HISTORY_DB}?mode=ro", uri=True)
+        try:
+            for start in range(0, len(market_ids), 500):
+                chunk = market_ids[start:start + 500]
+                rows = db.execute(f"""
+                    SELECT market_id, snapshot_date, yes_prob
+                    FROM probability_snapshots
+                    WHERE market_id IN ({",".join("?" * len(chunk))}) AND snapshot_date >= ?
+                    ORDER BY market_id, snapshot_date
+                """, (*chunk, since)).fetchall()
+                for market_id, snapshot_date, yes_prob in rows:
+                    if yes_prob is not None:
+                        series.setdefault(market_id, []).append([snapshot_date, round(yes_prob * 100, 1)])
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return {}
+    for market_id, points in series.items():
+        if max_points <= 1:
+            # 1点以下なら最新点だけ（間引きの step は max_points - 1 で割るため）
+            series[market_id] = points[-1:] if max_points == 1 else []
+        elif len(points) > max_points:
+            # 等間隔に間引き（最新点は必ず残す）
+            step = (len(points) - 1) / (max_points - 1)
+            series[market_id] = [points[round(i * step)] for i in range(max_points)]
+    return series
+
+
 def _get_market_url(linked):
     """linked_markets データから市場WebページのURLを構築する。"""
     if not linked:
@@ -919,7 +985,7 @@ def ensure_ja_translations(pred_db, google_api_key):
     If missing and google_api_key is available, translate via Gemini Flash and save back to DB.
     One-time operation per prediction — skipped if resolution_question_ja already exists.
     """
-    changed = False
+    translated_by_id = {}
     for pred in pred_db.get("predictions", []):
         rq = pred.get("resolution_question", "")
         rq_ja = pred.get("resolution_question_ja", "")
@@ -930,14 +996,19 @@ def ensure_ja_translations(pred_db, google_api_key):
             translated = _translate_to_ja(rq, google_api_key)
             if translated and translated != rq:
                 pred["resolution_question_ja"] = translated
-                changed = True
+                translated_by_id[pred.get("prediction_id", "")] = translated
                 print(f"  [translate] {rq[:50]} → {translated[:50]}")
             else:
                 print(f"  [translate] No change for: {rq[:50]}")
-    if changed:
-        with open(PREDICTION_DB, "w", encoding="utf-8") as f:
-            json.dump(pred_db, f, ensure_ascii=False, indent=2)
-        print(f"  [translate] Saved translations to {PREDICTION_DB}")
+    if translated_by_id:
+        # Row-level write-back: only translated predictions are touched, and the
+        # load-time scrubbing in load_prediction_db() is never persisted.
+        store = get_store(PREDICTION_DB)
+        with store.batch():
+            for prediction_id, translated in translated_by_id.items():
+                if prediction_id:
+                    store.update(prediction_id, {"resolution_question_ja": translated})
+        print(f"  [translate] Saved {len(translated_by_id)} translations to {PREDICTION_DB}")
     return pred_db
 
 
@@ -1040,6 +1111,8 @@ def find_metaculus_match(title):
     Strategy: extract proper nouns (capitalized entities) as primary search terms,
     fall back to longest content words. Accepts ~30-40% match rate as normal.
     API: https://api.manifold.markets/v0/search-markets
+    Search results are cached per normalized query (MARKET_SEARCH_CACHE, TTL),
+    so repeated builds only hit the API for new or expired queries.
     """
     import urllib.request
     import urllib.parse
@@ -1081,62 +1154,133 @@ def find_metaculus_match(title):
             seen.add(q)
             unique_queries.append(q)
 
-    try:
-        ctx = ssl.create_default_context()
-        headers = {"User-Agent": "Nowpattern/1.0"}
-
-        for query in unique_queries[:3]:
-            enc = urllib.parse.quote(query)
-            url = (
-                f"https://api.manifold.markets/v0/search-markets"
-                f"?term={enc}&filter=open&sort=score&limit=5"
-            )
+    cache = _market_search_cache()
+    ctx = ssl.create_default_context()
+    headers = {"User-Agent": "Nowpattern/1.0"}
+
+    def _search(query):
+        """Manifold 検索（正規化クエリで TTL キャッシュ。API 失敗時は market_history.db のローカル索引）"""
+        cached = cache.get("manifold", query)
+        if cached is not None:
+            return cached
+        enc = urllib.parse.quote(query)
+        url = (
+            f"https://api.manifold.markets/v0/search-markets"
+            f"?term={enc}&filter=open&sort=score&limit=5"
+        )
+        try:
             req = urllib.request.Request(url, headers=headers)
             with urllib.request.urlopen(req, context=ctx, timeout=10) as resp:
                 markets = _json.loads(resp.read())
-            for m in markets:
-                prob = m.get("probability")
-                if prob is None:
-                    continue
-                if not (0.03 <= prob <= 0.97):
-                    continue
-                return {
-                    "question": m.get("question", "")[:80],
-                    "probability": round(prob * 100),
-                    "url": m.get("url", f"https://manifold.markets/{m.get('id', '')}"),
-                    "id": m.get("id", ""),
-                }
-        return None
-    except Exception:
-        return None
+        except Exception:
+            if _MARKET_INDEX is None:
+                return []
+            return [
+                {"question": m["question"], "probability": m["probability"] / 100,
+                 "url": f"https://manifold.markets/{m.get('market_slug') or m.get('external_id', '')}",
+                 "id": m.get("external_id", "")}
+                for m in _MARKET_INDEX.search(query, source="manifold")
+            ]
+        slim = [
+            {"question": m.get("question", ""), "probability": m.get("probability"),
+             "url": m.get("url", f"https://manifold.markets/{m.get('id', '')}"), "id": m.get("id", "")}
+            for m in markets
+        ]
+        cache.put("manifold", query, slim)
+        return slim
+
+    for query in unique_queries[:3]:
+        for m in _search(query):
+            prob = m.get("probability")
+            if prob is None:
+                continue
+            if not (0.03 <= prob <= 0.97):
+                continue
+            return {
+                "question": m.get("question", "")[:80],
+                "probability": round(prob * 100),
+                "url": m.get("url", f"https://manifold.markets/{m.get('id', '')}"),
+                "id": m.get("id", ""),
+            }
+    return None
+
+
+_MARKET_INDEX = None
+_MARKET_INDEX_SOURCE = None
+_MARKET_SEARCH_CACHE = None
+
+
+def _market_search_cache() -> SearchCache:
+    global _MARKET_SEARCH_CACHE
+    if _MARKET_SEARCH_CACHE is None:
+        _MARKET_SEARCH_CACHE = SearchCache(MARKET_SEARCH_CACHE)
+        atexit.register(_MARKET_SEARCH_CACHE.save)
+    return _MARKET_SEARCH_CACHE
+
+
+def get_market_index(embed_data) -> MarketMatchIndex:
+    """embed_data + market_history.db の市場キーワード索引（embed_data ごとに1回だけ構築）"""
+    global _MARKET_INDEX, _MARKET_INDEX_SOURCE
+    if _MARKET_INDEX is None or _MARKET_INDEX_SOURCE is not embed_data:
+        _MARKET_INDEX = MarketMatchIndex.from_sources(
+            embed_data or [], MARKET_HISTORY_DB, keyword_fn=extract_keywords, genre_map=POLY_TO_GHOST,
+        )
+        _MARKET_INDEX_SOURCE = embed_data
+    return _MARKET_INDEX
 
 
 def find_polymarket_match(title, genres, embed_data):
-    """Find best Polymarket match for an article."""
-    article_kw = extract_keywords(title)
-    article_genres = set(genres) if isinstance(genres, list) else set()
-    best = None
-    best_score = 0
-
-    for m in embed_data:
-        score = 0
-        poly_genres = {POLY_TO_GHOST.get(g, g) for g in m.get("genres", [])}
-        overlap = article_genres & poly_genres
-        if overlap:
-            score += len(overlap) * 3
-        mkw = extract_keywords(m.get("title", "") + " " + m.get("question", ""))
-        kw_hit = article_kw & mkw
-        if len(kw_hit) >= 2:
-            score += len(kw_hit)
-        if score > best_score and (overlap and len(kw_hit) >= 2 or len(kw_hit) >= 4):
-            best_score = score
-            best = {
-                "question": m.get("question", "")[:60],
-                "probability": m.get("probability", 0),
-                "outcomes": m.get("outcomes"),  # {"Yes": xx, "No": yy} 0-100%
-                "volume_usd": m.get("volume_usd", 0),
-            }
-    return best
+    """Find best Polymarket match for an article (local inverted-index lookup)."""
+    return get_market_index(embed_data).best_match(title, genres)
+
+
+def batch_match_markets(pred_db, embed_data, include_manifold=False):
+    """全予測を一括マッチ → {prediction_id: {"polymarket": ..., "metaculus": ...}}
+
+    Polymarket はローカル索引のみ。include_manifold=True でも Manifold 検索は
+    TTL キャッシュ経由なので、2回目以降のビルドはほぼネットワーク無しで済む。
+    """
+    index = get_market_index(embed_data)
+    result = {}
+    for pred in pred_db.get("predictions", []):
+        pid = pred.get("prediction_id", "")
+        title = pred.get("article_title") or pred.get("title") or ""
+        genre_tags = pred.get("genre_tags") or ""
+        if isinstance(genre_tags, str):
+            genre_tags = genre_tags.split(",")
+        genres = [str(g).strip().lower() for g in genre_tags if str(g).strip()]
+        if not pid or not title:
+            continue
+        result[pid] = {
+            "polymarket": index.best_match(title, genres),
+            "metaculus": find_metaculus_match(title) if include_manifold else None,
+        }
+    return result
+
+
+def report_market_suggestions(pred_db, embed_data, include_manifold=False):
+    """market_consensus 未設定の予測に市場候補を提示（--suggest-markets）
+
+    build_rows は自動マッチを使わない方針なので、候補は表示せず編集者向けに
+    出力するだけ。採用するかは market_consensus に明示的に書いて決める。
+    """
+    unset = [
+        p for p in pred_db.get("predictions", [])
+        if not (isinstance(p.get("market_consensus"), dict) and p["market_consensus"].get("pick"))
+    ]
+    matches = batch_match_markets({"predictions": unset}, embed_data, include_manifold=include_manifold)
+    suggested = 0
+    for pid, match in sorted(matches.items()):
+        pm, mc = match["polymarket"], match["metaculus"]
+        if not (pm or mc):
+            continue
+        suggested += 1
+        if pm:
+            print(f"  {pid}  Polymarket {pm['probability']}%  {pm['question']}")
+        if mc:
+            print(f"  {pid}  Manifold {mc['probability']}%  {mc['question']}")
+    print(f"[MARKET SUGGEST] {suggested}/{len(unset)} predictions without market_consensus have a candidate")
+    return suggested
 
 
 
@@ -1200,6 +1344,35 @@ def _resolve_ghost_url(api_url: str, slug: str, tag_slugs: set[str] | None = Non
     return ""
 
 
+def _ghost_db_live_urls(db_path: str = _GHOST_DB_PATH) -> set[str]:
+    """Ghost DB の published 投稿から公開URLが確定できるもの（/en/ 投稿）を返す。
+
+    JA 投稿の permalink は routes 設定次第なので、ここでは推測せずサイトマップに任せる。
+    """
+    urls: set[str] = set()
+    if not os.path.exists(db_path):
+        return urls
+    try:
+        conn = _sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT p.slug, GROUP_CONCAT(t.slug) FROM posts p "
+                "LEFT JOIN posts_tags pt ON pt.post_id = p.id "
+                "LEFT JOIN tags t ON t.id = pt.tag_id "
+                "WHERE p.status = 'published' GROUP BY p.id"
+            ).fetchall()
+        finally:
+            conn.close()
+    except Exception:
+        return urls
+    for slug, tag_csv in rows:
+        tag_slugs = {tag.strip().lower() for tag in (tag_csv or "").split(",") if tag.strip()}
+        url = _canonical_public_post_url(slug or "", tag_slugs)
+        if url:
+            urls.add(url)
+    return urls
+
+
 def _resolve_ghost_post_url(post: dict) -> str:
     return _resolve_ghost_url(
         post.get("url", ""),
@@ -3522,6 +3695,333 @@ def _build_compact_row(r, lang):
     )
 
 
+# ── Incremental card render cache ─────────────────────────────
+# カード描画は row（prediction_db のソースフィールド + linked market スナップショット
+# + 解決済み Ghost URL）と lang だけで決まる純関数。row の指紋が前回と同じなら
+# 前回の HTML を再利用し、変化したカードだけ再描画してページ骨格に差し込む。
+
+_RENDER_CACHE_VERSION = 1
+_RENDER_CACHE: dict[str, dict] = {}
+_RENDER_CACHE_STATS = {"hit": 0, "miss": 0}
+_RENDER_CACHE_TOUCHED: set[str] = set()
+_RENDERER_SIGNATURE = ""
+
+
+def _renderer_signature() -> str:
+    """Hash of this module's source + feature flags. A code deploy invalidates every card."""
+    global _RENDERER_SIGNATURE
+    if not _RENDERER_SIGNATURE:
+        h = hashlib.sha256()
+        try:
+            with open(os.path.abspath(__file__), "rb") as fh:
+                h.update(fh.read())
+        except OSError:
+            pass
+        h.update(json.dumps(FEATURE_FLAGS, sort_keys=True).encode())
+        h.update(str(_RENDER_CACHE_VERSION).encode())
+        _RENDERER_SIGNATURE = h.hexdigest()[:16]
+    return _RENDERER_SIGNATURE
+
+
+def prediction_fingerprint(row: dict, lang: str, kind: str = "card") -> str:
+    """Stable fingerprint of everything a tracker card render depends on."""
+    payload = json.dumps(row, ensure_ascii=False, sort_keys=True, default=str)
+    h = hashlib.sha256()
+    h.update(f"{_renderer_signature()}|{lang}|{kind}|".encode())
+    h.update(payload.encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_render_cache(path: str = TRACKER_RENDER_CACHE) -> int:
+    """Load persisted card HTML from the previous run. Returns number of cached cards."""
+    _RENDER_CACHE.clear()
+    _RENDER_CACHE_TOUCHED.clear()
+    _RENDER_CACHE_STATS.update({"hit": 0, "miss": 0})
+    payload = _read_json_if_exists(path)
+    if payload.get("version") != _RENDER_CACHE_VERSION or payload.get("renderer") != _renderer_signature():
+        return 0
+    entries = payload.get("entries", {})
+    if isinstance(entries, dict):
+        _RENDER_CACHE.update(entries)
+    return len(_RENDER_CACHE)
+
+
+def save_render_cache(path: str = TRACKER_RENDER_CACHE, built_langs: list[str] | None = None) -> None:
+    """Persist the card cache atomically.
+
+    Cards of a language built this run that were not rendered (deleted/hidden
+    predictions) are pruned; other languages are kept as-is.
+    """
+    built = set(built_langs or [])
+    entries = {
+        k: v for k, v in _RENDER_CACHE.items()
+        if k.split(":", 1)[0] not in built or k in _RENDER_CACHE_TOUCHED
+    }
+    payload = {
+        "version": _RENDER_CACHE_VERSION,
+        "renderer": _renderer_signature(),
+        "saved_at": datetime.now(timezone.utc).isoformat(),
+        "entries": entries,
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        print(f"[RENDER CACHE] write failed: {exc}")
+
+
+def tracker_input_fingerprint(pred_db: dict, embed_data, linked_markets: dict, ghost_index: list[dict],
+                              lang: str, today: date | None = None) -> str:
+    """Fingerprint of every input a tracker page build reads.
+
+    ghost_index is the light (id, slug, updated_at) post list; today is included
+    because in-play / deadline badges move with the date.
+    """
+    h = hashlib.sha256()
+    h.update(f"{_renderer_signature()}|{lang}|{(today or date.today()).isoformat()}|".encode())
+    for part in (
+        pred_db,
+        embed_data,
+        linked_markets,
+        sorted((p.get("id", ""), p.get("slug", ""), p.get("updated_at", "")) for p in ghost_index),
+    ):
+        h.update(json.dumps(part, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def load_build_state(path: str = TRACKER_BUILD_STATE) -> dict:
+    state = _read_json_if_exists(path)
+    return state if isinstance(state, dict) else {}
+
+
+def save_build_state(state: dict, path: str = TRACKER_BUILD_STATE) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(state, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        print(f"[BUILD STATE] write failed: {exc}")
+
+
+def _render_cache_key(row: dict, lang: str, kind: str) -> str:
+    return f"{lang}:{kind}:{row.get('prediction_id', '')}"
+
+
+def _render_card_cached(row: dict, lang: str, kind: str = "card") -> str:
+    """Render via _build_card/_build_compact_row, reusing cached HTML when the fingerprint matches."""
+    render = _build_compact_row if kind == "compact" else _build_card
+    if not row.get("prediction_id"):
+        return render(row, lang)
+    key = _render_cache_key(row, lang, kind)
+    _RENDER_CACHE_TOUCHED.add(key)
+    fingerprint = prediction_fingerprint(row, lang, kind)
+    cached = _RENDER_CACHE.get(key)
+    if cached and cached.get("fp") == fingerprint:
+        _RENDER_CACHE_STATS["hit"] += 1
+        return cached["html"]
+    html = render(row, lang)
+    _RENDER_CACHE[key] = {"fp": fingerprint, "html": html}
+    _RENDER_CACHE_STATS["miss"] += 1
+    return html
+
+
+@functools.lru_cache(maxsize=None)
+def _tracker_inline_code(lang: str) -> str:
+    """Page skeleton CSS + JS. Depends only on lang, so it is built once per process."""
+    cards_word = "件" if lang == "ja" else "cards"
+    return f"""<style>
+details > summary {{ list-style:none; cursor:pointer; }}
+details > summary::-webkit-details-marker {{ display:none; }}
+.chevron {{ transition:transform .2s; display:inline-block; }}
+details[open] .chevron {{ transform:rotate(180deg); }}
+.np-cat-btn:focus {{ outline:none; }}
+.np-view-btn {{ min-height:44px;padding:10px 14px;border-radius:9999px;border:1px solid #d6dce5;background:#f8fafc;color:#334155;font-size:0.88em;font-weight:700;cursor:pointer;display:inline-flex;gap:8px;align-items:center; }}
+.np-view-btn span {{ display:inline-flex;min-width:24px;justify-content:center;padding:2px 7px;border-radius:9999px;background:#e2e8f0;color:#334155;font-size:0.82em;font-weight:700; }}
+.np-view-btn.active {{ background:#0f172a;color:#fff;border-color:#0f172a;box-shadow:0 6px 18px rgba(15,23,42,.14); }}
+.np-view-btn.active span {{ background:#f59e0b;color:#1f2937; }}
+.np-view-btn:hover {{ background:#eef2f7; }}
+.np-view-btn.active:hover {{ background:#111827; }}
+.np-cat-btn {{ min-height:40px; }}
+.np-page-btn {{ padding:4px 10px;border-radius:4px;border:1px solid #ddd;background:#fff;color:#555;font-size:0.85em;cursor:pointer;font-family:inherit; }}
+.np-page-btn.active {{ background:#b8860b;color:#fff;border-color:#b8860b;font-weight:600; }}
+.np-page-btn:hover {{ background:#f5f0e0; }}
+.np-page-btn.active:hover {{ background:#a07a0a; }}
+.score-tier-label {{ white-space:nowrap; }}
+.score-disclaimer a:hover {{ opacity:.85; }}
+@media (max-width: 640px) {{
+  .np-card-grid {{ grid-template-columns: 1fr !important; }}
+  .np-view-btn {{ flex:1 1 calc(50% - 6px); justify-content:center; padding:10px 8px; font-size:0.8em; }}
+  #np-view-toolbar > div {{ gap:12px !important; }}
+}}
+</style>
+<script>
+(function(){{
+  var CARDS_PER_PAGE = window.innerWidth <= 640 ? 18 : 36;
+  var currentPage = 1;
+  var filteredCards = [];
+  var currentView = 'all';
+  var cats = document.querySelectorAll('.np-cat-btn');
+  var viewButtons = document.querySelectorAll('.np-view-btn');
+  var searchEl = document.getElementById('np-search');
+  var inPlaySection = document.getElementById('np-inplay-group');
+  var awaitingSection = document.getElementById('np-awaiting-group');
+  var trackingSection = document.getElementById('np-tracking-section');
+  var resolvedSection = document.getElementById('np-resolved-section');
+  var inPlayCards = Array.from(document.querySelectorAll('#np-inplay-list details'));
+  var awaitingCards = Array.from(document.querySelectorAll('#np-awaiting-list details'));
+  var trackingCards = inPlayCards.concat(awaitingCards);
+
+  function setView(view){{
+    currentView = view || 'all';
+    viewButtons.forEach(function(btn) {{
+      btn.classList.toggle('active', btn.dataset.view === currentView);
+    }});
+    if (trackingSection) {{
+      trackingSection.style.display = currentView === 'resolved' ? 'none' : '';
+    }}
+    if (resolvedSection) {{
+      resolvedSection.style.display = (currentView === 'resolved' || currentView === 'all') ? '' : 'none';
+    }}
+    if (inPlaySection) {{
+      inPlaySection.style.display = (currentView === 'all' || currentView === 'inplay') ? '' : 'none';
+    }}
+    if (awaitingSection) {{
+      awaitingSection.style.display = (currentView === 'all' || currentView === 'awaiting') ? '' : 'none';
+    }}
+    var pagination = document.getElementById('np-pagination');
+    if (pagination && currentView !== 'all' && currentView !== 'inplay') {{
+      pagination.innerHTML = '';
+    }}
+  }}
+
+  viewButtons.forEach(function(btn){{
+    btn.addEventListener('click', function(){{
+      setView(this.dataset.view);
+      if(this.dataset.view !== 'resolved'){{
+        filterCards();
+      }}
+    }});
+  }});
+
+  cats.forEach(function(btn){{
+    btn.addEventListener('click', function(){{
+      cats.forEach(function(b){{
+        b.style.background='#fff'; b.style.color='#555';
+        b.style.border='1px solid #ddd'; b.style.fontWeight='400';
+      }});
+      this.style.background='#b8860b'; this.style.color='#fff';
+      this.style.border='2px solid #b8860b'; this.style.fontWeight='600';
+      currentPage = 1;
+      filterCards();
+    }});
+  }});
+
+  if(searchEl) searchEl.addEventListener('input', function(){{ currentPage=1; filterCards(); }});
+
+  function filterCards(){{
+    var activeCat = 'all';
+    cats.forEach(function(b){{
+      if(b.style.background==='rgb(184, 134, 11)' || b.style.background==='#b8860b')
+        activeCat = b.dataset.cat;
+    }});
+    var kw = searchEl ? searchEl.value.toLowerCase() : '';
+    var candidateCards = trackingCards;
+    if (currentView === 'inplay') candidateCards = inPlayCards;
+    if (currentView === 'awaiting') candidateCards = awaitingCards;
+    filteredCards = [];
+    trackingCards.forEach(function(d){{
+      d.style.display = 'none';
+    }});
+    candidateCards.forEach(function(d){{
+      var genres = (d.dataset.genres || '').split(',');
+      var matchCat = activeCat==='all' || genres.indexOf(activeCat)>=0;
+      var matchKw = !kw || d.textContent.toLowerCase().indexOf(kw)>=0;
+      if(matchCat && matchKw) filteredCards.push(d);
+    }});
+    showPage(currentPage);
+  }}
+
+  function showPage(page){{
+    currentPage = page;
+    var total = filteredCards.length;
+    var totalPages = Math.max(1, Math.ceil(total / CARDS_PER_PAGE));
+    if(currentPage > totalPages) currentPage = totalPages;
+    var start = (currentPage - 1) * CARDS_PER_PAGE;
+    var end = start + CARDS_PER_PAGE;
+    filteredCards.forEach(function(d, i){{
+      d.style.display = (i >= start && i < end) ? '' : 'none';
+    }});
+    renderPagination(totalPages, total);
+  }}
+
+  function renderPagination(totalPages, total){{
+    var pag = document.getElementById('np-pagination');
+    if(!pag) return;
+    if(currentView === 'resolved') {{ pag.innerHTML = ''; return; }}
+    if(totalPages <= 1){{ pag.innerHTML = '<span style="color:#888;font-size:0.85em">'+total+' {cards_word}</span>'; return; }}
+    var html = '';
+    var pages = [];
+    pages.push(1);
+    var lo = Math.max(2, currentPage - 2);
+    var hi = Math.min(totalPages - 1, currentPage + 2);
+    if(lo > 2) pages.push(-1);
+    for(var i = lo; i <= hi; i++) pages.push(i);
+    if(hi < totalPages - 1) pages.push(-1);
+    if(totalPages > 1) pages.push(totalPages);
+    pages.forEach(function(p){{
+      if(p === -1){{ html += '<span style="color:#888">...</span> '; }}
+      else {{ html += '<button class="np-page-btn'+(p===currentPage?' active':'')+'" onclick="window._npGoPage('+p+')">'+p+'</button> '; }}
+    }});
+    html += '<span style="color:#888;font-size:0.85em;margin-left:8px">'+total+' {cards_word}</span>';
+    pag.innerHTML = html;
+  }}
+
+  window._npGoPage = function(p){{
+    showPage(p);
+    var el = document.getElementById(currentView === 'awaiting' ? 'np-awaiting-list' : 'np-tracking-section');
+    if(el) el.scrollIntoView({{behavior:'smooth',block:'start'}});
+  }};
+
+  setView('all');
+  filterCards();
+
+  (function(){{
+    function npLand(){{
+      var h=window.location.hash;
+      if(!h||h.indexOf('np-')<0)return;
+      var el=document.querySelector(h);
+      if(!el)return;
+      if (resolvedSection && resolvedSection.contains(el)) {{
+        setView('resolved');
+      }} else if (awaitingSection && awaitingSection.contains(el)) {{
+        setView('awaiting');
+      }} else {{
+        setView('all');
+        if(el.style.display==='none'){{
+          var idx=filteredCards.indexOf(el);
+          if(idx>=0)showPage(Math.floor(idx/CARDS_PER_PAGE)+1);
+        }}
+      }}
+      el.open=true;
+      setTimeout(function(){{
+        el.scrollIntoView({{behavior:'smooth',block:'center'}});
+        el.style.outline='3px solid #b8860b';
+        setTimeout(function(){{el.style.outline='';}},2500);
+      }},150);
+    }}
+    npLand();
+    window.addEventListener('hashchange',npLand);
+  }})();
+}})();
+</script>"""
+
+
 def build_page_html(rows, stats, lang="ja"):
     """Build predictions page HTML — 4 blocks: scoreboard + tracking + resolved + automation."""
     now = datetime.now().strftime("%Y-%m-%d %H:%M JST")
@@ -3612,8 +4112,8 @@ def build_page_html(rows, stats, lang="ja"):
     # Reduces EN page: 5.27MB -> ~450KB (91% size reduction)
     _featured   = [r for r in tracking if _is_tracker_in_play(r)]
     _monitoring = [r for r in tracking if _normalize_status_value(r) == 'resolving' and not _is_tracker_in_play(r)]
-    _featured_cards   = "\n".join(_build_card(r, lang) for r in _featured)
-    _monitoring_cards = "\n".join(_build_compact_row(r, lang) for r in _monitoring)
+    _featured_cards   = "\n".join(_render_card_cached(r, lang) for r in _featured)
+    _monitoring_cards = "\n".join(_render_card_cached(r, lang, "compact") for r in _monitoring)
     if _monitoring:
         if lang == 'ja':
             _mon_hdr = (
@@ -3670,7 +4170,7 @@ def build_page_html(rows, stats, lang="ja"):
         no_resolved_text = "No resolved predictions yet."
 
     if resolved:
-        resolved_cards = "\n".join(_build_card(r, lang) for r in resolved)
+        resolved_cards = "\n".join(_render_card_cached(r, lang) for r in resolved)
         block3 = (
             '<div id="np-resolved-section" style="margin-bottom:24px;background:#fff;border-radius:12px;'
             'padding:24px 28px;box-shadow:0 2px 8px rgba(0,0,0,.08)">'
@@ -3845,7 +4345,6 @@ details[open] .chevron { transform:rotate(180deg); }
     total_predictions = len(formal_rows)
     search_placeholder = ui["search_placeholder"]
     auto_updated = ui["last_updated"].format(now=now)
-    cards_word = "件" if lang == "ja" else "cards"
 
     view_toolbar = (
         '<div id="np-view-toolbar" style="position:sticky;top:12px;z-index:20;margin-bottom:18px;'
@@ -3886,9 +4385,9 @@ details[open] .chevron { transform:rotate(180deg); }
             f'background:#fff;color:#555;font-size:0.8em;cursor:pointer">{cat_name}</button>'
         )
 
-    in_play_cards = "\n".join(_build_card(r, lang) for r in in_play)
-    awaiting_cards = "\n".join(_build_compact_row(r, lang) for r in awaiting)
-    resolved_cards = "\n".join(_build_card(r, lang) for r in resolved)
+    in_play_cards = "\n".join(_render_card_cached(r, lang) for r in in_play)
+    awaiting_cards = "\n".join(_render_card_cached(r, lang, "compact") for r in awaiting)
+    resolved_cards = "\n".join(_render_card_cached(r, lang) for r in resolved)
 
     awaiting_group = ""
     if awaiting:
@@ -3934,191 +4433,7 @@ details[open] .chevron { transform:rotate(180deg); }
         '</div>'
     )
 
-    inline_code = f"""<style>
-details > summary {{ list-style:none; cursor:pointer; }}
-details > summary::-webkit-details-marker {{ display:none; }}
-.chevron {{ transition:transform .2s; display:inline-block; }}
-details[open] .chevron {{ transform:rotate(180deg); }}
-.np-cat-btn:focus {{ outline:none; }}
-.np-view-btn {{ min-height:44px;padding:10px 14px;border-radius:9999px;border:1px solid #d6dce5;background:#f8fafc;color:#334155;font-size:0.88em;font-weight:700;cursor:pointer;display:inline-flex;gap:8px;align-items:center; }}
-.np-view-btn span {{ display:inline-flex;min-width:24px;justify-content:center;padding:2px 7px;border-radius:9999px;background:#e2e8f0;color:#334155;font-size:0.82em;font-weight:700; }}
-.np-view-btn.active {{ background:#0f172a;color:#fff;border-color:#0f172a;box-shadow:0 6px 18px rgba(15,23,42,.14); }}
-.np-view-btn.active span {{ background:#f59e0b;color:#1f2937; }}
-.np-view-btn:hover {{ background:#eef2f7; }}
-.np-view-btn.active:hover {{ background:#111827; }}
-.np-cat-btn {{ min-height:40px; }}
-.np-page-btn {{ padding:4px 10px;border-radius:4px;border:1px solid #ddd;background:#fff;color:#555;font-size:0.85em;cursor:pointer;font-family:inherit; }}
-.np-page-btn.active {{ background:#b8860b;color:#fff;border-color:#b8860b;font-weight:600; }}
-.np-page-btn:hover {{ background:#f5f0e0; }}
-.np-page-btn.active:hover {{ background:#a07a0a; }}
-.score-tier-label {{ white-space:nowrap; }}
-.score-disclaimer a:hover {{ opacity:.85; }}
-@media (max-width: 640px) {{
-  .np-card-grid {{ grid-template-columns: 1fr !important; }}
-  .np-view-btn {{ flex:1 1 calc(50% - 6px); justify-content:center; padding:10px 8px; font-size:0.8em; }}
-  #np-view-toolbar > div {{ gap:12px !important; }}
-}}
-</style>
-<script>
-(function(){{
-  var CARDS_PER_PAGE = window.innerWidth <= 640 ? 18 : 36;
-  var currentPage = 1;
-  var filteredCards = [];
-  var currentView = 'all';
-  var cats = document.querySelectorAll('.np-cat-btn');
-  var viewButtons = document.querySelectorAll('.np-view-btn');
-  var searchEl = document.getElementById('np-search');
-  var inPlaySection = document.getElementById('np-inplay-group');
-  var awaitingSection = document.getElementById('np-awaiting-group');
-  var trackingSection = document.getElementById('np-tracking-section');
-  var resolvedSection = document.getElementById('np-resolved-section');
-  var inPlayCards = Array.from(document.querySelectorAll('#np-inplay-list details'));
-  var awaitingCards = Array.from(document.querySelectorAll('#np-awaiting-list details'));
-  var trackingCards = inPlayCards.concat(awaitingCards);
-
-  function setView(view){{
-    currentView = view || 'all';
-    viewButtons.forEach(function(btn) {{
-      btn.classList.toggle('active', btn.dataset.view === currentView);
-    }});
-    if (trackingSection) {{
-      trackingSection.style.display = currentView === 'resolved' ? 'none' : '';
-    }}
-    if (resolvedSection) {{
-      resolvedSection.style.display = (currentView === 'resolved' || currentView === 'all') ? '' : 'none';
-    }}
-    if (inPlaySection) {{
-      inPlaySection.style.display = (currentView === 'all' || currentView === 'inplay') ? '' : 'none';
-    }}
-    if (awaitingSection) {{
-      awaitingSection.style.display = (currentView === 'all' || currentView === 'awaiting') ? '' : 'none';
-    }}
-    var pagination = document.getElementById('np-pagination');
-    if (pagination && currentView !== 'all' && currentView !== 'inplay') {{
-      pagination.innerHTML = '';
-    }}
-  }}
-
-  viewButtons.forEach(function(btn){{
-    btn.addEventListener('click', function(){{
-      setView(this.dataset.view);
-      if(this.dataset.view !== 'resolved'){{
-        filterCards();
-      }}
-    }});
-  }});
-
-  cats.forEach(function(btn){{
-    btn.addEventListener('click', function(){{
-      cats.forEach(function(b){{
-        b.style.background='#fff'; b.style.color='#555';
-        b.style.border='1px solid #ddd'; b.style.fontWeight='400';
-      }});
-      this.style.background='#b8860b'; this.style.color='#fff';
-      this.style.border='2px solid #b8860b'; this.style.fontWeight='600';
-      currentPage = 1;
-      filterCards();
-    }});
-  }});
-
-  if(searchEl) searchEl.addEventListener('input', function(){{ currentPage=1; filterCards(); }});
-
-  function filterCards(){{
-    var activeCat = 'all';
-    cats.forEach(function(b){{
-      if(b.style.background==='rgb(184, 134, 11)' || b.style.background==='#b8860b')
-        activeCat = b.dataset.cat;
-    }});
-    var kw = searchEl ? searchEl.value.toLowerCase() : '';
-    var candidateCards = trackingCards;
-    if (currentView === 'inplay') candidateCards = inPlayCards;
-    if (currentView === 'awaiting') candidateCards = awaitingCards;
-    filteredCards = [];
-    trackingCards.forEach(function(d){{
-      d.style.display = 'none';
-    }});
-    candidateCards.forEach(function(d){{
-      var genres = (d.dataset.genres || '').split(',');
-      var matchCat = activeCat==='all' || genres.indexOf(activeCat)>=0;
-      var matchKw = !kw || d.textContent.toLowerCase().indexOf(kw)>=0;
-      if(matchCat && matchKw) filteredCards.push(d);
-    }});
-    showPage(currentPage);
-  }}
-
-  function showPage(page){{
-    currentPage = page;
-    var total = filteredCards.length;
-    var totalPages = Math.max(1, Math.ceil(total / CARDS_PER_PAGE));
-    if(currentPage > totalPages) currentPage = totalPages;
-    var start = (currentPage - 1) * CARDS_PER_PAGE;
-    var end = start + CARDS_PER_PAGE;
-    filteredCards.forEach(function(d, i){{
-      d.style.display = (i >= start && i < end) ? '' : 'none';
-    }});
-    renderPagination(totalPages, total);
-  }}
-
-  function renderPagination(totalPages, total){{
-    var pag = document.getElementById('np-pagination');
-    if(!pag) return;
-    if(currentView === 'resolved') {{ pag.innerHTML = ''; return; }}
-    if(totalPages <= 1){{ pag.innerHTML = '<span style="color:#888;font-size:0.85em">'+total+' {cards_word}</span>'; return; }}
-    var html = '';
-    var pages = [];
-    pages.push(1);
-    var lo = Math.max(2, currentPage - 2);
-    var hi = Math.min(totalPages - 1, currentPage + 2);
-    if(lo > 2) pages.push(-1);
-    for(var i = lo; i <= hi; i++) pages.push(i);
-    if(hi < totalPages - 1) pages.push(-1);
-    if(totalPages > 1) pages.push(totalPages);
-    pages.forEach(function(p){{
-      if(p === -1){{ html += '<span style="color:#888">...</span> '; }}
-      else {{ html += '<button class="np-page-btn'+(p===currentPage?' active':'')+'" onclick="window._npGoPage('+p+')">'+p+'</button> '; }}
-    }});
-    html += '<span style="color:#888;font-size:0.85em;margin-left:8px">'+total+' {cards_word}</span>';
-    pag.innerHTML = html;
-  }}
-
-  window._npGoPage = function(p){{
-    showPage(p);
-    var el = document.getElementById(currentView === 'awaiting' ? 'np-awaiting-list' : 'np-tracking-section');
-    if(el) el.scrollIntoView({{behavior:'smooth',block:'start'}});
-  }};
-
-  setView('all');
-  filterCards();
-
-  (function(){{
-    function npLand(){{
-      var h=window.location.hash;
-      if(!h||h.indexOf('np-')<0)return;
-      var el=document.querySelector(h);
-      if(!el)return;
-      if (resolvedSection && resolvedSection.contains(el)) {{
-        setView('resolved');
-      }} else if (awaitingSection && awaitingSection.contains(el)) {{
-        setView('awaiting');
-      }} else {{
-        setView('all');
-        if(el.style.display==='none'){{
-          var idx=filteredCards.indexOf(el);
-          if(idx>=0)showPage(Math.floor(idx/CARDS_PER_PAGE)+1);
-        }}
-      }}
-      el.open=true;
-      setTimeout(function(){{
-        el.scrollIntoView({{behavior:'smooth',block:'center'}});
-        el.style.outline='3px solid #b8860b';
-        setTimeout(function(){{el.style.outline='';}},2500);
-      }},150);
-    }}
-    npLand();
-    window.addEventListener('hashchange',npLand);
-  }})();
-}})();
-</script>"""
+    inline_code = _tracker_inline_code(lang)
 
     return (
         '<div class="np-tracker">'
@@ -4183,76 +4498,52 @@ def assert_prediction_language_article_integrity(rows: list[dict], lang: str) ->
 
 # ── Layer 1: デプロイ前 Link Checker ─────────────────────────────────────
 
+_LINK_VERIFIER = None
+
+
+def _link_verifier() -> LinkVerifier:
+    """プロセス内で1つだけ作る（Ghost DB / サイトマップの読み込みは言語ごとに繰り返さない）"""
+    global _LINK_VERIFIER
+    if _LINK_VERIFIER is None:
+        _LINK_VERIFIER = LinkVerifier(
+            cache_path=LINK_CHECK_CACHE,
+            live_urls=_ghost_db_live_urls(),
+            sitemap_url=f"{GHOST_URL}/sitemap.xml",
+        )
+    return _LINK_VERIFIER
+
+
 def check_links_in_html(html: str, context: str = "") -> bool:
     """
-    生成したHTML内の全 <a href> リンクをHTTP HEADで検証。
+    生成したHTML内の全 <a href> リンクを検証。
     1件でも404/エラー → False を返してデプロイをブロック。
+    結果キャッシュ（ステータス別TTL）・Ghost DB/サイトマップによるローカル判定・
+    ホスト別同時実行数制限つきの並列プローブは link_verifier.LinkVerifier が担当。
     """
     import re
-    import urllib.error
-    import urllib.request
-    import ssl
-    from concurrent.futures import ThreadPoolExecutor, as_completed
 
     urls = re.findall(r"""href=['"](https://nowpattern[.]com/[^'"]+)['"]""", html)
     if not urls:
         print(f"  [LinkChecker] {context}: no internal links found")
         return True
 
-    unique_urls = list(set(urls))
-    print(f"  [LinkChecker] {context}: checking {len(unique_urls)} links...")
-
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-
-    errors = []
-
-    def _probe(url, method, timeout_s):
-        req = urllib.request.Request(
-            url,
-            method=method,
-            headers={"User-Agent": "nowpattern-linkchecking/1.0"},
-        )
-        with urllib.request.urlopen(req, context=ctx, timeout=timeout_s) as r:
-            return r.status
+    verifier = _link_verifier()
+    before = dict(verifier.stats)
+    results = verifier.verify(urls)
+    delta = {key: verifier.stats[key] - before.get(key, 0) for key in verifier.stats}
+    print(f"  [LinkChecker] {context}: {len(results)} links "
+          f"(cached={delta['cached']} local={delta['local']} "
+          f"revalidated={delta['revalidated']} fetched={delta['fetched']})")
 
-    def check_one(url):
-        last_error = None
-        saw_timeout = False
-        for method, timeout_s in (("HEAD", 12), ("GET", 25)):
-            try:
-                return (url, _probe(url, method, timeout_s))
-            except urllib.error.HTTPError as e:
-                if e.code in (404, 410):
-                    return (url, e.code)
-                last_error = f"HTTP Error {e.code}: {e.reason}"
-            except Exception as e:
-                last_error = str(e)
-                if isinstance(e, TimeoutError) or "timed out" in last_error.lower():
-                    saw_timeout = True
-        if saw_timeout:
-            try:
-                return (url, _probe(url, "GET", 90))
-            except Exception as e:
-                last_error = str(e)
-        return (url, last_error or "Unknown link check error")
-
-    with ThreadPoolExecutor(max_workers=4) as ex:
-        futures = {ex.submit(check_one, u): u for u in unique_urls}
-        for future in as_completed(futures):
-            url, result = future.result()
-            if isinstance(result, int) and result < 400:
-                pass  # OK
-            else:
-                errors.append((url, result))
-                print(f"    ❌ FAIL: {url} -> {result}")
+    errors = [(url, result) for url, result in results.items() if not is_live(result)]
+    for url, result in errors:
+        print(f"    ❌ FAIL: {url} -> {result}")
 
     if errors:
         print(f"  [LinkChecker] {context}: BLOCKED — {len(errors)} broken links found!")
         return False
 
-    print(f"  [LinkChecker] {context}: ✅ ALL {len(unique_urls)} links OK")
+    print(f"  [LinkChecker] {context}: ✅ ALL {len(results)} links OK")
     return True
 
 
@@ -4613,9 +4904,14 @@ def main():
     parser.add_argument("--force", action="store_true", help="Skip link checker")
     parser.add_argument("--integrity-only", action="store_true", help="Refresh tracker integrity report only")
     parser.add_argument("--skip-deploy-gate", action="store_true", help="Skip deploy gate (for gate-internal refreshes)")
+    parser.add_argument("--full-rebuild", action="store_true", help="Ignore the card render cache and re-render every card")
     parser.add_argument("--lang", choices=["ja", "en", "both"], default="both",
                         help="Language to update (default: both)")
+    parser.add_argument("--suggest-markets", action="store_true",
+                        help="List market candidates for predictions without market_consensus (no deploy)")
     args = parser.parse_args()
+    if args.suggest_markets:
+        args.report = True  # ゲート・デプロイは走らせない
 
     env = load_env()
     api_key = env.get("NOWPATTERN_GHOST_ADMIN_API_KEY", "")
@@ -4666,6 +4962,9 @@ def main():
     pred_db = load_prediction_db()
     embed_data = load_embed_data()
     print(f"Prediction DB: {len(pred_db.get('predictions', []))} entries")
+    if args.suggest_markets:
+        report_market_suggestions(pred_db, embed_data, include_manifold=True)
+        return
 
     # ★ SCHEMA COMPATIBILITY CHECK (2026-03-29追加)
     # ビルド前にOracle Guardianブロック率とプレースホルダーを事前チェック
@@ -4691,6 +4990,30 @@ def main():
     pred_db = ensure_ja_translations(pred_db, google_api_key)
     print(f"Polymarket: {len(embed_data)} markets")
 
+    page_langs = ["ja", "en"] if args.lang == "both" else [args.lang]
+
+    # 入力（prediction_db / Polymarket / 市場スナップショット / Ghost 記事の更新時刻）が
+    # 前回デプロイ時と同じなら、本文付きの Ghost 取得・build_rows・ページ生成ごと省略する
+    build_state = load_build_state()
+    input_fps = {}
+    if not (args.report or args.integrity_only or args.full_rebuild):
+        try:
+            ghost_index = ghost_request(
+                "GET", "/posts/?limit=all&filter=status:published&fields=id,slug,updated_at", api_key
+            ).get("posts", [])
+        except Exception as exc:
+            print(f"[BUILD SKIP] Ghost index fetch failed ({exc}) — building")
+            ghost_index = None
+        if ghost_index is not None:
+            linked_markets = load_linked_markets()
+            input_fps = {
+                lang: tracker_input_fingerprint(pred_db, embed_data, linked_markets, ghost_index, lang)
+                for lang in page_langs
+            }
+            if all(build_state.get(lang, {}).get("fp") == fp for lang, fp in input_fps.items()):
+                print(f"[BUILD SKIP] Inputs unchanged since last deploy ({', '.join(page_langs)}). Nothing to do.")
+                return
+
     # Fetch articles from Ghost
     ghost_result = ghost_request("GET",
         "/posts/?limit=all&filter=status:published&include=tags&formats=html&fields=id,slug,title,url,html,published_at",
@@ -4702,7 +5025,6 @@ def main():
 
     TRACKER_INTEGRITY_REPORT.clear()
     integrity_langs = ["ja", "en"]
-    page_langs = ["ja", "en"] if args.lang == "both" else [args.lang]
     rows_by_lang = {lang: build_rows(pred_db, ghost_posts, embed_data, lang) for lang in integrity_langs}
     integrity_payload = _build_tracker_integrity_payload(
         ghost_posts=ghost_posts,
@@ -4724,6 +5046,11 @@ def main():
         print("[INTEGRITY] Report refreshed only; skipping page build/update.")
         sys.exit(0)
 
+    if args.full_rebuild:
+        print("[RENDER CACHE] --full-rebuild: re-rendering every card")
+    else:
+        print(f"[RENDER CACHE] Loaded {load_render_cache()} cached cards")
+
     for lang in page_langs:
         print(f"\n{'='*40}")
         print(f"Building {lang.upper()} page...")
@@ -4742,8 +5069,10 @@ def main():
             div_str = f"Δ={r['divergence']:+.0f}%" if r.get("divergence") is not None else ""
             print(f"    B={r.get('base','?')}% {pm_str} {div_str} | {r['title'][:50]}")
 
-        # Build HTML
+        # Build HTML (unchanged cards are spliced in from the render cache)
         page_html = build_page_html(rows, pred_db.get("stats", {}), lang)
+        print(f"  [RENDER CACHE] reused={_RENDER_CACHE_STATS['hit']} re-rendered={_RENDER_CACHE_STATS['miss']}")
+        _RENDER_CACHE_STATS.update({"hit": 0, "miss": 0})
         try:
             check_gate_f_provisional_labels(page_html)
             print("  [GATE F] Score label / disclaimer check PASSED")
@@ -4792,6 +5121,11 @@ def main():
             take_page_snapshot(lang=lang, phase="pre")
             update_ghost_page(api_key, slug, page_html, title)
             _update_dataset_in_head(api_key, slug, pred_db.get("stats", {}), lang, pred_db.get("predictions", []))
+            if lang in input_fps:
+                build_state[lang] = {"fp": input_fps[lang], "deployed_at": datetime.now(timezone.utc).isoformat()}
+                save_build_state(build_state)
+
+    save_render_cache(built_langs=page_langs)
 
     # Save output data (combined)
     all_rows_ja = rows_by_lang.get("ja") or build_rows(pred_db, ghost_posts, embed_data, "ja")
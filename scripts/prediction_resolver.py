@@ -33,6 +33,9 @@ from datetime import datetime, date, timezone
 
 import requests
 
+from prediction_store import get_store
+import market_candidate_index
+
 # ── 設定 ────────────────────────────────────────────────────────────
 DB_PATH = "/opt/shared/market_history/market_history.db"
 PREDICTION_DB = "/opt/shared/scripts/prediction_db.json"
@@ -267,13 +270,15 @@ def notify_auto_resolved(prediction_id: str, article_title: str, outcome: str,
 # ── メイン処理 ────────────────────────────────────────────────────────
 
 def load_prediction_db():
-    with open(PREDICTION_DB, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_store(PREDICTION_DB).load_db()
 
 
-def save_prediction_db(data: dict):
-    with open(PREDICTION_DB, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def save_prediction_updates(updates_by_id: dict):
+    """変更のあった予測だけを row-level で書き戻す（JSON は最後に1回だけ export）"""
+    store = get_store(PREDICTION_DB)
+    with store.batch():
+        for prediction_id, fields in updates_by_id.items():
+            store.update(prediction_id, fields)
 
 
 def process_prediction(pred: dict, links: list, db, dry_run: bool) -> dict:
@@ -457,27 +462,27 @@ def run_resolver(dry_run: bool = False):
     print()
 
     db = get_db()
-    data = load_prediction_db()
-    predictions = data.get("predictions", [])
+    store = get_store(PREDICTION_DB)
+    # リンク済みの予測だけを主キー索引で引く（未リンクの予測は全件読み込まない）
+    linked_ids = [row["prediction_id"] for row in
+                  db.execute("SELECT DISTINCT prediction_id FROM nowpattern_links ORDER BY prediction_id")]
+    predictions = store.get_many(linked_ids)
 
     resolved_count = 0
-    skipped_count = 0
+    skipped_count = store.count() - len(predictions)
     manual_count = 0
+    pending_updates = {}
+    print(f"  リンク済み予測: {len(predictions)} 件 / nowpattern_links 未設定: {skipped_count} 件")
 
-    for pred in predictions:
-        prediction_id = pred["prediction_id"]
+    for prediction_id, pred in predictions.items():
         links = get_links_for_prediction(db, prediction_id)
 
-        if not links:
-            print(f"  [SKIP] {prediction_id}: nowpattern_links 未設定")
-            skipped_count += 1
-            continue
-
         updates = process_prediction(pred, list(links), db, dry_run)
 
         if updates:
             if not dry_run:
                 pred.update(updates)
+                pending_updates[prediction_id] = updates
             resolved_count += 1
         elif pred.get("status") != "resolved":
             manual_count += 1
@@ -485,8 +490,8 @@ def run_resolver(dry_run: bool = False):
     db.close()
 
     # prediction_db.json を保存
-    if not dry_run and resolved_count > 0:
-        save_prediction_db(data)
+    if not dry_run and pending_updates:
+        save_prediction_updates(pending_updates)
         print(f"\n✅ prediction_db.json 更新: {resolved_count} 件")
 
     print(f"\n=== 集計 ===")
@@ -584,9 +589,7 @@ def add_link(prediction_id: str, market_id: int, direction: str, notes: str = ""
         return False
 
     # prediction が prediction_db.json に存在するか確認
-    data = load_prediction_db()
-    pred_ids = [p["prediction_id"] for p in data.get("predictions", [])]
-    if prediction_id not in pred_ids:
+    if get_store(PREDICTION_DB).get(prediction_id) is None:
         print(f"[ERROR] prediction_id={prediction_id} が prediction_db.json に存在しません")
         db.close()
         return False
@@ -751,6 +754,9 @@ def _generate_resolution_question(pred: dict) -> tuple:
     return question_ja, question_en
 
 
+AUTO_LINK_TOP_K = 5  # 候補索引から採点する上位件数
+
+
 def auto_link_predictions(dry_run: bool = False):
     """
     未リンクの予測を market_history.db のマーケットと自動マッチングし、
@@ -769,32 +775,25 @@ def auto_link_predictions(dry_run: bool = False):
     cur.execute("SELECT DISTINCT prediction_id FROM nowpattern_links")
     linked_ids = {row["prediction_id"] for row in cur.fetchall()}
 
-    # prediction_db.json を読む
-    data = load_prediction_db()
-    predictions = data.get("predictions", [])
-    open_preds = [p for p in predictions if p.get("status") == "open"]
-
-    print(f"  予測総数: {len(predictions)} | 未判定: {len(open_preds)} | リンク済み: {len(linked_ids)}")
-
-    # 全マーケットを取得（未解決のものを優先）
-    cur.execute("""
-        SELECT m.id, m.source, m.external_id, m.question, m.event_title,
-               m.close_date, m.resolved,
-               ps.yes_prob, ps.snapshot_date
-        FROM markets m
-        LEFT JOIN (
-            SELECT market_id, yes_prob, snapshot_date,
-                   ROW_NUMBER() OVER (PARTITION BY market_id ORDER BY snapshot_date DESC) as rn
-            FROM probability_snapshots
-        ) ps ON m.id = ps.market_id AND ps.rn = 1
-        WHERE m.resolved = 0
-        ORDER BY m.last_updated DESC
-    """)
-    all_markets = cur.fetchall()
-    print(f"  利用可能マーケット: {len(all_markets)} 件")
-
+    # 未判定の予測だけを status 索引で引く（索引は大文字化済みなので元の値で絞り直す）
+    store = get_store(PREDICTION_DB)
+    open_preds = [p for p in store.by_status("open") if p.get("status") == "open"]
+
+    print(f"  予測総数: {store.count()} | 未判定: {len(open_preds)} | リンク済み: {len(linked_ids)}")
+
+    # 候補索引（n-gram ブロッキングキー）を最新化。通常はクローラーが維持済みなので差分のみ
+    market_candidate_index.ensure_schema(db)
+    with db:
+        indexed = market_candidate_index.update(db)
+    if indexed:
+        print(f"  候補索引を更新: {indexed} 市場")
+    n_open_markets = cur.execute("SELECT COUNT(*) FROM markets WHERE resolved = 0").fetchone()[0]
+    print(f"  利用可能マーケット: {n_open_markets} 件")
+    matcher = market_candidate_index.CandidateMatcher(db)
+    new_links = []
     linked_count = 0
     enriched_count = 0
+    touched = {}
 
     for pred in open_preds:
         pid = pred["prediction_id"]
@@ -814,6 +813,7 @@ def auto_link_predictions(dry_run: bool = False):
                     best = max(scenarios, key=lambda s: s.get("probability", 0))
                     pred["our_pick"] = best.get("label", "基本シナリオ")
                     pred["our_pick_prob"] = int(best.get("probability", 0) * 100)
+                touched[pid] = pred
 
             enriched_count += 1
             print(f"  📝 {pid}: resolution_question 生成 → {q_ja[:50]}...")
@@ -838,20 +838,10 @@ def auto_link_predictions(dry_run: bool = False):
             print(f"  [SKIP] {pid}: キーワード抽出失敗")
             continue
 
-        # マーケットのスコアリング
-        best_match = None
-        best_score = 0.0
+        # マーケットのスコアリング: キーワードを含む市場だけを候補索引から引いて採点
         MATCH_THRESHOLD = 0.2  # 最低20%のキーワード一致
-
-        for market in all_markets:
-            score = _score_market_match(
-                keywords,
-                market["question"],
-                market["event_title"]
-            )
-            if score > best_score:
-                best_score = score
-                best_match = market
+        candidates = matcher.top_candidates(keywords, limit=AUTO_LINK_TOP_K)
+        best_match, best_score = candidates[0] if candidates else (None, 0.0)
 
         if best_match and best_score >= MATCH_THRESHOLD:
             direction = pred.get("resolution_direction") or \
@@ -862,41 +852,50 @@ def auto_link_predictions(dry_run: bool = False):
 
             if not dry_run:
                 now_str = datetime.now(timezone.utc).isoformat()
-                try:
-                    cur.execute("""
-                        INSERT OR IGNORE INTO nowpattern_links
-                        (prediction_id, market_id, source, external_market_id,
-                         resolution_direction, notes, created_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        pid, best_match["id"], best_match["source"],
-                        best_match["external_id"], direction,
-                        f"auto-link score={best_score:.2f}", now_str
-                    ))
-                    db.commit()
-                    linked_count += 1
-
-                    # market_consensus を prediction_db に追記
-                    if best_match["yes_prob"] is not None:
-                        pred["market_consensus"] = {
-                            "question": best_match["question"],
-                            "probability": round(best_match["yes_prob"] * 100, 1),
-                            "source": best_match["source"],
-                            "market_id": best_match["id"],
-                            "snapshot_date": best_match["snapshot_date"],
-                        }
-                except Exception as e:
-                    print(f"  [ERROR] {pid}: リンク追加失敗 — {e}")
+                new_links.append((pred, best_match, (
+                    pid, best_match["id"], best_match["source"],
+                    best_match["external_id"], direction,
+                    f"auto-link score={best_score:.2f}", now_str
+                )))
             else:
                 linked_count += 1
         else:
             print(f"  [NO MATCH] {pid}: 最高スコア={best_score:.2f} (閾値={MATCH_THRESHOLD})")
 
+    # 新規リンクは1トランザクションでまとめて書き込む（リンクごとの commit をしない）
+    if new_links:
+        try:
+            with db:
+                db.executemany("""
+                    INSERT OR IGNORE INTO nowpattern_links
+                    (prediction_id, market_id, source, external_market_id,
+                     resolution_direction, notes, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [row for _, _, row in new_links])
+            linked_count += len(new_links)
+        except Exception as e:
+            print(f"  [ERROR] リンク追加失敗 ({len(new_links)} 件) — {e}")
+            new_links = []
+
+    # market_consensus を prediction_db に追記
+    for pred, market, _ in new_links:
+        latest = get_latest_probability(db, market["id"])
+        if latest and latest["yes_prob"] is not None:
+            pred["market_consensus"] = {
+                "question": market["question"],
+                "probability": round(latest["yes_prob"] * 100, 1),
+                "source": market["source"],
+                "market_id": market["id"],
+                "snapshot_date": latest["snapshot_date"],
+            }
+            touched[pred["prediction_id"]] = pred
+    print(f"  候補索引: キーワード {matcher.stats['keywords']} 種 / 採点した市場 {matcher.stats['candidates']} 件")
+
     db.close()
 
     # prediction_db.json を保存
-    if not dry_run and (enriched_count > 0 or linked_count > 0):
-        save_prediction_db(data)
+    if not dry_run and touched:
+        save_prediction_updates(touched)
 
     print(f"\n=== Auto-Link 完了 ===")
     print(f"  resolution_question 生成: {enriched_count} 件")
@@ -12,6 +12,7 @@ prediction_db.json から類似予測を検索し、過去の精度・教訓を
   python scripts/prediction_similarity_search.py "米国金融緩和" --embed   # Gemini embedding使用
   python scripts/prediction_similarity_search.py --stats
   python scripts/prediction_similarity_search.py --build-index            # TF-IDFインデックス構築
+  EMBED_PROVIDER=local python scripts/prediction_similarity_search.py "..." --embed  # API不要のローカルembedding
 
 NORTH_STAR.md §12 「AIのNotion = 判断を支える基盤サービス」の実装:
   1. 過去に似た予測はあったか？ → このスクリプトが検索
@@ -24,16 +25,23 @@ v2 改善点（2026-04-05）:
   - 「Fed利下げ」↔「米国金融緩和」のような同義語的クエリでもヒット可能に
 """
 
+import hashlib
 import json
 import math
 import os
+import random
 import re
 import sys
+import time
 import argparse
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 
+sys.path.insert(0, str(Path(__file__).parent))
+from prediction_store import get_store
+
 # prediction_db.json のパス（ローカル / VPS 両対応）
 DB_PATHS = [
     Path(__file__).parent.parent / "data" / "prediction_db.json",
@@ -43,8 +51,23 @@ DB_PATHS = [
 # TF-IDFインデックスのキャッシュパス
 INDEX_PATH = Path(__file__).parent.parent / "data" / "prediction_tfidf_index.json"
 
-# Gemini embeddingキャッシュパス
-EMBED_CACHE_PATH = Path(__file__).parent.parent / "data" / "prediction_embeddings.json"
+# embedding 行列ストア: 正規化済み float32 行（追記専用）+ key→row マップ
+EMBED_MATRIX_PATH = Path(__file__).parent.parent / "data" / "prediction_embeddings.f32"
+EMBED_META_PATH = Path(__file__).parent.parent / "data" / "prediction_embeddings.meta.json"
+EMBED_IVF_PATH = Path(__file__).parent.parent / "data" / "prediction_embeddings.ivf.npz"
+
+# IVF 近似インデックス: この行数以上で --build-index 時に構築（未満は全件厳密スコアリング）
+IVF_MIN_ROWS = 20000
+IVF_NPROBE = 8
+
+
+# ── NumPy（オプション）─────────────────────────────────────────────
+HAS_NUMPY = False
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
 
 
 # ── Gemini Embedding（オプション）──────────────────────────────────
@@ -86,33 +109,151 @@ def _init_genai():
 
 
 def get_embedding(text: str) -> list[float]:
-    """Gemini embedding-001 でテキストのembeddingを取得"""
-    if not _init_genai():
-        raise RuntimeError("Gemini API not available. Set GEMINI_API_KEY.")
-    try:
-        if hasattr(_genai_client, "models"):
-            # 新SDK
-            result = _genai_client.models.embed_content(
-                model="models/gemini-embedding-001",
-                contents=text[:2048],  # embedding-001の入力制限
-            )
-            return result.embeddings[0].values
-        else:
-            # 旧SDK
-            result = _genai_client.embed_content(
-                model="models/embedding-001",
-                content=text[:2048],
-            )
-            return result["embedding"]
-    except Exception as e:
-        raise RuntimeError(f"Embedding API error: {e}")
+    """Gemini embedding-001 でテキストのembeddingを取得（単発。バッチは compute_embeddings を使う）"""
+    return GeminiEmbeddingProvider().embed_batch([text])[0]
+
+
+# ── Embedding プロバイダ + バッチ計算 ───────────────────────────────
+# embedding は「モデル名 + 予測テキスト」のハッシュをキーに保存する。
+# 予測を編集するとキーが変わるので自動で再計算され、モデルを変えても古い行は使われない。
+EMBED_PROVIDER = os.environ.get("EMBED_PROVIDER", "gemini")  # gemini | local
+EMBED_INPUT_LIMIT = 2048      # embedding-001の入力制限（文字数で近似）
+EMBED_BATCH_SIZE = 64         # 1リクエストあたりのテキスト数（Gemini batch 上限 100 未満）
+EMBED_MAX_WORKERS = 4         # 同時リクエスト数の上限
+EMBED_MAX_RETRIES = 4         # 1バッチあたりの再試行回数（指数バックオフ）
+EMBED_RETRY_BASE_SEC = 1.0
+EMBED_CHECKPOINT_ROWS = 512   # この行数ごとに行列ストアへ追記（中断しても次回は続きから）
+
+
+class GeminiEmbeddingProvider:
+    """Gemini embedding API。新SDK/旧SDKのどちらでも複数テキストを1リクエストで送る"""
+
+    name = "gemini"
+
+    def __init__(self):
+        if not _init_genai():
+            raise RuntimeError("Gemini API not available. Set GEMINI_API_KEY.")
+        self.new_sdk = hasattr(_genai_client, "models")
+        self.model = "models/gemini-embedding-001" if self.new_sdk else "models/embedding-001"
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        texts = [text[:EMBED_INPUT_LIMIT] for text in texts]
+        try:
+            if self.new_sdk:
+                result = _genai_client.models.embed_content(model=self.model, contents=texts)
+                return [list(e.values) for e in result.embeddings]
+            result = _genai_client.embed_content(model=self.model, content=texts)
+            vectors = result["embedding"]
+            return vectors if vectors and isinstance(vectors[0], list) else [vectors]
+        except Exception as e:
+            raise RuntimeError(f"Embedding API error: {e}")
+
+
+class HashEmbeddingProvider:
+    """API不要の決定的 embedding（トークンの feature hashing）。テスト・オフライン用"""
+
+    name = "local"
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model = f"local-hash-{dim}"
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        vectors = []
+        for text in texts:
+            vec = [0.0] * self.dim
+            for token in tokenize(text[:EMBED_INPUT_LIMIT]):
+                digest = hashlib.sha1(token.encode("utf-8")).digest()
+                bucket = int.from_bytes(digest[:4], "big") % self.dim
+                vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+            vectors.append(vec)
+        return vectors
+
+
+def default_embedding_provider():
+    """EMBED_PROVIDER 環境変数に従ってプロバイダを返す（既定: Gemini）"""
+    if EMBED_PROVIDER == "local":
+        return HashEmbeddingProvider()
+    return GeminiEmbeddingProvider()
+
+
+def embedding_provider_available() -> bool:
+    return EMBED_PROVIDER == "local" or _init_genai()
+
+
+def embedding_key(text: str, model: str) -> str:
+    """行列ストアのキー: モデル名 + テキストの sha1（予測IDには依存しない）"""
+    return hashlib.sha1(f"{model}\n{text}".encode("utf-8")).hexdigest()[:24]
+
+
+def embed_with_retry(provider, texts: list[str], max_retries: int = EMBED_MAX_RETRIES,
+                     base_delay: float = EMBED_RETRY_BASE_SEC) -> list[list[float]]:
+    """1バッチを embedding。失敗時は指数バックオフ（+ジッタ）で再試行"""
+    for attempt in range(max_retries + 1):
+        try:
+            vectors = provider.embed_batch(texts)
+            if len(vectors) != len(texts):
+                raise RuntimeError(f"provider returned {len(vectors)} vectors for {len(texts)} texts")
+            return vectors
+        except Exception:
+            if attempt >= max_retries:
+                raise
+            time.sleep(base_delay * (2 ** attempt) * (0.5 + random.random() / 2))
+    return []
+
+
+def compute_embeddings(provider, items: list[tuple[str, str]], matrix: "EmbeddingMatrix",
+                       batch_size: int = EMBED_BATCH_SIZE, max_workers: int = EMBED_MAX_WORKERS,
+                       max_retries: int = EMBED_MAX_RETRIES, base_delay: float = EMBED_RETRY_BASE_SEC,
+                       checkpoint_rows: int = EMBED_CHECKPOINT_ROWS) -> tuple[int, int]:
+    """(key, text) をバッチ化し、同時実行数を制限して embedding → 行列ストアへ逐次追記
+
+    完了したバッチは checkpoint_rows ごとに追記するので、途中で落ちても次回は
+    未計算のキーだけが再送される。戻り値は (保存件数, 失敗件数)。
+    """
+    unique = {}
+    for key, text in items:
+        if matrix.row_of(key) is None:
+            unique.setdefault(key, text)
+    pending_items = list(unique.items())
+    if not pending_items:
+        return 0, 0
+    batches = [pending_items[i:i + batch_size] for i in range(0, len(pending_items), batch_size)]
+
+    saved = failed = done = 0
+    buffer: list[tuple[str, list[float]]] = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(embed_with_retry, provider, [text for _, text in batch], max_retries, base_delay): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                vectors = future.result()
+                buffer.extend((key, vec) for (key, _), vec in zip(batch, vectors))
+            except Exception as e:
+                failed += len(batch)
+                print(f"  WARNING: embedding batch of {len(batch)} failed: {e}", file=sys.stderr)
+            done += len(batch)
+            if len(buffer) >= checkpoint_rows:
+                saved += matrix.append(buffer)
+                buffer = []
+                print(f"  ...embedded {done}/{len(pending_items)}", file=sys.stderr)
+    if buffer:
+        saved += matrix.append(buffer)
+    return saved, failed
 
 
 # ── データ読み込み ────────────────────────────────────────────────
 def load_predictions() -> list[dict]:
-    """prediction_db.json を読み込む"""
+    """prediction_db.json を共有 prediction store 経由で読み込む（JSON直読みはフォールバック）"""
     for path in DB_PATHS:
         if path.exists():
+            try:
+                return get_store(str(path)).all()
+            except Exception as e:
+                print(f"WARN: prediction store unavailable ({e}), reading JSON", file=sys.stderr)
             with open(path, "r", encoding="utf-8") as f:
                 data = json.load(f)
             if isinstance(data, dict) and "predictions" in data:
@@ -159,45 +300,150 @@ def get_pred_text(pred: dict) -> str:
 
 
 # ── TF-IDF エンジン ──────────────────────────────────────────────
+# 転置インデックスの永続化形式バージョン（形式を変えたら上げる → 自動再構築）
+TFIDF_INDEX_VERSION = 2
+
+
+def _doc_keys(predictions: list[dict]) -> list[str]:
+    """予測ごとの安定キー（ID + 検索テキストのハッシュ）。テキストが変われば別キーになる"""
+    keys = []
+    seen: Counter = Counter()
+    for pred in predictions:
+        text = get_pred_text(pred)
+        pid = pred.get("id") or pred.get("prediction_id") or ""
+        key = f"{pid}:{hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]}"
+        seen[key] += 1
+        if seen[key] > 1:
+            key = f"{key}#{seen[key]}"
+        keys.append(key)
+    return keys
+
+
+def _term_frequencies(tokens: list[str]) -> dict[str, float]:
+    """TF（Term Frequency）: log(1 + count / total)"""
+    token_counts = Counter(tokens)
+    total = len(tokens) if tokens else 1
+    return {token: math.log(1 + count / total) for token, count in token_counts.items()}
+
+
 class TFIDFEngine:
-    """TF-IDF + cosine similarity による検索エンジン"""
+    """TF-IDF + cosine similarity による検索エンジン（転置インデックス版）
+
+    posting list（term → [[doc, tf], ...]）とドキュメントノルムを INDEX_PATH に
+    永続化する。起動時は追加・変更された予測だけをトークナイズし（削除・変更分は
+    posting から除去してコンパクション）、検索時はクエリ語の posting だけを走査する。
+    """
 
-    def __init__(self, predictions: list[dict]):
+    def __init__(self, predictions: list[dict], index_path: Optional[Path] = INDEX_PATH):
         self.predictions = predictions
-        self.doc_tokens: list[list[str]] = []
-        self.doc_tfs: list[dict[str, float]] = []
+        self.index_path = index_path
+        self.doc_keys: list[str] = []
+        self.postings: dict[str, list[list]] = {}
+        self.doc_norms: list[float] = []
+        self.doc_pred: list[int] = []
         self.idf: dict[str, float] = {}
+        self.stats = {"reused": 0, "tokenized": 0, "removed": 0}
         self._build_index()
 
+    def _load_index(self) -> Optional[dict]:
+        if not self.index_path or not Path(self.index_path).exists():
+            return None
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        if data.get("version") != TFIDF_INDEX_VERSION:
+            return None
+        return data
+
+    def _save_index(self):
+        if not self.index_path:
+            return
+        path = Path(self.index_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": TFIDF_INDEX_VERSION,
+                "doc_keys": self.doc_keys,
+                "doc_norms": self.doc_norms,
+                "postings": self.postings,
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _idf(self, token: str) -> float:
+        """IDF: log(N / (1 + df))。df は posting list の長さ"""
+        idf = self.idf.get(token)
+        if idf is None:
+            n_docs = len(self.doc_keys)
+            plist = self.postings.get(token)
+            idf = math.log(n_docs / (1 + len(plist))) if plist and n_docs else 0.0
+            self.idf[token] = idf
+        return idf
+
     def _build_index(self):
-        """全予測のTF-IDFインデックスを構築"""
-        n_docs = len(self.predictions)
-
-        # ドキュメント頻度（DF）カウント用
-        df_counter: Counter = Counter()
-
-        for pred in self.predictions:
-            text = get_pred_text(pred)
-            tokens = tokenize(text)
-            self.doc_tokens.append(tokens)
-
-            # TF（Term Frequency）計算: log(1 + count) で正規化
-            token_counts = Counter(tokens)
-            total = len(tokens) if tokens else 1
-            tf = {}
-            unique_tokens = set()
-            for token, count in token_counts.items():
-                tf[token] = math.log(1 + count / total)
-                unique_tokens.add(token)
-            self.doc_tfs.append(tf)
-
-            # DF更新
-            for token in unique_tokens:
-                df_counter[token] += 1
-
-        # IDF（Inverse Document Frequency）計算: log(N / (1 + df))
-        for token, df in df_counter.items():
-            self.idf[token] = math.log(n_docs / (1 + df))
+        """永続インデックスを読み込み、予測の追加・変更・削除分だけ差分更新する"""
+        current_keys = _doc_keys(self.predictions)
+        current_set = set(current_keys)
+        data = self._load_index()
+        changed = data is None
+
+        if data:
+            stored_keys = data.get("doc_keys", [])
+            dead = {i for i, key in enumerate(stored_keys) if key not in current_set}
+            if dead:
+                # コンパクション: 削除・変更されたドキュメントを posting から除去して番号を詰める
+                remap, next_id = {}, 0
+                for i in range(len(stored_keys)):
+                    if i not in dead:
+                        remap[i] = next_id
+                        next_id += 1
+                postings = {}
+                for token, plist in data.get("postings", {}).items():
+                    kept = [[remap[d], tf] for d, tf in plist if d in remap]
+                    if kept:
+                        postings[token] = kept
+                self.postings = postings
+                self.doc_keys = [k for i, k in enumerate(stored_keys) if i not in dead]
+                self.stats["removed"] = len(dead)
+                changed = True
+            else:
+                self.postings = data.get("postings", {})
+                self.doc_keys = list(stored_keys)
+                self.doc_norms = data.get("doc_norms", [])
+
+        key_to_doc = {key: i for i, key in enumerate(self.doc_keys)}
+        self.stats["reused"] = len(key_to_doc)
+        for i, key in enumerate(current_keys):
+            if key in key_to_doc:
+                continue
+            doc_id = len(self.doc_keys)
+            self.doc_keys.append(key)
+            key_to_doc[key] = doc_id
+            for token, tf in _term_frequencies(tokenize(get_pred_text(self.predictions[i]))).items():
+                self.postings.setdefault(token, []).append([doc_id, tf])
+            self.stats["tokenized"] += 1
+            changed = True
+
+        # doc → predictions のインデックス（検索結果の返却用）
+        self.doc_pred = [0] * len(self.doc_keys)
+        for i, key in enumerate(current_keys):
+            self.doc_pred[key_to_doc[key]] = i
+
+        if changed or len(self.doc_norms) != len(self.doc_keys):
+            # IDF は N と df に依存するので、変更があった時だけノルムを一括再計算
+            norms2 = [0.0] * len(self.doc_keys)
+            for token, plist in self.postings.items():
+                idf = self._idf(token)
+                for doc_id, tf in plist:
+                    w = tf * idf
+                    norms2[doc_id] += w * w
+            self.doc_norms = [math.sqrt(v) for v in norms2]
+            try:
+                self._save_index()
+            except OSError as e:
+                print(f"  WARNING: TF-IDF index save failed: {e}", file=sys.stderr)
 
     def search(
         self,
@@ -207,18 +453,18 @@ class TFIDFEngine:
         resolved_only: bool = False,
         min_score: float = 0.01,
     ) -> list[tuple[dict, float]]:
-        """TF-IDF cosine similarity で検索"""
+        """TF-IDF cosine similarity で検索（クエリ語の posting のみ走査）"""
         query_tokens = tokenize(query)
         if not query_tokens:
             return []
 
         # クエリのTF-IDF ベクトル
-        query_counts = Counter(query_tokens)
-        query_total = len(query_tokens)
         query_tfidf = {}
-        for token, count in query_counts.items():
-            tf = math.log(1 + count / query_total)
-            idf = self.idf.get(token, math.log(len(self.predictions)))  # 未知語は最大IDF
+        for token, tf in _term_frequencies(query_tokens).items():
+            if token in self.postings:
+                idf = self._idf(token)
+            else:
+                idf = math.log(len(self.doc_keys)) if self.doc_keys else 0.0  # 未知語は最大IDF
             query_tfidf[token] = tf * idf
 
         # クエリベクトルのノルム
@@ -226,8 +472,25 @@ class TFIDFEngine:
         if query_norm == 0:
             return []
 
+        # 内積: クエリ語の posting list だけを走査して累積
+        dots: dict[int, float] = {}
+        for token, q_val in query_tfidf.items():
+            plist = self.postings.get(token)
+            if not plist:
+                continue
+            w = q_val * self._idf(token)
+            for doc_id, tf in plist:
+                dots[doc_id] = dots.get(doc_id, 0.0) + w * tf
+
         results = []
-        for i, pred in enumerate(self.predictions):
+        for doc_id, dot_product in dots.items():
+            doc_norm = self.doc_norms[doc_id]
+            if doc_norm == 0:
+                continue
+            score = dot_product / (query_norm * doc_norm)
+            if score < min_score:
+                continue
+            pred = self.predictions[self.doc_pred[doc_id]]
             # フィルタリング
             if resolved_only and pred.get("status") != "resolved":
                 continue
@@ -236,109 +499,241 @@ class TFIDFEngine:
                 tag_str = " ".join(tags) if isinstance(tags, list) else str(tags)
                 if category.lower() not in tag_str.lower():
                     continue
+            results.append((self.doc_pred[doc_id], pred, score))
 
-            # ドキュメントのTF-IDFベクトル
-            doc_tf = self.doc_tfs[i]
-            doc_tfidf = {}
-            for token, tf_val in doc_tf.items():
-                idf = self.idf.get(token, 0)
-                doc_tfidf[token] = tf_val * idf
+        # 同点は予測の並び順（旧実装の安定ソートと同じ順序）
+        results.sort(key=lambda x: (-x[2], x[0]))
+        return [(pred, score) for _, pred, score in results[:top_n]]
 
-            # cosine similarity
-            dot_product = 0.0
-            for token, q_val in query_tfidf.items():
-                if token in doc_tfidf:
-                    dot_product += q_val * doc_tfidf[token]
 
-            doc_norm = math.sqrt(sum(v * v for v in doc_tfidf.values()))
-            if doc_norm == 0:
-                continue
+# ── Embedding 行列ストア ──────────────────────────────────────────
+def _normalize(vec) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in vec))
+    return [x / norm for x in vec] if norm else []
 
-            score = dot_product / (query_norm * doc_norm)
-            if score >= min_score:
-                results.append((pred, score))
 
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_n]
+class EmbeddingMatrix:
+    """正規化済み embedding を float32 の追記専用ファイルに保持するストア
+
+    - EMBED_MATRIX_PATH: 行 = 1 embedding（L2 正規化済み float32）
+    - EMBED_META_PATH:   {"dim", "count", "rows": {key: row}}
+    NumPy があれば np.memmap で即時ロードし、行列×ベクトル1回でスコアリングする。
+    NumPy がなければ array('f') で読み、純Pythonでスコアリングする（JSONより高速・省メモリ）。
+    """
+
+    def __init__(self, matrix_path: Path = EMBED_MATRIX_PATH, meta_path: Path = EMBED_META_PATH):
+        self.matrix_path = Path(matrix_path)
+        self.meta_path = Path(meta_path)
+        self.dim = 0
+        self.count = 0
+        self.rows: dict[str, int] = {}
+        self._data = None
+        self.load()
+
+    def load(self):
+        self._data = None
+        meta = {}
+        if self.meta_path.exists():
+            try:
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except Exception:
+                meta = {}
+        self.dim = int(meta.get("dim") or 0)
+        self.count = int(meta.get("count") or 0)
+        self.rows = dict(meta.get("rows") or {})
+        if not self.count or not self.dim or not self.matrix_path.exists():
+            self.count = 0
+            self.rows = {}
+            return
+        if HAS_NUMPY:
+            self._data = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        else:
+            from array import array
+            data = array("f")
+            with open(self.matrix_path, "rb") as f:
+                data.fromfile(f, self.count * self.dim)
+            self._data = data
+
+    def _save_meta(self):
+        self.meta_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.meta_path.with_suffix(self.meta_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": self.count, "rows": self.rows}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.meta_path)
+
+    def row_of(self, key: str) -> Optional[int]:
+        return self.rows.get(key)
+
+    def append(self, items: list[tuple[str, list[float]]]) -> int:
+        """(key, embedding) を正規化して末尾に追記する。既存 key は新しい行を指すようになる"""
+        items = [(key, _normalize(vec)) for key, vec in items if vec]
+        items = [(key, vec) for key, vec in items if vec]
+        if not items:
+            return 0
+        dim = len(items[0][1])
+        if self.dim and dim != self.dim:
+            # モデル変更で次元が変わった → ストアを作り直す
+            print(f"  Embedding dim changed {self.dim} -> {dim}; resetting matrix store", file=sys.stderr)
+            self.count, self.rows = 0, {}
+        self.dim = dim
+        items = [(key, vec) for key, vec in items if len(vec) == dim]
+        self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        self._data = None
+        with open(self.matrix_path, "ab") as f:
+            # メタ更新前にクラッシュした行の残骸を切り詰めてから追記
+            f.truncate(self.count * self.dim * 4)
+            if HAS_NUMPY:
+                f.write(np.asarray([vec for _, vec in items], dtype=np.float32).tobytes())
+            else:
+                from array import array
+                for _, vec in items:
+                    f.write(array("f", vec).tobytes())
+        for offset, (key, _) in enumerate(items):
+            self.rows[key] = self.count + offset
+        self.count += len(items)
+        self._save_meta()
+        self.load()
+        return len(items)
+
+    def vector(self, row: int) -> list[float]:
+        if HAS_NUMPY:
+            return self._data[row].tolist()
+        return self._data[row * self.dim:(row + 1) * self.dim].tolist()
+
+    def scores(self, query_unit: list[float], rows=None):
+        """正規化済みクエリとの cosine（= 内積）。rows 指定時はその行のみ"""
+        if not self.count:
+            return [] if rows is None else [0.0] * len(rows)
+        if HAS_NUMPY:
+            q = np.asarray(query_unit, dtype=np.float32)
+            if rows is None:
+                return self._data @ q
+            return self._data[np.asarray(rows, dtype=np.int64)] @ q
+        dim = self.dim
+        data = self._data
+        targets = range(self.count) if rows is None else rows
+        return [sum(a * b for a, b in zip(query_unit, data[r * dim:(r + 1) * dim])) for r in targets]
+
+
+class _IVFIndex:
+    """球面 k-means による IVF 近似インデックス（NumPy 必須・大規模コーパス用）
+
+    centroids と各行の所属リストを EMBED_IVF_PATH に保存。構築後に追記された行
+    （row >= n_rows_built）は常に厳密スコアリング対象に含める。
+    """
+
+    def __init__(self, centroids, assign, n_rows_built: int):
+        self.centroids = centroids
+        self.n_rows_built = n_rows_built
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(centroids))]
+
+    @classmethod
+    def build(cls, matrix: EmbeddingMatrix, n_lists: int = 0, iterations: int = 8, seed: int = 0):
+        data = np.asarray(matrix._data, dtype=np.float32)
+        n = len(data)
+        n_lists = n_lists or max(1, int(math.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(n, size=n_lists, replace=False)].copy()
+        assign = np.zeros(n, dtype=np.int32)
+        for _ in range(iterations):
+            for start in range(0, n, 8192):
+                assign[start:start + 8192] = np.argmax(data[start:start + 8192] @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = data[assign == c]
+                if len(members):
+                    center = members.mean(axis=0)
+                    norm = np.linalg.norm(center)
+                    if norm:
+                        centroids[c] = center / norm
+        return cls(centroids, assign, n)
+
+    def save(self, path: Path):
+        assign = np.empty(self.n_rows_built, dtype=np.int32)
+        for c, members in enumerate(self.lists):
+            assign[members] = c
+        tmp_path = Path(str(path) + ".tmp.npz")
+        np.savez(tmp_path, centroids=self.centroids, assign=assign, n_rows_built=self.n_rows_built)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, matrix: EmbeddingMatrix):
+        if not HAS_NUMPY or not Path(path).exists():
+            return None
+        try:
+            with np.load(path) as z:
+                n_rows_built = int(z["n_rows_built"])
+                if n_rows_built > matrix.count or z["centroids"].shape[1] != matrix.dim:
+                    return None
+                return cls(z["centroids"], z["assign"], n_rows_built)
+        except Exception:
+            return None
+
+    def candidate_rows(self, query_unit, total_rows: int, nprobe: int = IVF_NPROBE):
+        q = np.asarray(query_unit, dtype=np.float32)
+        nprobe = min(nprobe, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+        parts = [self.lists[c] for c in nearest]
+        if total_rows > self.n_rows_built:
+            parts.append(np.arange(self.n_rows_built, total_rows))
+        return np.concatenate(parts) if parts else np.arange(0)
 
 
 # ── Embedding エンジン ───────────────────────────────────────────
 class EmbeddingEngine:
-    """Gemini Embedding によるセマンティック検索エンジン"""
+    """embedding によるセマンティック検索エンジン（float32 行列ストア + テキストハッシュキー）"""
 
-    def __init__(self, predictions: list[dict]):
+    def __init__(self, predictions: list[dict], matrix_path: Path = EMBED_MATRIX_PATH,
+                 meta_path: Path = EMBED_META_PATH, ivf_path: Optional[Path] = EMBED_IVF_PATH,
+                 provider=None, max_workers: int = EMBED_MAX_WORKERS):
         self.predictions = predictions
-        self.embeddings: list[list[float]] = []
+        self.provider = provider or default_embedding_provider()
+        self.max_workers = max_workers
+        self.matrix = EmbeddingMatrix(matrix_path, meta_path)
+        self.ivf_path = ivf_path
+        self.ivf = None
+        self.pred_rows: list[int] = []
+        self.stats = {"computed": 0, "failed": 0}
         self._load_or_build()
 
+    def _key(self, pred: dict) -> str:
+        return embedding_key(get_pred_text(pred), self.provider.model)
+
     def _load_or_build(self):
-        """キャッシュがあれば読み込み、なければ構築"""
-        if EMBED_CACHE_PATH.exists():
-            try:
-                with open(EMBED_CACHE_PATH, "r", encoding="utf-8") as f:
-                    cache = json.load(f)
-                # IDでマッチング
-                cache_map = {e["id"]: e["embedding"] for e in cache.get("embeddings", [])}
-                missing = []
-                for i, pred in enumerate(self.predictions):
-                    pid = pred.get("id", f"idx_{i}")
-                    if pid in cache_map:
-                        self.embeddings.append(cache_map[pid])
-                    else:
-                        missing.append(i)
-                        self.embeddings.append([])
-
-                if missing:
-                    print(f"  {len(missing)} predictions not in cache, computing...", file=sys.stderr)
-                    self._compute_missing(missing)
-                    self._save_cache()
-                return
-            except Exception:
-                pass
-
-        # キャッシュなし → 全件構築
-        print(f"  Building embeddings for {len(self.predictions)} predictions...", file=sys.stderr)
-        self._compute_all()
-        self._save_cache()
-
-    def _compute_all(self):
-        """全予測のembeddingを計算"""
-        self.embeddings = []
-        for i, pred in enumerate(self.predictions):
-            text = get_pred_text(pred)
-            try:
-                emb = get_embedding(text)
-                self.embeddings.append(emb)
-            except Exception as e:
-                print(f"  WARNING: embedding failed for prediction {i}: {e}", file=sys.stderr)
-                self.embeddings.append([])
-            if (i + 1) % 50 == 0:
-                print(f"  ...embedded {i + 1}/{len(self.predictions)}", file=sys.stderr)
-
-    def _compute_missing(self, indices: list[int]):
-        """キャッシュにない予測のembeddingを計算"""
-        for i in indices:
-            pred = self.predictions[i]
-            text = get_pred_text(pred)
-            try:
-                emb = get_embedding(text)
-                self.embeddings[i] = emb
-            except Exception as e:
-                print(f"  WARNING: embedding failed for prediction {i}: {e}", file=sys.stderr)
-
-    def _save_cache(self):
-        """embeddingキャッシュを保存"""
-        cache = {"embeddings": []}
-        for i, pred in enumerate(self.predictions):
-            if self.embeddings[i]:
-                cache["embeddings"].append({
-                    "id": pred.get("id", f"idx_{i}"),
-                    "embedding": self.embeddings[i],
-                })
-        EMBED_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(EMBED_CACHE_PATH, "w", encoding="utf-8") as f:
-            json.dump(cache, f, ensure_ascii=False)
-        print(f"  Saved {len(cache['embeddings'])} embeddings to cache", file=sys.stderr)
+        """行列ストアを memmap で読み込み、キー（テキストハッシュ）未登録の予測だけ計算して追記"""
+        keys = [self._key(pred) for pred in self.predictions]
+        missing = [(key, get_pred_text(pred)) for key, pred in zip(keys, self.predictions)
+                   if self.matrix.row_of(key) is None]
+        if missing:
+            print(f"  {len(missing)} predictions not in cache, computing...", file=sys.stderr)
+            saved, failed = compute_embeddings(self.provider, missing, self.matrix, max_workers=self.max_workers)
+            self.stats = {"computed": saved, "failed": failed}
+            print(f"  Saved {saved} embeddings to {self.matrix.matrix_path.name}"
+                  + (f" ({failed} failed)" if failed else ""), file=sys.stderr)
+        self.pred_rows = [-1 if row is None else row for row in (self.matrix.row_of(key) for key in keys)]
+        if self.ivf_path:
+            self.ivf = _IVFIndex.load(self.ivf_path, self.matrix)
+
+    def build_ann_index(self, n_lists: int = 0) -> bool:
+        """大規模コーパス向け IVF 近似インデックスを構築（NumPy 必須）"""
+        if not HAS_NUMPY or self.matrix.count < max(IVF_MIN_ROWS, 2) or not self.ivf_path:
+            return False
+        self.ivf = _IVFIndex.build(self.matrix, n_lists=n_lists)
+        self.ivf.save(self.ivf_path)
+        return True
+
+    def _passes_filters(self, pred: dict, category: Optional[str], resolved_only: bool) -> bool:
+        if resolved_only and pred.get("status") != "resolved":
+            return False
+        if category:
+            tags = pred.get("tags", [])
+            tag_str = " ".join(tags) if isinstance(tags, list) else str(tags)
+            if category.lower() not in tag_str.lower():
+                return False
+        return True
 
     def search(
         self,
@@ -347,39 +742,44 @@ class EmbeddingEngine:
         category: Optional[str] = None,
         resolved_only: bool = False,
         min_score: float = 0.3,
+        exact: bool = False,
     ) -> list[tuple[dict, float]]:
-        """cosine similarity で検索"""
-        query_emb = get_embedding(query)
-        q_norm = math.sqrt(sum(x * x for x in query_emb))
-        if q_norm == 0:
+        """cosine similarity で検索（行列×ベクトル1回 + argpartition による top-k）"""
+        query_unit = _normalize(embed_with_retry(self.provider, [query])[0])
+        if not query_unit or not self.matrix.count or len(query_unit) != self.matrix.dim:
             return []
 
-        results = []
-        for i, pred in enumerate(self.predictions):
-            if resolved_only and pred.get("status") != "resolved":
-                continue
-            if category:
-                tags = pred.get("tags", [])
-                tag_str = " ".join(tags) if isinstance(tags, list) else str(tags)
-                if category.lower() not in tag_str.lower():
-                    continue
-
-            emb = self.embeddings[i]
-            if not emb:
-                continue
-
-            # cosine similarity
-            dot = sum(a * b for a, b in zip(query_emb, emb))
-            d_norm = math.sqrt(sum(x * x for x in emb))
-            if d_norm == 0:
-                continue
-            score = dot / (q_norm * d_norm)
+        candidates = [i for i, row in enumerate(self.pred_rows)
+                      if row >= 0 and self._passes_filters(self.predictions[i], category, resolved_only)]
+        if not candidates:
+            return []
 
-            if score >= min_score:
-                results.append((pred, score))
+        if not HAS_NUMPY:
+            row_scores = self.matrix.scores(query_unit, [self.pred_rows[i] for i in candidates])
+            results = [(self.predictions[i], sc) for i, sc in zip(candidates, row_scores) if sc >= min_score]
+            results.sort(key=lambda x: x[1], reverse=True)
+            return results[:top_n]
+
+        cand = np.asarray(candidates, dtype=np.int64)
+        rows = np.asarray(self.pred_rows, dtype=np.int64)[cand]
+        if self.ivf is not None and not exact:
+            # 近似: 近傍クラスタ（+ 構築後の追記行）に属する行だけスコアリング
+            allowed = np.zeros(self.matrix.count, dtype=bool)
+            allowed[self.ivf.candidate_rows(query_unit, self.matrix.count)] = True
+            keep = allowed[rows]
+            cand, rows = cand[keep], rows[keep]
+            if not len(rows):
+                return []
+            scores = self.matrix.scores(query_unit, rows)
+        else:
+            scores = self.matrix.scores(query_unit)[rows]
 
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_n]
+        k = min(top_n, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.predictions[int(cand[j])], float(scores[j])) for j in top if scores[j] >= min_score]
 
 
 # ── フォーマット・ユーティリティ ─────────────────────────────────
@@ -473,7 +873,7 @@ def main():
     parser.add_argument("--stats", action="store_true", help="prediction_db の統計を表示")
     parser.add_argument("--json", action="store_true", help="JSON形式で出力")
     parser.add_argument("--embed", action="store_true", help="Gemini embedding-001 でセマンティック検索")
-    parser.add_argument("--build-index", action="store_true", help="embeddingキャッシュを事前構築")
+    parser.add_argument("--build-index", action="store_true", help="TF-IDF転置インデックスとembeddingキャッシュを事前構築")
 
     args = parser.parse_args()
     predictions = load_predictions()
@@ -483,12 +883,19 @@ def main():
         return
 
     if args.build_index:
-        if not _init_genai():
-            print("ERROR: GEMINI_API_KEY not set. Cannot build embedding index.", file=sys.stderr)
+        tfidf_engine = TFIDFEngine(predictions)
+        print(f"TF-IDF index: {tfidf_engine.stats['tokenized']} tokenized, "
+              f"{tfidf_engine.stats['reused']} reused, {tfidf_engine.stats['removed']} removed "
+              f"-> {INDEX_PATH}")
+        if not embedding_provider_available():
+            print("ERROR: GEMINI_API_KEY not set (or EMBED_PROVIDER=local). Cannot build embedding index.",
+                  file=sys.stderr)
             sys.exit(1)
         print(f"Building embedding index for {len(predictions)} predictions...")
         engine = EmbeddingEngine(predictions)
-        print(f"Done. Cache saved to {EMBED_CACHE_PATH}")
+        if engine.build_ann_index():
+            print(f"IVF approximate index built -> {EMBED_IVF_PATH}")
+        print(f"Done. Matrix saved to {EMBED_MATRIX_PATH} ({engine.matrix.count} rows)")
         return
 
     if not args.query:
@@ -499,7 +906,7 @@ def main():
     # B'' ハイブリッドデフォルト: GEMINI_API_KEY が存在すれば自動で
     # Reciprocal Rank Fusion (RRF) によるハイブリッドスコアリングを使用。
     # --embed フラグで embedding 100% に切り替え可能。
-    gemini_available = _init_genai()
+    gemini_available = embedding_provider_available()
     use_hybrid = gemini_available and not args.embed  # --embed時は純embedding
 
     if args.embed:
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""Shared indexed prediction store backed by SQLite (WAL).
+
+prediction_db.json stays the interchange format (40+ scripts still read it),
+but the hot consumers — prediction_page_builder, reader_prediction_api,
+prediction_similarity_search and prediction_resolver — go through this store:
+
+- One row per prediction (JSON body) with secondary indexes on status,
+  oracle_deadline, genre/dynamics tags and ghost slug.
+- Row-level updates inside SQLite transactions, so concurrent writers no
+  longer race on a whole-file rewrite.
+- Import from / export to prediction_db.json. The store re-imports
+  automatically when the JSON file was rewritten by a legacy script
+  (mtime/size signature). Row changes not yet exported are kept in the DB
+  (pending_rows / pending_top, shared by every process using the store) and
+  re-applied on top of each import, so neither side's write is lost even when
+  another process does the import.
+- Export is debounced (EXPORT_DEBOUNCE_SEC, plus a flush at exit / close()),
+  runs under a cross-process file lock, re-checks staleness right before the
+  write, and is atomic (tmp + os.replace).
+
+Usage:
+  python3 prediction_store.py --import          # JSON -> SQLite
+  python3 prediction_store.py --export          # SQLite -> JSON
+  python3 prediction_store.py --stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
+
+from file_lock import FileLock
+
+DEFAULT_JSON_PATH = "/opt/shared/scripts/prediction_db.json"
+STORE_SCHEMA_VERSION = 1
+TAG_KINDS = ("genre", "dynamics")
+EXPORT_DEBOUNCE_SEC = 30.0  # 単発 update が続いても JSON 全書き出しはこの間隔に1回
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    prediction_id   TEXT PRIMARY KEY,
+    position        INTEGER NOT NULL,
+    status          TEXT NOT NULL DEFAULT '',
+    oracle_deadline TEXT NOT NULL DEFAULT '',
+    ghost_slug      TEXT NOT NULL DEFAULT '',
+    updated_at      TEXT NOT NULL DEFAULT '',
+    body            TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_position ON predictions(position);
+CREATE INDEX IF NOT EXISTS idx_predictions_status ON predictions(status);
+CREATE INDEX IF NOT EXISTS idx_predictions_deadline ON predictions(oracle_deadline);
+CREATE INDEX IF NOT EXISTS idx_predictions_ghost_slug ON predictions(ghost_slug);
+
+CREATE TABLE IF NOT EXISTS prediction_tags (
+    prediction_id TEXT NOT NULL,
+    kind          TEXT NOT NULL,
+    tag           TEXT NOT NULL,
+    PRIMARY KEY (kind, tag, prediction_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_prediction_tags_pid ON prediction_tags(prediction_id);
+
+-- 未 export の変更。import のたびに上から適用し直し、export 成功で消す
+CREATE TABLE IF NOT EXISTS pending_rows (
+    prediction_id TEXT PRIMARY KEY,
+    op            TEXT NOT NULL,
+    payload       TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pending_top (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def default_store_path(json_path: str) -> str:
+    """prediction_db.json -> prediction_db.sqlite3 (same directory)."""
+    return os.path.splitext(json_path)[0] + ".sqlite3"
+
+
+def _split_tags(value: Any) -> list[str]:
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value or "").split(",")
+    tags = []
+    for item in items:
+        tag = str(item or "").strip().lower()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def _ghost_slug(pred: dict) -> str:
+    slug = str(pred.get("article_slug") or pred.get("ghost_slug") or "").strip()
+    if slug:
+        return slug
+    url = str(pred.get("ghost_url") or "").strip().rstrip("/")
+    return url.rsplit("/", 1)[-1] if url else ""
+
+
+def _index_fields(pred: dict) -> dict:
+    return {
+        "status": str(pred.get("status") or "").upper(),
+        "oracle_deadline": str(pred.get("oracle_deadline") or "")[:10],
+        "ghost_slug": _ghost_slug(pred),
+        "tags": {
+            "genre": _split_tags(pred.get("genre_tags")),
+            "dynamics": _split_tags(pred.get("dynamics_tags")),
+        },
+    }
+
+
+class PredictionStore:
+    """Indexed prediction store. One instance per process is enough (see get_store)."""
+
+    def __init__(self, json_path: str = DEFAULT_JSON_PATH, db_path: str | None = None,
+                 auto_sync: bool = True):
+        self.json_path = json_path
+        self.db_path = db_path or default_store_path(json_path)
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty = False
+        self._last_export = float("-inf")
+        self._flush_timer: threading.Timer | None = None
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+        self._closed = False
+        atexit.register(self.flush)
+        if auto_sync:
+            self.sync_from_json()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._conn.close()
+        atexit.unregister(self.flush)
+
+    # ── meta / sync ───────────────────────────────────────────
+
+    def _get_meta(self, key: str, default: str = "") -> str:
+        row = self._conn.execute("SELECT value FROM store_meta WHERE key=?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT INTO store_meta(key, value) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+            (key, value),
+        )
+
+    def _json_signature(self) -> str:
+        try:
+            st = os.stat(self.json_path)
+        except OSError:
+            return ""
+        return f"{st.st_mtime_ns}:{st.st_size}"
+
+    def is_stale(self) -> bool:
+        """True when prediction_db.json changed since the last import/export."""
+        signature = self._json_signature()
+        return bool(signature) and signature != self._get_meta("json_signature")
+
+    def sync_from_json(self, force: bool = False) -> bool:
+        """Re-import prediction_db.json if a legacy writer rewrote it. Returns True if imported."""
+        with self._lock:
+            if not force and not self.is_stale():
+                return False
+            if not os.path.exists(self.json_path):
+                return False
+            with open(self.json_path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.import_data(data, signature=self._json_signature())
+            return True
+
+    def _reapply_pending(self, conn: sqlite3.Connection) -> None:
+        """Re-apply every process's unexported changes (inside the import transaction)."""
+        for row in conn.execute("SELECT prediction_id, op, payload FROM pending_rows").fetchall():
+            payload = json.loads(row["payload"])
+            if row["op"] == "put":
+                self._write_row(conn, payload)
+                continue
+            current = conn.execute("SELECT body FROM predictions WHERE prediction_id=?",
+                                   (row["prediction_id"],)).fetchone()
+            if current:  # legacy 側で削除された予測は復活させない
+                pred = json.loads(current["body"])
+                pred.update(payload)
+                self._write_row(conn, pred)
+        pending_top = conn.execute("SELECT key, value FROM pending_top").fetchall()
+        if pending_top:
+            data = json.loads(self._get_meta("top_level", "{}") or "{}")
+            data.update({row["key"]: json.loads(row["value"]) for row in pending_top})
+            self._set_meta("top_level", json.dumps(data, ensure_ascii=False))
+
+    def _has_pending(self) -> bool:
+        row = self._query("SELECT EXISTS(SELECT 1 FROM pending_rows) OR EXISTS(SELECT 1 FROM pending_top)")
+        return bool(row[0][0])
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def import_data(self, data: dict | list, signature: str = "") -> int:
+        """Replace the store contents with a prediction_db.json payload.
+
+        Unexported changes (pending_rows / pending_top) are re-applied on top.
+        """
+        if isinstance(data, list):
+            data = {"predictions": data}
+        predictions = [p for p in data.get("predictions", []) if isinstance(p, dict)]
+        top_level = {k: v for k, v in data.items() if k != "predictions"}
+        now = datetime.now(timezone.utc).isoformat()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM predictions")
+            conn.execute("DELETE FROM prediction_tags")
+            rows = []
+            tag_rows = []
+            seen: set[str] = set()
+            for position, pred in enumerate(predictions):
+                # Duplicates/missing ids are kept under a synthetic key so export never drops data.
+                pid = str(pred.get("prediction_id") or f"__pos_{position}")
+                if pid in seen:
+                    pid = f"{pid}__dup_{position}"
+                seen.add(pid)
+                fields = _index_fields(pred)
+                rows.append((
+                    pid, position, fields["status"], fields["oracle_deadline"],
+                    fields["ghost_slug"], now, json.dumps(pred, ensure_ascii=False),
+                ))
+                for kind, tags in fields["tags"].items():
+                    tag_rows.extend((pid, kind, tag) for tag in tags)
+            conn.executemany(
+                "INSERT INTO predictions"
+                "(prediction_id, position, status, oracle_deadline, ghost_slug, updated_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO prediction_tags(prediction_id, kind, tag) VALUES (?, ?, ?)",
+                tag_rows,
+            )
+            self._set_meta("top_level", json.dumps(top_level, ensure_ascii=False))
+            self._set_meta("schema_version", str(STORE_SCHEMA_VERSION))
+            self._reapply_pending(conn)
+            if signature:
+                self._set_meta("json_signature", signature)
+        return len(rows)
+
+    def export_json(self, path: str | None = None) -> str:
+        """Write a prediction_db.json-compatible file atomically. Returns the path.
+
+        Holds the file lock shared with other store processes and merges a
+        legacy rewrite (is_stale) in before replacing the file. Reading the rows
+        and clearing the pending tables happen in one write transaction, so a
+        change another process commits meanwhile stays pending.
+        """
+        path = path or self.json_path
+        with self._lock, FileLock(path):
+            if path == self.json_path:
+                self.sync_from_json()
+            with self._transaction() as conn:
+                data = self.load_db()
+                tmp_path = f"{path}.tmp.{os.getpid()}"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, path)
+                if path == self.json_path:
+                    self._set_meta("json_signature", self._json_signature())
+                    conn.execute("DELETE FROM pending_rows")
+                    conn.execute("DELETE FROM pending_top")
+            if path == self.json_path:
+                self._dirty = False
+                self._last_export = time.monotonic()
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+        return path
+
+    def flush(self) -> None:
+        """Export now if there are unexported writes (called at exit and by the debounce timer)."""
+        with self._lock:
+            timer, self._flush_timer = self._flush_timer, None
+            if timer is not None and timer is not threading.current_thread():
+                timer.cancel()
+            if self._dirty and not self._closed:
+                if self._has_pending():
+                    self.export_json()
+                else:
+                    self._dirty = False  # 他プロセスの export がこちらの変更ごと書き出し済み
+
+    # ── reads ─────────────────────────────────────────────────
+
+    @staticmethod
+    def _decode(rows: Iterable[sqlite3.Row]) -> list[dict]:
+        return [json.loads(row["body"]) for row in rows]
+
+    # 接続はスレッド間で共有しているので、読み取りも self._lock の下で行う
+    # （sync_from_json の DELETE+INSERT 途中の空テーブルを見ないため）
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def load_db(self) -> dict:
+        """Full prediction_db.json-shaped dict (drop-in for json.load)."""
+        with self._lock:
+            data = json.loads(self._get_meta("top_level", "{}") or "{}")
+            data["predictions"] = self.all()
+        return data
+
+    def all(self) -> list[dict]:
+        return self._decode(self._query("SELECT body FROM predictions ORDER BY position"))
+
+    def count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM predictions")[0][0]
+
+    def ids(self) -> list[str]:
+        rows = self._query("SELECT prediction_id FROM predictions ORDER BY position")
+        return [row["prediction_id"] for row in rows]
+
+    def get(self, prediction_id: str) -> dict | None:
+        rows = self._query("SELECT body FROM predictions WHERE prediction_id=?", (prediction_id,))
+        return json.loads(rows[0]["body"]) if rows else None
+
+    def get_many(self, prediction_ids: Iterable[str]) -> dict[str, dict]:
+        ids = list(dict.fromkeys(prediction_ids))
+        result: dict[str, dict] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._query(
+                f"SELECT prediction_id, body FROM predictions WHERE prediction_id IN ({placeholders})",
+                chunk,
+            )
+            result.update({row["prediction_id"]: json.loads(row["body"]) for row in rows})
+        return result
+
+    def by_status(self, *statuses: str) -> list[dict]:
+        wanted = [str(s).upper() for s in statuses]
+        placeholders = ",".join("?" * len(wanted))
+        rows = self._query(
+            f"SELECT body FROM predictions WHERE status IN ({placeholders}) ORDER BY position",
+            wanted,
+        )
+        return self._decode(rows)
+
+    def due_between(self, start: str = "", end: str = "9999-12-31") -> list[dict]:
+        """Predictions whose oracle_deadline (YYYY-MM-DD) falls in [start, end]."""
+        rows = self._query(
+            "SELECT body FROM predictions WHERE oracle_deadline != '' "
+            "AND oracle_deadline >= ? AND oracle_deadline <= ? ORDER BY oracle_deadline",
+            (start, end),
+        )
+        return self._decode(rows)
+
+    def by_tag(self, kind: str, tag: str) -> list[dict]:
+        rows = self._query(
+            "SELECT p.body FROM prediction_tags t JOIN predictions p USING(prediction_id) "
+            "WHERE t.kind=? AND t.tag=? ORDER BY p.position",
+            (kind, str(tag).strip().lower()),
+        )
+        return self._decode(rows)
+
+    def by_ghost_slug(self, slug: str) -> list[dict]:
+        rows = self._query("SELECT body FROM predictions WHERE ghost_slug=? ORDER BY position", (slug,))
+        return self._decode(rows)
+
+    # ── writes ────────────────────────────────────────────────
+
+    def _write_row(self, conn: sqlite3.Connection, pred: dict, position: int | None = None) -> None:
+        pid = str(pred["prediction_id"])
+        if position is None:
+            row = conn.execute("SELECT position FROM predictions WHERE prediction_id=?", (pid,)).fetchone()
+            if row:
+                position = row["position"]
+            else:
+                position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM predictions").fetchone()[0]
+        fields = _index_fields(pred)
+        conn.execute(
+            "INSERT INTO predictions"
+            "(prediction_id, position, status, oracle_deadline, ghost_slug, updated_at, body) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(prediction_id) DO UPDATE SET status=excluded.status, "
+            "oracle_deadline=excluded.oracle_deadline, ghost_slug=excluded.ghost_slug, "
+            "updated_at=excluded.updated_at, body=excluded.body",
+            (pid, position, fields["status"], fields["oracle_deadline"], fields["ghost_slug"],
+             datetime.now(timezone.utc).isoformat(), json.dumps(pred, ensure_ascii=False)),
+        )
+        conn.execute("DELETE FROM prediction_tags WHERE prediction_id=?", (pid,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO prediction_tags(prediction_id, kind, tag) VALUES (?, ?, ?)",
+            [(pid, kind, tag) for kind, tags in fields["tags"].items() for tag in tags],
+        )
+
+    @staticmethod
+    def _set_pending_row(conn: sqlite3.Connection, prediction_id: str, op: str, payload: dict) -> None:
+        conn.execute(
+            "INSERT INTO pending_rows(prediction_id, op, payload) VALUES(?, ?, ?) "
+            "ON CONFLICT(prediction_id) DO UPDATE SET op=excluded.op, payload=excluded.payload",
+            (prediction_id, op, json.dumps(payload, ensure_ascii=False)),
+        )
+
+    def _after_write(self) -> None:
+        self._dirty = True
+        if self._batch_depth:
+            return
+        wait = EXPORT_DEBOUNCE_SEC - (time.monotonic() - self._last_export)
+        if wait <= 0:
+            self.export_json()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(wait, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    @contextmanager
+    def batch(self) -> Iterator["PredictionStore"]:
+        """Group several row updates; prediction_db.json is exported once on exit."""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self.export_json()
+
+    def update(self, prediction_id: str, fields: dict) -> dict | None:
+        """Merge fields into one prediction (row-level). Returns the updated prediction."""
+        with self._lock:
+            self.sync_from_json()
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT body FROM predictions WHERE prediction_id=?", (prediction_id,)
+                ).fetchone()
+                if not row:
+                    return None
+                pred = json.loads(row["body"])
+                pred.update(fields)
+                self._write_row(conn, pred)
+                pending = conn.execute(
+                    "SELECT op, payload FROM pending_rows WHERE prediction_id=?", (prediction_id,)
+                ).fetchone()
+                if pending and pending["op"] == "put":
+                    self._set_pending_row(conn, prediction_id, "put", pred)
+                else:
+                    merged = json.loads(pending["payload"]) if pending else {}
+                    merged.update(fields)
+                    self._set_pending_row(conn, prediction_id, "merge", merged)
+            self._after_write()
+            return pred
+
+    def upsert(self, pred: dict) -> None:
+        """Insert or replace a whole prediction (appended at the end when new)."""
+        if not pred.get("prediction_id"):
+            raise ValueError("prediction_id is required")
+        with self._lock:
+            self.sync_from_json()
+            with self._transaction() as conn:
+                self._write_row(conn, pred)
+                self._set_pending_row(conn, str(pred["prediction_id"]), "put", pred)
+            self._after_write()
+
+    def set_top_level(self, key: str, value: Any) -> None:
+        """Update a non-prediction key of prediction_db.json (e.g. stats)."""
+        with self._lock:
+            self.sync_from_json()
+            with self._transaction() as conn:
+                data = json.loads(self._get_meta("top_level", "{}") or "{}")
+                data[key] = value
+                self._set_meta("top_level", json.dumps(data, ensure_ascii=False))
+                conn.execute(
+                    "INSERT INTO pending_top(key, value) VALUES(?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                    (key, json.dumps(value, ensure_ascii=False)),
+                )
+            self._after_write()
+
+
+_STORES: dict[tuple[str, str], PredictionStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(json_path: str = DEFAULT_JSON_PATH, db_path: str | None = None) -> PredictionStore:
+    """Process-wide store for a given prediction_db.json (synced on every call)."""
+    key = (json_path, db_path or default_store_path(json_path))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = PredictionStore(json_path, db_path)
+            _STORES[key] = store
+    store.sync_from_json()
+    return store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Indexed prediction store (SQLite WAL)")
+    parser.add_argument("--json", default=DEFAULT_JSON_PATH, help="prediction_db.json path")
+    parser.add_argument("--db", default=None, help="SQLite path (default: next to the JSON)")
+    parser.add_argument("--import", dest="do_import", action="store_true", help="Force JSON -> SQLite import")
+    parser.add_argument("--export", action="store_true", help="SQLite -> JSON export")
+    parser.add_argument("--stats", action="store_true", help="Print index stats")
+    args = parser.parse_args()
+
+    store = PredictionStore(args.json, args.db, auto_sync=False)
+    if args.do_import:
+        store.sync_from_json(force=True)
+        print(f"Imported {store.count()} predictions into {store.db_path}")
+    if args.export:
+        print(f"Exported {store.count()} predictions to {store.export_json()}")
+    if args.stats or not (args.do_import or args.export):
+        rows = store._query("SELECT status, COUNT(*) AS n FROM predictions GROUP BY status ORDER BY n DESC")
+        print(f"Store: {store.db_path} ({store.count()} predictions, stale={store.is_stale()})")
+        for row in rows:
+            print(f"  {row['status'] or '(none)'}: {row['n']}")
+    store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -104,6 +104,61 @@ TARGETS = [
         "local": REPO_ROOT / "scripts" / "prediction_page_builder.py",
         "remote": "/opt/shared/scripts/prediction_page_builder.py",
     },
+    {
+        "name": "prediction_store",
+        "local": REPO_ROOT / "scripts" / "prediction_store.py",
+        "remote": "/opt/shared/scripts/prediction_store.py",
+    },
+    {
+        "name": "file_lock",
+        "local": REPO_ROOT / "scripts" / "file_lock.py",
+        "remote": "/opt/shared/scripts/file_lock.py",
+    },
+    {
+        "name": "link_verifier",
+        "local": REPO_ROOT / "scripts" / "link_verifier.py",
+        "remote": "/opt/shared/scripts/link_verifier.py",
+    },
+    {
+        "name": "market_match_index",
+        "local": REPO_ROOT / "scripts" / "market_match_index.py",
+        "remote": "/opt/shared/scripts/market_match_index.py",
+    },
+    {
+        "name": "market_candidate_index",
+        "local": REPO_ROOT / "scripts" / "market_candidate_index.py",
+        "remote": "/opt/shared/scripts/market_candidate_index.py",
+    },
+    {
+        "name": "odds_timeseries",
+        "local": REPO_ROOT / "scripts" / "odds_timeseries.py",
+        "remote": "/opt/shared/scripts/odds_timeseries.py",
+    },
+    {
+        "name": "polymarket_monitor",
+        "local": REPO_ROOT / "scripts" / "polymarket_monitor.py",
+        "remote": "/opt/shared/scripts/polymarket_monitor.py",
+    },
+    {
+        "name": "article_validator",
+        "local": REPO_ROOT / "scripts" / "article_validator.py",
+        "remote": "/opt/shared/scripts/article_validator.py",
+    },
+    {
+        "name": "prediction_release_contract",
+        "local": REPO_ROOT / "scripts" / "prediction_release_contract.py",
+        "remote": "/opt/shared/scripts/prediction_release_contract.py",
+    },
+    {
+        "name": "prediction_tracker",
+        "local": REPO_ROOT / "scripts" / "prediction_tracker.py",
+        "remote": "/opt/shared/scripts/prediction_tracker.py",
+    },
+    {
+        "name": "report_authority",
+        "local": REPO_ROOT / "scripts" / "report_authority.py",
+        "remote": "/opt/shared/scripts/report_authority.py",
+    },
     {
         "name": "reader_prediction_api",
         "local": REPO_ROOT / "scripts" / "reader_prediction_api.py",
@@ -159,6 +214,16 @@ TARGETS = [
         "local": REPO_ROOT / "scripts" / "article_release_guard.py",
         "remote": "/opt/shared/scripts/article_release_guard.py",
     },
+    {
+        "name": "article_index",
+        "local": REPO_ROOT / "scripts" / "article_index.py",
+        "remote": "/opt/shared/scripts/article_index.py",
+    },
+    {
+        "name": "sitemap_engine",
+        "local": REPO_ROOT / "scripts" / "sitemap_engine.py",
+        "remote": "/opt/shared/scripts/sitemap_engine.py",
+    },
     {
         "name": "nowpattern_publisher",
         "local": REPO_ROOT / "scripts" / "nowpattern_publisher.py",
@@ -179,11 +244,31 @@ TARGETS = [
         "local": REPO_ROOT / "scripts" / "breaking-news-watcher.py",
         "remote": "/opt/shared/scripts/breaking-news-watcher.py",
     },
+    {
+        "name": "feed_ingest",
+        "local": REPO_ROOT / "scripts" / "feed_ingest.py",
+        "remote": "/opt/shared/scripts/feed_ingest.py",
+    },
+    {
+        "name": "seen_set",
+        "local": REPO_ROOT / "scripts" / "seen_set.py",
+        "remote": "/opt/shared/scripts/seen_set.py",
+    },
     {
         "name": "breaking_pipeline_helper",
         "local": REPO_ROOT / "scripts" / "breaking_pipeline_helper.py",
         "remote": "/opt/shared/scripts/breaking_pipeline_helper.py",
     },
+    {
+        "name": "qa_rule_engine",
+        "local": REPO_ROOT / "scripts" / "qa_rule_engine.py",
+        "remote": "/opt/shared/scripts/qa_rule_engine.py",
+    },
+    {
+        "name": "webhook_job_queue",
+        "local": REPO_ROOT / "scripts" / "webhook_job_queue.py",
+        "remote": "/opt/shared/scripts/webhook_job_queue.py",
+    },
     {
         "name": "ghost_webhook_server",
         "local": REPO_ROOT / "scripts" / "ghost_webhook_server.py",
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""Shared article QA rules for ghost_webhook_server (real time) and qa_sentinel (nightly).
+
+Both entry points used to carry their own copies of count_cjk / get_text /
+marker checks / the /predictions/ link fix / NEO queue helpers, and the copies
+had drifted (Hangul counted in one but not the other, different link fixes,
+different oracle issue names). Each check also re-scanned the HTML on its own,
+with CJK counting done character by character in Python.
+
+Here the HTML is parsed once into a PostDoc (plain text, the np-* markers
+present, bad /predictions/ links, longest CJK run) using precompiled regexes, and every
+registered rule reads from that model in a single pass. evaluate() returns a
+QAResult whose `checks` map straight onto article_health columns, so both
+callers persist the same fields. A rule added with @rule applies to both paths.
+
+Side effects (Ghost API fixes, NEO delegation, DRAFT demotion) and the release
+governor stay with the callers.
+
+Usage:
+  python3 qa_rule_engine.py article.html [--lang en] [--slug en-foo]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Iterable
+
+from file_lock import FileLock
+
+NEO_QUEUE = "/opt/shared/neo_task_queue.json"
+
+# 必須タグ slug
+REQUIRED_TAGS_ALL = ["nowpattern", "deep-pattern"]
+REQUIRED_TAGS_JA  = ["lang-ja"]
+REQUIRED_TAGS_EN  = ["lang-en"]
+
+# 必須セクションマーカー
+REQUIRED_MARKERS = ["np-fast-read", "np-signal", "np-between-lines", "np-open-loop"]
+ORACLE_MARKER    = "np-oracle"
+
+# コンテンツ長しきい値
+MIN_LEN_JA = 5000
+MIN_LEN_EN = 3000
+
+# CJK汚染しきい値（EN記事で連続日本語50文字超）
+CJK_MAX_EN = 50
+
+# ルール本体の判定を変えたら上げる（しきい値・ルール名は rules_signature() に自動で入る）。
+# qa_sentinel の増分監査 fingerprint に入るので、上げると前回合格の記事も再監査される。
+RULES_VERSION = 1
+
+_TAG_RE       = re.compile(r"<[^>]+>")
+_MARKER_RE    = re.compile("|".join(re.escape(m) for m in REQUIRED_MARKERS + [ORACLE_MARKER]))
+_CJK_RUN_RE   = re.compile(r"[\u3000-\u9fff\uf900-\ufaff\uac00-\ud7af]+")
+# 相対リンクの /predictions/（/en/predictions/ 以外）。EN記事では /en/predictions/ が正しい
+_BAD_PRED_RE  = re.compile(r'(href=["\'](?!https?://)[^"\']*?)(?<!/en)/predictions/(["\'])')
+
+
+def html_to_text(html: str) -> str:
+    """HTMLタグを除いてプレーンテキストを返す"""
+    return _TAG_RE.sub("", html or "")
+
+
+def count_cjk(text: str) -> int:
+    """日本語・CJK・ハングル文字の連続最大長を返す"""
+    return max((len(m) for m in _CJK_RUN_RE.findall(text or "")), default=0)
+
+
+def has_bad_prediction_link(html: str) -> bool:
+    return bool(_BAD_PRED_RE.search(html or ""))
+
+
+def fix_prediction_link(html: str) -> str:
+    """has_bad_prediction_link が検出したリンクだけを /en/predictions/ に書き換える"""
+    return _BAD_PRED_RE.sub(r"\1/en/predictions/\2", html or "")
+
+
+def reuses_ja_image(lang: str, feature_image: str, ja_images: Iterable[str]) -> bool:
+    """EN記事がJA記事の画像を使い回しているか"""
+    return bool(lang == "en" and feature_image and feature_image in ja_images)
+
+
+def oracle_needed(slug: str, lang: str, pred_slugs: Iterable[str]) -> bool:
+    return slug in pred_slugs or (lang == "en" and slug.replace("en-", "") in pred_slugs)
+
+
+def load_prediction_slugs(path: str) -> set:
+    """prediction_db.json から記事 slug のセットを返す"""
+    try:
+        with open(path) as f:
+            db = json.load(f)
+    except Exception:
+        return set()
+    slugs = set()
+    for p in db.get("predictions", []):
+        url = p.get("ghost_url", "")
+        if url:
+            slug = url.rstrip("/").rsplit("/", 1)[-1]
+            if slug:
+                slugs.add(slug)
+    return slugs
+
+
+# ── Post model ────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class PostDoc:
+    """One post, parsed once; rules only read from this."""
+
+    slug: str
+    lang: str
+    tags: frozenset
+    html: str
+    text: str
+    markers: frozenset
+    bad_pred_link: bool
+    cjk_run: int
+    feature_image: str = ""
+
+    @classmethod
+    def parse(cls, html: str, slug: str = "", lang: str = "ja", tags: Iterable[str] = (),
+              feature_image: str = "") -> "PostDoc":
+        html = html or ""
+        text = html_to_text(html)
+        return cls(
+            slug=slug,
+            lang=lang,
+            tags=frozenset(tags),
+            html=html,
+            text=text,
+            markers=frozenset(_MARKER_RE.findall(html)),
+            bad_pred_link=lang == "en" and has_bad_prediction_link(html),
+            cjk_run=count_cjk(text) if lang == "en" else 0,
+            feature_image=feature_image or "",
+        )
+
+
+@dataclass
+class QAResult:
+    checks: dict = field(default_factory=dict)       # article_health の列
+    neo_issues: list = field(default_factory=list)   # NEO に委譲する問題
+    missing_tags: list = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class QAContext:
+    ja_images: frozenset = frozenset()
+    pred_slugs: frozenset = frozenset()
+
+
+Rule = Callable[[PostDoc, QAContext, QAResult], None]
+RULES: list[tuple[str, Rule]] = []
+
+
+def rule(name: str):
+    """Register a rule; rules run in registration order (= neo_issues order)."""
+    def register(fn: Rule) -> Rule:
+        RULES.append((name, fn))
+        return fn
+    return register
+
+
+@rule("feature_image")
+def _rule_feature_image(doc, ctx, res):
+    if reuses_ja_image(doc.lang, doc.feature_image, ctx.ja_images):
+        res.checks["image_ok"] = 0
+
+
+@rule("required_tags")
+def _rule_required_tags(doc, ctx, res):
+    required = set(REQUIRED_TAGS_ALL + (REQUIRED_TAGS_JA if doc.lang == "ja" else REQUIRED_TAGS_EN))
+    missing = sorted(required - doc.tags)
+    if missing:
+        res.checks["tags_ok"] = 0
+        res.checks["missing_tags"] = ",".join(missing)
+        res.missing_tags = missing
+
+
+@rule("prediction_link")
+def _rule_prediction_link(doc, ctx, res):
+    if doc.bad_pred_link:
+        res.checks["pred_link_ok"] = 0
+
+
+@rule("content_length")
+def _rule_content_length(doc, ctx, res):
+    min_len = MIN_LEN_JA if doc.lang == "ja" else MIN_LEN_EN
+    if len(doc.text) < min_len:
+        res.checks["length_ok"] = 0
+        res.neo_issues.append(f"article_too_short:{len(doc.text)}chars(min:{min_len})")
+
+
+@rule("sections")
+def _rule_sections(doc, ctx, res):
+    missing = [m for m in REQUIRED_MARKERS if m not in doc.markers]
+    if missing:
+        res.checks["sections_ok"] = 0
+        res.checks["missing_sections"] = ",".join(missing)
+        res.neo_issues.append(f"missing_sections:{','.join(missing)}")
+
+
+@rule("cjk_contamination")
+def _rule_cjk(doc, ctx, res):
+    if doc.lang == "en":
+        res.checks["cjk_char_count"] = doc.cjk_run
+        if doc.cjk_run > CJK_MAX_EN:
+            res.checks["cjk_ok"] = 0
+            res.neo_issues.append(f"cjk_contamination:{doc.cjk_run}chars")
+
+
+@rule("oracle")
+def _rule_oracle(doc, ctx, res):
+    if oracle_needed(doc.slug, doc.lang, ctx.pred_slugs):
+        res.checks["oracle_needed"] = 1
+        if ORACLE_MARKER not in doc.markers:
+            res.checks["oracle_ok"] = 0
+            res.neo_issues.append("missing_oracle")
+
+
+def rules_signature() -> str:
+    """Everything besides the article that decides a verdict: version, rules, thresholds."""
+    return "|".join([
+        str(RULES_VERSION),
+        ",".join(name for name, _ in RULES),
+        f"len:{MIN_LEN_JA}/{MIN_LEN_EN}",
+        f"cjk:{CJK_MAX_EN}",
+        ",".join(REQUIRED_MARKERS + [ORACLE_MARKER]),
+        ",".join(REQUIRED_TAGS_ALL + REQUIRED_TAGS_JA + REQUIRED_TAGS_EN),
+    ])
+
+
+def evaluate(doc: PostDoc, ctx: QAContext = QAContext()) -> QAResult:
+    res = QAResult(checks={
+        "content_len": len(doc.text),
+        "image_ok": 1, "tags_ok": 1, "missing_tags": "",
+        "length_ok": 1, "sections_ok": 1, "missing_sections": "",
+        "cjk_ok": 1, "cjk_char_count": 0,
+        "oracle_ok": 1, "oracle_needed": 0,
+        "pred_link_ok": 1,
+    })
+    for _, fn in RULES:
+        fn(doc, ctx, res)
+    return res
+
+
+def new_health_record(post_id: str, slug: str, title: str, lang: str, result: QAResult) -> dict:
+    """article_health 1行分（修正フラグ・NEO・overall は呼び出し側で埋める）"""
+    rec = {
+        "post_id": post_id, "slug": slug, "title": (title or "")[:120], "lang": lang,
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "image_fixed": 0, "tags_fixed": 0, "pred_link_fixed": 0,
+        "neo_queued": 0, "neo_issue": "", "overall_ok": 0,
+    }
+    rec.update(result.checks)
+    return rec
+
+
+def overall_ok(rec: dict) -> int:
+    fixable_ok = (
+        (rec["image_ok"] or rec["image_fixed"]) and
+        (rec["tags_ok"]  or rec["tags_fixed"])  and
+        (rec["pred_link_ok"] or rec["pred_link_fixed"])
+    )
+    structural_ok = (rec["length_ok"] and rec["sections_ok"] and
+                     rec["cjk_ok"]    and rec["oracle_ok"])
+    return 1 if (fixable_ok and structural_ok) else 0
+
+
+# ── NEO Task Queue ────────────────────────────────────────────────────────
+
+def load_neo_queue(path: str = NEO_QUEUE) -> dict:
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {"tasks": []}
+
+
+def save_neo_queue(q: dict, path: str = NEO_QUEUE):
+    """ディスク上のキューに q の新規タスクを追記して保存する。
+
+    呼び出し側は load → 追記 → save の間にネットワーク処理を挟むので、q をそのまま
+    書くと他ワーカー（や NEO 側のステータス更新）の変更を上書きしてしまう。
+    書き手は webhook サーバーと qa_sentinel の別プロセスなので fcntl のファイルロックで直列化し、
+    未完了の同じ (post_id, issue) が既にあるタスクは追加しない（task_id は秒単位で衝突しないため）。
+    """
+    with FileLock(path):
+        current = load_neo_queue(path)
+        tasks = current.setdefault("tasks", [])
+        known = {t.get("task_id") for t in tasks}
+        open_issues = {(t.get("post_id"), t.get("issue")) for t in tasks if t.get("status") != "done"}
+        for t in q.get("tasks", []):
+            key = (t.get("post_id"), t.get("issue"))
+            if t.get("task_id") in known or key in open_issues:
+                continue
+            tasks.append(t)
+            known.add(t.get("task_id"))
+            open_issues.add(key)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        q["tasks"] = current["tasks"]
+
+
+def enqueue_neo_with_prompt(queue, post_id, slug, title, lang, issue, fix_prompt,
+                            priority=1, source="webhook_qa"):
+    """詳細な修正プロンプト付きでNEOキューに追加（同じ post_id+issue が未完了なら追加しない）"""
+    existing = {(t["post_id"], t["issue"]) for t in queue["tasks"] if t.get("status") != "done"}
+    if (post_id, issue) in existing:
+        return False
+    queue["tasks"].append({
+        "task_id":    f"{slug[:25]}_{issue[:15]}_{int(time.time())}",
+        "post_id":    post_id,
+        "slug":       slug,
+        "title":      title[:80],
+        "lang":       lang,
+        "issue":      issue,
+        "fix_prompt": fix_prompt,
+        "priority":   priority,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "status":     "pending",
+        "source":     source,
+    })
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the shared QA rules on one HTML file")
+    parser.add_argument("html_file")
+    parser.add_argument("--lang", default="ja", choices=["ja", "en"])
+    parser.add_argument("--slug", default="")
+    parser.add_argument("--tags", default="", help="カンマ区切りのタグ slug")
+    args = parser.parse_args()
+
+    with open(args.html_file, encoding="utf-8") as f:
+        html = f.read()
+    tags = [t for t in args.tags.split(",") if t] or REQUIRED_TAGS_ALL + [f"lang-{args.lang}"]
+    result = evaluate(PostDoc.parse(html, slug=args.slug, lang=args.lang, tags=tags))
+    print(json.dumps({"checks": result.checks, "neo_issues": result.neo_issues}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,14 +14,22 @@ NEOキュー委譲（AIが必要な修正）:
   - cjk_contamination: EN記事に日本語50文字超
   - missing_oracle: prediction_db記事でOracleボックスなし
 
-実行: python3 /opt/shared/scripts/qa_sentinel.py [--dry-run] [--report-only]
+差分監査:
+  前回合格した記事は updated_at と fingerprint（HTML・画像・タグ等のハッシュ）が
+  一致すればスキップし、残りの判定はプロセスプールで並列実行する。
+  出典の到達性は QA_SOURCE_CHECK_TTL_DAYS（既定: 7日）ごとに記事単位で再確認する。
+  --full で全件を再監査。並列数は QA_SENTINEL_WORKERS（既定: CPU数）。
+
+実行: python3 /opt/shared/scripts/qa_sentinel.py [--dry-run] [--report-only] [--full]
 """
 
 import os, sys, json, sqlite3, subprocess, tempfile, time, urllib.request, ssl, re, hashlib
 from datetime import datetime, timezone
 
 from mission_contract import assert_mission_handshake
-from release_governor import evaluate_governed_release
+from release_governor import GOVERNOR_POLICY_VERSION, evaluate_governed_release
+import qa_rule_engine
+from qa_rule_engine import fix_prediction_link
 
 MISSION_HANDSHAKE = assert_mission_handshake(
     "qa_sentinel",
@@ -58,21 +66,6 @@ REPORTS_DIR = "/opt/shared/reports"
 GEN_THUMB   = "/opt/shared/scripts/gen_thumbnail.py"
 PRED_DB     = "/opt/shared/scripts/prediction_db.json"
 
-# 必須タグ slug
-REQUIRED_TAGS_ALL = ["nowpattern", "deep-pattern"]
-REQUIRED_TAGS_JA  = ["lang-ja"]
-REQUIRED_TAGS_EN  = ["lang-en"]
-
-# 必須セクションマーカー
-REQUIRED_MARKERS = ["np-fast-read", "np-signal", "np-between-lines", "np-open-loop"]
-
-# コンテンツ長しきい値
-MIN_LEN_JA = 5000
-MIN_LEN_EN = 3000
-
-# CJK汚染しきい値（EN記事で連続日本語50文字超）
-CJK_MAX_EN = 50
-
 # ── Ghost JWT ─────────────────────────────────────────────────────────────
 
 def ghost_jwt():
@@ -199,6 +192,13 @@ def upload_image_to_ghost(image_path):
 
 # ── Article Health DB ─────────────────────────────────────────────────────
 
+def ensure_columns(con, table, columns):
+    """既存DBに後から追加した列を ALTER TABLE で足す"""
+    have = {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns.items():
+        if name not in have:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
 def init_health_db():
     os.makedirs(os.path.dirname(HEALTH_DB), exist_ok=True)
     con = sqlite3.connect(HEALTH_DB)
@@ -247,93 +247,25 @@ def init_health_db():
             dry_run      INTEGER
         );
     """)
+    ensure_columns(con, "article_health", {"updated_at": "TEXT", "content_hash": "TEXT"})
+    ensure_columns(con, "qa_runs", {"skipped": "INTEGER DEFAULT 0"})
     con.commit()
     return con
 
 # ── Quality Checks ────────────────────────────────────────────────────────
-
-def count_cjk(text):
-    """日本語・CJK文字の連続最大長を返す"""
-    max_run = 0
-    run     = 0
-    for ch in text:
-        cp = ord(ch)
-        if (0x3000 <= cp <= 0x9FFF) or (0xF900 <= cp <= 0xFAFF) or (0xAC00 <= cp <= 0xD7AF):
-            run += 1
-            max_run = max(max_run, run)
-        else:
-            run = 0
-    return max_run
-
-def get_html_text(html):
-    """HTMLタグを除いてプレーンテキストを返す"""
-    if not html:
-        return ""
-    return re.sub(r"<[^>]+>", "", html)
-
-def check_missing_markers(html):
-    """欠落マーカーのリストを返す"""
-    if not html:
-        return list(REQUIRED_MARKERS)
-    return [m for m in REQUIRED_MARKERS if m not in html]
-
-def check_prediction_link(html, lang):
-    """EN記事で /predictions/ (非 /en/predictions/) が存在すれば True（要修正）"""
-    if lang != "en" or not html:
-        return False
-    # /en/predictions/ は OK。/predictions/ のみ（/en/なし）はNG
-    bad_pattern = re.compile(r'href=["\'](?!https?://)[^"\']*?(?<!/en)/predictions/["\']')
-    return bool(bad_pattern.search(html))
-
-def fix_prediction_link(html):
-    """EN記事の /predictions/ URL を /en/predictions/ に修正"""
-    result = html
-    # __GHOST_URL__/predictions/ および /predictions/ を /en/predictions/ に変換
-    # すでに /en/predictions/ になっているものはスキップ
-    i = 0
-    while True:
-        idx = result.find("/predictions/", i)
-        if idx == -1:
-            break
-        # /en/predictions/ はスキップ
-        if result[max(0,idx-3):idx] == "/en":
-            i = idx + 1
-            continue
-        result = result[:idx] + "/en/predictions/" + result[idx+len("/predictions/"):]
-        i = idx + len("/en/predictions/")
-    return result
-
+# 判定ルール本体は qa_rule_engine（ghost_webhook_server と共有）
 
 def load_prediction_slugs():
     """prediction_db.jsonから記事slugセットを返す"""
-    try:
-        with open(PRED_DB) as f:
-            db = json.load(f)
-        slugs = set()
-        for p in db.get("predictions", []):
-            url = p.get("ghost_url", "")
-            if url:
-                slug = url.rstrip("/").rsplit("/", 1)[-1]
-                if slug:
-                    slugs.add(slug)
-        return slugs
-    except Exception:
-        return set()
+    return qa_rule_engine.load_prediction_slugs(PRED_DB)
 
 # ── NEO Task Queue ────────────────────────────────────────────────────────
 
 def load_neo_queue():
-    if os.path.exists(NEO_QUEUE):
-        try:
-            with open(NEO_QUEUE) as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return {"tasks": []}
+    return qa_rule_engine.load_neo_queue(NEO_QUEUE)
 
 def save_neo_queue(q):
-    with open(NEO_QUEUE, "w") as f:
-        json.dump(q, f, ensure_ascii=False, indent=2)
+    qa_rule_engine.save_neo_queue(q, NEO_QUEUE)
 
 
 def build_fix_prompt(slug, title, lang, issues):
@@ -408,23 +340,8 @@ def ghost_force_draft(post_id, slug):
 
 def enqueue_neo_with_prompt(queue, post_id, slug, title, lang, issue, fix_prompt, priority=2):
     """詳細プロンプト付きでNEOキューに追加"""
-    existing = {(t["post_id"], t["issue"]) for t in queue["tasks"] if t.get("status") != "done"}
-    if (post_id, issue) in existing:
-        return False
-    queue["tasks"].append({
-        "task_id":    f"{slug[:25]}_{issue[:15]}_{__import__('time').time():.0f}",
-        "post_id":    post_id,
-        "slug":       slug,
-        "title":      title[:80],
-        "lang":       lang,
-        "issue":      issue,
-        "fix_prompt": fix_prompt,
-        "priority":   priority,
-        "created_at": __import__('datetime').datetime.now(__import__('datetime').timezone.utc).isoformat(),
-        "status":     "pending",
-        "source":     "batch_sentinel",
-    })
-    return True
+    return qa_rule_engine.enqueue_neo_with_prompt(queue, post_id, slug, title, lang, issue, fix_prompt,
+                                                  priority=priority, source="batch_sentinel")
 
 def send_telegram(msg):
     if not BOT_TOKEN or not CHAT_ID:
@@ -442,6 +359,207 @@ def send_telegram(msg):
     except Exception as e:
         print(f"Telegram error: {e}")
 
+# ── Incremental Audit ─────────────────────────────────────────────────────
+# 前回「問題なし」だった記事は updated_at と fingerprint が一致すればスキップする。
+# fingerprint には判定に効く入力（HTML・画像・タグ・Oracle要否）と qa_rule_engine.rules_signature()
+# （ルール版・登録ルール・しきい値）を含めるので、prediction_db への追加、ルールの追加やしきい値の
+# 変更、ルール本体の変更（qa_rule_engine.RULES_VERSION を上げる）でも再監査される。
+# release governor の出典到達性チェック（外部サイト）は本文が変わらなくても結果が変わるので、
+# 記事ごとにずらした SOURCE_CHECK_TTL_DAYS 周期の世代番号も fingerprint に入れる。
+
+FULL_AUDIT            = "--full" in sys.argv
+WORKERS               = int(ENV.get("QA_SENTINEL_WORKERS", "0")) or (os.cpu_count() or 2)
+HEALTH_BATCH          = 500
+AUDIT_PAGE_SIZE       = 200  # ghost.db は keyset ページ単位で読む（読み取り中に Ghost が書けるように）
+SOURCE_CHECK_TTL_DAYS = int(ENV.get("QA_SOURCE_CHECK_TTL_DAYS", "7"))
+
+def source_check_epoch(post_id, now=None):
+    """出典チェックの世代番号。記事ごとにずらして TTL ごとに1回だけ変わる（全件同時の再監査を避ける）"""
+    ttl = max(SOURCE_CHECK_TTL_DAYS, 1) * 86400
+    now = time.time() if now is None else now
+    offset = int.from_bytes(hashlib.blake2b(post_id.encode("utf-8"), digest_size=4).digest(), "big") % ttl
+    return int((now + offset) // ttl)
+
+def audit_fingerprint(html, feature_image, tags, oracle_needed, image_dup, source_epoch=0):
+    h = hashlib.blake2b(digest_size=16)
+    for part in (qa_rule_engine.rules_signature(), GOVERNOR_POLICY_VERSION, html or "", feature_image or "",
+                 ",".join(sorted(tags)), str(int(oracle_needed)), str(int(image_dup)), str(source_epoch)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def load_clean_fingerprints(health_con):
+    """{post_id: (updated_at, content_hash)} — 前回問題なしだった記事のみ"""
+    return {
+        row[0]: (row[1], row[2])
+        for row in health_con.execute("""
+            SELECT post_id, updated_at, content_hash FROM article_health
+            WHERE overall_ok = 1 AND neo_queued = 0 AND content_hash IS NOT NULL
+        """)
+    }
+
+_AUDIT_CTX = qa_rule_engine.QAContext()
+
+def _init_audit_worker(ctx):
+    global _AUDIT_CTX
+    _AUDIT_CTX = ctx
+
+def audit_post(task):
+    """1記事分の判定（副作用なし・プロセスプールで実行）。修正/委譲は呼び出し側で行う。"""
+    doc = qa_rule_engine.PostDoc.parse(task["html"], slug=task["slug"], lang=task["lang"],
+                                       tags=task["tags"], feature_image=task["feature_image"])
+    result = qa_rule_engine.evaluate(doc, _AUDIT_CTX)
+    rec = qa_rule_engine.new_health_record(task["post_id"], task["slug"], task["title"], task["lang"], result)
+    rec["updated_at"]   = task["updated_at"]
+    rec["content_hash"] = task["content_hash"]
+    neo_issues = list(result.neo_issues)
+
+    # ── Release governor ───────────────────────────────────────────────────
+    release_block = evaluate_governed_release(
+        title=task["title"],
+        html=task["html"],
+        tags=list(doc.tags),
+        site_url=GHOST_URL,
+        status="published",
+        channel="public",
+        require_external_sources=True,
+        check_source_fetchability=True,
+    )
+    if release_block["errors"]:
+        neo_issues.append("release_blocker:" + ",".join(release_block["errors"][:3]))
+
+    return {"rec": rec, "neo_issues": neo_issues, "missing_tags": result.missing_tags}
+
+def iter_audits(tasks, ctx, workers=None):
+    """(task, result) を完了順に返す。投入中のタスクは workers*4 件までに抑える（HTML をため込まない）
+
+    ja_images / pred_slugs（ctx）は各ワーカーに一度だけ渡す。
+    """
+    workers = WORKERS if workers is None else workers
+    if workers <= 1:
+        _init_audit_worker(ctx)
+        for task in tasks:
+            yield task, audit_post(task)
+        return
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    window = workers * 4
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_audit_worker, initargs=(ctx,)) as pool:
+        pending = {}
+        for task in tasks:
+            pending[pool.submit(audit_post, task)] = task
+            if len(pending) >= window:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield pending.pop(fut), fut.result()
+        for fut in list(pending):
+            yield pending.pop(fut), fut.result()
+
+def iter_ghost_posts(ghost_con, page_size=None):
+    """公開記事を id の keyset ページで読む。
+
+    ページごとに fetchall して文を閉じるので、呼び出し側が Ghost Admin API 経由で
+    同じ ghost.db に書く間は読み取りロックを持たない（SQLITE_BUSY / WAL checkpoint 阻害を防ぐ）。
+    """
+    page_size = page_size or AUDIT_PAGE_SIZE
+    last_id = ""
+    while True:
+        rows = ghost_con.execute("""
+            SELECT id, slug, title, html, feature_image, updated_at, published_at
+            FROM posts
+            WHERE type = 'post' AND status = 'published' AND id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, page_size)).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield from rows
+        if len(rows) < page_size:
+            return
+
+def iter_audit_tasks(ghost_con, all_post_tags, ja_images, pred_slugs, clean, stats, now=None):
+    """公開記事をページ単位で読み、変更のない記事を除いたタスクを返す"""
+    now = time.time() if now is None else now
+    for row in iter_ghost_posts(ghost_con):
+        post_id = row["id"]
+        tags    = all_post_tags.get(post_id, set())
+        if "lang-ja" not in tags and "lang-en" not in tags:
+            continue
+        stats["total"] += 1
+        slug  = row["slug"]
+        html  = row["html"] or ""
+        fi    = row["feature_image"]
+        lang  = "en" if "lang-en" in tags else "ja"
+        content_hash  = audit_fingerprint(
+            html, fi, tags,
+            qa_rule_engine.oracle_needed(slug, lang, pred_slugs),
+            qa_rule_engine.reuses_ja_image(lang, fi, ja_images),
+            source_check_epoch(post_id, now),
+        )
+        updated_at    = str(row["updated_at"] or "")
+        if not FULL_AUDIT and clean.get(post_id) == (updated_at, content_hash):
+            stats["skipped"] += 1
+            continue
+        yield {
+            "post_id":       post_id,
+            "slug":          slug,
+            "title":         row["title"] or "",
+            "html":          html,
+            "feature_image": fi,
+            "lang":          lang,
+            "tags":          sorted(tags),
+            "updated_at":    updated_at,
+            "published_at":  str(row["published_at"] or ""),
+            "content_hash":  content_hash,
+        }
+
+def regenerate_feature_image(post_id, title):
+    """EN用thumbnailを再生成してGhostに反映。成功したら True"""
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tf:
+        tmp_path = tf.name
+    try:
+        clean_title = title.replace('\x00','').replace('\x05','').strip()
+        r = subprocess.run([
+            "python3", GEN_THUMB,
+            "--title", clean_title,
+            "--lang", "en",
+            "--output", tmp_path,
+            "--size", "1200x675"
+        ], capture_output=True, text=True, timeout=30)
+        if r.returncode == 0 and os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
+            new_url = upload_image_to_ghost(tmp_path)
+            return bool(new_url and ghost_update_feature_image(post_id, new_url))
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+HEALTH_UPSERT = """
+    INSERT OR REPLACE INTO article_health (
+        post_id, slug, title, lang, checked_at,
+        image_ok, image_fixed,
+        tags_ok, tags_fixed, missing_tags,
+        content_len, length_ok,
+        sections_ok, missing_sections,
+        cjk_ok, cjk_char_count,
+        oracle_ok, oracle_needed,
+        pred_link_ok, pred_link_fixed,
+        neo_queued, neo_issue,
+        overall_ok, updated_at, content_hash
+    ) VALUES (
+        :post_id, :slug, :title, :lang, :checked_at,
+        :image_ok, :image_fixed,
+        :tags_ok, :tags_fixed, :missing_tags,
+        :content_len, :length_ok,
+        :sections_ok, :missing_sections,
+        :cjk_ok, :cjk_char_count,
+        :oracle_ok, :oracle_needed,
+        :pred_link_ok, :pred_link_fixed,
+        :neo_queued, :neo_issue,
+        :overall_ok, :updated_at, :content_hash
+    )
+"""
+
 # ── Main ──────────────────────────────────────────────────────────────────
 
 def main():
@@ -455,24 +573,11 @@ def main():
     # DBセットアップ
     health_con = init_health_db()
     health_cur = health_con.cursor()
+    clean = {} if FULL_AUDIT else load_clean_fingerprints(health_con)
 
-    # Ghost DBから全公開記事を取得
     ghost_con = sqlite3.connect(GHOST_DB)
     ghost_con.row_factory = sqlite3.Row
 
-    posts = ghost_con.execute("""
-        SELECT DISTINCT p.id, p.slug, p.title, p.html, p.feature_image,
-               MAX(CASE WHEN t.slug = 'lang-en' THEN 'en' ELSE 'ja' END) as lang
-        FROM posts p
-        JOIN posts_tags pt ON p.id = pt.post_id
-        JOIN tags t ON pt.tag_id = t.id
-        WHERE t.slug IN ('lang-ja', 'lang-en')
-          AND p.type = 'post'
-          AND p.status = 'published'
-        GROUP BY p.id, p.slug, p.title
-        ORDER BY p.published_at DESC
-    """).fetchall()
-
     # 全記事のタグを一括取得
     all_post_tags = {}
     for row in ghost_con.execute("""
@@ -496,156 +601,63 @@ def main():
     """).fetchall():
         ja_images.add(row[0])
 
-    ghost_con.close()
-
     pred_slugs = load_prediction_slugs()
     neo_queue  = load_neo_queue()
 
-    print(f"  対象: {len(posts)}件 / 予測連動slug: {len(pred_slugs)}件")
+    print(f"  前回合格: {len(clean)}件 / 予測連動slug: {len(pred_slugs)}件 / workers: {WORKERS}"
+          + (" / --full" if FULL_AUDIT else ""))
 
     # カウンタ
-    total         = len(posts)
+    stats         = {"total": 0, "skipped": 0}
+    audited       = 0
     passed        = 0
     auto_fixed    = 0
     neo_queued_n  = 0
     draft_demoted = 0  # 処刑権: DRAFT降格件数
     issues_detail = []
-
-    for i, post in enumerate(posts, 1):
-        post_id = post["id"]
-        slug    = post["slug"]
-        title   = post["title"] or ""
-        html    = post["html"] or ""
-        lang    = post["lang"]
-        fi      = post["feature_image"]
-        tags    = all_post_tags.get(post_id, set())
-        text    = get_html_text(html)
-        content_len = len(text)
-
-        if i % 20 == 0:
-            print(f"  [{i}/{total}] 処理中...")
-
-        rec = {
-            "post_id":         post_id,
-            "slug":            slug,
-            "title":           title[:120],
-            "lang":            lang,
-            "checked_at":      datetime.now(timezone.utc).isoformat(),
-            "content_len":     content_len,
-            "image_ok":        1,
-            "image_fixed":     0,
-            "tags_ok":         1,
-            "tags_fixed":      0,
-            "missing_tags":    "",
-            "length_ok":       1,
-            "sections_ok":     1,
-            "missing_sections":"",
-            "cjk_ok":          1,
-            "cjk_char_count":  0,
-            "oracle_ok":       1,
-            "oracle_needed":   0,
-            "pred_link_ok":    1,
-            "pred_link_fixed": 0,
-            "neo_queued":      0,
-            "neo_issue":       "",
-            "overall_ok":      0,
-        }
-        neo_issues = []
+    health_rows   = []
+    fix_allowed   = not DRY_RUN and not REPORT_ONLY
+
+    tasks = iter_audit_tasks(ghost_con, all_post_tags, ja_images, pred_slugs, clean, stats)
+    ctx   = qa_rule_engine.QAContext(ja_images=frozenset(ja_images), pred_slugs=frozenset(pred_slugs))
+    for task, result in iter_audits(tasks, ctx):
+        audited += 1
+        post_id    = task["post_id"]
+        slug       = task["slug"]
+        title      = task["title"]
+        lang       = task["lang"]
+        rec        = result["rec"]
+        neo_issues = result["neo_issues"]
+
+        if audited % 20 == 0:
+            print(f"  [{audited}] 監査済み（スキップ {stats['skipped']}件）...")
 
         # ── Check 1: feature_image (EN記事がJA画像を使用) ──────────────────
-        if lang == "en" and fi and fi in ja_images:
-            rec["image_ok"] = 0
-            if not DRY_RUN and not REPORT_ONLY:
-                with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tf:
-                    tmp_path = tf.name
-                try:
-                    clean_title = title.replace('\x00','').replace('\x05','').strip()
-                    r = subprocess.run([
-                        "python3", GEN_THUMB,
-                        "--title", clean_title,
-                        "--lang", "en",
-                        "--output", tmp_path,
-                        "--size", "1200x675"
-                    ], capture_output=True, text=True, timeout=30)
-                    if r.returncode == 0 and os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
-                        new_url = upload_image_to_ghost(tmp_path)
-                        if new_url and ghost_update_feature_image(post_id, new_url):
-                            rec["image_fixed"] = 1
-                            auto_fixed += 1
-                            print(f"  [IMG FIX] {slug[:40]}")
-                finally:
-                    if os.path.exists(tmp_path):
-                        os.unlink(tmp_path)
+        if not rec["image_ok"] and fix_allowed:
+            if regenerate_feature_image(post_id, title):
+                rec["image_fixed"] = 1
+                auto_fixed += 1
+                print(f"  [IMG FIX] {slug[:40]}")
 
         # ── Check 2: required tags ─────────────────────────────────────────
-        required = set(REQUIRED_TAGS_ALL + (REQUIRED_TAGS_JA if lang == "ja" else REQUIRED_TAGS_EN))
-        missing_tags = required - tags
-        if missing_tags:
-            rec["tags_ok"]      = 0
-            rec["missing_tags"] = ",".join(sorted(missing_tags))
-            if not DRY_RUN and not REPORT_ONLY:
-                ok = ghost_add_tags(post_id, tags, list(missing_tags))
-                if ok:
-                    rec["tags_fixed"] = 1
-                    auto_fixed += 1
-                    print(f"  [TAG FIX] {slug[:40]} +{','.join(missing_tags)}")
+        if result["missing_tags"] and fix_allowed:
+            if ghost_add_tags(post_id, task["tags"], result["missing_tags"]):
+                rec["tags_fixed"] = 1
+                auto_fixed += 1
+                print(f"  [TAG FIX] {slug[:40]} +{','.join(result['missing_tags'])}")
 
         # ── Check 3: prediction link (EN記事) ──────────────────────────────
-        if lang == "en" and check_prediction_link(html, lang):
-            rec["pred_link_ok"] = 0
-            if not DRY_RUN and not REPORT_ONLY:
-                new_html = fix_prediction_link(html)
-                if ghost_update_html(post_id, new_html):
-                    rec["pred_link_fixed"] = 1
-                    auto_fixed += 1
-                    print(f"  [LINK FIX] {slug[:40]}")
-
-        # ── Check 4: content length ─────────────────────────────────────────
-        min_len = MIN_LEN_JA if lang == "ja" else MIN_LEN_EN
-        if content_len < min_len:
-            rec["length_ok"] = 0
-            neo_issues.append(f"article_too_short:{content_len}chars(min:{min_len})")
-
-        # ── Check 5: required section markers ──────────────────────────────
-        missing_secs = check_missing_markers(html)
-        if missing_secs:
-            rec["sections_ok"]      = 0
-            rec["missing_sections"] = ",".join(missing_secs)
-            neo_issues.append(f"missing_sections:{','.join(missing_secs)}")
-
-        # ── Check 6: CJK contamination (EN only) ───────────────────────────
-        if lang == "en":
-            cjk_count = count_cjk(text)
-            rec["cjk_char_count"] = cjk_count
-            if cjk_count > CJK_MAX_EN:
-                rec["cjk_ok"] = 0
-                neo_issues.append(f"cjk_contamination:{cjk_count}chars")
-
-        # ── Check 7: Oracle Statement ──────────────────────────────────────
-        if slug in pred_slugs or (lang == "en" and slug.replace("en-","") in pred_slugs):
-            rec["oracle_needed"] = 1
-            if "np-oracle" not in html:
-                rec["oracle_ok"] = 0
-                neo_issues.append("missing_oracle")
+        if not rec["pred_link_ok"] and fix_allowed:
+            if ghost_update_html(post_id, fix_prediction_link(task["html"])):
+                rec["pred_link_fixed"] = 1
+                auto_fixed += 1
+                print(f"  [LINK FIX] {slug[:40]}")
 
         # ── NEO委譲 ─────────────────────────────────────────────────────────
-        release_block = evaluate_governed_release(
-            title=title,
-            html=html,
-            tags=list(tags),
-            site_url=GHOST_URL,
-            status="published",
-            channel="public",
-            require_external_sources=True,
-            check_source_fetchability=True,
-        )
-        if release_block["errors"]:
-            neo_issues.append("release_blocker:" + ",".join(release_block["errors"][:3]))
-
         if neo_issues:
             rec["neo_queued"] = 1
             rec["neo_issue"]  = "|".join(neo_issues)
-            if not DRY_RUN and not REPORT_ONLY:
+            if fix_allowed:
                 fix_prompt = build_fix_prompt(slug, title, lang, neo_issues)
                 for issue in neo_issues:
                     if enqueue_neo_with_prompt(neo_queue, post_id, slug, title, lang,
@@ -654,19 +666,12 @@ def main():
 
         # ── 処刑権: QA不合格記事をDRAFTに降格 ──────────────────────────────
         # NEOが修正するまで公開しない。修正完了後NEOがre-publishする。
-        if neo_issues and not DRY_RUN and not REPORT_ONLY:
+        if neo_issues and fix_allowed:
             if ghost_force_draft(post_id, slug):
                 draft_demoted += 1
 
         # ── overall OK? ────────────────────────────────────────────────────
-        fixable_ok = (
-            (rec["image_ok"] or rec["image_fixed"]) and
-            (rec["tags_ok"]  or rec["tags_fixed"])  and
-            (rec["pred_link_ok"] or rec["pred_link_fixed"])
-        )
-        structural_ok = (rec["length_ok"] and rec["sections_ok"] and
-                         rec["cjk_ok"]    and rec["oracle_ok"])
-        rec["overall_ok"] = 1 if (fixable_ok and structural_ok) else 0
+        rec["overall_ok"] = qa_rule_engine.overall_ok(rec)
         if rec["overall_ok"]:
             passed += 1
         else:
@@ -676,36 +681,25 @@ def main():
                 "neo_issues": neo_issues,
                 "tags_missing": rec["missing_tags"],
                 "secs_missing": rec["missing_sections"],
+                "published_at": task["published_at"],
             })
 
-        # DB upsert
-        health_cur.execute("""
-            INSERT OR REPLACE INTO article_health (
-                post_id, slug, title, lang, checked_at,
-                image_ok, image_fixed,
-                tags_ok, tags_fixed, missing_tags,
-                content_len, length_ok,
-                sections_ok, missing_sections,
-                cjk_ok, cjk_char_count,
-                oracle_ok, oracle_needed,
-                pred_link_ok, pred_link_fixed,
-                neo_queued, neo_issue,
-                overall_ok
-            ) VALUES (
-                :post_id, :slug, :title, :lang, :checked_at,
-                :image_ok, :image_fixed,
-                :tags_ok, :tags_fixed, :missing_tags,
-                :content_len, :length_ok,
-                :sections_ok, :missing_sections,
-                :cjk_ok, :cjk_char_count,
-                :oracle_ok, :oracle_needed,
-                :pred_link_ok, :pred_link_fixed,
-                :neo_queued, :neo_issue,
-                :overall_ok
-            )
-        """, rec)
-
-        time.sleep(0.05)  # DB負荷軽減
+        # DB upsert（まとめて書く）
+        health_rows.append(rec)
+        if len(health_rows) >= HEALTH_BATCH:
+            health_cur.executemany(HEALTH_UPSERT, health_rows)
+            health_rows = []
+
+    if health_rows:
+        health_cur.executemany(HEALTH_UPSERT, health_rows)
+    ghost_con.close()
+
+    total   = stats["total"]
+    skipped = stats["skipped"]
+    passed += skipped  # スキップ = 前回合格から変更なし
+    # 完了順に届くので公開日の新しい順に並べ直す
+    issues_detail.sort(key=lambda d: d.pop("published_at"), reverse=True)
+    print(f"  対象: {total}件 / 監査: {audited}件 / 変更なしスキップ: {skipped}件")
 
     # NEOキューを保存
     if not DRY_RUN and not REPORT_ONLY:
@@ -731,11 +725,12 @@ def main():
                     stderr=open("/opt/shared/logs/e2e_visual.log", "a"),
                 )
 
-    # qa_runs に記録
+# qa_runs に記録
     health_cur.execute("""
-        INSERT INTO qa_runs (run_at, total, passed, auto_fixed, neo_queued, dry_run)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (datetime.now(timezone.utc).isoformat(), total, passed, auto_fixed, neo_queued_n, int(DRY_RUN or REPORT_ONLY)))
+        INSERT INTO qa_runs (run_at, total, passed, auto_fixed, neo_queued, dry_run, skipped)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (datetime.now(timezone.utc).isoformat(), total, passed, auto_fixed, neo_queued_n,
+          int(DRY_RUN or REPORT_ONLY), skipped))
     health_con.commit()
     health_con.close()
 
@@ -745,6 +740,8 @@ def main():
     report_data = {
         "run_at":     datetime.now().strftime("%Y-%m-%d %H:%M JST"),
         "total":      total,
+        "audited":    audited,
+        "skipped":    skipped,
         "passed":     passed,
         "failed":     total - passed,
         "pass_rate":  f"{passed/total*100:.1f}%" if total else "0%",
@@ -757,11 +754,12 @@ def main():
         json.dump(report_data, f, ensure_ascii=False, indent=2)
 
     # ── Telegram レポート ─────────────────────────────────────────────────
-    pass_icon  = "✅" if passed == total else ("⚠️" if passed / total >= 0.8 else "🚨")
+    pass_icon  = "✅" if passed == total else ("⚠️" if total and passed / total >= 0.8 else "🚨")
     fail_count = total - passed
     msg = (
         f"🛡 *[QA Sentinel] 監査完了* {run_label}\n"
-        f"{pass_icon} 合格: {passed}/{total} ({passed/total*100:.1f}%)\n"
+        f"{pass_icon} 合格: {passed}/{total} ({passed/total*100 if total else 0:.1f}%)\n"
+        f"🔍 監査: {audited}件（変更なしスキップ {skipped}件）\n"
         f"🔧 自動修正: {auto_fixed}件\n"
         f"📬 NEO委譲: {neo_queued_n}タスク\n"
         f"⚰️ 処刑（DRAFT降格）: {draft_demoted}件\n"
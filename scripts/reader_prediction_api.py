@@ -8,7 +8,7 @@ Caddy: /reader-predict/* → 127.0.0.1:8766
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, Any, List
 import sqlite3
@@ -19,6 +19,7 @@ from datetime import datetime
 from contextlib import contextmanager
 from pathlib import Path
 
+from prediction_store import get_store
 from prediction_state_utils import (
     is_prediction_publicly_scorable,
     is_prediction_resolved,
@@ -29,6 +30,7 @@ from prediction_state_utils import (
 )
 
 DB_PATH = "/opt/shared/reader_predictions.db"
+PRED_DB_PATH = "/opt/shared/scripts/prediction_db.json"
 SCRIPT_DIR = Path(__file__).resolve().parent
 REPO_ROOT = SCRIPT_DIR.parent
 TRACKER_PAYLOAD_OUTPUT_TEMPLATE = (
@@ -149,6 +151,20 @@ def init_db():
     cols = {row[1] for row in cur.execute("PRAGMA table_info(reader_votes)").fetchall()}
     if "explanation" not in cols:
         cur.execute("ALTER TABLE reader_votes ADD COLUMN explanation TEXT")
+    # Materialized human-only counters for stats / stats-bulk (maintained by vote()).
+    cur.executescript("""
+        CREATE TABLE IF NOT EXISTS reader_vote_counters (
+            prediction_id TEXT    NOT NULL,
+            scenario      TEXT    NOT NULL,
+            vote_count    INTEGER NOT NULL DEFAULT 0,
+            prob_sum      INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (prediction_id, scenario)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS reader_vote_meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """)
     con.commit()
 
     # Migrate legacy JSON votes (reader_predictions.json from v1.0)
@@ -176,23 +192,146 @@ def init_db():
         except Exception as e:
             print(f"[MIGRATE] Warning: {e}")
 
+    # Counters are rebuilt once at startup so writes made outside vote()
+    # (migrations, manual fixes) never leave them stale.
+    rebuild_vote_counters(con)
+    con.commit()
     con.close()
 
 
+def _human_voter_clause() -> tuple[str, list]:
+    """SQL predicate + params equivalent to `not is_synthetic_voter(voter_uuid)`."""
+    exact = sorted(SYNTHETIC_VOTER_EXACT)
+    clause = f"voter_uuid NOT IN ({','.join('?' * len(exact))})" if exact else "1=1"
+    params: list = list(exact)
+    for prefix in SYNTHETIC_VOTER_PREFIXES:
+        clause += f" AND substr(voter_uuid, 1, {len(prefix)}) != ?"
+        params.append(prefix)
+    return clause, params
+
+
+def rebuild_vote_counters(con) -> int:
+    """Recompute reader_vote_counters from reader_votes in one grouped pass."""
+    clause, params = _human_voter_clause()
+    con.execute("DELETE FROM reader_vote_counters")
+    con.execute(f"""
+        INSERT INTO reader_vote_counters (prediction_id, scenario, vote_count, prob_sum)
+        SELECT prediction_id, scenario, COUNT(*), SUM(probability)
+        FROM reader_votes WHERE {clause}
+        GROUP BY prediction_id, scenario
+    """, params)
+    _bump_stats_version(con)
+    return con.execute("SELECT COUNT(DISTINCT prediction_id) FROM reader_vote_counters").fetchone()[0]
+
+
+def _bump_stats_version(con) -> None:
+    con.execute("""
+        INSERT INTO reader_vote_meta (key, value) VALUES ('stats_version', '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT)
+    """)
+
+
+def _stats_version(con) -> str:
+    row = con.execute("SELECT value FROM reader_vote_meta WHERE key='stats_version'").fetchone()
+    return row[0] if row else "0"
+
+
+def _apply_vote_counter_delta(con, prediction_id: str, scenario: str, count_delta: int, prob_delta: int) -> None:
+    con.execute("""
+        INSERT INTO reader_vote_counters (prediction_id, scenario, vote_count, prob_sum)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(prediction_id, scenario) DO UPDATE SET
+            vote_count = vote_count + excluded.vote_count,
+            prob_sum   = prob_sum + excluded.prob_sum
+    """, (prediction_id, scenario, count_delta, prob_delta))
+
+
+DB_POOL_SIZE = 8
+DB_BUSY_TIMEOUT_MS = 5000
+DB_CACHED_STATEMENTS = 256
+
+
+class _ConnectionPool:
+    """Per-worker pool of configured SQLite connections.
+
+    Connections are created lazily (WAL, busy_timeout, statement cache set
+    once per connection) and reused across requests. A forked worker never
+    inherits its parent's connections: the pool is keyed by PID.
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE):
+        import queue
+        self.path = path
+        self.pid = os.getpid()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=DB_CACHED_STATEMENTS,
+        )
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        con.execute("PRAGMA temp_store=MEMORY")
+        con.row_factory = sqlite3.Row
+        return con
+
+    def acquire(self) -> sqlite3.Connection:
+        import queue
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, con: sqlite3.Connection) -> None:
+        import queue
+        try:
+            self._idle.put_nowait(con)
+        except queue.Full:
+            con.close()
+
+
+_DB_POOLS: Dict[str, _ConnectionPool] = {}
+
+
+def _db_pool() -> _ConnectionPool:
+    pool = _DB_POOLS.get(DB_PATH)
+    if pool is None or pool.pid != os.getpid():
+        pool = _ConnectionPool(DB_PATH)
+        _DB_POOLS[DB_PATH] = pool
+    return pool
+
+
 @contextmanager
-def db():
-    """Thread-safe SQLite connection context manager."""
-    con = sqlite3.connect(DB_PATH, check_same_thread=False)
-    con.execute("PRAGMA journal_mode=WAL")
-    con.row_factory = sqlite3.Row
+def db(immediate: bool = False):
+    """Pooled SQLite connection; one transaction per `with` block.
+
+    immediate=True takes the write lock up front (BEGIN IMMEDIATE) so a
+    read-then-write sequence cannot interleave with another writer.
+    """
+    pool = _db_pool()
+    con = pool.acquire()
+    healthy = True
     try:
+        if immediate:
+            con.execute("BEGIN IMMEDIATE")
         yield con
         con.commit()
+    except sqlite3.DatabaseError:
+        healthy = False
+        con.rollback()
+        raise
     except Exception:
         con.rollback()
         raise
     finally:
-        con.close()
+        if healthy:
+            pool.release(con)
+        else:
+            con.close()
 
 
 # ── Pydantic models ───────────────────────────────────────────────────────────
@@ -251,47 +390,21 @@ class TrackerEntry(BaseModel):
 
 # ── Business logic ────────────────────────────────────────────────────────────
 
-def compute_stats(prediction_id: str) -> CommunityStats:
-    """Compute human community distribution for a given prediction ID."""
-    with db() as con:
-        rows = con.execute(
-            "SELECT voter_uuid, scenario, probability FROM reader_votes WHERE prediction_id=?",
-            (prediction_id,)
-        ).fetchall()
-
-    human_rows = [row for row in rows if not is_synthetic_voter(row["voter_uuid"])]
-
-    if not human_rows:
-        return CommunityStats(
-            total=0, avg_probability=None,
-            pct_optimistic=0, pct_base=0, pct_pessimistic=0,
-            distribution={
-                "optimistic":  ScenarioDist(count=0, avg_probability=None, pct=0),
-                "base":        ScenarioDist(count=0, avg_probability=None, pct=0),
-                "pessimistic": ScenarioDist(count=0, avg_probability=None, pct=0),
-            }
-        )
-
-    buckets: Dict[str, List[int]] = {"optimistic": [], "base": [], "pessimistic": []}
-    for r in human_rows:
-        buckets[r["scenario"]].append(r["probability"])
-
-    total = len(human_rows)
+def _stats_from_counters(counters: Dict[str, tuple]) -> CommunityStats:
+    """Build CommunityStats from {scenario: (count, prob_sum)} human-only aggregates."""
+    total = sum(count for count, _ in counters.values())
     dist: Dict[str, ScenarioDist] = {}
-    for sc, probs in buckets.items():
-        count = len(probs)
+    for sc in ("optimistic", "base", "pessimistic"):
+        count, prob_sum = counters.get(sc, (0, 0))
         dist[sc] = ScenarioDist(
             count=count,
-            avg_probability=round(sum(probs) / count) if probs else None,
+            avg_probability=round(prob_sum / count) if count else None,
             pct=round(count * 100 / total) if total else 0,
         )
-
-    all_probs = [r["probability"] for r in human_rows]
-    avg_all = round(sum(all_probs) / len(all_probs)) if all_probs else None
-
+    all_sum = sum(prob_sum for _, prob_sum in counters.values())
     return CommunityStats(
         total=total,
-        avg_probability=avg_all,
+        avg_probability=round(all_sum / total) if total else None,
         pct_optimistic=dist["optimistic"].pct,
         pct_base=dist["base"].pct,
         pct_pessimistic=dist["pessimistic"].pct,
@@ -299,6 +412,21 @@ def compute_stats(prediction_id: str) -> CommunityStats:
     )
 
 
+def _read_stats(con, prediction_id: str) -> CommunityStats:
+    rows = con.execute(
+        "SELECT scenario, vote_count, prob_sum FROM reader_vote_counters "
+        "WHERE prediction_id=? AND vote_count > 0",
+        (prediction_id,)
+    ).fetchall()
+    return _stats_from_counters({r["scenario"]: (r["vote_count"], r["prob_sum"]) for r in rows})
+
+
+def compute_stats(prediction_id: str) -> CommunityStats:
+    """Compute human community distribution for a given prediction ID."""
+    with db() as con:
+        return _read_stats(con, prediction_id)
+
+
 # ── Routes ────────────────────────────────────────────────────────────────────
 
 @app.get("/reader-predict/health")
@@ -314,7 +442,11 @@ def vote(req: VoteRequest):
     voter_uuid identifies the reader (stored in localStorage).
     UPSERT: same reader can change their prediction.
     """
-    with db() as con:
+    with db(immediate=True) as con:
+        previous = con.execute(
+            "SELECT scenario, probability FROM reader_votes WHERE prediction_id=? AND voter_uuid=?",
+            (req.prediction_id, req.voter_uuid)
+        ).fetchone()
         con.execute("""
             INSERT INTO reader_votes (prediction_id, voter_uuid, scenario, probability, explanation)
             VALUES (?, ?, ?, ?, ?)
@@ -324,8 +456,13 @@ def vote(req: VoteRequest):
                 explanation = COALESCE(excluded.explanation, explanation),
                 updated_at  = strftime('%Y-%m-%dT%H:%M:%SZ','now')
         """, (req.prediction_id, req.voter_uuid, req.scenario, req.probability, req.explanation))
-
-    stats = compute_stats(req.prediction_id)
+        if not is_synthetic_voter(req.voter_uuid):
+            if previous:
+                _apply_vote_counter_delta(con, req.prediction_id, previous["scenario"], -1, -previous["probability"])
+            _apply_vote_counter_delta(con, req.prediction_id, req.scenario, 1, req.probability)
+            _bump_stats_version(con)
+        # Refreshed stats come from the same transaction/connection as the upsert.
+        stats = _read_stats(con, req.prediction_id)
     return VoteResponse(success=True, prediction_id=req.prediction_id, community_stats=stats)
 
 
@@ -352,22 +489,40 @@ def stats_single(prediction_id: str):
     return compute_stats(prediction_id)
 
 
+STATS_BULK_CACHE: Dict[str, Any] = {"version": None, "body": None}
+
+
 @app.get("/reader-predict/stats-bulk")
-def stats_bulk():
+def stats_bulk(request: Request):
     """
-    Returns stats for ALL predictions with at least 1 vote.
+    Returns stats for ALL predictions with at least 1 human vote.
     Used by the /predictions/ page JS to batch-load community bars.
+    One pass over the materialized counters (rows = predictions x scenarios,
+    not total votes); ETag is the counters version so unchanged pages get 304.
     """
     with db() as con:
-        pred_ids = [r[0] for r in con.execute(
-            "SELECT DISTINCT prediction_id FROM reader_votes"
-        ).fetchall()]
-    stats_map = {}
-    for pid in pred_ids:
-        stats = compute_stats(pid)
-        if stats.total > 0:
-            stats_map[pid] = stats.model_dump()
-    return stats_map
+        version = _stats_version(con)
+        etag = f'W/"stats-{version}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        if STATS_BULK_CACHE["version"] == version:
+            body = STATS_BULK_CACHE["body"]
+        else:
+            rows = con.execute(
+                "SELECT prediction_id, scenario, vote_count, prob_sum FROM reader_vote_counters "
+                "WHERE vote_count > 0 ORDER BY prediction_id"
+            ).fetchall()
+            grouped: Dict[str, Dict[str, tuple]] = {}
+            for r in rows:
+                grouped.setdefault(r["prediction_id"], {})[r["scenario"]] = (r["vote_count"], r["prob_sum"])
+            stats_map = {pid: _stats_from_counters(c).model_dump() for pid, c in grouped.items()}
+            body = json.dumps(stats_map, ensure_ascii=False)
+            STATS_BULK_CACHE.update({"version": version, "body": body})
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
 
 
 @app.get("/reader-predict/tracking-payload/{lang}")
@@ -628,15 +783,14 @@ TRACKER_PAYLOAD_CACHE_TIME = {}
 
 
 def load_pred_db() -> dict:
-    """Load prediction_db.json with 60s cache."""
+    """Load predictions from the shared prediction store with 60s cache."""
     import time
     global PRED_DB_CACHE, PRED_DB_CACHE_TIME
     now = time.time()
     if not PRED_DB_CACHE or now - PRED_DB_CACHE_TIME > 60:
         try:
-            with open("/opt/shared/scripts/prediction_db.json") as f:
-                raw = json.load(f)
-            PRED_DB_CACHE = {p["prediction_id"]: p for p in raw.get("predictions", [])}
+            predictions = get_store(PRED_DB_PATH).all()
+            PRED_DB_CACHE = {p["prediction_id"]: p for p in predictions if p.get("prediction_id")}
             PRED_DB_CACHE_TIME = now
         except Exception:
             pass
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Compact rolling seen-set shared by the pollers.
+
+breaking-news-watcher kept `breaking_seen.json` as {url: iso_timestamp},
+rewrote it pretty-printed every 5 minutes and expired entries by comparing
+ISO strings. RollingSeenSet replaces that with:
+
+- 64-bit blake2b keys instead of full URLs
+- keys grouped into time buckets (1h by default); expiry drops whole buckets
+- O(1) membership through a key -> bucket dict, optionally fronted by a
+  Bloom filter so misses never touch the dict
+- a compact on-disk form: each bucket is a base64 blob of sorted uint64,
+  written atomically (tmp + os.replace)
+
+The legacy {key: iso_or_epoch} format is read transparently, so existing
+state files migrate on the first run.
+
+Users: breaking-news-watcher (seen URLs), feed_collector.CollectorCache
+(cross-run first_seen for intelligence-feed-v2).
+
+Usage:
+  python3 seen_set.py /opt/shared/state/breaking_seen.json   # stats
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+FORMAT_VERSION = 1
+DEFAULT_BUCKET_SEC = 3600
+DEFAULT_WINDOW_SEC = 24 * 3600
+BLOOM_HASHES = 4
+
+
+def hash_key(key: str) -> int:
+    """Stable 64-bit key (blake2b, big-endian)."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _pack(keys: Iterable[int]) -> str:
+    ordered = sorted(keys)
+    return base64.b64encode(struct.pack(f"<{len(ordered)}Q", *ordered)).decode("ascii")
+
+
+def _unpack(blob: str) -> tuple[int, ...]:
+    raw = base64.b64decode(blob)
+    return struct.unpack(f"<{len(raw) // 8}Q", raw)
+
+
+def _legacy_ts(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if dt.tzinfo is None:  # 旧形式は datetime.utcnow().isoformat()（naive UTC）
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return None
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit keys (double hashing)."""
+
+    def __init__(self, bits: int, hashes: int = BLOOM_HASHES):
+        self.bits = max(64, bits)
+        self.hashes = hashes
+        self.array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, h: int):
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, h: int):
+        for pos in self._positions(h):
+            self.array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, h: int) -> bool:
+        return all(self.array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(h))
+
+
+class RollingSeenSet:
+    """Hashed keys in rotating time buckets; entries live for `window_sec`."""
+
+    def __init__(self, window_sec: float = DEFAULT_WINDOW_SEC, bucket_sec: int = DEFAULT_BUCKET_SEC,
+                 clock: Callable[[], float] = time.time, bloom_bits: int = 0):
+        self.window_sec = window_sec
+        self.bucket_sec = int(bucket_sec)
+        self.clock = clock
+        self.bloom_bits = bloom_bits
+        self.buckets: dict[int, set[int]] = {}
+        self.index: dict[int, int] = {}  # key -> bucket id
+        self.bloom: Optional[BloomFilter] = BloomFilter(bloom_bits) if bloom_bits else None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _bucket_id(self, ts: float) -> int:
+        return int(ts // self.bucket_sec)
+
+    def _oldest_live_bucket(self, now: float) -> int:
+        return self._bucket_id(now - self.window_sec)
+
+    def _lookup(self, h: int) -> Optional[int]:
+        if self.bloom is not None and h not in self.bloom:
+            return None
+        bucket = self.index.get(h)
+        if bucket is None or bucket < self._oldest_live_bucket(self.clock()):
+            return None
+        return bucket
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(hash_key(key)) is not None
+
+    def _insert(self, h: int, ts: float):
+        bucket = self._bucket_id(ts)
+        old = self.index.get(h)
+        if old is not None:
+            if old >= bucket:
+                return
+            self.buckets[old].discard(h)
+        self.index[h] = bucket
+        self.buckets.setdefault(bucket, set()).add(h)
+        if self.bloom is not None:
+            self.bloom.add(h)
+
+    def add(self, key: str, ts: Optional[float] = None) -> bool:
+        """Record `key`; returns True if it was not already live."""
+        h = hash_key(key)
+        is_new = self._lookup(h) is None
+        if is_new:
+            self._insert(h, self.clock() if ts is None else ts)
+        return is_new
+
+    def first_seen(self, key: str) -> tuple[float, bool]:
+        """(first_seen, is_new) — records the key on first sight.
+
+        first_seen is the start of the key's bucket (resolution `bucket_sec`),
+        so the value is the same on the first sighting and on every later run.
+        """
+        h = hash_key(key)
+        bucket = self._lookup(h)
+        if bucket is not None:
+            return float(bucket * self.bucket_sec), False
+        self._insert(h, self.clock())
+        return float(self.index[h] * self.bucket_sec), True
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop buckets older than the window; returns the number of keys removed."""
+        cutoff = self._oldest_live_bucket(self.clock() if now is None else now)
+        dropped = 0
+        for bucket in [b for b in self.buckets if b < cutoff]:
+            for h in self.buckets.pop(bucket):
+                if self.index.get(h) == bucket:
+                    del self.index[h]
+                    dropped += 1
+        if dropped and self.bloom is not None:
+            self._rebuild_bloom()
+        return dropped
+
+    def _rebuild_bloom(self):
+        self.bloom = BloomFilter(self.bloom_bits)
+        for h in self.index:
+            self.bloom.add(h)
+
+    # -- persistence --------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        self.expire()
+        return {
+            "version": FORMAT_VERSION,
+            "bucket_sec": self.bucket_sec,
+            "buckets": {str(b): _pack(keys) for b, keys in sorted(self.buckets.items()) if keys},
+        }
+
+    def update_from_dict(self, data: dict):
+        """Merge a saved set (or a legacy {key: iso/epoch} map) into this one."""
+        if not isinstance(data, dict):
+            return
+        if data.get("version") == FORMAT_VERSION and isinstance(data.get("buckets"), dict):
+            saved_bucket_sec = int(data.get("bucket_sec") or self.bucket_sec)
+            for bucket, blob in data["buckets"].items():
+                ts = int(bucket) * saved_bucket_sec
+                for h in _unpack(blob):
+                    self._insert(h, ts)
+        else:
+            for key, value in data.items():
+                ts = _legacy_ts(value)
+                if ts is not None:
+                    self._insert(hash_key(key), ts)
+        self.expire()
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "RollingSeenSet":
+        seen = cls(**kwargs)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    seen.update_from_dict(json.load(f))
+            except (OSError, ValueError, struct.error):
+                pass
+        return seen
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    seen = RollingSeenSet.load(sys.argv[1], window_sec=10 * 365 * 86400)  # 期限切れも含めて表示
+    print(f"keys={len(seen)} buckets={len(seen.buckets)}")
+    for bucket, keys in sorted(seen.buckets.items()):
+        stamp = time.strftime("%Y-%m-%d %H:%M", time.gmtime(bucket * seen.bucket_sec))
+        print(f"  {stamp}Z  {len(keys)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Incremental, sharded sitemaps for nowpattern articles.
+
+generate_news_sitemap() used to rebuild sitemap-news.xml and one flat
+sitemap.xml from the whole article index on every publish. The flat file was
+capped at the newest 1000 articles, so older articles fell out of the
+sitemap.
+
+Layout (all in the same directory as sitemap-news.xml):
+  sitemap.xml                    <sitemapindex> listing every shard
+  sitemap-articles-YYYY-MM.xml   one shard per publish month
+                                 (-2, -3 ... past MAX_URLS_PER_SHARD URLs)
+  sitemap-news.xml               Google News sitemap, rolling 48h window
+  sitemap-shards.json            engine state: per-month files / counts / lastmod
+                                 and the index write seq already covered
+
+update() only rewrites the months of the records the index wrote after the
+stored seq (ArticleIndex.written_since(): new, backfilled and revised
+articles alike, whatever their published_at), plus any month whose shard file
+is missing. A state without a seq (older engine) triggers one full rewrite.
+The month is read from ArticleIndex.published_between(), so the cost is the
+size of that month, not the size of the archive. The news sitemap and sitemap index are small and are
+rewritten every time. Every file is written to a temp file and then
+os.replace()d.
+
+Usage:
+  python3 sitemap_engine.py                          # incremental update
+  python3 sitemap_engine.py --full                   # rewrite every shard
+  python3 sitemap_engine.py --index /path/index.json --out-dir /opt/shared
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+from xml.sax.saxutils import escape
+
+from article_index import ArticleIndex
+from file_lock import FileLock
+
+DEFAULT_INDEX_PATH = "/opt/shared/nowpattern_article_index.json"
+DEFAULT_OUT_DIR = "/opt/shared"
+DEFAULT_GHOST_URL = "https://nowpattern.com"
+
+SITEMAP_INDEX_NAME = "sitemap.xml"
+NEWS_SITEMAP_NAME = "sitemap-news.xml"
+SHARD_PREFIX = "sitemap-articles-"
+STATE_NAME = "sitemap-shards.json"
+
+MAX_URLS_PER_SHARD = 50000   # sitemaps.org の1ファイル上限
+NEWS_WINDOW_HOURS = 48       # Google News は直近2日間のみ
+NEWS_MAX_URLS = 1000         # Google News sitemap の上限
+
+_MONTH_RE = re.compile(r"^\d{4}-\d{2}")
+
+
+def atomic_write(path: str, text: str):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+class SitemapEngine:
+    """Keeps the sharded sitemap files in `out_dir` in step with an ArticleIndex."""
+
+    def __init__(self, out_dir: str = DEFAULT_OUT_DIR, ghost_url: str = DEFAULT_GHOST_URL,
+                 news_name: str = NEWS_SITEMAP_NAME, index_name: str = SITEMAP_INDEX_NAME):
+        self.out_dir = out_dir
+        self.ghost_url = ghost_url.rstrip("/")
+        self.news_path = os.path.join(out_dir, news_name)
+        self.index_path = os.path.join(out_dir, index_name)
+        self.state_path = os.path.join(out_dir, STATE_NAME)
+
+    # -- state ------------------------------------------------------------------
+
+    def load_state(self) -> dict:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == 1:
+                return state
+        except (OSError, ValueError):
+            pass
+        return {"version": 1, "seq": 0, "shards": {}}
+
+    def _article_url(self, article: dict) -> str:
+        url = article.get("url", "")
+        if not url and article.get("slug"):
+            url = f"{self.ghost_url}/{article['slug']}/"
+        return url
+
+    # -- shards -----------------------------------------------------------------
+
+    def dirty_months(self, index: ArticleIndex, state: dict, full: bool = False) -> set:
+        if full or not state["shards"] or not 0 <= state.get("seq", -1) <= index.write_seq:
+            # 初回 / --full / watermark 時代の state / index が作り直された: 全件を1回だけ走査して月を集める
+            return {a.get("published_at", "")[:7] for a in index.newest()
+                    if _MONTH_RE.match(a.get("published_at", ""))}
+        # published_at ではなく書き込み順で見る（過去日付の追加・同時刻・URL 修正も拾う）
+        months = {a.get("published_at", "")[:7] for a in index.written_since(state["seq"])
+                  if _MONTH_RE.match(a.get("published_at", ""))}
+        for month, shard in state["shards"].items():
+            if any(not os.path.exists(os.path.join(self.out_dir, name)) for name in shard["files"]):
+                months.add(month)
+        return months
+
+    def write_month(self, index: ArticleIndex, month: str, previous: Optional[dict] = None) -> dict:
+        """Rewrite every shard file of one month; returns its state entry."""
+        items, seen_urls, lastmod = [], set(), ""
+        for article in index.published_between(month, _next_month(month)):
+            url = self._article_url(article)
+            if not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            lastmod = max(lastmod, article["published_at"][:10])
+            items.append(
+                f'  <url>\n'
+                f'    <loc>{escape(url)}</loc>\n'
+                f'    <lastmod>{article["published_at"][:10]}</lastmod>\n'
+                f'    <changefreq>weekly</changefreq>\n'
+                f'    <priority>0.8</priority>\n'
+                f'  </url>'
+            )
+
+        files = []
+        for part, start in enumerate(range(0, max(len(items), 1), MAX_URLS_PER_SHARD), 1):
+            name = f"{SHARD_PREFIX}{month}.xml" if part == 1 else f"{SHARD_PREFIX}{month}-{part}.xml"
+            chunk = items[start:start + MAX_URLS_PER_SHARD]
+            atomic_write(os.path.join(self.out_dir, name), (
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+                + ("\n".join(chunk) if chunk else "  <!-- no articles -->") + "\n"
+                "</urlset>\n"
+            ))
+            files.append(name)
+        for name in (previous or {}).get("files", [])[len(files):]:
+            try:
+                os.remove(os.path.join(self.out_dir, name))  # 分割数が減った月の余り
+            except FileNotFoundError:
+                pass
+        return {"files": files, "urls": len(items), "lastmod": lastmod}
+
+    def write_index(self, shards: dict):
+        entries = []
+        for month in sorted(shards, reverse=True):
+            for name in shards[month]["files"]:
+                entries.append(
+                    f'  <sitemap>\n'
+                    f'    <loc>{escape(self.ghost_url)}/{name}</loc>\n'
+                    f'    <lastmod>{shards[month]["lastmod"]}</lastmod>\n'
+                    f'  </sitemap>'
+                )
+        atomic_write(self.index_path, (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + "\n".join(entries) + "\n"
+            "</sitemapindex>\n"
+        ))
+
+    # -- news -------------------------------------------------------------------
+
+    def write_news(self, index: ArticleIndex, now: Optional[datetime] = None,
+                   window_hours: int = NEWS_WINDOW_HOURS) -> int:
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=window_hours)
+        items, seen_urls = [], set()
+        for article, dt in index.published_since(cutoff):
+            url = self._article_url(article)
+            if not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            title = (article.get("title_ja") or article.get("title_en", "")).replace("]]>", "]]&gt;")
+            genre_tags = article.get("genre_tags", [])
+            keywords = ", ".join(genre_tags[:3]) if genre_tags else "geopolitics"
+            items.append(
+                f'  <url>\n'
+                f'    <loc>{escape(url)}</loc>\n'
+                f'    <news:news>\n'
+                f'      <news:publication>\n'
+                f'        <news:name>Nowpattern</news:name>\n'
+                f'        <news:language>ja</news:language>\n'
+                f'      </news:publication>\n'
+                f'      <news:publication_date>{dt.strftime("%Y-%m-%dT%H:%M:%S+00:00")}</news:publication_date>\n'
+                f'      <news:title><![CDATA[{title}]]></news:title>\n'
+                f'      <news:keywords>{escape(keywords)}</news:keywords>\n'
+                f'    </news:news>\n'
+                f'  </url>'
+            )
+            if len(items) >= NEWS_MAX_URLS:
+                break
+        atomic_write(self.news_path, (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"\n'
+            '        xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">\n'
+            + ("\n".join(items) if items else "  <!-- no recent articles -->") + "\n"
+            "</urlset>\n"
+        ))
+        return len(items)
+
+    # -- entry point ------------------------------------------------------------
+
+    def update(self, index: ArticleIndex, full: bool = False, now: Optional[datetime] = None,
+               news_window_hours: int = NEWS_WINDOW_HOURS) -> dict:
+        """Bring shards, sitemap index and news sitemap up to date with `index`."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        with FileLock(self.state_path):
+            state = self.load_state()
+            months = self.dirty_months(index, state, full)
+            for month in sorted(months):
+                state["shards"][month] = self.write_month(index, month, state["shards"].get(month))
+            state.pop("watermark", None)
+            state["seq"] = index.write_seq
+            if months or not os.path.exists(self.index_path):
+                self.write_index(state["shards"])
+            news_urls = self.write_news(index, now, news_window_hours)
+            atomic_write(self.state_path, json.dumps(state, ensure_ascii=False, indent=2))
+        return {
+            "rewritten_months": sorted(months),
+            "shards": sum(len(s["files"]) for s in state["shards"].values()),
+            "urls": sum(s["urls"] for s in state["shards"].values()),
+            "news_urls": news_urls,
+        }
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description="Nowpattern sharded sitemap generator")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--ghost-url", default=DEFAULT_GHOST_URL)
+    parser.add_argument("--full", action="store_true", help="全シャードを書き直す")
+    args = parser.parse_args(argv)
+
+    summary = SitemapEngine(args.out_dir, args.ghost_url).update(ArticleIndex.load(args.index), full=args.full)
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,21 @@ $PROJECT_ROOT = Split-Path -Parent (Split-Path -Parent $MyInvocation.MyCommand.P
 $FILES = @(
     @{ Local = "$PROJECT_ROOT\scripts\nowpattern_article_builder.py";  Remote = "/opt/shared/scripts/nowpattern_article_builder.py" },
     @{ Local = "$PROJECT_ROOT\scripts\nowpattern_publisher.py";        Remote = "/opt/shared/scripts/nowpattern_publisher.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\agent_bootstrap_context.py";     Remote = "/opt/shared/scripts/agent_bootstrap_context.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\canonical_public_lexicon.py";    Remote = "/opt/shared/scripts/canonical_public_lexicon.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\article_factcheck_postprocess.py"; Remote = "/opt/shared/scripts/article_factcheck_postprocess.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\article_index.py";               Remote = "/opt/shared/scripts/article_index.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\file_lock.py";                   Remote = "/opt/shared/scripts/file_lock.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\article_release_guard.py";       Remote = "/opt/shared/scripts/article_release_guard.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\article_truth_guard.py";         Remote = "/opt/shared/scripts/article_truth_guard.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\change_freeze_guard.py";         Remote = "/opt/shared/scripts/change_freeze_guard.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\credibility_budget_guard.py";    Remote = "/opt/shared/scripts/credibility_budget_guard.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\mission_contract.py";            Remote = "/opt/shared/scripts/mission_contract.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\prediction_tracker.py";          Remote = "/opt/shared/scripts/prediction_tracker.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\release_governor.py";            Remote = "/opt/shared/scripts/release_governor.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\report_authority.py";            Remote = "/opt/shared/scripts/report_authority.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\runtime_boundary.py";            Remote = "/opt/shared/scripts/runtime_boundary.py" },
+    @{ Local = "$PROJECT_ROOT\scripts\sitemap_engine.py";              Remote = "/opt/shared/scripts/sitemap_engine.py" },
     @{ Local = "$PROJECT_ROOT\scripts\article_validator.py";           Remote = "/opt/shared/scripts/article_validator.py" },
     @{ Local = "$PROJECT_ROOT\scripts\breaking_pipeline_helper.py";    Remote = "/opt/shared/scripts/breaking_pipeline_helper.py" },
     @{ Local = "$PROJECT_ROOT\scripts\gen_dynamics_diagram.py";        Remote = "/opt/shared/scripts/gen_dynamics_diagram.py" },
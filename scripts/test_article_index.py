@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Regression tests for the journaled article index used by nowpattern_publisher."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import article_index as ai  # noqa: E402
+
+
+def _article(article_id: str, published_at: str, dynamics=(), genre=(), mode="deep_pattern") -> dict:
+    return {"id": article_id, "mode": mode, "title_ja": article_id, "url": f"https://nowpattern.com/{article_id}/",
+            "published_at": published_at, "dynamics_tags": list(dynamics), "genre_tags": list(genre)}
+
+
+def _legacy_related(data: dict, dynamics_tags, exclude_id=""):
+    related, seen_ids = [], set()
+    for tag in dynamics_tags:
+        for article_id in data.get("dynamics_index", {}).get(tag, []):
+            if article_id != exclude_id and article_id not in seen_ids:
+                seen_ids.add(article_id)
+                for article in data["articles"]:
+                    if article["id"] == article_id:
+                        related.append(article)
+                        break
+    return related
+
+
+def test_queries_match_legacy_scan() -> None:
+    index = ai.ArticleIndex(dynamics_tags=["A", "B", "C"], genre_tags=["g1", "g2"])
+    index.add(_article("a1", "2026-03-01T00:00:00+00:00", ["A"], ["g1"]))
+    index.add(_article("a2", "2026-03-03T00:00:00+00:00", ["B", "A", "unknown"], ["g2"], mode="speed_log"))
+    index.add(_article("a3", "2026-03-02T00:00:00+00:00", ["C", "A"], ["g1", "g1"]))
+    index.add(_article("a1", "2026-03-04T00:00:00+00:00", ["A"]))  # 同じ id の再掲: 最初の記事が勝つ
+    data = index.to_dict()
+
+    for tags, exclude in ((["A"], ""), (["B", "C"], "a2"), (["C", "A", "B"], "a3"), (["unknown"], "")):
+        assert index.related(tags, exclude) == _legacy_related(data, tags, exclude)
+    assert data["dynamics_index"] == {"A": ["a1", "a2", "a3"], "B": ["a2"], "C": ["a3"]}
+    assert data["genre_index"] == {"g1": ["a1", "a3"], "g2": ["a2"]}
+    assert index.get("a1")["published_at"].startswith("2026-03-01")
+    assert data["meta"]["total_articles"] == 4 and data["meta"]["total_speed_logs"] == 1
+    assert [a["published_at"][:10] for a in index.newest(3)] == ["2026-03-04", "2026-03-03", "2026-03-02"]
+
+    cutoff = datetime(2026, 3, 3, tzinfo=timezone.utc)
+    assert [dt.day for _, dt in index.published_since(cutoff)] == [4, 3]
+
+
+def test_journal_appends_and_compacts() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "nowpattern_article_index.json")
+        journal = Path(ai.journal_path_for(path))
+        base = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+        first = ai.ArticleIndex.load(path, ["A"], ["g1"])
+        first.add(_article("a0", base.isoformat(), ["A"], ["g1"]))
+        first.save()  # スナップショットが無ければ最初の save で作る
+        assert Path(path).exists() and not journal.exists()
+
+        orig = ai.COMPACT_EVERY
+        ai.COMPACT_EVERY = 3
+        try:
+            for i in range(1, 3):
+                index = ai.ArticleIndex.load(path)
+                index.add(_article(f"a{i}", (base + timedelta(hours=i)).isoformat(), ["A"]))
+                index.save()
+            assert len(journal.read_text(encoding="utf-8").splitlines()) == 2
+            assert len(json.loads(Path(path).read_text(encoding="utf-8"))["articles"]) == 1
+
+            # 書き込み途中で落ちた末尾行は読み飛ばす
+            with journal.open("a", encoding="utf-8") as f:
+                f.write('{"id": "broken"')
+            index = ai.ArticleIndex.load(path)
+            assert [a["id"] for a in index.newest()] == ["a2", "a1", "a0"]
+            assert index.dynamics_index["A"] == ["a0", "a1", "a2"]
+
+            index.add(_article("a3", (base + timedelta(hours=3)).isoformat(), ["A"]))
+            index.save()  # journal が COMPACT_EVERY 行に達したのでスナップショットへ畳み込む
+        finally:
+            ai.COMPACT_EVERY = orig
+        assert not journal.exists()
+        snapshot = json.loads(Path(path).read_text(encoding="utf-8"))
+        assert [a["id"] for a in snapshot["articles"]] == ["a0", "a1", "a2", "a3"]
+        assert snapshot["genre_index"] == {"g1": ["a0"]}
+
+        # 古いスナップショットの内容が journal に残っていても二重に数えない
+        journal.write_text(json.dumps(snapshot["articles"][0]) + "\n", encoding="utf-8")
+        assert len(ai.ArticleIndex.load(path)) == 4
+
+        # 件数が少なくても、スナップショットが COMPACT_MAX_AGE_SEC より古ければ畳み込む
+        index = ai.ArticleIndex.load(path)
+        index.add(_article("a4", (base + timedelta(hours=4)).isoformat(), ["A"]))
+        index.save()
+        assert journal.exists()
+        stale = time.time() - ai.COMPACT_MAX_AGE_SEC - 1
+        os.utime(path, (stale, stale))
+        index.add(_article("a5", (base + timedelta(hours=5)).isoformat(), ["A"]))
+        index.save()
+        assert not journal.exists()
+        assert len(json.loads(Path(path).read_text(encoding="utf-8"))["articles"]) == 6
+
+
+def test_periodic_compaction_folds_a_quiet_journal() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "nowpattern_article_index.json")
+        journal = Path(ai.journal_path_for(path))
+        assert ai.ArticleIndex.load(path).compact_if_due() is False  # 何も無ければ作らない
+        base = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        index = ai.ArticleIndex.load(path)
+        index.add(_article("a0", base.isoformat()))
+        index.save()
+        index.add(_article("a1", (base + timedelta(hours=1)).isoformat()))
+        index.save()  # 静かな時間帯の最後の記事: journal にだけ残る
+        assert journal.exists()
+
+        cron = ai.ArticleIndex.load(path)
+        assert cron.compact_if_due() is False  # スナップショットがまだ新しい
+        stale = time.time() - ai.COMPACT_MAX_AGE_SEC - 1
+        os.utime(path, (stale, stale))
+        assert ai.ArticleIndex.load(path).compact_if_due() is True
+        assert not journal.exists()
+        assert [a["id"] for a in json.loads(Path(path).read_text(encoding="utf-8"))["articles"]] == ["a0", "a1"]
+        assert cron.compact_if_due() is False  # journal が空なら書き直さない
+
+
+def test_write_seq_is_shared_by_writers_and_survives_compaction() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "nowpattern_article_index.json")
+        base = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        index = ai.ArticleIndex.load(path)
+        index.add(_article("a0", base.isoformat(), ["A"]))
+        index.save()
+
+        one, two = ai.ArticleIndex.load(path), ai.ArticleIndex.load(path)
+        one.add(_article("a1", (base + timedelta(hours=1)).isoformat()))
+        one.save()
+        one.compact()  # two の読み込み後にスナップショットが差し替わる
+        two.add(_article("old", (base - timedelta(days=30)).isoformat()))
+        assert [a["id"] for a in two.written_since(two.write_seq)] == ["old"]  # 未保存分は常に含む
+        two.save()
+        assert {a["id"]: a["seq"] for a in two.articles} == {"a0": 1, "a1": 2, "old": 3}
+
+        index = ai.ArticleIndex.load(path)
+        assert index.write_seq == 3 and len(index) == 3
+        assert [a["id"] for a in index.written_since(1)] == ["a1", "old"]
+        revised = dict(index.get("a1"), slug="renamed")
+        index.add(revised)
+        index.add(dict(revised))  # 同じ内容の再追加は改訂にならない
+        index.compact()
+        index = ai.ArticleIndex.load(path)
+        assert [(a["id"], a["seq"]) for a in index.written_since(2)] == [("old", 3), ("a1", 4)]
+        assert index.get("a1")["slug"] == "renamed" and len(index) == 3
+
+
+def run() -> None:
+    test_queries_match_legacy_scan()
+    test_journal_appends_and_compacts()
+    test_periodic_compaction_folds_a_quiet_journal()
+    test_write_seq_is_shared_by_writers_and_survives_compaction()
+    print("PASS: article index checks")
+
+
+if __name__ == "__main__":
+    run()
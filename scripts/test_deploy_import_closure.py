@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Every deploy path must ship the local modules its scripts import."""
+
+from __future__ import annotations
+
+import ast
+import re
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import push_prediction_platform_sources as push  # noqa: E402
+
+
+def _local_imports(module: str, seen: set[str]) -> set[str]:
+    """module が（再帰的に）import する scripts/ 直下のモジュール"""
+    path = SCRIPT_DIR / f"{module}.py"
+    if module in seen or not path.exists():
+        return seen
+    seen.add(module)
+    for node in ast.walk(ast.parse(path.read_text(encoding="utf-8-sig"))):
+        if isinstance(node, ast.Import):
+            names = [alias.name.split(".")[0] for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module.split(".")[0]]
+        else:
+            continue
+        for name in names:
+            _local_imports(name, seen)
+    return seen
+
+
+def _missing(files: list[str]) -> list[str]:
+    shipped = {Path(f).stem for f in files if f.endswith(".py")}
+    needed: set[str] = set()
+    for module in shipped:
+        needed |= _local_imports(module, set())
+    return sorted(needed - shipped)
+
+
+def test_deploy_all_ships_import_closure() -> None:
+    text = (SCRIPT_DIR / "deploy_all.sh").read_text(encoding="utf-8")
+    block = text.split("SCRIPTS=(", 1)[1].split(")", 1)[0]
+    files = re.findall(r'"([\w\-]+\.py)"', block)
+    assert "nowpattern_publisher.py" in files and "prediction_page_builder.py" in files
+    assert _missing(files) == []
+
+
+def test_vps_sync_ships_import_closure() -> None:
+    text = (SCRIPT_DIR / "sync-nowpattern-vps.ps1").read_text(encoding="utf-8")
+    files = re.findall(r"scripts\\([\w\-]+\.py)", text)
+    assert "nowpattern_publisher.py" in files
+    assert _missing(files) == []
+
+
+def test_push_manifest_ships_import_closure() -> None:
+    files = [target["local"].name for target in push.TARGETS]
+    assert _missing(files) == []
+
+
+def test_intelligence_feed_deploy_ships_import_closure() -> None:
+    text = (SCRIPT_DIR / "deploy-intelligence-v2.sh").read_text(encoding="utf-8")
+    files = re.findall(r"([\w\-]+\.py)", text)
+    assert "intelligence-feed-v2.py" in files
+    assert {"feed_collector.py", "seen_set.py"} <= set(files)
+    assert _missing(files) == []
+
+
+def run() -> None:
+    test_deploy_all_ships_import_closure()
+    test_vps_sync_ships_import_closure()
+    test_push_manifest_ships_import_closure()
+    test_intelligence_feed_deploy_ships_import_closure()
+    print("PASS: deploy import closure checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Regression tests for the concurrent Layer 0 collection layer."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import feed_collector as fc  # noqa: E402
+
+
+class _FakeWeb:
+    """Thread-safe enough for the tests: records (url, headers, start time)."""
+
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.requests: list[tuple[str, dict, float]] = []
+
+    def __call__(self, url: str, headers: dict, timeout: float):
+        self.requests.append((url, dict(headers), time.monotonic()))
+        page = self.pages.get(url)
+        if page is None:
+            return 404, {}, b""
+        if isinstance(page, str) and page.startswith("->"):
+            return 301, {"location": page[2:]}, b""
+        etag = page.get("etag", "")
+        if etag and headers.get("If-None-Match") == etag:
+            return 304, {}, b""
+        return 200, {"etag": etag} if etag else {}, page["body"]
+
+
+def _load_intel_feed():
+    spec = importlib.util.spec_from_file_location("intelligence_feed_v2", SCRIPT_DIR / "intelligence-feed-v2.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_conditional_get_reuses_cached_body_across_runs() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "cache.json")
+        web = _FakeWeb({
+            "https://feeds.example/rss": {"etag": '"v1"', "body": b"<rss>v1</rss>"},
+            "http://old.example/feed": "->https://feeds.example/rss",
+        })
+        collector = fc.FeedCollector(fc.CollectorCache(path), fetcher=web)
+        assert asyncio.run(collector.get("http://old.example/feed")) == b"<rss>v1</rss>"
+        collector.cache.save()
+
+        web.requests.clear()
+        collector = fc.FeedCollector(fc.CollectorCache(path), fetcher=web)
+        assert asyncio.run(collector.get("http://old.example/feed")) == b"<rss>v1</rss>"
+        assert web.requests[-1][1] == {"If-None-Match": '"v1"'}
+        assert collector.stats["not_modified"] == 1
+        try:
+            asyncio.run(collector.get("https://feeds.example/missing"))
+        except fc.FetchError as e:
+            assert e.status == 404
+        else:
+            raise AssertionError("404 must raise FetchError")
+
+
+def test_rate_limits_are_per_host() -> None:
+    pages = {f"https://{host}/{i}": {"body": b"{}"} for host in ("slow.example", "fast.example") for i in range(3)}
+    web = _FakeWeb(pages)
+    limiter = fc.HostRateLimiter(intervals={"slow.example": 0.1}, concurrency={"slow.example": 1})
+    collector = fc.FeedCollector(fc.CollectorCache(None), fetcher=web, limiter=limiter)
+
+    async def run_all():
+        await asyncio.gather(*(collector.get(url) for url in pages))
+
+    started = time.monotonic()
+    asyncio.run(run_all())
+    slow = sorted(t for url, _, t in web.requests if "slow" in url)
+    fast = [t for url, _, t in web.requests if "fast" in url]
+    assert slow[1] - slow[0] >= 0.09 and slow[2] - slow[1] >= 0.09
+    assert max(fast) - started < 0.09  # other hosts never wait behind the slow one
+
+
+def test_slow_host_does_not_hold_global_slots() -> None:
+    slow_pages = [f"https://slow.example/{i}" for i in range(6)]
+    fast_pages = [f"https://fast.example/{i}" for i in range(6)]
+    web = _FakeWeb({url: {"body": b"{}"} for url in slow_pages + fast_pages})
+    limiter = fc.HostRateLimiter(intervals={"slow.example": 0.1}, concurrency={"slow.example": 1})
+    collector = fc.FeedCollector(fc.CollectorCache(None), fetcher=web, limiter=limiter, total_limit=2)
+
+    async def run_all():
+        await asyncio.gather(*(collector.get(url) for url in slow_pages + fast_pages))  # 遅いホストが先に並ぶ
+
+    started = time.monotonic()
+    asyncio.run(run_all())
+    fast = [t for url, _, t in web.requests if "fast" in url]
+    assert max(fast) - started < 0.09  # 全体枠は間隔待ちの slow.example に取られない
+
+
+def test_dedupe_across_sources_and_runs() -> None:
+    now = [1000.0]
+    cache = fc.CollectorCache(None, clock=lambda: now[0])
+    collector = fc.FeedCollector(cache, fetcher=_FakeWeb({}))
+    seen: set = set()
+    rss = collector.dedupe([{"title": "A", "url": "https://x.com/a?utm_source=rss#top"}], seen_in_run=seen)
+    hn = collector.dedupe([{"title": "A (HN)", "url": "https://X.com/a/"}, {"title": "No URL", "url": ""}],
+                          seen_in_run=seen)
+    assert [i["title"] for i in rss + hn] == ["A", "No URL"]
+    assert all(i["is_new"] for i in rss + hn)
+    now[0] += 1800
+    again = collector.dedupe([{"title": "A", "url": "https://x.com/a"}])
+    assert again[0]["is_new"] is False and again[0]["first_seen"] == rss[0]["first_seen"]
+
+
+def test_hn_skips_cached_offtopic_items() -> None:
+    intel = _load_intel_feed()
+    intel.log = lambda msg: None
+    items = {1: "Claude Code ships hooks", 2: "Gardening tips", 3: "A new MCP server"}
+    pages = {"https://hacker-news.firebaseio.com/v0/topstories.json": {"body": json.dumps([1, 2, 3]).encode()}}
+    for sid, title in items.items():
+        pages[f"https://hacker-news.firebaseio.com/v0/item/{sid}.json"] = {
+            "body": json.dumps({"id": sid, "title": title, "score": sid * 10}).encode()}
+    web = _FakeWeb(pages)
+    cache = fc.CollectorCache(None)
+    first = asyncio.run(intel.fetch_hn(fc.FeedCollector(cache, fetcher=web), limit=3))
+    web.requests.clear()
+    second = asyncio.run(intel.fetch_hn(fc.FeedCollector(cache, fetcher=web), limit=3))
+    assert [r["title"] for r in second] == [r["title"] for r in first]
+    assert not any(url.endswith("/item/2.json") for url, _, _ in web.requests)
+    assert len(web.requests) == 1 + len(first)
+
+
+def run() -> None:
+    test_conditional_get_reuses_cached_body_across_runs()
+    test_rate_limits_are_per_host()
+    test_slow_host_does_not_hold_global_slots()
+    test_dedupe_across_sources_and_runs()
+    test_hn_skips_cached_offtopic_items()
+    print("PASS: feed collector checks")
+
+
+if __name__ == "__main__":
+    run()
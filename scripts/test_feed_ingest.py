@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Regression tests for the streaming RSS/Atom ingest used by breaking-news-watcher."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import feed_ingest as fi  # noqa: E402
+
+
+def _rss(guids: list[str]) -> bytes:
+    items = "".join(
+        f"<item><title>Story {g} &amp; more</title><link>https://news.example/{g}</link>"
+        f"<guid>{g}</guid><pubDate>Mon, 02 Mar 2026 10:00:00 GMT</pubDate>"
+        f"<description><![CDATA[<p>Body {g}</p>]]></description></item>"
+        for g in guids
+    )
+    return f'<?xml version="1.0"?><rss><channel><title>T</title>{items}</channel></rss>'.encode()
+
+
+class _FakeFeeds:
+    """Serves bodies in small chunks and records how many chunks were pulled."""
+
+    def __init__(self, bodies: dict, chunk: int = 64, delay: float = 0.0):
+        self.bodies = bodies
+        self.chunk = chunk
+        self.delay = delay
+        self.read_chunks: dict[str, int] = {}
+        self.closed: list[str] = []
+        self.requests: list[tuple[str, dict]] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, url: str, headers: dict, timeout: float):
+        with self.lock:
+            self.requests.append((url, dict(headers)))
+        time.sleep(self.delay)
+        body, etag = self.bodies[url]
+        if etag and headers.get("If-None-Match") == etag:
+            return 304, {}, iter(()), lambda: None
+        self.read_chunks[url] = 0
+
+        def chunks():
+            for i in range(0, len(body), self.chunk):
+                self.read_chunks[url] += 1
+                yield body[i:i + self.chunk]
+
+        return 200, {"etag": etag} if etag else {}, chunks(), lambda: self.closed.append(url)
+
+
+def test_stream_stops_at_known_guids_and_honours_304() -> None:
+    url = "https://feeds.example/world"
+    guids = [f"g{i}" for i in range(40)]
+    feeds = _FakeFeeds({url: (_rss(guids), '"v1"')})
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = str(Path(tmpdir) / "cursor.json")
+        ingest = fi.FeedIngest(state, fetcher=feeds, log=lambda msg: None)
+        first = ingest.poll([url])[url]
+        assert [i["guid"] for i in first] == guids
+        assert first[0]["title"] == "Story g0 & more" and first[0]["description"] == "Body g0"
+        full_read = feeds.read_chunks[url]
+        ingest.save()
+
+        # unchanged feed -> 304, nothing parsed
+        ingest = fi.FeedIngest(state, fetcher=feeds, log=lambda msg: None)
+        assert ingest.poll([url]) == {url: []}
+        assert feeds.requests[-1][1] == {"If-None-Match": '"v1"'}
+        assert ingest.stats["not_modified"] == 1
+
+        # two new items on top: only the head of the body is read
+        feeds.bodies[url] = (_rss(["n1", "n2"] + guids), '"v2"')
+        new = ingest.poll([url])[url]
+        assert [i["guid"] for i in new] == ["n1", "n2"]
+        assert feeds.read_chunks[url] < full_read / 2
+        assert feeds.closed[-1] == url
+        assert ingest.state[url]["guids"][:3] == ["n1", "n2", "g0"]
+
+
+def test_malformed_feed_falls_back_to_regex_and_forget_requeues() -> None:
+    url = "https://feeds.example/broken"
+    body = _rss(["a", "b"]).replace(b"</channel>", b"<br></channel>")  # unclosed tag
+    feeds = _FakeFeeds({url: (body, '"x"')})
+    ingest = fi.FeedIngest(None, fetcher=feeds, log=lambda msg: None)
+    items = ingest.poll([url])[url]
+    assert [(i["guid"], i["link"]) for i in items] == [("a", "https://news.example/a"), ("b", "https://news.example/b")]
+
+    ingest.forget(url, ["b"])
+    again = ingest.poll([url])[url]
+    assert feeds.requests[-1][1] == {}  # validators dropped so the body comes back
+    assert [i["guid"] for i in again] == ["b"]
+
+
+def test_poll_is_parallel_and_isolates_errors() -> None:
+    urls = [f"https://feeds.example/{n}" for n in range(6)]
+    feeds = _FakeFeeds({u: (_rss([u[-1]]), "") for u in urls}, delay=0.1)
+    feeds.bodies["https://feeds.example/bad"] = None  # unpacking fails -> fetch error
+    logged: list[str] = []
+    ingest = fi.FeedIngest(None, fetcher=feeds, max_workers=8, log=logged.append)
+    started = time.monotonic()
+    results = ingest.poll(urls + ["https://feeds.example/bad"])
+    assert time.monotonic() - started < 0.4
+    assert all(len(results[u]) == 1 for u in urls) and results["https://feeds.example/bad"] == []
+    assert ingest.stats["errors"] == 1 and len(logged) == 1
+
+
+def test_atom_entries_and_parse_items_limit() -> None:
+    atom = (b'<feed xmlns="http://www.w3.org/2005/Atom">'
+            b'<entry><id>tag:1</id><title>One</title><link rel="alternate" href="https://a.example/1"/>'
+            b'<updated>2026-03-02T10:00:00Z</updated><summary>S1</summary></entry>'
+            b'<entry><id>tag:2</id><title>Two</title><link href="https://a.example/2"/></entry></feed>')
+    items = fi.parse_items(atom, limit=1)
+    assert items == [{"guid": "tag:1", "title": "One", "link": "https://a.example/1",
+                      "pub_date": "2026-03-02T10:00:00Z", "description": "S1"}]
+
+
+def run() -> None:
+    test_stream_stops_at_known_guids_and_honours_304()
+    test_malformed_feed_falls_back_to_regex_and_forget_requeues()
+    test_poll_is_parallel_and_isolates_errors()
+    test_atom_entries_and_parse_items_limit()
+    print("PASS: feed ingest checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Regression tests for the cached link verifier used by the tracker deploy."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import link_verifier as lv  # noqa: E402
+
+
+class _FakeSite:
+    """Records every request; responds from a {url: status} table."""
+
+    def __init__(self, statuses: dict, etag: str = '"v1"'):
+        self.statuses = statuses
+        self.etag = etag
+        self.requests: list[tuple[str, str, dict]] = []
+
+    def __call__(self, url: str, method: str, headers: dict, timeout: float):
+        self.requests.append((url, method, dict(headers)))
+        status = self.statuses.get(url, 404)
+        if isinstance(status, Exception):
+            raise status
+        if status == 200 and headers.get("If-None-Match") == self.etag:
+            return 304, {}
+        if isinstance(status, str):
+            return 301, {"location": status}
+        return status, {"etag": self.etag}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_results_are_cached_per_status_class_and_revalidated() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = str(Path(tmpdir) / "links.json")
+        site = _FakeSite({"https://nowpattern.com/a/": 200, "https://nowpattern.com/flaky/": 503})
+        clock = _Clock()
+        urls = ["https://nowpattern.com/a/#np-1", "https://nowpattern.com/a/",
+                "https://nowpattern.com/gone/", "https://nowpattern.com/flaky/"]
+        first = lv.LinkVerifier(cache_path=cache, fetcher=site, clock=clock).verify(urls)
+        assert first == {
+            "https://nowpattern.com/a/": 200,
+            "https://nowpattern.com/gone/": 404,
+            "https://nowpattern.com/flaky/": "HTTP Error 503",
+        }
+
+        # New process, 20 minutes later: live link cached, 404 expired, 5xx never cached.
+        site.requests.clear()
+        clock.now += 20 * 60
+        verifier = lv.LinkVerifier(cache_path=cache, fetcher=site, clock=clock)
+        verifier.verify(urls)
+        assert {url for url, _, _ in site.requests} == {"https://nowpattern.com/gone/", "https://nowpattern.com/flaky/"}
+        assert verifier.stats["cached"] == 1
+
+        # After the live TTL, the entry is revalidated with a conditional request.
+        site.requests.clear()
+        clock.now += lv.TTL_LIVE
+        verifier = lv.LinkVerifier(cache_path=cache, fetcher=site, clock=clock)
+        assert verifier.verify(["https://nowpattern.com/a/"]) == {"https://nowpattern.com/a/": 200}
+        assert site.requests[0][2] == {"If-None-Match": '"v1"'}
+        assert verifier.stats["revalidated"] == 1
+
+
+def test_locally_proven_urls_skip_http() -> None:
+    sitemap_index = b"""<?xml version="1.0"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://nowpattern.com/sitemap-posts.xml</loc></sitemap>
+</sitemapindex>"""
+    posts = b"""<?xml version="1.0"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://nowpattern.com/taiwan-strait/</loc></url>
+</urlset>"""
+    bodies = {"https://nowpattern.com/sitemap.xml": sitemap_index,
+              "https://nowpattern.com/sitemap-posts.xml": posts}
+    site = _FakeSite({})
+    verifier = lv.LinkVerifier(
+        cache_path=None,
+        live_urls=["https://nowpattern.com/en/btc-etf/"],
+        sitemap_url="https://nowpattern.com/sitemap.xml",
+        fetcher=site,
+        body_fetcher=lambda url, headers: (200, {}, bodies[url]),
+    )
+    results = verifier.verify(["https://nowpattern.com/taiwan-strait", "https://nowpattern.com/en/btc-etf/#x"])
+    assert set(results.values()) == {200}
+    assert site.requests == []
+    assert verifier.stats["local"] == 2
+
+
+def test_redirect_to_missing_page_is_broken_and_timeouts_get_slow_retry() -> None:
+    site = _FakeSite({
+        "https://nowpattern.com/old/": "https://nowpattern.com/new/",
+        "https://nowpattern.com/slow/": TimeoutError("timed out"),
+    })
+    verifier = lv.LinkVerifier(cache_path=None, fetcher=site)
+    results = verifier.verify(["https://nowpattern.com/old/", "https://nowpattern.com/slow/"])
+    assert results["https://nowpattern.com/old/"] == 404
+    assert results["https://nowpattern.com/slow/"] == "timed out"
+    slow_methods = [method for url, method, _ in site.requests if url.endswith("/slow/")]
+    assert slow_methods == ["HEAD", "GET", "GET"]
+
+
+def test_redirect_loop_is_an_uncached_error() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = str(Path(tmpdir) / "links.json")
+        site = _FakeSite({"https://nowpattern.com/loop/": "https://nowpattern.com/loop/"})
+        verifier = lv.LinkVerifier(cache_path=cache, fetcher=site)
+        results = verifier.verify(["https://nowpattern.com/loop/"])
+        status = results["https://nowpattern.com/loop/"]
+        assert not lv.is_live(status) and "redirect" in str(status).lower()
+        assert "https://nowpattern.com/loop/" not in verifier.entries
+
+
+def test_local_proof_overrides_cached_404() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = str(Path(tmpdir) / "links.json")
+        site = _FakeSite({})
+        lv.LinkVerifier(cache_path=cache, fetcher=site).verify(["https://nowpattern.com/new-post/"])
+        site.requests.clear()
+        # 記事が公開されて Ghost DB に載った直後: キャッシュの 404 より証明を優先
+        verifier = lv.LinkVerifier(cache_path=cache, live_urls=["https://nowpattern.com/new-post/"], fetcher=site)
+        assert verifier.verify(["https://nowpattern.com/new-post/"]) == {"https://nowpattern.com/new-post/": 200}
+        assert site.requests == []
+        assert verifier.stats["local"] == 1
+
+
+def run() -> None:
+    test_results_are_cached_per_status_class_and_revalidated()
+    test_locally_proven_urls_skip_http()
+    test_redirect_to_missing_page_is_broken_and_timeouts_get_slow_retry()
+    test_redirect_loop_is_an_uncached_error()
+    test_local_proof_overrides_cached_404()
+    print("PASS: link verifier checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Regression tests for the n-gram candidate index behind auto_link_predictions."""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import market_candidate_index as mci  # noqa: E402
+
+
+def _db(markets: list[tuple]) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE markets (id INTEGER PRIMARY KEY, source TEXT, external_id TEXT, question TEXT,
+            event_title TEXT, close_date TEXT, resolved INTEGER DEFAULT 0, last_updated TEXT);
+    """)
+    conn.executemany("INSERT INTO markets VALUES (?,?,?,?,?,?,?,?)", markets)
+    mci.ensure_schema(conn)
+    with conn:
+        mci.update(conn)
+    return conn
+
+
+def _linear_best(conn: sqlite3.Connection, keywords: set):
+    """The pre-index auto_link loop: open markets by last_updated DESC, first strictly-better score."""
+    best, best_score = None, 0.0
+    for mid, question, event_title in conn.execute(
+        "SELECT id, question, event_title FROM markets WHERE resolved = 0 ORDER BY last_updated DESC, id"
+    ):
+        text = f"{question} {event_title or ''}".lower()
+        score = sum(1 for kw in keywords if kw in text) / len(keywords)
+        if score > best_score:
+            best, best_score = mid, score
+    return best, best_score
+
+
+def test_top_candidate_matches_linear_scan() -> None:
+    rng = random.Random(12)
+    words = ["fed", "rate", "cut", "taiwan", "china", "tariff", "bitcoin", "etf", "trump", "oil",
+             "opec", "ukraine", "ceasefire", "nvidia", "gold", "yen", "boj", "日銀", "利上げ", "us"]
+    markets = [
+        (i, "polymarket", f"p{i}", " ".join(rng.sample(words, 4)).title() + "?",
+         rng.choice([None, " ".join(rng.sample(words, 2))]), None, int(rng.random() < 0.2),
+         f"2026-03-{rng.randint(1, 9):02d}")
+        for i in range(1, 400)
+    ]
+    conn = _db(markets)
+    matcher = mci.CandidateMatcher(conn)
+    for _ in range(200):
+        keywords = set(rng.sample(words + ["ra", "xyz"], rng.randint(1, 6)))
+        expected = _linear_best(conn, keywords)
+        top = matcher.top_candidates(keywords)
+        got = (top[0][0]["id"], top[0][1]) if top else (None, 0.0)
+        assert got == expected, (keywords, got, expected)
+
+
+def test_update_reindexes_only_changed_markets() -> None:
+    conn = _db([
+        (1, "polymarket", "p1", "Will the Fed cut rates?", "Fed", None, 0, "2026-03-01"),
+        (2, "manifold", "m1", "BOJ hike by June?", None, None, 0, "2026-03-01"),
+    ])
+    with conn:
+        assert mci.update(conn) == 0
+        conn.execute("UPDATE markets SET question = 'Will OPEC cut output?', event_title = 'OPEC' WHERE id = 1")
+        conn.execute("INSERT INTO markets VALUES (3, 'polymarket', 'p3', 'Gold above $3000?', NULL, NULL, 0, '2026-03-02')")
+        assert mci.update(conn) == 2
+    matcher = mci.CandidateMatcher(conn)
+    assert matcher.markets_containing("opec") == {1}
+    assert matcher.markets_containing("fed") == frozenset()
+    assert matcher.markets_containing("ju") == {2}  # 2-character keyword via prefix scan
+    assert matcher.markets_containing("gold") == {3}
+
+
+def run() -> None:
+    test_top_candidate_matches_linear_scan()
+    test_update_reindexes_only_changed_markets()
+    print("PASS: market candidate index checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Regression tests for market_history.db schema maintenance and its readers."""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+try:
+    import market_history_crawler as mhc  # noqa: E402
+except ImportError:  # requests not installed
+    mhc = None
+
+
+def _open(tmpdir: str) -> sqlite3.Connection:
+    mhc.DB_DIR = tmpdir
+    mhc.DB_PATH = str(Path(tmpdir) / "market_history.db")
+    mhc.init_db()
+    return mhc.get_db()
+
+
+def _event(prob: float) -> dict:
+    return {
+        "id": "E1", "title": "Fed", "slug": "fed", "tags": [{"slug": "economy"}],
+        "markets": [{"id": "M1", "question": "Fed cut in June?", "slug": "fed-june",
+                     "outcomePrices": f'["{prob}", "{1 - prob:.2f}"]', "outcomes": '["Yes", "No"]'}],
+    }
+
+
+def test_latest_snapshot_is_maintained_by_triggers() -> None:
+    if mhc is None:
+        print("    (skipped - requests not available)")
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        conn = _open(tmpdir)
+        mhc.upsert_polymarket(conn, _event(0.30), "2026-03-01")
+        mhc.upsert_polymarket(conn, _event(0.45), "2026-03-02")
+        mhc.upsert_polymarket(conn, _event(0.50), "2026-03-02")  # same-day upsert updates in place
+        latest = conn.execute("SELECT snapshot_date, yes_prob FROM latest_snapshot").fetchall()
+        assert [tuple(r) for r in latest] == [("2026-03-02", 0.50)]
+
+        # Backfilling an older day never replaces a newer latest row.
+        mhc.upsert_polymarket(conn, _event(0.10), "2026-02-01")
+        assert conn.execute("SELECT yes_prob FROM latest_snapshot").fetchone()[0] == 0.50
+
+        # Deleting the latest row falls back to the previous day.
+        conn.execute("DELETE FROM probability_snapshots WHERE snapshot_date = '2026-03-02'")
+        assert tuple(conn.execute("SELECT snapshot_date, yes_prob FROM latest_snapshot").fetchone()) == ("2026-03-01", 0.30)
+        conn.commit()
+        conn.close()
+
+
+def test_init_db_backfills_latest_snapshot_for_existing_db() -> None:
+    if mhc is None:
+        print("    (skipped - requests not available)")
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        conn = _open(tmpdir)
+        mhc.upsert_polymarket(conn, _event(0.30), "2026-03-01")
+        mhc.upsert_polymarket(conn, _event(0.40), "2026-03-02")
+        conn.execute("DELETE FROM latest_snapshot")  # DB created before the table existed
+        conn.commit()
+        conn.close()
+
+        mhc.init_db()
+        conn = mhc.get_db()
+        assert tuple(conn.execute("SELECT snapshot_date, yes_prob FROM latest_snapshot").fetchone()) == ("2026-03-02", 0.40)
+        conn.close()
+
+
+def _fake_sources(calls: list, fail_offsets: set):
+    def poly_page(limit, offset):
+        calls.append(("polymarket", offset))
+        if offset in fail_offsets:
+            raise RuntimeError("502 Bad Gateway")
+        if offset >= 300:
+            return []
+        return [{"id": f"E{offset}", "title": "t", "markets": [
+            {"id": f"M{offset}-{i}", "question": f"q{offset}-{i}",
+             "outcomePrices": '["0.4", "0.6"]', "outcomes": '["Yes", "No"]'} for i in range(3)]}]
+
+    def manifold_page(limit, before=None):
+        calls.append(("manifold", before))
+        page = 0 if before is None else int(before.split("-")[1]) + 1
+        return [{"id": f"mf-{page}", "question": f"mq{page}", "outcomeType": "BINARY", "probability": 0.2}]
+
+    return poly_page, manifold_page
+
+
+def test_crawler_resumes_from_checkpoints_and_records_intraday() -> None:
+    if mhc is None:
+        print("    (skipped - requests not available)")
+        return
+    originals = (mhc.fetch_polymarket_page, mhc.fetch_manifold_page)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _open(tmpdir).close()
+            calls: list = []
+            fail = {100}
+            mhc.fetch_polymarket_page, mhc.fetch_manifold_page = _fake_sources(calls, fail)
+            now = mhc.datetime(2026, 3, 2, 9, 15, tzinfo=mhc.timezone.utc)
+            first = mhc.run_crawler(poly_pages=4, manifold_pages=2, interval_min=60, workers=3, now=now)
+            assert first == {"polymarket": 6, "manifold": 2}, first
+
+            # Same hourly slot: only the failed Polymarket page is fetched again.
+            calls.clear()
+            fail.clear()
+            second = mhc.run_crawler(poly_pages=4, manifold_pages=2, interval_min=60, workers=3,
+                                     now=now.replace(minute=40))
+            assert calls == [("polymarket", 100)], calls
+            assert second == {"polymarket": 3, "manifold": 0}
+
+            # Next slot: a fresh run and a second intraday row per market, one daily row.
+            mhc.run_crawler(poly_pages=4, manifold_pages=2, interval_min=60, workers=3, now=now.replace(hour=10))
+            conn = mhc.get_db()
+            assert conn.execute("SELECT COUNT(*) FROM markets").fetchone()[0] == 11
+            assert conn.execute("SELECT COUNT(*) FROM probability_snapshots").fetchone()[0] == 11
+            slots = [r[0] for r in conn.execute("SELECT DISTINCT snapshot_at FROM intraday_snapshots ORDER BY 1")]
+            assert slots == ["2026-03-02T09:00Z", "2026-03-02T10:00Z"], slots
+            conn.close()
+    finally:
+        mhc.fetch_polymarket_page, mhc.fetch_manifold_page = originals
+
+
+def run() -> None:
+    test_latest_snapshot_is_maintained_by_triggers()
+    test_init_db_backfills_latest_snapshot_for_existing_db()
+    test_crawler_resumes_from_checkpoints_and_records_intraday()
+    print("PASS: market history crawler checks")
+
+
+if __name__ == "__main__":
+    run()
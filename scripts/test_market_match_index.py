@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Regression tests for the offline market matching index."""
+
+from __future__ import annotations
+
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import market_match_index as mmi  # noqa: E402
+
+
+def _linear_scan(title, genres, embed_data, keyword_fn, genre_map):
+    """The pre-index find_polymarket_match loop, kept as the reference."""
+    article_kw = keyword_fn(title)
+    article_genres = set(genres) if isinstance(genres, list) else set()
+    best, best_score = None, 0
+    for m in embed_data:
+        score = 0
+        overlap = article_genres & {genre_map.get(g, g) for g in m.get("genres", [])}
+        if overlap:
+            score += len(overlap) * 3
+        kw_hit = article_kw & keyword_fn(m.get("title", "") + " " + m.get("question", ""))
+        if len(kw_hit) >= 2:
+            score += len(kw_hit)
+        if score > best_score and (overlap and len(kw_hit) >= 2 or len(kw_hit) >= 4):
+            best_score = score
+            best = {"question": m.get("question", "")[:60], "probability": m.get("probability", 0),
+                    "outcomes": m.get("outcomes"), "volume_usd": m.get("volume_usd", 0)}
+    return best
+
+
+def test_index_matches_linear_scan() -> None:
+    rng = random.Random(7)
+    words = ["fed", "rate", "cut", "june", "taiwan", "china", "tariff", "bitcoin", "etf", "election",
+             "trump", "oil", "opec", "ukraine", "ceasefire", "nvidia", "earnings", "gold", "yen", "boj"]
+    genres = ["economy", "geopolitics", "crypto", "economic-policy", "technology"]
+    genre_map = {"economic-policy": "economy"}
+    embed_data = [
+        {"title": " ".join(rng.sample(words, 3)), "question": " ".join(rng.sample(words, 4)),
+         "genres": rng.sample(genres, rng.randint(0, 2)), "probability": i, "volume_usd": i}
+        for i in range(300)
+    ]
+    index = mmi.MarketMatchIndex(embed_data, keyword_fn=mmi.default_keywords, genre_map=genre_map)
+    matched = 0
+    for _ in range(200):
+        title = " ".join(rng.sample(words, rng.randint(2, 6)))
+        art_genres = rng.sample(["economy", "geopolitics", "crypto"], rng.randint(0, 2))
+        expected = _linear_scan(title, art_genres, embed_data, mmi.default_keywords, genre_map)
+        assert index.best_match(title, art_genres) == expected, title
+        matched += expected is not None
+    assert matched > 20
+
+
+def test_history_adds_only_manifold_search_candidates() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = str(Path(tmpdir) / "market_history.db")
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE markets (id INTEGER PRIMARY KEY, source TEXT, external_id TEXT, event_id TEXT,
+                question TEXT, event_title TEXT, market_slug TEXT, event_slug TEXT, genres TEXT,
+                close_date TEXT, resolved INTEGER DEFAULT 0);
+            CREATE TABLE probability_snapshots (market_id INTEGER, snapshot_date TEXT, yes_prob REAL,
+                no_prob REAL, volume REAL);
+        """)
+        conn.executemany("INSERT INTO markets (id, source, external_id, question, event_title, genres) VALUES (?,?,?,?,?,?)", [
+            (1, "polymarket", "p1", "Will OPEC cut oil output?", "OPEC oil", json.dumps(["energy"])),
+            (2, "polymarket", "p2", "Fed rate cut in June?", "Fed", "[]"),
+            (3, "manifold", "m1", "Will the BOJ raise rates?", "BOJ", "[]"),
+        ])
+        conn.executemany("INSERT INTO probability_snapshots VALUES (?,?,?,?,?)", [
+            (1, "2026-01-01", 0.2, 0.8, 10), (1, "2026-01-02", 0.35, 0.65, 12),
+            (2, "2026-01-02", 0.6, 0.4, 5), (3, "2026-01-02", 0.1, 0.9, 1),
+        ])
+        conn.commit()
+        conn.close()
+
+        history = mmi.load_history_markets(db_path, sources=("polymarket", "manifold"))
+        assert [(m["external_id"], m["probability"]) for m in history] == [("p1", 35.0), ("p2", 60.0), ("m1", 10.0)]
+        assert history[0]["outcomes"] == {"Yes": 35.0, "No": 65.0}
+
+        embed_data = [{"title": "Fed", "question": "Fed rate cut in June?", "genres": [], "probability": 55}]
+        index = mmi.MarketMatchIndex.from_sources(embed_data, db_path)
+        assert len(index) == 2  # embed_data + the Manifold market only
+        # Polymarket candidates stay exactly embed_data: DB-only Polymarket markets never match
+        assert index.best_match("OPEC oil output cut talks", ["energy"]) is None
+        assert index.best_match("Fed rate cut in June", [])["probability"] == 55
+        assert index.best_match("Will the BOJ raise rates soon", []) is None  # manifold not a Polymarket match
+        assert [m["external_id"] for m in index.search("boj rates", source="manifold")] == ["m1"]
+
+
+def test_search_cache_ttl_and_normalized_keys() -> None:
+    now = [1000.0]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "cache.json")
+        cache = mmi.SearchCache(path, ttl=60, empty_ttl=600, clock=lambda: now[0])
+        cache.put("manifold", "Fed  Rate", [{"id": "a"}])
+        cache.put("manifold", "nothing here", [])
+        cache.save()
+
+        reloaded = mmi.SearchCache(path, ttl=60, empty_ttl=600, clock=lambda: now[0])
+        assert reloaded.get("manifold", "fed rate") == [{"id": "a"}]
+        now[0] += 120
+        assert reloaded.get("manifold", "fed rate") is None  # hit results expire after ttl
+        assert reloaded.get("manifold", "Nothing Here") == []  # empty results live longer
+        assert reloaded.stats == {"hit": 2, "miss": 1}
+
+
+def run() -> None:
+    test_index_matches_linear_scan()
+    test_history_adds_only_manifold_search_candidates()
+    test_search_cache_ttl_and_normalized_keys()
+    print("PASS: market match index checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Regression tests for the Polymarket odds time-series store."""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import odds_timeseries as ots  # noqa: E402
+
+HOUR = 3600
+DAY = 24 * HOUR
+T0 = 1_772_323_200  # 2026-03-01T00:00Z
+
+
+def _snapshot(probs: dict) -> dict:
+    return {
+        "E1": {"title": "Fed", "volume": 9e6, "genres": [{"slug": "economic-policy", "name_ja": "経済政策"}],
+               "markets": {mid: {"question": f"{mid}?", "prices": {"Yes": p, "No": round(1 - p, 4)}}
+                           for mid, p in probs.items()}},
+    }
+
+
+def test_append_is_change_only_and_range_queries_are_as_of() -> None:
+    store = ots.OddsStore(":memory:")
+    assert store.append_snapshot(_snapshot({"M1": 0.30}), T0) == 2
+    assert store.append_snapshot(_snapshot({"M1": 0.30}), T0 + HOUR) == 0  # unchanged scan
+    assert store.append_snapshot(_snapshot({"M1": 0.45}), T0 + 2 * HOUR) == 2
+    assert store.append_snapshot(_snapshot({"M1": 0.10}), T0 - HOUR) == 0  # never rewrites the past
+
+    assert store.series_range("M1", "Yes", T0 + HOUR, T0 + 3 * HOUR) == [(T0, 0.30), (T0 + 2 * HOUR, 0.45)]
+    assert store.value_at("M1", "Yes", T0 + HOUR) == 0.30
+    assert store.downsample("M1", "Yes", T0, T0 + 3 * HOUR - 1, HOUR) == [
+        (T0, 0.30), (T0 + HOUR, 0.30), (T0 + 2 * HOUR, 0.45)]
+    deltas = store.rolling_deltas("M1", "Yes", HOUR, T0 + HOUR, T0 + 3 * HOUR, HOUR)
+    assert [(t, round(d, 2)) for t, d in deltas] == [(T0 + HOUR, 0.0), (T0 + 2 * HOUR, 0.15), (T0 + 3 * HOUR, 0.0)]
+    assert store.stats()["scans"] == 3
+
+
+def test_multi_window_movements_for_all_markets() -> None:
+    store = ots.OddsStore(":memory:")
+    store.append_snapshot(_snapshot({"M1": 0.20, "M2": 0.50, "M3": 0.50, "M4": 0.40}), T0)
+    store.append_snapshot(_snapshot({"M1": 0.25, "M2": 0.50, "M3": 0.40, "M4": 0.40}), T0 + 6 * DAY)
+    store.append_snapshot(_snapshot({"M1": 0.30, "M2": 0.50, "M3": 0.52, "M4": 0.41}), T0 + 7 * DAY - HOUR)
+    now = T0 + 7 * DAY - 2 * 60  # cron ran a little early: the previous scan still counts as "1h ago"
+    store.append_snapshot(_snapshot({"M1": 0.42, "M2": 0.62, "M3": 0.53, "M4": 0.41}), now)
+
+    alerts = {(a["market_id"], a["outcome"]): a for a in store.detect_movements(now)}
+    m1 = alerts[("M1", "Yes")]
+    assert m1["window"] == "7d" and round(m1["delta"], 2) == 0.22 and m1["severity"] == "high"
+    assert m1["genres"][0]["slug"] == "economic-policy"
+    m2 = alerts[("M2", "Yes")]
+    assert m2["window"] == "1h" and round(m2["delta"], 2) == 0.12 and m2["prev_prob"] == 0.50
+    m3 = alerts[("M3", "No")]
+    assert m3["window"] == "24h" and m3["direction"] == "DOWN" and round(m3["delta"], 2) == -0.13
+    assert not any(market_id == "M4" for market_id, _ in alerts)
+
+
+def test_values_at_many_matches_per_series_as_of() -> None:
+    store = ots.OddsStore(":memory:")
+    store.append_snapshot(_snapshot({"M1": 0.20, "M2": 0.50}), T0)
+    store.append_snapshot(_snapshot({"M1": 0.30, "M2": 0.50}), T0 + HOUR)
+    store.append_snapshot(_snapshot({"M1": 0.30, "M2": 0.70, "M3": 0.10}), T0 + 2 * HOUR)
+    cutoffs = [T0 - 1, T0, T0 + HOUR + 30, T0 + 5 * HOUR]
+    many = store.values_at_many(cutoffs)
+    for ts, got in zip(cutoffs, many):
+        expected = {}
+        for market_id in ("M1", "M2", "M3"):
+            for outcome in ("Yes", "No"):
+                value = store.value_at(market_id, outcome, ts)
+                if value is not None:
+                    expected[store.series_id(market_id, outcome)] = value
+        assert got == expected == store.values_at(ts), ts
+    assert many[0] == {} and len(many[3]) == 6
+    # 最新スキャンに現れた系列だけに絞る（M1 / M2 は直前スキャンから消えた扱い）
+    store.append_snapshot(_snapshot({"M3": 0.15}), T0 + 3 * HOUR)
+    seen = store.values_at_many([T0 + HOUR, T0 + 5 * HOUR], seen_at=T0 + 3 * HOUR)
+    m3 = store.series_id("M3", "Yes")
+    assert seen[0] == {} and set(seen[1]) == {m3, store.series_id("M3", "No")} and seen[1][m3] == 0.15
+    assert store.values_at_many([]) == []
+
+
+def test_market_brier_uses_price_before_settlement_and_legacy_import() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        history = Path(tmpdir) / "history"
+        history.mkdir()
+        days = [("2026-03-01", {"A": 0.70, "B": 0.40}), ("2026-03-08", {"A": 0.80, "B": 0.30}),
+                ("2026-03-09", {"A": 0.995, "B": 0.005})]
+        for day, probs in days:
+            (history / f"{day}.json").write_text(json.dumps(_snapshot(probs)), encoding="utf-8")
+        store = ots.OddsStore(str(Path(tmpdir) / "odds.db"))
+        assert store.import_history_dir(str(history)) == 3
+        settled = {s["market_id"]: s for s in store.settled_series()}
+        assert settled["A"]["actual"] == 1.0 and settled["B"]["actual"] == 0.0
+        result = store.market_brier()
+        # 24h before settlement: A=0.80 (hit), B=0.30 -> ((0.2)^2 + (0.3)^2) / 2
+        assert result["24h"] == {"n": 2, "brier": 0.065}
+        assert result["7d"]["n"] == 2 and result["7d"]["brier"] == round((0.3 ** 2 + 0.4 ** 2) / 2, 4)
+        store.close()
+
+
+def run() -> None:
+    test_append_is_change_only_and_range_queries_are_as_of()
+    test_multi_window_movements_for_all_markets()
+    test_values_at_many_matches_per_series_as_of()
+    test_market_brier_uses_price_before_settlement_and_legacy_import()
+    print("PASS: odds time-series checks")
+
+
+if __name__ == "__main__":
+    run()
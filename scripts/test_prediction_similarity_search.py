@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Regression tests for prediction_similarity_search.py index persistence."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import prediction_similarity_search as pss  # noqa: E402
+
+
+def _predictions() -> list[dict]:
+    return [
+        {"id": "P1", "title": "Trump tariff on China semiconductors", "status": "open", "tags": ["economics"]},
+        {"id": "P2", "title": "Fed rate cut in June", "status": "resolved", "tags": ["economics"]},
+        {"id": "P3", "title": "台湾有事と半導体サプライチェーン", "status": "open", "tags": ["geopolitics"]},
+        {"id": "P4", "title": "Bitcoin ETF inflows", "status": "resolved", "tags": ["crypto"]},
+    ]
+
+
+def test_tfidf_index_persists_and_updates_incrementally() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index_path = Path(tmpdir) / "tfidf_index.json"
+        preds = _predictions()
+        first = pss.TFIDFEngine(preds, index_path=index_path)
+        assert first.stats == {"reused": 0, "tokenized": 4, "removed": 0}
+        top = first.search("tariff semiconductors", top_n=1)
+        assert top[0][0]["id"] == "P1"
+
+        # Reload: nothing is re-tokenized and results are identical.
+        second = pss.TFIDFEngine(preds, index_path=index_path)
+        assert second.stats == {"reused": 4, "tokenized": 0, "removed": 0}
+        assert second.search("tariff semiconductors", top_n=4) == first.search("tariff semiconductors", top_n=4)
+
+        # Edit one prediction and append another: only those two are tokenized.
+        edited = [dict(preds[0], title="Oil price shock")] + preds[1:] + [
+            {"id": "P5", "title": "Semiconductor export controls", "status": "open", "tags": ["economics"]},
+        ]
+        third = pss.TFIDFEngine(edited, index_path=index_path)
+        assert third.stats == {"reused": 3, "tokenized": 2, "removed": 1}
+        ids = [pred["id"] for pred, _ in third.search("semiconductor export", top_n=5)]
+        assert ids[0] == "P5", ids
+        assert [pred["id"] for pred, _ in third.search("oil price", top_n=1)] == ["P1"]
+
+
+def test_tfidf_filters_apply_to_candidates() -> None:
+    engine = pss.TFIDFEngine(_predictions(), index_path=None)
+    resolved = engine.search("Fed rate cut Bitcoin", top_n=5, resolved_only=True)
+    assert {pred["id"] for pred, _ in resolved} == {"P2", "P4"}
+    crypto = engine.search("Fed rate cut Bitcoin", top_n=5, category="crypto")
+    assert [pred["id"] for pred, _ in crypto] == ["P4"]
+
+
+class _KeywordProvider:
+    """Deterministic bag-of-keywords provider (no API) that records each request."""
+
+    model = "test-keywords"
+
+    def __init__(self, fail_first: int = 0):
+        self.requests: list[list[str]] = []
+        self.fail_first = fail_first
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.requests.append(list(texts))
+        if self.fail_first:
+            self.fail_first -= 1
+            raise RuntimeError("429 rate limited")
+        vocab = ["tariff", "fed", "semiconductor", "bitcoin", "oil", "台湾"]
+        return [[float(text.lower().count(word)) + 0.01 for word in vocab] for text in texts]
+
+
+def _embed_paths(tmpdir: str) -> dict:
+    return {
+        "matrix_path": Path(tmpdir) / "emb.f32",
+        "meta_path": Path(tmpdir) / "emb.meta.json",
+        "ivf_path": Path(tmpdir) / "emb.ivf.npz",
+    }
+
+
+def test_embedding_matrix_store_scores_and_reloads() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _embed_paths(tmpdir)
+        preds = _predictions()
+        engine = pss.EmbeddingEngine(preds, provider=_KeywordProvider(), **paths)
+        assert engine.matrix.count == 4
+        results = engine.search("fed", top_n=2, min_score=0.0)
+        assert results[0][0]["id"] == "P2"
+        assert abs(results[0][1] - 1.0) < 1e-3  # rows are stored pre-normalized
+
+        provider = _KeywordProvider()
+        reloaded = pss.EmbeddingEngine(preds + [{"id": "P5", "title": "oil supply"}], provider=provider, **paths)
+        assert provider.requests == [["oil supply"]]  # only the new prediction is embedded
+        assert reloaded.matrix.count == 5
+        filtered = reloaded.search("bitcoin", top_n=5, resolved_only=True, min_score=0.0)
+        assert {pred["id"] for pred, _ in filtered} == {"P2", "P4"}
+        assert filtered[0][0]["id"] == "P4"
+
+
+def test_edited_prediction_is_reembedded_by_text_hash() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _embed_paths(tmpdir)
+        preds = _predictions()
+        pss.EmbeddingEngine(preds, provider=_KeywordProvider(), **paths)
+
+        provider = _KeywordProvider()
+        edited = [dict(preds[0], title="Oil price shock")] + preds[1:]
+        engine = pss.EmbeddingEngine(edited, provider=provider, **paths)
+        assert provider.requests == [["Oil price shock economics"]]  # title + tags
+        assert engine.search("oil", top_n=1, min_score=0.0)[0][0]["id"] == "P1"
+
+
+def test_compute_embeddings_batches_retries_and_checkpoints() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _embed_paths(tmpdir)
+        matrix = pss.EmbeddingMatrix(paths["matrix_path"], paths["meta_path"])
+        items = [(f"k{i}", f"bitcoin {i}") for i in range(10)] + [("k0", "bitcoin 0")]
+        provider = _KeywordProvider(fail_first=1)
+        saved, failed = pss.compute_embeddings(provider, items, matrix, batch_size=4, max_workers=1,
+                                               base_delay=0.0, checkpoint_rows=4)
+        assert (saved, failed) == (10, 0)
+        assert len(provider.requests) == 4  # 3 batches + 1 retry, duplicate key sent once
+        assert max(len(batch) for batch in provider.requests) == 4
+        reloaded = pss.EmbeddingMatrix(paths["matrix_path"], paths["meta_path"])
+        assert reloaded.count == 10 and reloaded.row_of("k9") is not None
+
+
+def test_local_hash_provider_is_deterministic() -> None:
+    provider = pss.HashEmbeddingProvider(dim=32)
+    first, second = provider.embed_batch(["Fed rate cut", "Fed rate cut"])
+    assert first == second and len(first) == 32 and any(first)
+    assert pss.embedding_key("Fed rate cut", provider.model) != pss.embedding_key("Fed rate cut", "other-model")
+
+
+def test_ivf_index_matches_exact_search_on_clustered_data() -> None:
+    if not pss.HAS_NUMPY:
+        print("    (skipped - numpy not available)")
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _embed_paths(tmpdir)
+        topics = ["tariff", "fed", "semiconductor", "bitcoin", "oil"]
+        preds = [{"id": f"Q{i}", "title": f"{topics[i % 5]} " * (1 + i % 3) + str(i)} for i in range(60)]
+        engine = pss.EmbeddingEngine(preds, provider=_KeywordProvider(), **paths)
+        old_min = pss.IVF_MIN_ROWS
+        pss.IVF_MIN_ROWS = 10
+        try:
+            assert engine.build_ann_index(n_lists=5)
+        finally:
+            pss.IVF_MIN_ROWS = old_min
+        approx = pss.EmbeddingEngine(preds, provider=_KeywordProvider(), **paths)
+        assert approx.ivf is not None
+        exact_ids = {p["id"] for p, _ in approx.search("bitcoin", top_n=5, exact=True)}
+        approx_ids = {p["id"] for p, _ in approx.search("bitcoin", top_n=5)}
+        assert exact_ids == approx_ids
+
+
+def run() -> None:
+    test_tfidf_index_persists_and_updates_incrementally()
+    test_tfidf_filters_apply_to_candidates()
+    test_embedding_matrix_store_scores_and_reloads()
+    test_edited_prediction_is_reembedded_by_text_hash()
+    test_compute_embeddings_batches_retries_and_checkpoints()
+    test_local_hash_provider_is_deterministic()
+    test_ivf_index_matches_exact_search_on_clustered_data()
+    print("PASS: prediction similarity search checks")
+
+
+if __name__ == "__main__":
+    run()
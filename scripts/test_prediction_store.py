@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Regression tests for the shared SQLite prediction store."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import prediction_store  # noqa: E402
+from prediction_store import PredictionStore  # noqa: E402
+
+
+def _write_db(path: Path, predictions: list[dict], **top_level) -> None:
+    payload = dict(top_level)
+    payload["predictions"] = predictions
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _sample_predictions() -> list[dict]:
+    return [
+        {
+            "prediction_id": "NP-2026-0001",
+            "status": "OPEN",
+            "oracle_deadline": "2026-06-30",
+            "genre_tags": "geopolitics, economy",
+            "dynamics_tags": "平衡崩壊",
+            "article_slug": "taiwan-strait",
+        },
+        {
+            "prediction_id": "NP-2026-0002",
+            "status": "resolved",
+            "oracle_deadline": "2026-01-31",
+            "genre_tags": ["Crypto"],
+            "ghost_url": "https://nowpattern.com/en/btc-etf/",
+        },
+    ]
+
+
+def test_secondary_indexes_answer_queries() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = Path(tmpdir) / "prediction_db.json"
+        _write_db(json_path, _sample_predictions(), stats={"total": 2})
+        store = PredictionStore(str(json_path))
+        try:
+            assert store.count() == 2
+            assert [p["prediction_id"] for p in store.by_status("open")] == ["NP-2026-0001"]
+            assert [p["prediction_id"] for p in store.by_tag("genre", "crypto")] == ["NP-2026-0002"]
+            assert [p["prediction_id"] for p in store.by_tag("dynamics", "平衡崩壊")] == ["NP-2026-0001"]
+            assert [p["prediction_id"] for p in store.by_ghost_slug("btc-etf")] == ["NP-2026-0002"]
+            assert [p["prediction_id"] for p in store.due_between("2026-03-01", "2026-12-31")] == ["NP-2026-0001"]
+            assert store.load_db()["stats"] == {"total": 2}
+        finally:
+            store.close()
+
+
+def test_row_update_exports_compatible_json() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = Path(tmpdir) / "prediction_db.json"
+        _write_db(json_path, _sample_predictions(), stats={"total": 2})
+        store = PredictionStore(str(json_path))
+        try:
+            with store.batch():
+                store.update("NP-2026-0001", {"status": "RESOLVED", "brier_score": 0.04})
+                store.update("NP-2026-0002", {"resolution_question_ja": "質問"})
+            assert store.by_status("open") == []
+            exported = json.loads(json_path.read_text(encoding="utf-8"))
+            assert exported["stats"] == {"total": 2}
+            assert [p["prediction_id"] for p in exported["predictions"]] == ["NP-2026-0001", "NP-2026-0002"]
+            assert exported["predictions"][0]["brier_score"] == 0.04
+            assert exported["predictions"][1]["resolution_question_ja"] == "質問"
+            assert not store.is_stale()
+        finally:
+            store.close()
+
+
+def test_reimports_after_legacy_json_rewrite() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = Path(tmpdir) / "prediction_db.json"
+        _write_db(json_path, _sample_predictions())
+        store = PredictionStore(str(json_path))
+        try:
+            predictions = _sample_predictions() + [{"prediction_id": "NP-2026-0003", "status": "OPEN"}]
+            _write_db(json_path, predictions)
+            future = time.time() + 5
+            os.utime(json_path, (future, future))
+            assert store.is_stale()
+            assert store.sync_from_json() is True
+            assert store.get("NP-2026-0003") == {"prediction_id": "NP-2026-0003", "status": "OPEN"}
+        finally:
+            store.close()
+
+
+def test_duplicate_ids_survive_round_trip() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = Path(tmpdir) / "prediction_db.json"
+        dup = [{"prediction_id": "NP-2026-0001", "v": 1}, {"prediction_id": "NP-2026-0001", "v": 2}]
+        _write_db(json_path, dup)
+        store = PredictionStore(str(json_path))
+        try:
+            store.export_json()
+            exported = json.loads(json_path.read_text(encoding="utf-8"))
+            assert exported["predictions"] == dup
+        finally:
+            store.close()
+
+
+def test_single_updates_are_debounced_and_flushed() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = Path(tmpdir) / "prediction_db.json"
+        _write_db(json_path, _sample_predictions())
+        store = PredictionStore(str(json_path))
+        try:
+            store.update("NP-2026-0001", {"v": 1})  # 最初の書き込みは即 export
+            assert json.loads(json_path.read_text(encoding="utf-8"))["predictions"][0]["v"] == 1
+            store.update("NP-2026-0001", {"v": 2})
+            store.update("NP-2026-0002", {"v": 3})
+            exported = json.loads(json_path.read_text(encoding="utf-8"))["predictions"]
+            assert exported[0]["v"] == 1 and "v" not in exported[1]  # 窓内の更新はまとめて後で書く
+            assert store.get("NP-2026-0001")["v"] == 2
+            timer = store._flush_timer
+            assert timer is not None
+            store.flush()
+            timer.join(1)
+            assert not timer.is_alive()  # 手動 flush で待機中のタイマーも止まる
+            exported = json.loads(json_path.read_text(encoding="utf-8"))["predictions"]
+            assert [p.get("v") for p in exported] == [2, 3]
+        finally:
+            store.close()
+
+
+def test_export_merges_concurrent_legacy_write() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = Path(tmpdir) / "prediction_db.json"
+        _write_db(json_path, _sample_predictions(), stats={"total": 2})
+        store = PredictionStore(str(json_path))
+        orig = prediction_store.EXPORT_DEBOUNCE_SEC
+        prediction_store.EXPORT_DEBOUNCE_SEC = 3600
+        try:
+            store.update("NP-2026-0001", {"brier_score": 0.1})  # export 済み
+            store.update("NP-2026-0001", {"status": "RESOLVED"})  # 未 export
+            store.set_top_level("stats", {"total": 3})
+
+            # legacy スクリプトがその間にファイル全体を書き換える
+            legacy = json.loads(json_path.read_text(encoding="utf-8"))
+            legacy["predictions"].append({"prediction_id": "NP-2026-0003", "status": "OPEN"})
+            legacy["predictions"][1]["note"] = "legacy"
+            json_path.write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+            future = time.time() + 5
+            os.utime(json_path, (future, future))
+
+            store.flush()
+            exported = json.loads(json_path.read_text(encoding="utf-8"))
+            by_id = {p["prediction_id"]: p for p in exported["predictions"]}
+            assert set(by_id) == {"NP-2026-0001", "NP-2026-0002", "NP-2026-0003"}
+            assert by_id["NP-2026-0001"]["status"] == "RESOLVED" and by_id["NP-2026-0001"]["brier_score"] == 0.1
+            assert by_id["NP-2026-0002"]["note"] == "legacy"
+            assert exported["stats"] == {"total": 3}
+            assert not store.is_stale()
+        finally:
+            prediction_store.EXPORT_DEBOUNCE_SEC = orig
+            store.close()
+
+
+def test_pending_update_survives_import_by_another_process() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = Path(tmpdir) / "prediction_db.json"
+        _write_db(json_path, _sample_predictions())
+        store = PredictionStore(str(json_path))
+        orig = prediction_store.EXPORT_DEBOUNCE_SEC
+        prediction_store.EXPORT_DEBOUNCE_SEC = 3600
+        try:
+            store.update("NP-2026-0001", {"x": 1})  # export 済み
+            store.update("NP-2026-0001", {"x": 2})  # このプロセスではまだ export していない
+            store.set_top_level("stats", {"total": 2})
+
+            # 別プロセス: legacy スクリプトの書き換えを取り込む（DELETE + 再 INSERT）
+            script = (
+                "import json, os, sys, time\n"
+                "from prediction_store import PredictionStore\n"
+                "path = sys.argv[1]\n"
+                "data = json.load(open(path, encoding='utf-8'))\n"
+                "data['predictions'][1]['note'] = 'legacy'\n"
+                "json.dump(data, open(path, 'w', encoding='utf-8'))\n"
+                "future = time.time() + 5\n"
+                "os.utime(path, (future, future))\n"
+                "store = PredictionStore(path)\n"
+                "assert store.get('NP-2026-0001')['x'] == 2\n"
+                "store.close()\n"
+            )
+            subprocess.run([sys.executable, "-c", script, str(json_path)], cwd=SCRIPT_DIR, check=True)
+            assert not store.is_stale()  # 取り込み済み: このプロセスは再 import しない
+
+            store.flush()
+            exported = json.loads(json_path.read_text(encoding="utf-8"))
+            assert exported["predictions"][0]["x"] == 2
+            assert exported["predictions"][1]["note"] == "legacy"
+            assert exported["stats"] == {"total": 2}
+            assert not store._has_pending()
+        finally:
+            prediction_store.EXPORT_DEBOUNCE_SEC = orig
+            store.close()
+
+
+def run() -> None:
+    test_secondary_indexes_answer_queries()
+    test_row_update_exports_compatible_json()
+    test_reimports_after_legacy_json_rewrite()
+    test_duplicate_ids_survive_round_trip()
+    test_single_updates_are_debounced_and_flushed()
+    test_export_merges_concurrent_legacy_write()
+    test_pending_update_survives_import_by_another_process()
+    print("PASS: prediction store checks")
+
+
+if __name__ == "__main__":
+    run()
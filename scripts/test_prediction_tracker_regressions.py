@@ -820,6 +820,140 @@ def test_resolving_q2_deadline_promotes_to_in_play() -> None:
     assert ppb._is_tracker_in_play(row, ppb.date(2026, 4, 4)) is True
 
 
+def test_render_cache_rerenders_only_changed_cards() -> None:
+    calls: list[str] = []
+    original = ppb._build_card
+
+    def _fake_build_card(r, lang):
+        calls.append(r["prediction_id"])
+        return f"<div id='{r['prediction_id'].lower()}'>{r.get('linked_market_prob')}</div>"
+
+    row_a = {"source": "prediction_db", "prediction_id": "NP-2026-4001", "linked_market_prob": 0.4, "url": "https://nowpattern.com/a/"}
+    row_b = {"source": "prediction_db", "prediction_id": "NP-2026-4002", "linked_market_prob": 0.7, "url": "https://nowpattern.com/b/"}
+    ppb._build_card = _fake_build_card
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_path = str(Path(tmpdir) / "render_cache.json")
+            assert ppb.load_render_cache(cache_path) == 0
+            ppb._render_card_cached(row_a, "ja")
+            ppb._render_card_cached(row_b, "ja")
+            ppb.save_render_cache(cache_path, built_langs=["ja"])
+            assert calls == ["NP-2026-4001", "NP-2026-4002"], calls
+
+            # Next run: only the prediction whose market snapshot moved is re-rendered.
+            assert ppb.load_render_cache(cache_path) == 2
+            row_b_moved = dict(row_b, linked_market_prob=0.75)
+            html_a = ppb._render_card_cached(row_a, "ja")
+            html_b = ppb._render_card_cached(row_b_moved, "ja")
+            assert calls == ["NP-2026-4001", "NP-2026-4002", "NP-2026-4002"], calls
+            assert "0.4" in html_a and "0.75" in html_b
+            assert ppb._RENDER_CACHE_STATS == {"hit": 1, "miss": 1}
+
+            # Predictions no longer rendered for a built language are pruned on save.
+            ppb.load_render_cache(cache_path)
+            ppb._render_card_cached(row_a, "ja")
+            ppb.save_render_cache(cache_path, built_langs=["ja"])
+            assert ppb.load_render_cache(cache_path) == 1
+    finally:
+        ppb._build_card = original
+        ppb._RENDER_CACHE.clear()
+        ppb._RENDER_CACHE_TOUCHED.clear()
+
+
+def test_tracker_input_fingerprint_tracks_every_build_input() -> None:
+    pred_db = {"predictions": [{"prediction_id": "NP-2026-4001", "status": "open"}], "stats": {}}
+    embed = [{"id": "m1", "probability": 40}]
+    linked = {"NP-2026-4001": {"yes_prob": 0.4}}
+    posts = [{"id": "p1", "slug": "a", "updated_at": "2026-03-01T00:00:00.000Z"}]
+    today = ppb.date(2026, 3, 2)
+    base = ppb.tracker_input_fingerprint(pred_db, embed, linked, posts, "ja", today)
+
+    assert base == ppb.tracker_input_fingerprint(pred_db, embed, linked, list(reversed(posts)), "ja", today)
+    changed = [
+        ppb.tracker_input_fingerprint({"predictions": [], "stats": {}}, embed, linked, posts, "ja", today),
+        ppb.tracker_input_fingerprint(pred_db, [], linked, posts, "ja", today),
+        ppb.tracker_input_fingerprint(pred_db, embed, {"NP-2026-4001": {"yes_prob": 0.5}}, posts, "ja", today),
+        ppb.tracker_input_fingerprint(pred_db, embed, linked, [dict(posts[0], updated_at="x")], "ja", today),
+        ppb.tracker_input_fingerprint(pred_db, embed, linked, posts, "en", today),
+        ppb.tracker_input_fingerprint(pred_db, embed, linked, posts, "ja", ppb.date(2026, 3, 3)),
+    ]
+    assert base not in changed and len(set(changed)) == len(changed)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state_path = str(Path(tmpdir) / "build_state.json")
+        assert ppb.load_build_state(state_path) == {}
+        ppb.save_build_state({"ja": {"fp": base}}, state_path)
+        assert ppb.load_build_state(state_path)["ja"]["fp"] == base
+
+    assert ppb._tracker_inline_code("ja") is ppb._tracker_inline_code("ja")
+    assert "件</span>" in ppb._tracker_inline_code("ja") and "cards</span>" in ppb._tracker_inline_code("en")
+
+
+def _write_market_history_db(path: str, with_latest_table: bool) -> None:
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE markets (id INTEGER PRIMARY KEY, source TEXT, external_id TEXT, event_id TEXT,
+            question TEXT, close_date TEXT, market_slug TEXT, event_slug TEXT);
+        CREATE TABLE probability_snapshots (market_id INTEGER, snapshot_date TEXT, yes_prob REAL);
+        CREATE TABLE nowpattern_links (prediction_id TEXT, market_id INTEGER, source TEXT,
+            external_market_id TEXT, resolution_direction TEXT);
+    """)
+    conn.execute("INSERT INTO markets VALUES (7, 'polymarket', 'p7', 'E7', 'Fed cut?', '2026-06-30', 'fed', 'fed-event')")
+    conn.execute("INSERT INTO nowpattern_links VALUES ('NP-2026-0001', 7, 'polymarket', 'p7', 'optimistic')")
+    today = ppb.date.today()
+    rows = [(7, (today - ppb.timedelta(days=d)).isoformat(), 0.01 * (60 - d)) for d in range(60)]
+    conn.executemany("INSERT INTO probability_snapshots VALUES (?, ?, ?)", rows)
+    if with_latest_table:
+        conn.execute("CREATE TABLE latest_snapshot (market_id INTEGER PRIMARY KEY, snapshot_date TEXT, yes_prob REAL)")
+        conn.execute("INSERT INTO latest_snapshot VALUES (7, ?, 0.6)", (today.isoformat(),))
+    conn.commit()
+    conn.close()
+
+
+def test_linked_markets_use_latest_snapshot_and_series_is_compact() -> None:
+    original = ppb.MARKET_HISTORY_DB
+    try:
+        for with_latest_table in (True, False):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                ppb.MARKET_HISTORY_DB = str(Path(tmpdir) / "market_history.db")
+                _write_market_history_db(ppb.MARKET_HISTORY_DB, with_latest_table)
+                linked = ppb.load_linked_markets()["NP-2026-0001"]
+                assert linked["market_id"] == 7
+                assert abs(linked["yes_prob"] - 0.6) < 1e-9, linked
+                assert linked["snapshot_date"] == ppb.date.today().isoformat()
+
+                series = ppb.load_market_series([linked["market_id"]], days=30, max_points=10)[7]
+                assert len(series) == 10
+                assert series[-1] == [ppb.date.today().isoformat(), 60.0]
+                assert [p[0] for p in series] == sorted(p[0] for p in series)
+                assert ppb.load_market_series([7], days=30, max_points=1)[7] == [[ppb.date.today().isoformat(), 60.0]]
+                assert ppb.load_market_series([7], days=30, max_points=0)[7] == []
+    finally:
+        ppb.MARKET_HISTORY_DB = original
+
+
+def test_market_suggestions_only_cover_predictions_without_consensus() -> None:
+    original_db = ppb.MARKET_HISTORY_DB
+    ppb.MARKET_HISTORY_DB = ""
+    try:
+        embed_data = [{"title": "Fed June", "question": "Will the Fed cut rates in June?",
+                       "genres": ["economy"], "probability": 42, "outcomes": {"Yes": 42, "No": 58}}]
+        pred_db = {"predictions": [
+            {"prediction_id": "NP-1", "article_title": "Fed rate cut in June", "genre_tags": "economy"},
+            {"prediction_id": "NP-2", "article_title": "Fed rate cut in June", "genre_tags": "economy",
+             "market_consensus": {"pick": "YES", "question": "Will the Fed cut rates in June?"}},
+        ]}
+        matches = ppb.batch_match_markets(pred_db, embed_data)
+        assert matches["NP-1"]["polymarket"]["probability"] == 42
+        assert ppb.report_market_suggestions(pred_db, embed_data) == 1  # NP-2 は market_consensus 設定済み
+    finally:
+        ppb.MARKET_HISTORY_DB = original_db
+        ppb._MARKET_INDEX = None
+        ppb._MARKET_INDEX_SOURCE = None
+
+
 def run() -> None:
     test_anchor_href_lowercases_prediction_id()
     test_tracker_ui_gate_blocks_tracker_back_links()
@@ -845,6 +979,10 @@ def run() -> None:
     test_resolving_near_deadline_promotes_to_in_play()
     test_resolving_far_past_deadline_stays_awaiting()
     test_resolving_q2_deadline_promotes_to_in_play()
+    test_render_cache_rerenders_only_changed_cards()
+    test_tracker_input_fingerprint_tracks_every_build_input()
+    test_market_suggestions_only_cover_predictions_without_consensus()
+    test_linked_markets_use_latest_snapshot_and_series_is_compact()
     print("PASS: prediction tracker regression checks")
 
 
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Regression tests for the QA rules shared by qa_sentinel and ghost_webhook_server."""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import qa_rule_engine as qe  # noqa: E402
+
+MARKERS = "".join(f'<div class="{m}">x</div>' for m in qe.REQUIRED_MARKERS)
+
+
+def _legacy_count_cjk(text: str) -> int:
+    max_run = run = 0
+    for ch in text:
+        cp = ord(ch)
+        if (0x3000 <= cp <= 0x9FFF) or (0xF900 <= cp <= 0xFAFF) or (0xAC00 <= cp <= 0xD7AF):
+            run += 1
+            max_run = max(max_run, run)
+        else:
+            run = 0
+    return max_run
+
+
+def test_text_model_matches_legacy_checks() -> None:
+    rng = random.Random(7)
+    alphabet = "ab <>/日本語한국어。、漢字xyz"
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 300)))
+        assert qe.count_cjk(text) == _legacy_count_cjk(text)
+        assert qe.html_to_text(text) == re.sub(r"<[^>]+>", "", text)
+
+    html = f'<p>{"word " * 700}</p>{MARKERS}<a href="/predictions/">p</a>'
+    doc = qe.PostDoc.parse(html, slug="en-x", lang="en", tags=["nowpattern", "lang-en"])
+    assert doc.markers == frozenset(qe.REQUIRED_MARKERS) and doc.bad_pred_link
+    res = qe.evaluate(doc, qe.QAContext(pred_slugs=frozenset({"x"})))
+    assert res.missing_tags == ["deep-pattern"] and res.checks["pred_link_ok"] == 0
+    assert res.neo_issues == ["missing_oracle"] and res.checks["oracle_needed"] == 1
+
+    short = qe.evaluate(qe.PostDoc.parse("<p>短い</p>", lang="ja", tags=["nowpattern", "deep-pattern", "lang-ja"]))
+    assert short.neo_issues == ["article_too_short:2chars(min:5000)",
+                                "missing_sections:" + ",".join(qe.REQUIRED_MARKERS)]
+    rec = qe.new_health_record("p1", "s", "t", "ja", short)
+    assert rec["length_ok"] == 0 and qe.overall_ok(rec) == 0
+
+
+def test_prediction_link_fix_only_touches_flagged_links() -> None:
+    html = ('<a href="/predictions/">a</a><a href="__GHOST_URL__/predictions/">b</a>'
+            '<a href="/en/predictions/">c</a><a href="https://nowpattern.com/predictions/">d</a>'
+            '<p>/predictions/ in text</p>')
+    fixed = qe.fix_prediction_link(html)
+    assert fixed == ('<a href="/en/predictions/">a</a><a href="__GHOST_URL__/en/predictions/">b</a>'
+                     '<a href="/en/predictions/">c</a><a href="https://nowpattern.com/predictions/">d</a>'
+                     '<p>/predictions/ in text</p>')
+    assert qe.has_bad_prediction_link(html) and not qe.has_bad_prediction_link(fixed)
+
+
+def test_registered_rule_runs_for_every_caller() -> None:
+    @qe.rule("no_lorem")
+    def _no_lorem(doc, ctx, res):
+        if "lorem ipsum" in doc.text:
+            res.neo_issues.append("placeholder_text")
+
+    try:
+        res = qe.evaluate(qe.PostDoc.parse(f"<p>lorem ipsum</p>{MARKERS}" + "あ" * 5000, lang="ja",
+                                           tags=["nowpattern", "deep-pattern", "lang-ja"]))
+        assert res.neo_issues == ["placeholder_text"]
+    finally:
+        qe.RULES.pop()
+
+
+def test_save_neo_queue_merges_concurrent_writers() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "neo_task_queue.json")
+        a, b = qe.load_neo_queue(path), qe.load_neo_queue(path)
+        assert qe.enqueue_neo_with_prompt(a, "p1", "s1", "t", "ja", "missing_oracle", "fix")
+        assert not qe.enqueue_neo_with_prompt(a, "p1", "s1", "t", "ja", "missing_oracle", "fix")
+        qe.enqueue_neo_with_prompt(b, "p2", "s2", "t", "en", "cjk_contamination:60chars", "fix",
+                                   priority=2, source="batch_sentinel")
+        qe.save_neo_queue(a, path)
+        qe.save_neo_queue(b, path)  # b は a の追記を知らない
+        tasks = json.loads(Path(path).read_text(encoding="utf-8"))["tasks"]
+        assert [(t["post_id"], t["source"]) for t in tasks] == [("p1", "webhook_qa"), ("p2", "batch_sentinel")]
+        assert len(b["tasks"]) == 2
+
+
+def test_save_neo_queue_dedupes_open_issues_across_processes() -> None:
+    import multiprocessing
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "neo_task_queue.json")
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_enqueue_and_save, args=(path, i)) for i in range(6)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        tasks = json.loads(Path(path).read_text(encoding="utf-8"))["tasks"]
+        # 別プロセスが同じ記事の同じ問題を別 task_id で積んでも1件、各プロセス固有の問題は全件残る
+        assert sorted((t["post_id"], t["issue"]) for t in tasks) == sorted(
+            [("p1", "missing_oracle")] + [(f"p-{i}", "article_too_short") for i in range(6)])
+
+        # NEO が done にした問題は再び積める
+        done = qe.load_neo_queue(path)
+        done["tasks"] = [dict(t, status="done") if t["post_id"] == "p1" else t for t in done["tasks"]]
+        Path(path).write_text(json.dumps(done), encoding="utf-8")
+        fresh = qe.load_neo_queue(path)
+        assert qe.enqueue_neo_with_prompt(fresh, "p1", "s1", "t", "ja", "missing_oracle", "fix again")
+        qe.save_neo_queue(fresh, path)
+        tasks = json.loads(Path(path).read_text(encoding="utf-8"))["tasks"]
+        assert [t["status"] for t in tasks if t["post_id"] == "p1"] == ["done", "pending"]
+
+
+def _enqueue_and_save(path: str, i: int) -> None:
+    q = qe.load_neo_queue(path)
+    q["tasks"].append({"task_id": f"s1_missing_oracle_{i}", "post_id": "p1", "issue": "missing_oracle",
+                       "status": "pending"})
+    qe.enqueue_neo_with_prompt(q, f"p-{i}", f"s-{i}", "t", "ja", "article_too_short", "fix")
+    qe.save_neo_queue(q, path)
+
+
+def run() -> None:
+    test_text_model_matches_legacy_checks()
+    test_prediction_link_fix_only_touches_flagged_links()
+    test_registered_rule_runs_for_every_caller()
+    test_save_neo_queue_merges_concurrent_writers()
+    test_save_neo_queue_dedupes_open_issues_across_processes()
+    print("PASS: QA rule engine checks")
+
+
+if __name__ == "__main__":
+    run()
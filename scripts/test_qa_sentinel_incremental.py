@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Regression tests for the incremental nightly audit in qa_sentinel."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import qa_sentinel as qs  # noqa: E402
+
+MARKERS = "".join(f'<div class="{m}">x</div>' for m in qs.qa_rule_engine.REQUIRED_MARKERS)
+
+
+def _ghost_db(path: Path) -> sqlite3.Connection:
+    con = sqlite3.connect(path)
+    con.executescript("""
+        CREATE TABLE posts (id TEXT PRIMARY KEY, slug TEXT, title TEXT, html TEXT, feature_image TEXT,
+                            type TEXT, status TEXT, updated_at TEXT, published_at TEXT);
+        CREATE TABLE tags (id TEXT PRIMARY KEY, slug TEXT);
+        CREATE TABLE posts_tags (post_id TEXT, tag_id TEXT);
+    """)
+    con.executemany("INSERT INTO tags VALUES (?, ?)",
+                    [(s, s) for s in ("nowpattern", "deep-pattern", "lang-ja", "lang-en")])
+    posts = [
+        ("p1", "ja-ok", "あ" * 5200, "ja", "published"),
+        ("p2", "ja-short", "あ" * 100, "ja", "published"),
+        ("p3", "en-ok", "word " * 700, "en", "published"),
+        ("p4", "ja-draft", "あ" * 10, "ja", "draft"),
+    ]
+    for i, (pid, slug, body, lang, status) in enumerate(posts):
+        con.execute("INSERT INTO posts VALUES (?, ?, ?, ?, NULL, 'post', ?, '2026-03-01T00:00:00', ?)",
+                    (pid, slug, slug, f"<p>{body}</p>{MARKERS}", status, f"2026-03-0{i + 1}"))
+        for tag in ("nowpattern", "deep-pattern", f"lang-{lang}"):
+            con.execute("INSERT INTO posts_tags VALUES (?, ?)", (pid, tag))
+    con.commit()
+    return con
+
+
+def _run(report_dir: Path) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        qs.main()
+    report = next(report_dir.glob("qa_sentinel_*.json"))
+    return json.loads(report.read_text(encoding="utf-8"))
+
+
+def test_unchanged_clean_posts_are_skipped() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        ghost = _ghost_db(tmp / "ghost.db")
+        (tmp / "pred.json").write_text(json.dumps({"predictions": []}), encoding="utf-8")
+        audited: list[str] = []
+        orig = (qs.GHOST_DB, qs.HEALTH_DB, qs.REPORTS_DIR, qs.PRED_DB, qs.REPORT_ONLY, qs.WORKERS,
+                qs.evaluate_governed_release, qs.audit_post)
+
+        def recording_audit(task):
+            audited.append(task["post_id"])
+            return orig[7](task)
+
+        qs.GHOST_DB, qs.HEALTH_DB = str(tmp / "ghost.db"), str(tmp / "health.db")
+        qs.REPORTS_DIR, qs.PRED_DB = str(tmp / "reports"), str(tmp / "pred.json")
+        qs.REPORT_ONLY, qs.WORKERS = True, 1
+        qs.evaluate_governed_release = lambda **kwargs: {"errors": []}
+        qs.audit_post = recording_audit
+        try:
+            first = _run(tmp / "reports")
+            assert (first["total"], first["audited"], first["skipped"], first["passed"]) == (3, 3, 0, 2)
+
+            audited.clear()
+            second = _run(tmp / "reports")
+            assert audited == ["p2"]  # 不合格の記事だけ再監査
+            assert (second["skipped"], second["passed"]) == (2, 2)
+
+            # 本文の更新と prediction_db への追加はどちらも再監査のきっかけになる
+            ghost.execute("UPDATE posts SET html = html || '<p>edit</p>', updated_at = '2026-03-05' WHERE id = 'p1'")
+            ghost.commit()
+            (tmp / "pred.json").write_text(json.dumps({"predictions": [
+                {"ghost_url": "https://nowpattern.com/en/en-ok/"}]}), encoding="utf-8")
+            audited.clear()
+            third = _run(tmp / "reports")
+            assert sorted(audited) == ["p1", "p2", "p3"] and third["passed"] == 1
+            assert any(d["slug"] == "en-ok" and d["neo_issues"] == ["missing_oracle"] for d in third["issues"])
+
+            health = sqlite3.connect(tmp / "health.db")
+            skipped = [r[0] for r in health.execute("SELECT skipped FROM qa_runs ORDER BY run_id")]
+            assert skipped == [0, 2, 0]
+            assert health.execute("SELECT updated_at FROM article_health WHERE post_id = 'p1'").fetchone()[0] == "2026-03-05"
+        finally:
+            (qs.GHOST_DB, qs.HEALTH_DB, qs.REPORTS_DIR, qs.PRED_DB, qs.REPORT_ONLY, qs.WORKERS,
+             qs.evaluate_governed_release, qs.audit_post) = orig
+            ghost.close()
+
+
+def test_ghost_db_is_not_locked_while_fixes_are_applied() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "ghost.db"
+        ghost = _ghost_db(path)
+        ghost.close()
+        reader = sqlite3.connect(path)
+        reader.row_factory = sqlite3.Row
+        writer = sqlite3.connect(path, timeout=0)  # Ghost 本体の書き込み役（待たない）
+        all_post_tags = {row[0]: set() for row in reader.execute("SELECT id FROM posts")}
+        for pid, tag in reader.execute("SELECT post_id, tag_id FROM posts_tags"):
+            all_post_tags[pid].add(tag)
+        stats = {"total": 0, "skipped": 0}
+        orig = qs.AUDIT_PAGE_SIZE
+        qs.AUDIT_PAGE_SIZE = 2
+        try:
+            seen = []
+            for task in qs.iter_audit_tasks(reader, all_post_tags, set(), set(), {}, stats):
+                # 監査ループ中の Ghost Admin API 書き込みに相当（rollback journal でも BUSY にならない）
+                writer.execute("UPDATE posts SET title = title || '!' WHERE id = ?", (task["post_id"],))
+                writer.commit()
+                seen.append(task["post_id"])
+            assert seen == ["p1", "p2", "p3"] and stats["total"] == 3
+        finally:
+            qs.AUDIT_PAGE_SIZE = orig
+            reader.close()
+            writer.close()
+
+
+def test_source_check_epoch_expires_skip_fingerprints() -> None:
+    ttl = qs.SOURCE_CHECK_TTL_DAYS * 86400
+    now = 1_772_323_200
+    fp = lambda epoch: qs.audit_fingerprint("<p>x</p>", "", {"lang-ja"}, False, False, epoch)
+    for pid in ("p1", "p2", "6630f0c2a1b2c3d4e5f60718"):
+        assert qs.source_check_epoch(pid, now + ttl) == qs.source_check_epoch(pid, now) + 1
+        assert fp(qs.source_check_epoch(pid, now)) != fp(qs.source_check_epoch(pid, now + ttl))
+    # 記事ごとに切り替わる時刻をずらす（TTL 境界で全件一斉に再監査しない）
+    rollovers = set()
+    for i in range(50):
+        pid = f"post-{i}"
+        base = qs.source_check_epoch(pid, now)
+        rollovers.add(next(h for h in range(0, ttl // 3600 + 2) if qs.source_check_epoch(pid, now + h * 3600) != base))
+    assert len(rollovers) > 10
+
+
+def test_rule_engine_changes_invalidate_fingerprints() -> None:
+    engine = qs.qa_rule_engine
+    fp = lambda: qs.audit_fingerprint("<p>x</p>", "", {"lang-en"}, False, False)
+    base = fp()
+    for name, value in (("MIN_LEN_EN", engine.MIN_LEN_EN + 1), ("CJK_MAX_EN", engine.CJK_MAX_EN - 1),
+                        ("RULES_VERSION", engine.RULES_VERSION + 1)):
+        orig = getattr(engine, name)
+        setattr(engine, name, value)
+        try:
+            assert fp() != base, name  # しきい値・ルール版の変更で前回合格の記事も再監査
+        finally:
+            setattr(engine, name, orig)
+    assert fp() == base
+
+
+def test_process_pool_matches_inline_results() -> None:
+    html = f"<p>{'word ' * 700}</p>{MARKERS}"
+    tasks = [{
+        "post_id": f"p{i}", "slug": f"en-{i}", "title": "t", "html": html + ("日本語" * 20 * (i % 2)),
+        "lang": "en", "tags": ["deep-pattern", "lang-en", "nowpattern"],
+        "feature_image": "ja.jpg" if i == 3 else "", "updated_at": "", "content_hash": "",
+    } for i in range(12)]
+    orig = qs.evaluate_governed_release
+    qs.evaluate_governed_release = lambda **kwargs: {"errors": []}
+    try:
+        def strip(result):
+            rec = dict(result["rec"])
+            rec.pop("checked_at")
+            return rec, result["neo_issues"]
+
+        ctx = qs.qa_rule_engine.QAContext(ja_images=frozenset({"ja.jpg"}))
+        inline = {t["post_id"]: strip(r) for t, r in qs.iter_audits(iter(tasks), ctx, workers=1)}
+        pooled = {t["post_id"]: strip(r) for t, r in qs.iter_audits(iter(tasks), ctx, workers=2)}
+    finally:
+        qs.evaluate_governed_release = orig
+    assert pooled == inline and len(pooled) == 12
+    assert inline["p1"][1] == ["cjk_contamination:60chars"] and inline["p3"][0]["image_ok"] == 0
+
+
+def run() -> None:
+    test_unchanged_clean_posts_are_skipped()
+    test_ghost_db_is_not_locked_while_fixes_are_applied()
+    test_source_check_epoch_expires_skip_fingerprints()
+    test_rule_engine_changes_invalidate_fingerprints()
+    test_process_pool_matches_inline_results()
+    print("PASS: qa_sentinel incremental audit checks")
+
+
+if __name__ == "__main__":
+    run()
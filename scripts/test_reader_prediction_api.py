@@ -236,6 +236,85 @@ def test_human_competition_snapshot_turns_live_at_threshold():
     assert snap["state"] == "live_human_ranking"
 
 
+def test_materialized_counters_match_raw_votes():
+    """vote() counters + stats-bulk must equal a naive human-only recount (FastAPI only)."""
+    if not _module_available:
+        print("    (skipped - FastAPI not available locally)")
+        return
+    import tempfile
+    import reader_prediction_api as api
+    from fastapi.testclient import TestClient
+
+    old_db_path = api.DB_PATH
+    with tempfile.TemporaryDirectory() as tmpdir:
+        api.DB_PATH = os.path.join(tmpdir, "reader_predictions.db")
+        api.STATS_BULK_CACHE.update({"version": None, "body": None})
+        try:
+            api.init_db()
+            client = TestClient(api.app)
+            votes = [
+                ("NP-2026-0001", "human-a-000000", "optimistic", 70),
+                ("NP-2026-0001", "human-b-000000", "pessimistic", 25),
+                ("NP-2026-0001", "neo-one-ai-player", "base", 50),
+                ("NP-2026-0001", "human-a-000000", "base", 55),   # human-a changes scenario
+                ("NP-2026-0002", "test-uuid-12345", "base", 40),  # synthetic only
+            ]
+            for pid, uid, scenario, prob in votes:
+                resp = client.post("/reader-predict/vote", json={
+                    "prediction_id": pid, "voter_uuid": uid, "scenario": scenario, "probability": prob,
+                })
+                assert resp.status_code == 200, resp.text
+
+            bulk = client.get("/reader-predict/stats-bulk")
+            assert bulk.status_code == 200
+            body = bulk.json()
+            assert list(body) == ["NP-2026-0001"], body
+            stats = body["NP-2026-0001"]
+            assert stats["total"] == 2
+            assert stats["distribution"]["base"] == {"count": 1, "avg_probability": 55, "pct": 50}
+            assert stats["distribution"]["optimistic"]["count"] == 0
+            assert stats["avg_probability"] == 40
+
+            etag = bulk.headers["etag"]
+            cached = client.get("/reader-predict/stats-bulk", headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+
+            # Rebuild from raw votes yields the same counters.
+            import sqlite3
+            con = sqlite3.connect(api.DB_PATH)
+            before = sorted(con.execute("SELECT * FROM reader_vote_counters WHERE vote_count > 0").fetchall())
+            api.rebuild_vote_counters(con)
+            after = sorted(con.execute("SELECT * FROM reader_vote_counters").fetchall())
+            con.close()
+            assert before == after, (before, after)
+        finally:
+            api.DB_PATH = old_db_path
+
+
+def test_db_pool_reuses_configured_connections():
+    """db() hands back the same WAL connection instead of reconnecting (FastAPI only)."""
+    if not _module_available:
+        print("    (skipped - FastAPI not available locally)")
+        return
+    import tempfile
+    import reader_prediction_api as api
+
+    old_db_path = api.DB_PATH
+    with tempfile.TemporaryDirectory() as tmpdir:
+        api.DB_PATH = os.path.join(tmpdir, "reader_predictions.db")
+        try:
+            with api.db() as con:
+                first = con
+                assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+                assert con.execute("PRAGMA busy_timeout").fetchone()[0] == api.DB_BUSY_TIMEOUT_MS
+            with api.db(immediate=True) as con:
+                assert con is first
+                assert con.in_transaction
+        finally:
+            api._DB_POOLS.pop(api.DB_PATH, None)
+            api.DB_PATH = old_db_path
+
+
 # ── Runner ───────────────────────────────────────────────────────────────────
 
 def main():
@@ -253,6 +332,8 @@ def main():
         test_my_stats_unaffected,
         test_human_competition_snapshot_stays_beta_below_threshold,
         test_human_competition_snapshot_turns_live_at_threshold,
+        test_materialized_counters_match_raw_votes,
+        test_db_pool_reuses_configured_connections,
     ]
     passed = 0
     failed = 0
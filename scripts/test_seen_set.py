@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Regression tests for the rolling seen-set shared by the pollers."""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import seen_set as ss  # noqa: E402
+
+HOUR = 3600
+T0 = 1_772_323_200  # 2026-03-01T00:00Z
+
+
+def test_membership_and_bucket_expiry() -> None:
+    now = [T0 + 10]
+    seen = ss.RollingSeenSet(window_sec=24 * HOUR, clock=lambda: now[0], bloom_bits=4096)
+    assert seen.add("https://a.example/1") is True
+    assert seen.add("https://a.example/1") is False
+    now[0] = T0 + 5 * HOUR
+    seen.add("https://a.example/2")
+    assert "https://a.example/1" in seen and "https://a.example/3" not in seen
+
+    now[0] = T0 + 25 * HOUR + 60  # bucket of /1 is past the window, /2 is not
+    assert "https://a.example/1" not in seen  # expired even before expire() runs
+    assert seen.expire() == 1 and len(seen) == 1 and len(seen.buckets) == 1
+    assert "https://a.example/2" in seen
+    assert seen.first_seen("https://a.example/2") == (T0 + 5 * HOUR, False)
+    assert seen.first_seen("https://a.example/4") == (T0 + 25 * HOUR, True)
+    now[0] += 1800
+    assert seen.first_seen("https://a.example/4") == (T0 + 25 * HOUR, False)
+
+
+def test_compact_roundtrip_and_legacy_migration() -> None:
+    now = T0 + 12 * HOUR
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "breaking_seen.json")
+        legacy = {f"https://news.example/{i}": "2026-03-01T0{}:30:00".format(i % 10) for i in range(50)}
+        legacy["https://news.example/old"] = "2026-02-27T00:00:00"
+        Path(path).write_text(json.dumps(legacy, indent=2), encoding="utf-8")
+
+        seen = ss.RollingSeenSet.load(path, clock=lambda: now)
+        assert len(seen) == 50 and "https://news.example/old" not in seen
+        assert seen.first_seen("https://news.example/3")[0] == T0 + 3 * HOUR
+        seen.save(path)
+
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        assert data["version"] == ss.FORMAT_VERSION and len(data["buckets"]) == 10
+        assert not list(Path(tmpdir).glob("*.tmp"))
+        reloaded = ss.RollingSeenSet.load(path, clock=lambda: now)
+        assert reloaded.index == seen.index
+        assert all(url in reloaded for url in legacy if not url.endswith("old"))
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom = ss.BloomFilter(8192)
+    keys = [ss.hash_key(f"k{i}") for i in range(500)]
+    for h in keys:
+        bloom.add(h)
+    assert all(h in bloom for h in keys)
+    misses = sum(ss.hash_key(f"other{i}") in bloom for i in range(2000))
+    assert misses < 200
+
+
+def run() -> None:
+    test_membership_and_bucket_expiry()
+    test_compact_roundtrip_and_legacy_migration()
+    test_bloom_filter_has_no_false_negatives()
+    print("PASS: seen-set checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Regression tests for the incremental sharded sitemaps."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import sitemap_engine as se  # noqa: E402
+from article_index import ArticleIndex  # noqa: E402
+
+
+def _article(article_id: str, published: datetime, genre=()) -> dict:
+    return {"id": article_id, "mode": "speed_log", "title_ja": f"{article_id} & ]]> 記事",
+            "url": f"https://nowpattern.com/{article_id}/?a=1&b=2", "published_at": published.isoformat(),
+            "genre_tags": list(genre), "dynamics_tags": []}
+
+
+def _locs(path: Path) -> list[str]:
+    return re.findall(r"<loc>(.*?)</loc>", path.read_text(encoding="utf-8"))
+
+
+def test_only_the_new_articles_month_is_rewritten() -> None:
+    now = datetime(2026, 3, 10, 12, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        index = ArticleIndex.load(str(out / "index.json"))
+        for i in range(1500):  # 旧実装の max_articles=1000 を超えるアーカイブ
+            index.add(_article(f"old{i}", datetime(2025, 11, 1, tzinfo=timezone.utc) + timedelta(hours=i)))
+        index.add(_article("recent", now - timedelta(hours=47), ["geopolitics", "energy"]))
+        index.save()
+        engine = se.SitemapEngine(tmpdir)
+        first = engine.update(index, now=now)
+        assert first["rewritten_months"] == ["2025-11", "2025-12", "2026-01", "2026-03"]
+        assert first["urls"] == 1501 and first["news_urls"] == 1
+
+        assert _locs(out / "sitemap.xml") == [f"https://nowpattern.com/sitemap-articles-{m}.xml"
+                                              for m in ("2026-03", "2026-01", "2025-12", "2025-11")]
+        assert "<sitemapindex" in (out / "sitemap.xml").read_text(encoding="utf-8")
+        assert len(_locs(out / "sitemap-articles-2025-11.xml")) == 720
+        assert _locs(out / "sitemap-news.xml") == ["https://nowpattern.com/recent/?a=1&amp;b=2"]
+        news = (out / "sitemap-news.xml").read_text(encoding="utf-8")
+        assert "<![CDATA[recent & ]]&gt; 記事]]>" in news and "geopolitics, energy" in news
+
+        old_mtime = os.stat(out / "sitemap-articles-2025-11.xml").st_mtime_ns
+        os.utime(out / "sitemap-articles-2025-11.xml", ns=(1, 1))
+        index.add(_article("new", now))
+        index.save()
+        second = engine.update(index, now=now + timedelta(hours=2))
+        assert second["rewritten_months"] == ["2026-03"]
+        assert os.stat(out / "sitemap-articles-2025-11.xml").st_mtime_ns == 1 != old_mtime
+        assert len(_locs(out / "sitemap-articles-2026-03.xml")) == 2
+        assert [u.split("/")[3] for u in _locs(out / "sitemap-news.xml")] == ["new"]  # 48h 窓から recent が外れる
+
+        # 消えたシャードは次の更新で書き戻す。変更が無ければ何も書き直さない
+        (out / "sitemap-articles-2025-12.xml").unlink()
+        assert engine.update(index, now=now)["rewritten_months"] == ["2025-12"]
+        assert engine.update(index, now=now)["rewritten_months"] == []
+        assert not list(out.glob("*.tmp"))
+
+
+def test_backfilled_same_time_and_edited_articles_are_picked_up() -> None:
+    now = datetime(2026, 3, 10, 12, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        path = str(out / "index.json")
+        index = ArticleIndex.load(path)
+        for i, month in enumerate((1, 2, 3)):
+            index.add(_article(f"a{i}", datetime(2026, month, 5, tzinfo=timezone.utc)))
+        index.save()
+        engine = se.SitemapEngine(tmpdir)
+        assert engine.update(ArticleIndex.load(path), now=now)["rewritten_months"] == ["2026-01", "2026-02", "2026-03"]
+
+        # 過去日付の追加（バックフィル）と、最新記事と同じ published_at の記事
+        index = ArticleIndex.load(path)
+        index.add(_article("backfill", datetime(2026, 1, 20, tzinfo=timezone.utc)))
+        index.add(_article("same-time", datetime(2026, 3, 5, tzinfo=timezone.utc)))
+        index.save()
+        assert engine.update(ArticleIndex.load(path), now=now)["rewritten_months"] == ["2026-01", "2026-03"]
+        assert len(_locs(out / "sitemap-articles-2026-01.xml")) == 2
+
+        # URL の修正は同じ記事の改訂として書き込まれ、その月だけ書き直す
+        index = ArticleIndex.load(path)
+        edited = dict(index.get("a1"), url="https://nowpattern.com/a1-renamed/")
+        index.add(edited)
+        index.save()
+        index = ArticleIndex.load(path)
+        assert len(index) == 5 and index.get("a1")["url"].endswith("/a1-renamed/")
+        assert engine.update(index, now=now)["rewritten_months"] == ["2026-02"]
+        assert _locs(out / "sitemap-articles-2026-02.xml") == ["https://nowpattern.com/a1-renamed/"]
+        assert engine.update(index, now=now)["rewritten_months"] == []
+
+        # watermark 時代の state は一度だけ全件書き直す
+        state = engine.load_state()
+        state.pop("seq")
+        state["watermark"] = "2026-03-05"
+        (out / se.STATE_NAME).write_text(json.dumps(state), encoding="utf-8")
+        assert engine.update(index, now=now)["rewritten_months"] == ["2026-01", "2026-02", "2026-03"]
+        assert "watermark" not in engine.load_state()
+
+
+def test_large_month_splits_into_parts() -> None:
+    orig = se.MAX_URLS_PER_SHARD
+    se.MAX_URLS_PER_SHARD = 100
+    try:
+        index = ArticleIndex()
+        base = datetime(2026, 2, 1, tzinfo=timezone.utc)
+        for i in range(250):
+            index.add(_article(f"a{i}", base + timedelta(minutes=i)))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = se.SitemapEngine(tmpdir)
+            engine.update(index, now=base)
+            names = [u.rsplit("/", 1)[-1] for u in _locs(Path(tmpdir) / "sitemap.xml")]
+            assert names == ["sitemap-articles-2026-02.xml", "sitemap-articles-2026-02-2.xml",
+                             "sitemap-articles-2026-02-3.xml"]
+            se.MAX_URLS_PER_SHARD = 200
+            engine.update(index, now=base, full=True)
+            assert not (Path(tmpdir) / "sitemap-articles-2026-02-3.xml").exists()
+    finally:
+        se.MAX_URLS_PER_SHARD = orig
+
+
+def run() -> None:
+    test_only_the_new_articles_month_is_rewritten()
+    test_backfilled_same_time_and_edited_articles_are_picked_up()
+    test_large_month_splits_into_parts()
+    print("PASS: sitemap engine checks")
+
+
+if __name__ == "__main__":
+    run()
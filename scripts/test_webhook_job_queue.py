@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Regression tests for the durable webhook job queue and worker pool."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import webhook_job_queue as wjq  # noqa: E402
+
+
+def test_burst_is_coalesced_and_debounced() -> None:
+    now = [1000.0]
+    queue = wjq.WebhookJobQueue(":memory:", debounce_sec=10, max_wait_sec=30, clock=lambda: now[0])
+    first = queue.enqueue("p1", "qa", "post.published", {"slug": "a"})
+    now[0] += 5
+    assert queue.enqueue("p1", "qa", "post.published.edited", {"slug": "a2"}) == first
+    queue.enqueue("p1", "tag_check", "post.edited", {"slug": "a2"})
+    assert queue.stats()["depth"] == 2 and queue.stats()["pending_events"] == 3
+
+    now[0] += 9  # 2 件目から 9 秒 → まだ debounce 中
+    assert queue.claim() is None
+    now[0] += 1.5
+    job = queue.claim()
+    assert job["id"] == first and job["events"] == 2
+    assert job["event"] == "post.published.edited" and job["payload"] == {"slug": "a2"}
+
+    # 編集が続いても最初のイベントから max_wait_sec で必ず実行される
+    for _ in range(10):
+        now[0] += 5
+        queue.enqueue("p2", "qa", "post.published.edited", {})
+    assert queue.stats()["due"] >= 1
+
+
+def test_same_post_never_runs_twice_and_restart_recovers() -> None:
+    now = [1000.0]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = str(Path(tmpdir) / "jobs.db")
+        queue = wjq.WebhookJobQueue(path, debounce_sec=0, clock=lambda: now[0])
+        queue.enqueue("p1", "qa", "post.published")
+        running = queue.claim()
+        queue.enqueue("p1", "qa", "post.published.edited")   # 実行中に来た → 新しいジョブ
+        queue.enqueue("p1", "tag_check", "post.edited")
+        queue.enqueue("p2", "qa", "post.published")
+        assert queue.claim()["post_id"] == "p2"
+        assert queue.claim() is None  # p1 は実行中なので待つ
+        queue.close()
+
+        # クラッシュ後の再起動: running だった p1/qa は新しい pending に吸収される
+        queue = wjq.WebhookJobQueue(path, debounce_sec=0, clock=lambda: now[0])
+        assert queue.recover() == 1  # p2
+        stats = queue.stats()
+        assert stats["depth"] == 3 and stats["running"] == 0
+        claimed = {(j["post_id"], j["kind"]) for j in iter(queue.claim, None)}
+        assert claimed == {("p1", "qa"), ("p2", "qa")}
+        old = queue.conn.execute("SELECT status, error FROM jobs WHERE id = ?", (running["id"],)).fetchone()
+        assert tuple(old) == ("failed", "superseded after restart")
+        queue.close()
+
+
+def test_worker_pool_parallel_across_posts_and_stats() -> None:
+    queue = wjq.WebhookJobQueue(":memory:", debounce_sec=0)
+    active: dict[str, int] = {}
+    peak = {"total": 0, "per_post": 0}
+    lock = threading.Lock()
+
+    def handler(job):
+        with lock:
+            active[job["post_id"]] = active.get(job["post_id"], 0) + 1
+            peak["total"] = max(peak["total"], sum(active.values()))
+            peak["per_post"] = max(peak["per_post"], active[job["post_id"]])
+        time.sleep(0.1)
+        with lock:
+            active[job["post_id"]] -= 1
+        if job["post_id"] == "bad":
+            raise RuntimeError("boom")
+
+    pool = wjq.WorkerPool(queue, handler, workers=4, poll_interval=0.05, log=lambda msg: None).start()
+    started = time.monotonic()
+    for post in ("p1", "p2", "p3", "bad"):
+        queue.enqueue(post, "qa")
+        queue.enqueue(post, "tag_check")
+    pool.notify()
+    while queue.stats()["depth"] or queue.stats()["running"]:
+        assert time.monotonic() - started < 3
+        time.sleep(0.02)
+    pool.stop()
+
+    assert peak["per_post"] == 1 and peak["total"] >= 3
+    assert time.monotonic() - started < 0.6  # 8 件 × 0.1s を 4 並列
+    stats = queue.stats()
+    assert stats["done"] == 6 and stats["failed"] == 2
+    assert stats["latency_p95_sec"] >= stats["run_p50_sec"] >= 0.09
+
+
+def run() -> None:
+    test_burst_is_coalesced_and_debounced()
+    test_same_post_never_runs_twice_and_restart_recovers()
+    test_worker_pool_parallel_across_posts_and_stats()
+    print("PASS: webhook job queue checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Durable job queue + worker pool for ghost_webhook_server.
+
+ghost_webhook_server used to run the whole QA pipeline (Ghost API calls,
+thumbnail generation, NEO delegation, X posting) inline inside do_POST on a
+single-threaded HTTPServer. One slow post blocked every webhook behind it,
+and Ghost fires post.edited / post.published.edited in bursts while an
+article is being saved, so the same post was audited several times in a row.
+
+WebhookJobQueue stores jobs in SQLite (WAL) so nothing is lost on restart:
+
+- enqueue() is an upsert on (post_id, kind) among *pending* jobs: a burst of
+  events for one post collapses into one job whose start is pushed back by
+  `debounce_sec` on every new event (capped at `max_wait_sec` after the first
+  event, so a post that is edited continuously still gets checked).
+- claim() hands out the oldest due job and never a job for a post that
+  already has a running job; different posts run in parallel.
+- An event that arrives while its post is running creates a new pending job,
+  so the post is re-checked against the newer content.
+- recover() puts jobs left `running` by a crash back to pending.
+- stats() reports queue depth and latency percentiles (GET /queue).
+
+WorkerPool runs `handler(job)` on N threads and marks each job done/failed.
+
+Usage:
+  python3 webhook_job_queue.py [/opt/shared/webhook_jobs.db]   # stats JSON
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+DEFAULT_DB = "/opt/shared/webhook_jobs.db"
+DEFAULT_DEBOUNCE_SEC = 10.0
+DEFAULT_MAX_WAIT_SEC = 60.0
+DEFAULT_WORKERS = 4
+STATS_WINDOW_SEC = 3600       # 完了ジョブのレイテンシ集計対象
+KEEP_FINISHED_SEC = 7 * 86400  # done/failed の保持期間
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    post_id     TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    event       TEXT NOT NULL DEFAULT '',
+    payload     TEXT NOT NULL DEFAULT '{}',
+    status      TEXT NOT NULL DEFAULT 'pending',   -- pending / running / done / failed
+    received_at REAL NOT NULL,                     -- 最初のイベント受信時刻
+    updated_at  REAL NOT NULL,                     -- 最後のイベント受信時刻
+    not_before  REAL NOT NULL,                     -- debounce 後の実行可能時刻
+    events      INTEGER NOT NULL DEFAULT 1,        -- まとめたイベント数
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    started_at  REAL,
+    finished_at REAL,
+    error       TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending_key ON jobs(post_id, kind) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS jobs_status_due ON jobs(status, not_before);
+CREATE INDEX IF NOT EXISTS jobs_status_finished ON jobs(status, finished_at);
+"""
+
+
+def _percentile(sorted_values: list[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return round(sorted_values[idx], 3)
+
+
+class WebhookJobQueue:
+    """SQLite-backed queue; one connection shared by the HTTP and worker threads."""
+
+    def __init__(self, path: str = DEFAULT_DB, debounce_sec: float = DEFAULT_DEBOUNCE_SEC,
+                 max_wait_sec: float = DEFAULT_MAX_WAIT_SEC, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.debounce_sec = debounce_sec
+        self.max_wait_sec = max(max_wait_sec, debounce_sec)
+        self.clock = clock
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def enqueue(self, post_id: str, kind: str, event: str = "", payload: Optional[dict] = None,
+                debounce_sec: Optional[float] = None) -> int:
+        """Add (or coalesce into) the pending job for (post_id, kind); returns the job id."""
+        now = self.clock()
+        delay = self.debounce_sec if debounce_sec is None else debounce_sec
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                """
+                INSERT INTO jobs (post_id, kind, event, payload, received_at, updated_at, not_before)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(post_id, kind) WHERE status = 'pending' DO UPDATE SET
+                    event      = excluded.event,
+                    payload    = excluded.payload,
+                    updated_at = excluded.updated_at,
+                    not_before = MAX(jobs.not_before,
+                                     MIN(excluded.not_before, jobs.received_at + ?)),
+                    events     = jobs.events + 1
+                RETURNING id
+                """,
+                (post_id, kind, event, json.dumps(payload or {}, ensure_ascii=False),
+                 now, now, now + delay, self.max_wait_sec),
+            ).fetchone()
+        return int(row[0])
+
+    def claim(self) -> Optional[dict]:
+        """Mark the oldest due job running and return it (None if nothing is due)."""
+        now = self.clock()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                """
+                SELECT * FROM jobs AS j
+                WHERE j.status = 'pending' AND j.not_before <= ?
+                  AND NOT EXISTS (SELECT 1 FROM jobs AS r
+                                  WHERE r.status = 'running' AND r.post_id = j.post_id)
+                ORDER BY j.not_before, j.id
+                LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (now, row["id"]),
+            )
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"] or "{}")
+        job["status"] = "running"
+        job["started_at"] = now
+        job["attempts"] += 1
+        return job
+
+    def complete(self, job_id: int, error: Optional[str] = None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                ("failed" if error else "done", self.clock(), error, job_id),
+            )
+
+    def next_due(self) -> Optional[float]:
+        """not_before of the earliest pending job (None if the queue is empty)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MIN(not_before) FROM jobs WHERE status = 'pending'"
+            ).fetchone()
+        return row[0]
+
+    def recover(self) -> int:
+        """Requeue jobs left running by a previous process; returns how many."""
+        with self._lock, self.conn:
+            # 同じ (post_id, kind) の pending が既にあればそちらが新しい内容をカバーする
+            self.conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', finished_at = ?, error = 'superseded after restart'
+                WHERE status = 'running' AND EXISTS (
+                    SELECT 1 FROM jobs AS p
+                    WHERE p.status = 'pending' AND p.post_id = jobs.post_id AND p.kind = jobs.kind)
+                """,
+                (self.clock(),),
+            )
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = 'pending', started_at = NULL WHERE status = 'running'"
+            )
+        return cur.rowcount
+
+    def prune(self, keep_sec: float = KEEP_FINISHED_SEC) -> int:
+        cutoff = self.clock() - keep_sec
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)
+            )
+        return cur.rowcount
+
+    def stats(self, window_sec: float = STATS_WINDOW_SEC) -> dict:
+        now = self.clock()
+        with self._lock:
+            counts = dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall())
+            due, oldest, pending_events = self.conn.execute(
+                """
+                SELECT COALESCE(SUM(not_before <= ?), 0), MIN(received_at), COALESCE(SUM(events), 0)
+                FROM jobs WHERE status = 'pending'
+                """,
+                (now,),
+            ).fetchone()
+            finished = self.conn.execute(
+                """
+                SELECT status, started_at - received_at, finished_at - started_at,
+                       finished_at - received_at, events
+                FROM jobs WHERE status IN ('done', 'failed') AND finished_at >= ?
+                """,
+                (now - window_sec,),
+            ).fetchall()
+        waits = sorted(r[1] for r in finished)
+        runs = sorted(r[2] for r in finished)
+        totals = sorted(r[3] for r in finished)
+        return {
+            "depth": counts.get("pending", 0),
+            "due": int(due),
+            "running": counts.get("running", 0),
+            "pending_events": int(pending_events),
+            "oldest_pending_age_sec": round(now - oldest, 3) if oldest is not None else None,
+            "window_sec": window_sec,
+            "done": sum(1 for r in finished if r[0] == "done"),
+            "failed": sum(1 for r in finished if r[0] == "failed"),
+            "coalesced_events": sum(r[4] - 1 for r in finished),
+            "wait_p50_sec": _percentile(waits, 0.50),
+            "wait_p95_sec": _percentile(waits, 0.95),
+            "run_p50_sec": _percentile(runs, 0.50),
+            "run_p95_sec": _percentile(runs, 0.95),
+            "latency_p50_sec": _percentile(totals, 0.50),
+            "latency_p95_sec": _percentile(totals, 0.95),
+            "latency_max_sec": round(totals[-1], 3) if totals else None,
+        }
+
+
+class WorkerPool:
+    """N threads that claim jobs and run `handler(job)`; exceptions mark the job failed."""
+
+    def __init__(self, queue: WebhookJobQueue, handler: Callable[[dict], None],
+                 workers: int = DEFAULT_WORKERS, poll_interval: float = 1.0,
+                 prune_every_sec: float = 3600, log: Callable[[str], None] = print):
+        self.queue = queue
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.prune_every_sec = prune_every_sec
+        self.log = log
+        self._wake = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._last_prune = 0.0
+
+    def start(self) -> "WorkerPool":
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"webhook-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def notify(self):
+        """Wake idle workers (call after enqueue)."""
+        with self._wake:
+            self._wake.notify_all()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self.notify()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _idle_wait(self):
+        timeout = self.poll_interval
+        due = self.queue.next_due()
+        if due is not None:
+            timeout = min(timeout, max(0.0, due - self.queue.clock()) + 0.01)
+        with self._wake:
+            if not self._stop.is_set():
+                self._wake.wait(timeout)
+
+    def _maybe_prune(self):
+        now = time.monotonic()
+        if now - self._last_prune < self.prune_every_sec:
+            return
+        self._last_prune = now
+        try:
+            self.queue.prune()
+        except sqlite3.Error as e:
+            self.log(f"[Worker] prune failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error as e:
+                self.log(f"[Worker] claim failed: {e}")
+                job = None
+            if job is None:
+                self._maybe_prune()
+                self._idle_wait()
+                continue
+            error = None
+            try:
+                self.handler(job)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                self.log(f"[Worker] {job['kind']} error for {job['post_id']}: {e}\n{traceback.format_exc()}")
+            try:
+                self.queue.complete(job["id"], error)
+            except sqlite3.Error as e:
+                self.log(f"[Worker] complete failed for job {job['id']}: {e}")
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB
+    if not os.path.exists(path):
+        print(f"not found: {path}")
+        sys.exit(1)
+    print(json.dumps(WebhookJobQueue(path).stats(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
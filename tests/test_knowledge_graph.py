@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+tests/test_knowledge_graph.py
+KnowledgeGraph — 隣接マップ・冪等更新・一括再計算・旧形式の読み込み
+
+実行方法:
+    python tests/test_knowledge_graph.py
+    python -m pytest tests/test_knowledge_graph.py -v
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from knowledge_engine.knowledge_graph import KnowledgeGraph
+
+PREDICTIONS = [
+    {"id": "P1", "tags": ["地政学", "対立の螺旋", "同盟の亀裂"], "result": "HIT", "brier_score": 0.09},
+    {"id": "P2", "tags": ["経済", "対立の螺旋", "制度の劣化"], "result": "MISS", "brier_score": 0.49},
+    {"id": "P3", "tags": ["地政学", "対立の螺旋"], "result": None, "brier_score": None},
+]
+
+
+def _graph(tmpdir: str) -> KnowledgeGraph:
+    return KnowledgeGraph(str(Path(tmpdir) / "knowledge_graph.json"))
+
+
+def test_incremental_updates_are_idempotent():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        g = _graph(tmpdir)
+        for _ in range(2):  # 二重実行しても同じ
+            for p in PREDICTIONS:
+                g.update_from_prediction(p["id"], p["tags"])
+            g.resolve_edge("P1", PREDICTIONS[0]["tags"], "HIT", 0.09)
+            g.resolve_edge("P2", PREDICTIONS[1]["tags"], "MISS", 0.49)
+
+        cooc = {c["tag"]: c for c in g.get_cooccurrence("対立の螺旋")}
+        assert cooc["地政学"]["count"] == 2 and cooc["地政学"]["resolved"] == 1
+        assert cooc["地政学"]["hit_rate"] == 1.0
+        assert g.get_tag_stats("対立の螺旋") == {
+            "tag": "対立の螺旋", "total_predictions": 3, "resolved": 2, "hit_rate": 0.5, "avg_brier": 0.29}
+
+        # 結果の訂正は差分だけ反映される
+        g.resolve_edge("P1", PREDICTIONS[0]["tags"], "MISS", 0.81)
+        assert g.get_tag_stats("同盟の亀裂")["hit_rate"] == 0.0
+        # タグの付け替えで古いエッジは消える
+        g.update_from_prediction("P3", ["地政学"])
+        assert g.get_cooccurrence("地政学")[0] == {
+            "tag": "対立の螺旋", "count": 1, "resolved": 1, "hit_rate": 0.0, "avg_brier": 0.81}
+
+        reloaded = _graph(tmpdir)
+        assert reloaded.get_cooccurrence("地政学") == g.get_cooccurrence("地政学")
+
+
+def test_rebuild_matches_incremental_and_limits_neighbors():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        incremental = _graph(tmpdir)
+        for p in PREDICTIONS:
+            incremental.update_from_prediction(p["id"], p["tags"])
+            if p["result"]:
+                incremental.resolve_edge(p["id"], p["tags"], p["result"], p["brier_score"])
+        rebuilt = KnowledgeGraph(str(Path(tmpdir) / "rebuilt.json"))
+        assert rebuilt.rebuild_from_predictions(PREDICTIONS) == {"predictions": 3, "nodes": 5, "edges": 6}
+        for tag in incremental.get_all_tags():
+            assert rebuilt.get_tag_stats(tag) == incremental.get_tag_stats(tag)
+            assert rebuilt.get_cooccurrence(tag) == incremental.get_cooccurrence(tag)
+        assert [c["tag"] for c in rebuilt.get_cooccurrence("対立の螺旋", limit=1)] == ["地政学"]
+        assert rebuilt.get_cooccurrence("unknown") == []
+
+
+def test_legacy_file_is_loaded_without_prediction_lists():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        legacy = {
+            "nodes": {t: {"count": 1, "hit": 0, "resolved": 0, "brier_sum": 0.0, "predictions": ["P9"]}
+                      for t in ("A", "B")},
+            "edges": {"A::B": {"tags": ["A", "B"], "count": 1, "hit": 0, "resolved": 0,
+                               "brier_sum": 0.0, "predictions": ["P9"]}},
+        }
+        path = Path(tmpdir) / "knowledge_graph.json"
+        path.write_text(json.dumps(legacy), encoding="utf-8")
+        g = KnowledgeGraph(str(path))
+        g.update_from_prediction("P9", ["A", "B"])  # 既知の予測 → 何も変わらない
+        assert g.get_cooccurrence("B")[0]["count"] == 1
+        g.resolve_edge("P9", ["A", "B"], "HIT", 0.04)
+        saved = json.loads(path.read_text(encoding="utf-8"))
+        assert saved["version"] == 2 and "predictions" not in saved["nodes"]["A"]
+        assert saved["edges"]["A::B"]["hit"] == 1
+
+
+def run():
+    test_incremental_updates_are_idempotent()
+    test_rebuild_matches_incremental_and_limits_neighbors()
+    test_legacy_file_is_loaded_without_prediction_lists()
+    print("PASS: knowledge graph checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+tests/test_knowledge_store.py
+KnowledgeStore (SQLite + FTS5) — 検索順位・インデックス・バッチ書き込み・旧JSON移行
+
+実行方法:
+    python tests/test_knowledge_store.py
+    python -m pytest tests/test_knowledge_store.py -v
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from knowledge_engine.knowledge_store import KnowledgeStore, USED_FLUSH_EVERY
+
+
+def _store(tmpdir: str) -> KnowledgeStore:
+    return KnowledgeStore(str(Path(tmpdir) / "knowledge_store.db"))
+
+
+def test_search_filters_and_priority_order():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ks = _store(tmpdir)
+        qe = ks.add("FRBは量的緩和を3回実施した（QE1/QE2/QE3）。", "UNSHAKEABLE", "FED", ["経済・金融", "FRB"], 0.99)
+        rep = ks.add("FRB may resume Quantitative Easing in 2026.", "REPORTED", "news", ["経済・金融"], 0.6)
+        geo = ks.add("対立の螺旋が発動すると紛争が激化する。", "UNSHAKEABLE", "db", ["地政学・安全保障"], 0.85)
+        assert ks.add("BTCは$200,000になるはず", "WISHFUL", "x") is None
+
+        assert [e.id for e in ks.search()] == [qe.id, geo.id, rep.id]
+        assert [e.id for e in ks.search(tags=["経済・金融"])] == [qe.id, rep.id]
+        assert [e.id for e in ks.search(tags=["経済・金融"], trusted_only=True)] == [qe.id]
+        assert [e.id for e in ks.search(fact_type="REPORTED")] == [rep.id]
+        assert [e.id for e in ks.search(query="量的緩和")] == [qe.id]          # FTS trigram (CJK substring)
+        assert [e.id for e in ks.search(query="quantitative easing")] == [rep.id]  # case-insensitive
+        assert [e.id for e in ks.search(query="FR")] == [qe.id, rep.id]        # short query -> instr
+        assert [e.id for e in ks.search(limit=1)] == [qe.id]
+        ks.close()
+
+
+def test_mark_used_is_batched_and_visible_to_reads():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ks = _store(tmpdir)
+        a = ks.add("A fact", "SURFACE", "s")
+        b = ks.add("B fact", "SURFACE", "s")
+        for _ in range(3):
+            ks.mark_used(b.id)
+        assert ks._pending_used == {b.id: 3}  # not written yet
+        assert [e.id for e in ks.search()] == [b.id, a.id]  # reads flush first
+        assert ks.get(b.id).used_count == 3
+        for _ in range(USED_FLUSH_EVERY):
+            ks.mark_used(a.id)
+        assert ks._pending_used == {}
+        assert ks.verify(a.id) and not ks.verify("KE-missing")
+        ks.close()
+
+        reopened = _store(tmpdir)
+        assert reopened.get(a.id).used_count == USED_FLUSH_EVERY and reopened.get(a.id).verified
+        assert reopened.stats()["most_used"][0].id == a.id
+        reopened.close()
+
+
+def test_batch_and_legacy_json_migration():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        legacy = {
+            "KE-20260101000000-0001": {
+                "id": "KE-20260101000000-0001", "content": "旧ストアの事実", "fact_type": "UNSHAKEABLE",
+                "source": "legacy", "tags": ["歴史"], "confidence": 0.9,
+                "created_at": "2026-01-01T00:00:00+00:00", "used_count": 4, "verified": True,
+            }
+        }
+        (Path(tmpdir) / "knowledge_store.json").write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+        ks = KnowledgeStore(str(Path(tmpdir) / "knowledge_store.json"))
+        assert ks.db_path.endswith("knowledge_store.db")
+        assert ks.search(tags=["歴史"])[0].used_count == 4
+
+        with ks.batch():
+            ids = [ks.add(f"batched fact {i}", "REPORTED", "loop").id for i in range(5)]
+        assert len(set(ids)) == 5
+        try:
+            with ks.batch():
+                ks.add("rolled back", "REPORTED", "loop")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        stats = ks.stats()
+        assert stats["total_entries"] == 6 and stats["verified_count"] == 1
+        assert ks.search(query="rolled back") == []
+        ks.close()
+
+
+def test_concurrent_writers_and_failed_batches_never_reuse_ids():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        first, second = _store(tmpdir), _store(tmpdir)
+        try:
+            with first.batch():
+                first.add("rolled back", "REPORTED", "loop")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        ids = []
+        for i in range(20):  # 同じ秒に2つの writer が交互に add しても衝突しない
+            ids.append(first.add(f"writer-1 fact {i}", "REPORTED", "loop").id)
+            ids.append(second.add(f"writer-2 fact {i}", "REPORTED", "loop").id)
+        assert len(set(ids)) == 40
+        assert first.stats()["total_entries"] == 40
+        first.close()
+        second.close()
+
+
+def run():
+    test_search_filters_and_priority_order()
+    test_mark_used_is_batched_and_visible_to_reads()
+    test_batch_and_legacy_json_migration()
+    test_concurrent_writers_and_failed_batches_never_reuse_ids()
+    print("PASS: knowledge store checks")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+tests/test_pipeline_metrics.py
+PipelineMetrics / MetricsStore — 追記・時間窓つき分位点・旧JSON取り込み・Prometheus 出力
+
+実行方法:
+    python tests/test_pipeline_metrics.py
+    python -m pytest tests/test_pipeline_metrics.py -v
+"""
+from __future__ import annotations
+
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from observability.pipeline_metrics import (
+    MetricsStore, PipelineMetrics, HIST_GAMMA, bucket_of, bucket_value,
+)
+
+T0 = 1_772_323_200  # 2026-03-01T00:00Z
+REL_ERR = (HIST_GAMMA - 1) / (HIST_GAMMA + 1) + 1e-9
+
+
+def _summary(pipeline: str, stages: dict, ok: bool = True) -> dict:
+    return {"pipeline": pipeline, "all_stages_ok": ok, "total_elapsed_sec": sum(stages.values()),
+            "stages": {name: {"status": "ok" if ok else "error", "elapsed_sec": sec}
+                       for name, sec in stages.items()}}
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def test_bucket_error_bound():
+    for x in (0.004, 0.5, 1.0, 3.2, 95.0, 1800.0):
+        assert abs(bucket_value(bucket_of(x)) - x) / x <= REL_ERR
+
+
+def test_windowed_percentiles_match_exact_within_bucket_error():
+    rng = random.Random(7)
+    store = MetricsStore(":memory:")
+    old = [rng.uniform(50, 60) for _ in range(50)]
+    new = [rng.lognormvariate(1.0, 0.6) for _ in range(400)]
+    for i, sec in enumerate(old):
+        store.append_run(_summary("article_pipeline", {"generate_jp": sec}), ts=T0 + i * 60)
+    for i, sec in enumerate(new):
+        store.append_run(_summary("article_pipeline", {"generate_jp": sec}), ts=T0 + 10 * 86400 + i * 60)
+
+    recent = store.stage_percentiles("article_pipeline", "generate_jp", since=T0 + 10 * 86400)
+    for key, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        assert abs(recent[key] - _exact(new, q)) / _exact(new, q) <= REL_ERR + 0.001
+    everything = store.stage_percentiles("article_pipeline", "generate_jp", (0.99,))
+    assert everything["p99"] > 49  # 古い遅い実行が窓に入ると p99 が上がる
+    assert store.stage_percentiles("article_pipeline", "missing") == {}
+
+    # 90日ローテーション: 古い実行は追記時に消える
+    store.append_run(_summary("article_pipeline", {"generate_jp": 1.0}), ts=T0 + 95 * 86400)
+    assert store.stage_percentiles("article_pipeline", "generate_jp", (0.99,))["p99"] < 49
+
+
+def test_flush_and_legacy_json_import():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        legacy = Path(tmpdir) / "daily_metrics.json"
+        legacy.write_text(json.dumps({"2026-03-01": {"article_pipeline": [
+            {**_summary("article_pipeline", {"count_check": 0.2}), "ended_at": "2026-03-01T01:00:00+00:00"}]}}),
+            encoding="utf-8")
+        db = str(Path(tmpdir) / "pipeline_metrics.db")
+        store = MetricsStore(db, legacy_json_path=str(legacy))
+        assert store.latest_run("article_pipeline", day="2026-03-01")["stages"]["count_check"]["elapsed_sec"] == 0.2
+        store.close()
+
+        m = PipelineMetrics("article_pipeline", db_path=db)
+        with m.stage("count_check"):
+            m.record(jp_current=3)
+        try:
+            with m.stage("generate_jp"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        flushed = m.flush()
+        assert PipelineMetrics.get_today_summary("article_pipeline", db_path=db)["started_at"] == flushed["started_at"]
+        assert PipelineMetrics.get_stage_p95("article_pipeline", "count_check", db_path=db) is not None
+        assert PipelineMetrics.get_stage_p95("nope", "count_check", db_path=db) is None
+
+
+def test_prometheus_text():
+    store = MetricsStore(":memory:")
+    store.append_run(_summary("article_pipeline", {"generate_jp": 2.0}), ts=T0)
+    store.append_run(_summary("article_pipeline", {"generate_jp": 4.0}, ok=False), ts=T0 + 60)
+    store.append_run(_summary('we"ird', {"s": 1.0}), ts=T0)
+    text = store.prometheus_text(now=T0 + 120)
+    # 窓付きの値は減りうるので summary/counter ではなく gauge
+    assert " summary" not in text and " counter" not in text
+    assert '# TYPE nowpattern_pipeline_stage_window_seconds gauge' in text
+    assert 'nowpattern_pipeline_stage_window_runs{pipeline="article_pipeline",stage="generate_jp"} 2' in text
+    assert 'nowpattern_pipeline_stage_window_seconds_spent{pipeline="article_pipeline",stage="generate_jp"} 6.0' in text
+    assert 'nowpattern_pipeline_stage_window_seconds{pipeline="article_pipeline",stage="generate_jp",quantile="0.5"}' in text
+    assert 'nowpattern_pipeline_stage_errors{pipeline="article_pipeline",stage="generate_jp"} 1' in text
+    assert 'nowpattern_pipeline_runs_ok{pipeline="article_pipeline"} 1' in text
+    assert 'pipeline="we\\"ird"' in text
+    assert text.endswith("\n")
+
+
+def run():
+    test_bucket_error_bound()
+    test_windowed_percentiles_match_exact_within_bucket_error()
+    test_flush_and_legacy_json_import()
+    test_prometheus_text()
+    print("PASS: pipeline metrics checks")
+
+
+if __name__ == "__main__":
+    run()
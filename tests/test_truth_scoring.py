@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+tests/test_truth_scoring.py
+truth_engine 一括採点 — ベクトル化した集計が従来のループ実装・素朴な定義と一致すること
+
+実行方法:
+    python tests/test_truth_scoring.py
+    python -m pytest tests/test_truth_scoring.py -v
+"""
+from __future__ import annotations
+
+import math
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import truth_engine.brier_score as bs
+import truth_engine.track_record as trm
+from truth_engine.brier_score import BrierScoreEngine, Prediction, ScoreArrays, score_batch
+from truth_engine.track_record import TrackRecord
+
+TAGS = ["地政学", "経済", "暗号資産", "テクノロジー"]
+
+
+def _predictions(n: int = 300, seed: int = 3):
+    rng = random.Random(seed)
+    preds = []
+    for i in range(n):
+        p = rng.choice([0.0, 0.05, 0.29, 0.5, 0.57, 0.7, 0.85, 1.0, rng.random()])
+        outcome = None if i % 17 == 0 else int(rng.random() < p)
+        preds.append(Prediction(f"P{i}", p, outcome, tags=rng.sample(TAGS, rng.randint(0, 2))))
+    return preds
+
+
+def _legacy(engine: BrierScoreEngine, method: str, preds):
+    saved = bs.HAS_NUMPY
+    bs.HAS_NUMPY = False
+    try:
+        return getattr(engine, method)(preds)
+    finally:
+        bs.HAS_NUMPY = saved
+
+
+def test_vectorized_batch_and_calibration_match_loops():
+    if not bs.HAS_NUMPY:  # NumPy なし環境は従来ループのみ
+        return
+    engine = BrierScoreEngine()
+    preds = _predictions()
+    assert engine.calculate_batch(preds) == _legacy(engine, "calculate_batch", preds)
+    assert engine.evaluate_calibration(preds) == _legacy(engine, "evaluate_calibration", preds)
+
+
+def test_scorecard_metrics_follow_definitions():
+    if not bs.HAS_NUMPY:  # NumPy なし環境は従来ループのみ
+        return
+    preds = [p for p in _predictions() if p.actual_outcome is not None]
+    card = score_batch(ScoreArrays.from_predictions(preds), n_boot=300, seed=1)
+    ps = [p.predicted_probability for p in preds]
+    os_ = [p.actual_outcome for p in preds]
+    n = len(preds)
+    brier = sum((p - o) ** 2 for p, o in zip(ps, os_)) / n
+    clip = lambda x: min(max(x, bs.LOG_SCORE_EPS), 1 - bs.LOG_SCORE_EPS)
+    log_score = sum(math.log(clip(p)) if o else math.log(1 - clip(p)) for p, o in zip(ps, os_)) / n
+    assert card["brier"] == round(brier, 4) and card["log_score"] == round(log_score, 4)
+
+    # Murphy: 素朴な定義で再計算（ビンは校正ビンと同じ 10% 刻み）
+    bins = {}
+    for p, o in zip(ps, os_):
+        bins.setdefault(min(int(p * 100 // 10), 9), []).append((p, o))
+    base = sum(os_) / n
+    rel = sum(len(v) * (sum(p for p, _ in v) / len(v) - sum(o for _, o in v) / len(v)) ** 2 for v in bins.values()) / n
+    res = sum(len(v) * (sum(o for _, o in v) / len(v) - base) ** 2 for v in bins.values()) / n
+    assert card["murphy"] == {"reliability": round(rel, 4), "resolution": round(res, 4),
+                              "uncertainty": round(base * (1 - base), 4)}
+
+    lo, hi = card["ci"]["brier"]
+    assert lo <= card["brier"] <= hi and hi - lo < 0.1
+    assert card["ci"] == score_batch(ScoreArrays.from_predictions(preds), n_boot=300, seed=1)["ci"]
+    assert sum(d["count"] for d in card["calibration"].values()) == n
+    assert list(card["by_tag"]) == sorted(card["by_tag"], key=lambda t: card["by_tag"][t]["mean_brier"])
+
+
+def test_track_record_accuracy_over_time_matches_loop_and_caches():
+    if not bs.HAS_NUMPY:  # NumPy なし環境は従来ループのみ
+        return
+    db = [
+        {"id": "a", "resolved": True, "result": "HIT", "our_pick_prob": 70, "tags": ["経済"], "resolution_date": "2026-01-20"},
+        {"id": "b", "resolved": True, "result": "MISS", "our_pick_prob": 60, "tags": ["経済"], "resolution_date": "2026-01-31"},
+        {"id": "c", "resolved": True, "result": "VOID", "created_at": "2026-02-02T00:00:00Z"},
+        {"id": "d", "resolved": True, "result": "HIT", "our_pick_prob": "85", "resolution_date": "2026-02-10"},
+        {"id": "e", "resolved": False, "our_pick_prob": 50, "created_at": "2026-02-11"},
+        {"id": "f", "resolved": True, "result": "HIT"},
+    ]
+    tr = TrackRecord(db)
+    saved = trm.HAS_NUMPY
+    trm.HAS_NUMPY = False
+    try:
+        legacy = tr.accuracy_over_time()
+    finally:
+        trm.HAS_NUMPY = saved
+    assert tr.accuracy_over_time() == legacy
+    assert legacy == [{"month": "2026-01", "hit_rate": 0.5, "hits": 1, "total": 2},
+                      {"month": "2026-02", "hit_rate": 0.5, "hits": 1, "total": 2}]
+    card = tr.scorecard(n_boot=0)
+    assert card["count"] == 3 and card["brier"] == round((0.09 + 0.36 + 0.0225) / 3, 4)
+    assert card["by_month"][1]["mean_brier"] == 0.0225
+    assert tr.scorecard(n_boot=0) is card
+
+
+def run():
+    test_vectorized_batch_and_calibration_match_loops()
+    test_scorecard_metrics_follow_definitions()
+    test_track_record_accuracy_over_time_matches_loop_and_caches()
+    print("PASS: truth scoring checks")
+
+
+if __name__ == "__main__":
+    run()
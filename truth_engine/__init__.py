@@ -1,7 +1,8 @@
 """truth_engine — AI Civilization OS の Truth Layer"""
 from truth_engine.truth_engine import TruthEngine
-from truth_engine.brier_score import BrierScoreEngine, Prediction
+from truth_engine.brier_score import BrierScoreEngine, Prediction, ScoreArrays, score_batch
 from truth_engine.track_record import TrackRecord
 from truth_engine.evidence_registry import EvidenceRegistry, Evidence
 
-__all__ = ["TruthEngine", "BrierScoreEngine", "Prediction", "TrackRecord", "EvidenceRegistry", "Evidence"]
+__all__ = ["TruthEngine", "BrierScoreEngine", "Prediction", "ScoreArrays", "score_batch",
+           "TrackRecord", "EvidenceRegistry", "Evidence"]
@@ -6,13 +6,32 @@ Brier Score = (1/N) * Σ (predicted_probability - actual_outcome)^2
 - 0.0  = 完璧な予測
 - 0.25 = ランダム予測（無価値な基準線）
 - 1.0  = 最悪の予測（完全に逆）
+
+一括採点 (NumPy):
+  ScoreArrays   — 解決済み予測を確率 / 結果 / 月 / タグの配列に1回だけ変換したもの
+  score_batch() — Brier・対数スコア・Murphy 分解（reliability/resolution/uncertainty）・
+                  校正ビン・タグ別・月別・ブートストラップ信頼区間をベクトル演算でまとめて計算
+  トラッカーページ / リーダーボード / 読者 API は同じ ScoreArrays から数字を取る。
+  NumPy が無い環境では BrierScoreEngine は従来のループ実装で動く。
 """
 
 import sys
 import math
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Sequence, Tuple
 from dataclasses import dataclass, field
 
+HAS_NUMPY = False
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+
+CALIBRATION_BUCKETS = [f"{lo}-{lo + 10}" for lo in range(0, 100, 10)]
+LOG_SCORE_EPS = 1e-6        # log(0) を避けるためのクリップ幅
+BOOTSTRAP_SAMPLES = 1000
+BOOTSTRAP_CHUNK = 200       # 1回に作るリサンプル数（メモリ上限用）
+
 
 @dataclass
 class Prediction:
@@ -48,6 +67,226 @@ class BrierResult:
             return "POOR"          # ランダム以下
 
 
+@dataclass
+class ScoreArrays:
+    """
+    解決済み予測の列指向ビュー（NumPy 配列）
+
+    prob / outcome は採点できない行では NaN（月別の件数には数える）。
+    タグは (tag_rows[i], tag_cols[i]) = (行番号, タグ番号) の疎行列で持つ。
+    """
+    ids: List[str]
+    prob: Any                      # float64[N]  予測確率 0.0〜1.0
+    outcome: Any                   # float64[N]  1=的中, 0=外れ, NaN=不明
+    months: List[str]              # "YYYY-MM"（不明は ""）
+    tag_names: List[str]           # 初出順
+    tag_rows: Any                  # int64[M]
+    tag_cols: Any                  # int64[M]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, rows: Sequence[Tuple[str, Optional[float], Optional[float], str, Sequence[str]]]) -> "ScoreArrays":
+        """rows: (id, prob, outcome, month, tags)"""
+        if not HAS_NUMPY:
+            raise ImportError("ScoreArrays requires numpy")
+        tag_index: Dict[str, int] = {}
+        tag_rows: List[int] = []
+        tag_cols: List[int] = []
+        for i, (_, _, _, _, tags) in enumerate(rows):
+            for tag in dict.fromkeys(tags or []):
+                tag_rows.append(i)
+                tag_cols.append(tag_index.setdefault(tag, len(tag_index)))
+        nan = float("nan")
+        return cls(
+            ids=[r[0] for r in rows],
+            prob=np.array([nan if r[1] is None else r[1] for r in rows], dtype=np.float64),
+            outcome=np.array([nan if r[2] is None else r[2] for r in rows], dtype=np.float64),
+            months=[r[3] or "" for r in rows],
+            tag_names=list(tag_index),
+            tag_rows=np.array(tag_rows, dtype=np.int64),
+            tag_cols=np.array(tag_cols, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_predictions(cls, predictions: List["Prediction"]) -> "ScoreArrays":
+        """Prediction dataclass のうち解決済みのものだけ"""
+        return cls.build([(p.prediction_id, p.predicted_probability, p.actual_outcome, "", p.tags)
+                          for p in predictions if p.actual_outcome is not None])
+
+    @classmethod
+    def from_prediction_db(cls, entries: List[Dict]) -> "ScoreArrays":
+        """prediction_db.json の resolved エントリー（our_pick_prob は 0-100, result は HIT/MISS）"""
+        rows = []
+        for p in entries:
+            if not p.get("resolved"):
+                continue
+            prob = p.get("our_pick_prob")
+            try:
+                prob = float(prob)
+                prob = prob / 100 if prob > 1 else prob
+            except (TypeError, ValueError):
+                prob = None
+            result = p.get("result")
+            outcome = 1.0 if result == "HIT" else 0.0 if result == "MISS" else None
+            month = (p.get("resolution_date") or p.get("created_at") or "")[:7]
+            rows.append((p.get("id") or p.get("prediction_id") or "", prob, outcome, month, p.get("tags") or []))
+        return cls.build(rows)
+
+
+def _bin_index(prob):
+    """確率 → 10% 刻みの校正ビン番号（100% は最後のビン、範囲外は -1）"""
+    pct = prob * 100
+    idx = np.floor_divide(pct, 10)
+    idx = np.where(pct == 100, 9, idx)
+    return np.where((pct >= 0) & (pct <= 100), idx, -1).astype(np.int64)
+
+
+def _log_scores(p, o):
+    q = np.clip(p, LOG_SCORE_EPS, 1 - LOG_SCORE_EPS)
+    return o * np.log(q) + (1 - o) * np.log(1 - q)
+
+
+def calibration_bins(p, o) -> Dict[str, Dict]:
+    """evaluate_calibration() と同じ 10 ビンをベクトル演算で集計（空ビンは省く）"""
+    idx = _bin_index(p)
+    keep = idx >= 0
+    counts = np.bincount(idx[keep], minlength=10)
+    hits = np.bincount(idx[keep], weights=o[keep], minlength=10)
+    forecast = np.bincount(idx[keep], weights=p[keep], minlength=10)
+    result = {}
+    for k in np.flatnonzero(counts):
+        expected = (k * 10 + 5) / 100
+        actual = hits[k] / counts[k]
+        result[CALIBRATION_BUCKETS[k]] = {
+            "expected_probability": expected,
+            "actual_hit_rate": round(float(actual), 4),
+            "calibration_error": round(abs(expected - float(actual)), 4),
+            "count": int(counts[k]),
+            "mean_forecast": round(float(forecast[k] / counts[k]), 4),
+        }
+    return result
+
+
+def murphy_decomposition(p, o) -> Dict[str, float]:
+    """
+    Brier = reliability - resolution + uncertainty（校正ビン内の予測が同一とみなした Murphy 分解）
+    reliability は小さいほど良い（校正）、resolution は大きいほど良い（識別力）。
+    """
+    n = len(p)
+    idx = np.clip(_bin_index(p), 0, 9)
+    counts = np.bincount(idx, minlength=10)
+    nz = counts > 0
+    f_k = np.bincount(idx, weights=p, minlength=10)[nz] / counts[nz]
+    o_k = np.bincount(idx, weights=o, minlength=10)[nz] / counts[nz]
+    base = o.mean()
+    return {
+        "reliability": round(float(np.sum(counts[nz] * (f_k - o_k) ** 2) / n), 4),
+        "resolution": round(float(np.sum(counts[nz] * (o_k - base) ** 2) / n), 4),
+        "uncertainty": round(float(base * (1 - base)), 4),
+    }
+
+
+def bootstrap_ci(p, o, n_boot: int = BOOTSTRAP_SAMPLES, ci: float = 0.95,
+                 seed: int = 0) -> Dict[str, List[float]]:
+    """Brier / 対数スコア / 的中率のブートストラップ信頼区間（リサンプルは行列で一括計算）"""
+    n = len(p)
+    sq = (p - o) ** 2
+    logs = _log_scores(p, o)
+    rng = np.random.default_rng(seed)
+    samples = {"brier": [], "log_score": [], "hit_rate": []}
+    done = 0
+    while done < n_boot:
+        size = min(BOOTSTRAP_CHUNK, n_boot - done)
+        idx = rng.integers(0, n, size=(size, n))
+        samples["brier"].append(sq[idx].mean(axis=1))
+        samples["log_score"].append(logs[idx].mean(axis=1))
+        samples["hit_rate"].append(o[idx].mean(axis=1))
+        done += size
+    tail = (1 - ci) / 2 * 100
+    return {key: [round(float(v), 4) for v in np.percentile(np.concatenate(vals), [tail, 100 - tail])]
+            for key, vals in samples.items()}
+
+
+def score_batch(arrays: ScoreArrays, n_boot: int = BOOTSTRAP_SAMPLES, ci: float = 0.95,
+                seed: int = 0) -> Dict:
+    """
+    一括採点: Brier・対数スコア・Murphy 分解・校正ビン・タグ別・月別・信頼区間
+
+    n_boot=0 なら信頼区間を省略する。
+    """
+    scorable = np.isfinite(arrays.prob) & np.isfinite(arrays.outcome)
+    p = arrays.prob[scorable]
+    o = arrays.outcome[scorable]
+    n = int(scorable.sum())
+    report: Dict[str, Any] = {"count": n, "by_month": monthly_breakdown(arrays)}
+    if n == 0:
+        report.update({"brier": None, "log_score": None, "hit_rate": None, "murphy": None,
+                       "calibration": {}, "by_tag": {}, "ci": None})
+        return report
+
+    sq = (p - o) ** 2
+    report.update({
+        "brier": round(float(sq.mean()), 4),
+        "log_score": round(float(_log_scores(p, o).mean()), 4),
+        "hit_rate": round(float(o.mean()), 4),
+        "murphy": murphy_decomposition(p, o),
+        "calibration": calibration_bins(p, o),
+        "by_tag": tag_breakdown(arrays, scorable),
+        "ci": bootstrap_ci(p, o, n_boot, ci, seed) if n_boot else None,
+    })
+    return report
+
+
+def tag_breakdown(arrays: ScoreArrays, scorable=None) -> Dict[str, Dict]:
+    """タグ別 Brier / 的中率（平均 Brier 昇順、同点は初出順）"""
+    if not len(arrays.tag_rows):
+        return {}
+    if scorable is None:
+        scorable = np.isfinite(arrays.prob) & np.isfinite(arrays.outcome)
+    keep = scorable[arrays.tag_rows]
+    rows, cols = arrays.tag_rows[keep], arrays.tag_cols[keep]
+    sq = (arrays.prob - arrays.outcome) ** 2
+    n_tags = len(arrays.tag_names)
+    counts = np.bincount(cols, minlength=n_tags)
+    brier_sum = np.bincount(cols, weights=sq[rows], minlength=n_tags)
+    hit_sum = np.bincount(cols, weights=arrays.outcome[rows], minlength=n_tags)
+    breakdown = {}
+    for t in np.flatnonzero(counts):
+        breakdown[arrays.tag_names[t]] = {
+            "mean_brier": round(float(brier_sum[t] / counts[t]), 4),
+            "count": int(counts[t]),
+            "hit_rate": round(float(hit_sum[t] / counts[t]), 4),
+        }
+    return dict(sorted(breakdown.items(), key=lambda x: x[1]["mean_brier"]))
+
+
+def monthly_breakdown(arrays: ScoreArrays) -> List[Dict]:
+    """月別の的中率・Brier（解決済み全件を数え、採点できる行だけで Brier を出す）"""
+    if not len(arrays):
+        return []
+    months = np.array(arrays.months)
+    has_month = months != ""
+    labels, inverse = np.unique(months[has_month], return_inverse=True)
+    prob, outcome = arrays.prob[has_month], arrays.outcome[has_month]
+    total = np.bincount(inverse, minlength=len(labels))
+    hits = np.bincount(inverse, weights=(outcome == 1), minlength=len(labels))
+    scorable = np.isfinite(prob) & np.isfinite(outcome)
+    scored = np.bincount(inverse, weights=scorable, minlength=len(labels))
+    brier_sum = np.bincount(inverse, weights=np.where(scorable, (prob - outcome) ** 2, 0.0), minlength=len(labels))
+    result = []
+    for k, month in enumerate(labels):
+        result.append({
+            "month": str(month),
+            "hit_rate": round(float(hits[k] / total[k]), 4) if total[k] else 0,
+            "hits": int(hits[k]),
+            "total": int(total[k]),
+            "mean_brier": round(float(brier_sum[k] / scored[k]), 4) if scored[k] else None,
+        })
+    return result
+
+
 class BrierScoreEngine:
     """
     Brier Score 計算エンジン
@@ -102,21 +341,28 @@ class BrierScoreEngine:
                 "message": "解決済み予測がありません",
             }
 
-        scores = []
-        hits = 0
+        if HAS_NUMPY:
+            arrays = ScoreArrays.from_predictions(resolved)
+            mean_score = float(((arrays.prob - arrays.outcome) ** 2).mean())
+            hit_rate = float((arrays.outcome == 1).mean())
+            breakdown = {tag: {"mean_brier": d["mean_brier"], "count": d["count"]}
+                         for tag, d in tag_breakdown(arrays).items()}
+        else:
+            scores = []
+            hits = 0
 
-        for pred in resolved:
-            result = self.calculate_single(pred)
-            if result:
-                scores.append(result.score)
-                if pred.actual_outcome == 1:
-                    hits += 1
+            for pred in resolved:
+                result = self.calculate_single(pred)
+                if result:
+                    scores.append(result.score)
+                    if pred.actual_outcome == 1:
+                        hits += 1
 
-        mean_score = sum(scores) / len(scores)
-        hit_rate = hits / len(resolved)
+            mean_score = sum(scores) / len(scores)
+            hit_rate = hits / len(resolved)
 
-        # タグ別ブレークダウン
-        breakdown = self._breakdown_by_tag(resolved)
+            # タグ別ブレークダウン
+            breakdown = self._breakdown_by_tag(resolved)
 
         # 総合グレード
         dummy_result = BrierResult(
@@ -163,6 +409,11 @@ class BrierScoreEngine:
         """
         校正曲線分析: 「70%と言った予測が実際に70%当たるか」を検証する
         """
+        if HAS_NUMPY:
+            arrays = ScoreArrays.from_predictions(predictions)
+            return {bucket: {k: v for k, v in d.items() if k != "mean_forecast"}
+                    for bucket, d in calibration_bins(arrays.prob, arrays.outcome).items()}
+
         buckets = {
             "0-10": [], "10-20": [], "20-30": [], "30-40": [], "40-50": [],
             "50-60": [], "60-70": [], "70-80": [], "80-90": [], "90-100": [],
@@ -193,6 +444,11 @@ class BrierScoreEngine:
 
         return calibration
 
+    def scorecard(self, predictions: List[Prediction], n_boot: int = BOOTSTRAP_SAMPLES,
+                  seed: int = 0) -> Dict:
+        """score_batch() の結果（Brier / 対数スコア / Murphy 分解 / 校正 / タグ別 / 信頼区間）"""
+        return score_batch(ScoreArrays.from_predictions(predictions), n_boot=n_boot, seed=seed)
+
 
 # ─────────────────────────────
 # CLI 実行サポート
@@ -12,6 +12,11 @@ import os
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
 
+try:
+    from truth_engine.brier_score import HAS_NUMPY, ScoreArrays, score_batch, monthly_breakdown
+except ImportError:  # python truth_engine/track_record.py として直接実行した場合
+    from brier_score import HAS_NUMPY, ScoreArrays, score_batch, monthly_breakdown
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 
@@ -49,6 +54,23 @@ class TrackRecord:
 
     def __init__(self, predictions: Optional[List[Dict]] = None):
         self.predictions = predictions or load_prediction_db()
+        self._arrays: Optional[ScoreArrays] = None
+        self._scorecards: Dict[int, Dict] = {}
+
+    def score_arrays(self) -> ScoreArrays:
+        """解決済み予測の NumPy 配列（初回だけ作り、以降はキャッシュ）"""
+        if self._arrays is None:
+            self._arrays = ScoreArrays.from_prediction_db(self.predictions)
+        return self._arrays
+
+    def scorecard(self, n_boot: int = 1000) -> Dict:
+        """
+        トラッカーページ / リーダーボード / 読者 API 共通の採点結果
+        （Brier・対数スコア・Murphy 分解・校正ビン・タグ別・月別・信頼区間。キャッシュ付き）
+        """
+        if n_boot not in self._scorecards:
+            self._scorecards[n_boot] = score_batch(self.score_arrays(), n_boot=n_boot)
+        return self._scorecards[n_boot]
 
     def summary(self) -> Dict:
         """トラックレコードのサマリー"""
@@ -123,6 +145,10 @@ class TrackRecord:
         時系列の精度推移
         月別の的中率を返す — 予測プラットフォームの成長を可視化する
         """
+        if HAS_NUMPY:
+            return [{k: row[k] for k in ("month", "hit_rate", "hits", "total")}
+                    for row in monthly_breakdown(self.score_arrays())]
+
         monthly: Dict[str, Dict] = {}
 
         for pred in self.predictions: